@@ -0,0 +1,267 @@
+"""
+Clinic analytics: doctor utilisation, cancel / no-show rates and the
+busiest hours of the week over a date range
+(GET /api/analytics/appointments?from=&to=).
+
+Each calendar month is aggregated into a count "cube" keyed by one
+packed integer
+
+    key = (doctor_id * 4 + outcome) * 168 + hour_of_week
+
+with outcome 0 completed, 1 canceled, 2 no-show (still "scheduled" but
+already in the past; there is no separate status for it), 3 upcoming,
+and hour_of_week counted from Monday 00:00. SQLite computes the key
+and the counts in a single GROUP BY over the covering index
+idx_appointments_start_doctor_status (start_min, doctor_id, status), so
+no appointment row ever reaches Python. Grouping on one integer sorts
+noticeably faster than grouping on three columns. Totals, per-doctor
+figures and the weekly histogram are then sums over a few thousand
+cube cells, not over appointments.
+
+Cubes are cached per (database, month):
+- months that ended more than ANALYTICS_SETTLE_DAYS ago are final and
+  kept until evicted (LRU, ANALYTICS_CACHE_BUCKETS entries),
+- the current and recent months are reused for
+  ANALYTICS_OPEN_TTL_SECONDS,
+- partial months at the edges of a range are computed and not cached.
+
+Status changes to appointments in a settled month (rare: a visit marked
+completed weeks later) are not picked up until the process restarts.
+Archived appointments (archive.py) are included when a month reaches
+below the archive horizon.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+
+from .archive import ARCHIVE_ALIAS, reaches_archive
+from .db import current_archive_path, current_db_path, read_snapshot
+from .timeutil import MINUTES_PER_DAY, day_of, now_minutes, parse_day
+
+OUTCOMES = ("completed", "canceled", "no_show", "upcoming")
+HOURS_PER_WEEK = 7 * 24
+
+_CUBE_SQL = """
+    SELECT (doctor_id * 4
+            + CASE status WHEN 'completed' THEN 0
+                          WHEN 'canceled'  THEN 1
+                          ELSE 2 + (start_min >= :now) END) * 168
+           + ((start_min / 1440 + 3) % 7) * 24
+           + (start_min % 1440) / 60 AS k,
+           COUNT(*)
+      FROM {t}
+     WHERE start_min >= :lo AND start_min < :hi
+     GROUP BY k;
+"""
+
+_lock = threading.Lock()
+
+
+def month_start(minutes: int) -> int:
+    """
+    Epoch minutes of 00:00 on the first day of minutes' month.
+    """
+    return parse_day(day_of(minutes)[:8] + "01")
+
+
+def month_buckets(lo: int, hi: int):
+    """
+    Split [lo, hi) at month boundaries: (bucket_lo, bucket_hi, whole),
+    whole=True when the piece is an entire calendar month.
+    """
+    start = month_start(lo)
+    while start < hi:
+        end = month_start(start + 32 * MINUTES_PER_DAY)
+        piece_lo, piece_hi = max(lo, start), min(hi, end)
+        yield piece_lo, piece_hi, (piece_lo == start and piece_hi == end)
+        start = end
+
+
+class CubeCache:
+    """
+    Thread-safe LRU of month cubes. Entries carry an expiry (monotonic
+    time, or None for settled months).
+    """
+
+    def __init__(self, size: int = 4096):
+        self.size = size
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()       # key -> (cube, expires_at)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] is not None and entry[1] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, cube, ttl: float = None):
+        expires_at = None if ttl is None else time.monotonic() + ttl
+        with self._lock:
+            self._entries[key] = (cube, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _cache(app) -> CubeCache:
+    cache = app.extensions.get("hms_analytics")
+    if cache is None:
+        with _lock:
+            cache = app.extensions.get("hms_analytics")
+            if cache is None:
+                cache = CubeCache(app.config["ANALYTICS_CACHE_BUCKETS"])
+                app.extensions["hms_analytics"] = cache
+    return cache
+
+
+def compute_cube(conn, lo: int, hi: int, now: int, archived: bool = False) -> dict:
+    """
+    {packed key: count} for appointments starting in [lo, hi).
+    archived: also count the cold-tier copy (must be attached).
+    """
+    params = {"lo": lo, "hi": hi, "now": now}
+    cube = dict(conn.execute(_CUBE_SQL.format(t="main.appointments"), params))
+    if archived:
+        for key, n in conn.execute(
+            _CUBE_SQL.format(t=f"{ARCHIVE_ALIAS}.appointments"), params
+        ):
+            cube[key] = cube.get(key, 0) + n
+    return cube
+
+
+def range_cube(lo: int, hi: int):
+    """
+    Merged cube for [lo, hi) in the current request's database, using
+    and filling the month cache. Returns (cube, cached_months, computed).
+    """
+    app = current_app._get_current_object()
+    cache = _cache(app)
+    now = now_minutes()
+    settled = now - app.config["ANALYTICS_SETTLE_DAYS"] * MINUTES_PER_DAY
+    open_ttl = app.config["ANALYTICS_OPEN_TTL_SECONDS"]
+    db_path = current_db_path()
+    archive_path = current_archive_path()
+
+    merged, hits, misses = {}, 0, 0
+    missing = []
+    for piece_lo, piece_hi, whole in month_buckets(lo, hi):
+        cube = cache.get((db_path, piece_lo)) if whole else None
+        if cube is None:
+            missing.append((piece_lo, piece_hi, whole))
+            continue
+        hits += 1
+        _add(merged, cube)
+
+    if missing:
+        with read_snapshot(archive_path) as conn:
+            attached = archive_path and ARCHIVE_ALIAS in {
+                row[1] for row in conn.execute("PRAGMA database_list;")
+            }
+            for piece_lo, piece_hi, whole in missing:
+                archived = attached and reaches_archive(conn, "appointments", piece_lo)
+                cube = compute_cube(conn, piece_lo, piece_hi, now, archived)
+                misses += 1
+                _add(merged, cube)
+                if whole and (piece_hi <= settled or open_ttl > 0):
+                    cache.put((db_path, piece_lo), cube,
+                              None if piece_hi <= settled else open_ttl)
+    return merged, hits, misses
+
+
+def _add(into: dict, cube: dict):
+    for key, n in cube.items():
+        into[key] = into.get(key, 0) + n
+
+
+def _weekdays(lo: int, hi: int) -> int:
+    """
+    Monday-Friday days in [lo, hi) (both day-aligned).
+    """
+    first, days = lo // MINUTES_PER_DAY, (hi - lo) // MINUTES_PER_DAY
+    full, rest = divmod(days, 7)
+    weekday = (first + 3) % 7                   # 1970-01-01 was a Thursday
+    return full * 5 + sum(1 for d in range(rest) if (weekday + d) % 7 < 5)
+
+
+def _rates(counts: list) -> dict:
+    completed, canceled, no_show, upcoming = counts
+    total = completed + canceled + no_show + upcoming
+    attended_or_missed = completed + no_show
+    return {
+        "appointments": total,
+        **dict(zip(OUTCOMES, counts)),
+        "cancel_rate": round(canceled / total, 4) if total else 0.0,
+        "no_show_rate": (
+            round(no_show / attended_or_missed, 4) if attended_or_missed else 0.0
+        ),
+    }
+
+
+def summarise(cube: dict, lo: int, hi: int, doctors: dict, only_doctor: int = None) -> dict:
+    """
+    Report for the cube of [lo, hi). doctors: {id: full_name} to list
+    (doctors with no appointments get zeros). only_doctor restricts
+    every figure to that doctor.
+    """
+    per_doctor = {}
+    totals = [0, 0, 0, 0]
+    load = [0] * HOURS_PER_WEEK                 # booked (not canceled) per hour
+    for key, n in cube.items():
+        rest, how = divmod(key, HOURS_PER_WEEK)
+        doctor_id, outcome = divmod(rest, 4)
+        if only_doctor is not None and doctor_id != only_doctor:
+            continue
+        per_doctor.setdefault(doctor_id, [0, 0, 0, 0])[outcome] += n
+        totals[outcome] += n
+        if outcome != 1:
+            load[how] += n
+
+    cfg = current_app.config
+    capacity = _weekdays(lo, hi) * cfg["ANALYTICS_HOURS_PER_DAY"] * 60
+    slot = cfg["ANALYTICS_SLOT_MINUTES"]
+    ids = set(per_doctor) | set(doctors)
+    if only_doctor is not None:
+        ids &= {only_doctor}
+    rows = []
+    for doctor_id in sorted(ids):
+        counts = per_doctor.get(doctor_id, [0, 0, 0, 0])
+        booked = (counts[0] + counts[2] + counts[3]) * slot
+        rows.append({
+            "doctor_id": doctor_id,
+            "doctor_name": doctors.get(doctor_id),
+            **_rates(counts),
+            "booked_hours": round(booked / 60, 2),
+            "utilisation": round(booked / capacity, 4) if capacity else 0.0,
+        })
+
+    busiest = sorted(
+        (h for h in range(HOURS_PER_WEEK) if load[h]), key=lambda h: (-load[h], h)
+    )[:5]
+    return {
+        "totals": _rates(totals),
+        "doctors": rows,
+        # load[weekday][hour], Monday first
+        "load": [load[d * 24:(d + 1) * 24] for d in range(7)],
+        "busiest_hours": [
+            {"weekday": h // 24, "hour": h % 24, "appointments": load[h]}
+            for h in busiest
+        ],
+    }
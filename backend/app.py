@@ -1,15 +1,14 @@
-from pathlib import Path
-from flask import Flask, send_from_directory, session
+from flask import Flask, session
 from flask_cors import CORS
+from .assets import AssetManifest, send_asset
 from .config import Config, TestingConfig
-from .db import init_db
+from .db import init_db, attach_memory_database
 from .routes.auth import auth_bp
 from .routes.api import api_bp
-
-# Resolve absolute paths so this works no matter where you launch python -m backend.app
-BASE_DIR = Path(__file__).resolve().parent.parent  # points to project root (Hospital Management)
-FRONTEND_TEMPLATES = BASE_DIR / "frontend" / "templates"
-FRONTEND_STATIC = BASE_DIR / "frontend" / "static"
+from .routes.admin import admin_bp
+from .sessions import init_sessions
+from .tenancy import init_tenancy
+from .traffic import init_capture
 
 
 def create_app(testing: bool = False) -> Flask:
@@ -18,11 +17,9 @@ def create_app(testing: bool = False) -> Flask:
     If testing=True, use TestingConfig (in-memory DB).
     Otherwise use Config (file-based DB).
     """
-    app = Flask(
-        __name__,
-        static_folder=str(FRONTEND_STATIC),     # serve /static/* from frontend/static
-        static_url_path="/static"
-    )
+    # Flask's own static handler stats the file on every request, so it is
+    # disabled; /static/* is served from the in-memory asset manifest below.
+    app = Flask(__name__, static_folder=None)
 
     # Load config
     if testing:
@@ -30,6 +27,22 @@ def create_app(testing: bool = False) -> Flask:
     else:
         app.config.from_object(Config)
 
+    if app.config["DB_PATH"] == ":memory:":
+        # Shared-cache in-memory DB kept alive by an app-owned connection
+        attach_memory_database(app)
+
+    if app.config.get("TENANT_DB_DIR"):
+        # One DB file per clinic, picked per request (see tenancy.py)
+        init_tenancy(app)
+
+    if app.config["SESSION_BACKEND"] == "server":
+        # Opaque session ID in the cookie, data in SQLite (see sessions.py)
+        init_sessions(app)
+
+    if app.config["TRAFFIC_CAPTURE_PATH"]:
+        # Anonymised request shapes + timings for replay (see traffic.py)
+        init_capture(app)
+
     # CORS: allow frontend pages (same origin) to call /api with cookies
     CORS(
         app,
@@ -43,13 +56,27 @@ def create_app(testing: bool = False) -> Flask:
     # Blueprints for API routes
     app.register_blueprint(auth_bp)
     app.register_blueprint(api_bp)
+    app.register_blueprint(admin_bp)
 
     # ---- Static page routes (HTML files in frontend/templates/) ----
+    # Built once at startup from frontend/dist (python -m backend.assets build)
+    # or, if there is no build, compiled in memory from the source folders.
+    assets = AssetManifest.for_app(
+        dist_dir=app.config["ASSET_BUILD_DIR"],
+    )
+    app.extensions["hms_assets"] = assets
 
     @app.route("/")
     def root_index():
         # serve login page
-        return send_from_directory(str(FRONTEND_TEMPLATES), "index.html")
+        return send_asset(assets.page("index.html"))
+
+    @app.route("/static/<path:filename>", endpoint="static")
+    def serve_static(filename: str):
+        asset = assets.asset(filename)
+        if asset is None:
+            return ("Not found", 404)
+        return send_asset(asset)
 
     @app.route("/<path:path>")
     def serve_page(path: str):
@@ -58,18 +85,11 @@ def create_app(testing: bool = False) -> Flask:
         We FIRST try templates (actual pages).
         If the file doesn't exist there, we fall back to static (images, etc.).
         """
-        page_path = FRONTEND_TEMPLATES / path
-        if page_path.exists():
-            return send_from_directory(str(FRONTEND_TEMPLATES), path)
-
-        asset_path = FRONTEND_STATIC / path
-        if asset_path.exists():
-            # e.g. someone directly navigates to /static/js/api.js
-            # This is usually covered by app.static_folder, but keep fallback.
-            return send_from_directory(str(FRONTEND_STATIC), path)
-
-        # If we get here, it's not found
-        return ("Not found", 404)
+        asset = assets.page(path) or assets.asset(path)
+        if asset is None:
+            # If we get here, it's not found
+            return ("Not found", 404)
+        return send_asset(asset)
 
     # Harden session on every request
     @app.before_request
@@ -82,9 +102,10 @@ def create_app(testing: bool = False) -> Flask:
 if __name__ == "__main__":
     flask_app = create_app(testing=False)
 
-    # init DB + seed demo users
-    with flask_app.app_context():
-        init_db(seed_demo_users=True)
+    # init DB + seed demo users (tenant DBs are initialised on first use)
+    if "hms_tenants" not in flask_app.extensions:
+        with flask_app.app_context():
+            init_db(seed_demo_users=True)
 
     # run server
     flask_app.run(host="0.0.0.0", port=5000, debug=flask_app.config["DEBUG"])
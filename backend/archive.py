@@ -0,0 +1,262 @@
+"""
+Hot/cold tiering: move old, finished rows into an attached archive DB.
+
+    python -m backend.archive [--older-than-days 365] [--batch-size 500]
+
+Moved (older than the cutoff):
+- appointments that are completed/canceled and have no prescriptions
+  (prescriptions.appointment_id is a foreign key, and a key can't point
+  into another database)
+- notifications that are read
+- billing entries that are paid/void
+
+Rows keep their ids. Each batch is one short write transaction
+(INSERT INTO archive.t ... / DELETE FROM main.t ...), so the web app's
+writers are never blocked for long.
+
+archive_state (in the main DB) holds each table's horizon: the archive
+may contain rows older than it, never newer. Read endpoints look at the
+requested range and only UNION in archive.<table> when the range starts
+before the horizon, so normal "recent" queries never touch the archive.
+"""
+import argparse
+import sqlite3
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from .changes import set_suppressed
+from .timeutil import ISO_FORMAT, parse_slot, SLOT_FORMAT
+
+ARCHIVE_ALIAS = "archive"
+
+# table -> (columns, eligibility predicate, horizon kind)
+# The predicate's single "?" is the cutoff: epoch minutes for appointments
+# (by start_min), an ISO created_at string for the others.
+_TABLES = {
+    "appointments": (
+        ("id", "patient_id", "doctor_id", "start_time", "reason", "status",
+         "created_at", "start_min"),
+        "status IN ('completed','canceled') AND start_min < ? "
+        "AND NOT EXISTS (SELECT 1 FROM main.prescriptions p "
+        "WHERE p.appointment_id = appointments.id)",
+        "minutes",
+    ),
+    "notifications": (
+        ("id", "user_id", "message", "is_read", "created_at"),
+        "is_read = 1 AND created_at < ?",
+        "iso",
+    ),
+    "billing": (
+        ("id", "patient_id", "amount", "status", "description", "created_at"),
+        "status IN ('paid','void') AND created_at < ?",
+        "iso",
+    ),
+}
+
+# Archive copies: same columns, no foreign keys (can't span databases),
+# indexed for the same range reads as the hot tables.
+_ARCHIVE_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS {a}.appointments (
+        id INTEGER PRIMARY KEY,
+        patient_id INTEGER NOT NULL,
+        doctor_id INTEGER NOT NULL,
+        start_time TEXT NOT NULL,
+        reason TEXT DEFAULT '',
+        status TEXT NOT NULL,
+        created_at TEXT NOT NULL,
+        start_min INTEGER
+    );
+    """,
+    "CREATE INDEX IF NOT EXISTS {a}.idx_arch_appointments_doctor_start "
+    "ON appointments(doctor_id, start_min);",
+    "CREATE INDEX IF NOT EXISTS {a}.idx_arch_appointments_patient "
+    "ON appointments(patient_id);",
+    """
+    CREATE TABLE IF NOT EXISTS {a}.notifications (
+        id INTEGER PRIMARY KEY,
+        user_id INTEGER NOT NULL,
+        message TEXT NOT NULL,
+        is_read INTEGER NOT NULL,
+        created_at TEXT NOT NULL
+    );
+    """,
+    "CREATE INDEX IF NOT EXISTS {a}.idx_arch_notifications_user "
+    "ON notifications(user_id, created_at);",
+    """
+    CREATE TABLE IF NOT EXISTS {a}.billing (
+        id INTEGER PRIMARY KEY,
+        patient_id INTEGER NOT NULL,
+        amount REAL NOT NULL,
+        status TEXT NOT NULL,
+        description TEXT DEFAULT '',
+        created_at TEXT NOT NULL
+    );
+    """,
+    "CREATE INDEX IF NOT EXISTS {a}.idx_arch_billing_patient "
+    "ON billing(patient_id, created_at);",
+)
+
+
+# ---- reads -----------------------------------------------------
+
+def archive_horizon(conn, table: str):
+    """
+    Cutoff below which `table` may have archived rows, or None if the
+    table has never been archived.
+    """
+    row = conn.execute(
+        "SELECT horizon FROM archive_state WHERE table_name = ?;", (table,)
+    ).fetchone()
+    return row[0] if row else None
+
+
+def reaches_archive(conn, table: str, lower_bound=None) -> bool:
+    """
+    True if a read whose range starts at lower_bound (None = unbounded)
+    could include archived rows of `table`.
+    lower_bound is epoch minutes for appointments, ISO text otherwise.
+    """
+    horizon = archive_horizon(conn, table)
+    if horizon is None:
+        return False
+    return lower_bound is None or lower_bound < horizon
+
+
+def attach_archive(conn, archive_path: str):
+    """
+    ATTACH the archive to this connection (once; pooled readers keep it).
+    """
+    attached = {row[1] for row in conn.execute("PRAGMA database_list;")}
+    if ARCHIVE_ALIAS in attached:
+        return
+    if conn.execute("PRAGMA query_only;").fetchone()[0]:
+        target = Path(archive_path).resolve().as_uri() + "?mode=ro"
+    else:
+        target = archive_path
+    conn.execute(f"ATTACH DATABASE ? AS {ARCHIVE_ALIAS};", (target,))
+
+
+def tiered_select(conn, table: str, select_sql: str, params, order_by: str,
+                  lower_bound=None, archive_path: str = None):
+    """
+    Run select_sql (with "{t}" where the table name goes) against the hot
+    table, plus a UNION ALL over the archived copy if the range reaches
+    into it (an unbounded read does once a horizon exists). order_by must
+    use result column names. Returns a cursor.
+    """
+    params = tuple(params)
+    if (archive_path and reaches_archive(conn, table, lower_bound)
+            and Path(archive_path).exists()):
+        attach_archive(conn, archive_path)
+        sql = (
+            select_sql.format(t=f"main.{table}")
+            + " UNION ALL "
+            + select_sql.format(t=f"{ARCHIVE_ALIAS}.{table}")
+            + f" ORDER BY {order_by};"
+        )
+        return conn.execute(sql, params + params)
+    return conn.execute(select_sql.format(t=table) + f" ORDER BY {order_by};", params)
+
+
+# ---- archival job ----------------------------------------------
+
+def archive_old_rows(db_path: str, archive_path: str, older_than_days: int = 365,
+                     batch_size: int = 500, pause: float = 0.0, now: datetime = None):
+    """
+    Move eligible rows older than `older_than_days` into the archive.
+    Returns {table: rows_moved}.
+    """
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(days=older_than_days)
+    cutoffs = {
+        "minutes": parse_slot(cutoff.strftime(SLOT_FORMAT)),
+        "iso": cutoff.strftime(ISO_FORMAT),
+    }
+
+    conn = sqlite3.connect(db_path, uri=db_path.startswith("file:"), timeout=30)
+    # Appointments with prescriptions are never moved (see _TABLES); foreign
+    # keys are off anyway so a DELETE here can never cascade.
+    conn.execute("PRAGMA foreign_keys = OFF;")
+    moved = {}
+    try:
+        conn.execute(f"ATTACH DATABASE ? AS {ARCHIVE_ALIAS};", (archive_path,))
+        for stmt in _ARCHIVE_SCHEMA:
+            conn.execute(stmt.format(a=ARCHIVE_ALIAS))
+        conn.commit()
+
+        for table, (columns, predicate, kind) in _TABLES.items():
+            moved[table] = _move_table(
+                conn, table, columns, predicate, cutoffs[kind], batch_size, pause
+            )
+    finally:
+        conn.close()
+    return moved
+
+
+def _move_table(conn, table, columns, predicate, cutoff, batch_size, pause):
+    cols = ", ".join(columns)
+    total = 0
+
+    # Raise the horizon first: from now on readers whose range starts
+    # below it also look in the archive, so rows are never "missing"
+    # while they are in flight.
+    conn.execute("BEGIN IMMEDIATE;")
+    conn.execute(
+        """
+        INSERT INTO archive_state (table_name, horizon) VALUES (?, ?)
+        ON CONFLICT(table_name) DO UPDATE
+           SET horizon = MAX(horizon, excluded.horizon);
+        """,
+        (table, cutoff)
+    )
+    conn.commit()
+
+    while True:
+        conn.execute("BEGIN IMMEDIATE;")
+        ids = [r[0] for r in conn.execute(
+            f"SELECT id FROM main.{table} WHERE {predicate} ORDER BY id LIMIT ?;",
+            (cutoff, batch_size)
+        )]
+        if not ids:
+            conn.rollback()
+            return total
+        marks = ",".join("?" * len(ids))
+        conn.execute(
+            f"INSERT OR REPLACE INTO {ARCHIVE_ALIAS}.{table} ({cols}) "
+            f"SELECT {cols} FROM main.{table} WHERE id IN ({marks});",
+            ids
+        )
+        # moving to the cold tier is not a delete for CDC consumers
+        set_suppressed(conn, True)
+        conn.execute(f"DELETE FROM main.{table} WHERE id IN ({marks});", ids)
+        set_suppressed(conn, False)
+        conn.commit()
+        total += len(ids)
+        if pause:
+            time.sleep(pause)
+
+
+def main(argv=None):
+    from .config import Config
+
+    parser = argparse.ArgumentParser(description="Archive old rows")
+    parser.add_argument("--db", default=Config.DB_PATH)
+    parser.add_argument("--archive", default=Config.ARCHIVE_DB_PATH)
+    parser.add_argument("--older-than-days", type=int,
+                        default=Config.ARCHIVE_AFTER_DAYS)
+    parser.add_argument("--batch-size", type=int, default=Config.ARCHIVE_BATCH_SIZE)
+    parser.add_argument("--pause", type=float, default=0.0,
+                        help="seconds to sleep between batches")
+    args = parser.parse_args(argv)
+
+    moved = archive_old_rows(
+        args.db, args.archive, args.older_than_days, args.batch_size, args.pause
+    )
+    for table, n in moved.items():
+        print(f"{table}: {n} rows archived")
+
+
+if __name__ == "__main__":
+    main()
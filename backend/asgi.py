@@ -0,0 +1,424 @@
+"""
+Optional ASGI front end for the read endpoints.
+
+`python backend/app.py` (Flask's threaded server) spends one thread per
+open connection, so a few thousand idle keep-alive clients (dashboards
+left open, polling tablets) mean a few thousand parked threads. This
+module serves the read-heavy routes from an asyncio event loop instead.
+Idle connections cost a socket and a coroutine. Real work still runs
+in the Flask app, so validators, the access policy, sessions, audit and
+SQL are exactly the ones the WSGI server uses. The work runs on a
+bounded thread pool (ASGI_WORKERS), so SQLite never blocks the loop.
+
+Exposed (everything else is 404 here and stays on the Flask server):
+- GET  patients, patient summaries, appointments, prescriptions,
+  billing and notifications (READ_ENDPOINTS)
+- the auth routes, so clients can log in against this front end too
+
+When more than ASGI_MAX_PENDING requests are queued or running, new ones
+get 503 with Retry-After instead of an ever-growing queue.
+
+Run it with any ASGI server, e.g.
+
+    uvicorn --factory backend.asgi:create_asgi_app
+
+or, without extra packages, with the small HTTP/1.1 server below:
+
+    python -m backend.asgi --port 8001
+
+Flask (backend/app.py) stays the default and serves everything.
+"""
+import argparse
+import asyncio
+import io
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import unquote
+
+from werkzeug.exceptions import HTTPException
+
+READ_ENDPOINTS = frozenset((
+    "api_bp.get_patient",
+    "api_bp.patient_summary",
+    "api_bp.list_appointments_for_doctor",
+    "api_bp.view_prescriptions",
+    "api_bp.view_billing",
+    "api_bp.my_notifications",
+))
+AUTH_ENDPOINTS = frozenset((
+    "auth_bp.login",
+    "auth_bp.logout",
+    "auth_bp.me",
+    "auth_bp.csrf_token",
+))
+
+MAX_BODY = 1 << 20
+MAX_HEAD = 64 * 1024
+
+_JSON = [(b"content-type", b"application/json")]
+_NOT_FOUND = b'{"ok":false,"error":"Not found"}'
+_BUSY = b'{"ok":false,"error":"Server busy, retry shortly"}'
+_TOO_LARGE = b'{"ok":false,"error":"Request body too large"}'
+
+
+class AsgiFrontend:
+    """
+    ASGI 3 application wrapping a Flask app (see module docstring).
+    """
+
+    def __init__(self, flask_app, workers: int = None, max_pending: int = None):
+        cfg = flask_app.config
+        self.flask_app = flask_app
+        self.endpoints = READ_ENDPOINTS | AUTH_ENDPOINTS
+        self.max_pending = max_pending or cfg["ASGI_MAX_PENDING"]
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers or cfg["ASGI_WORKERS"], thread_name_prefix="hms-asgi"
+        )
+        self.pending = 0
+        # routing only looks at path + method; the Flask app re-matches
+        # with the real host (tenancy) in the worker thread
+        self._urls = flask_app.url_map.bind("localhost")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return                      # no websockets here
+
+        if not self.exposes(scope["method"], scope["path"]):
+            await _respond(send, 404, _JSON, _NOT_FOUND)
+            return
+        if self.pending >= self.max_pending:
+            await _respond(send, 503, _JSON + [(b"retry-after", b"1")], _BUSY)
+            return
+
+        body = await _read_body(receive)
+        if body is None:
+            await _respond(send, 413, _JSON, _TOO_LARGE)
+            return
+
+        environ = _environ(scope, body)
+        self.pending += 1
+        try:
+            status, headers, payload = await asyncio.get_running_loop().run_in_executor(
+                self.executor, self._call_flask, environ
+            )
+        finally:
+            self.pending -= 1
+        await _respond(send, status, headers, payload)
+
+    def exposes(self, method: str, path: str) -> bool:
+        try:
+            endpoint, _ = self._urls.match(path, method=method)
+        except HTTPException:
+            return False
+        return endpoint in self.endpoints
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+    # ---- helpers ----
+
+    def _call_flask(self, environ):
+        started = []
+
+        def start_response(status, headers, exc_info=None):
+            started[:] = [status, headers]
+
+        result = self.flask_app(environ, start_response)
+        try:
+            payload = b"".join(result)
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+        status, headers = started
+        return (
+            int(status.split(" ", 1)[0]),
+            [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers],
+            payload,
+        )
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await asyncio.get_running_loop().run_in_executor(None, self.close)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+def create_asgi_app(flask_app=None) -> AsgiFrontend:
+    """
+    ASGI app over `flask_app` (default: create_app() with the DB
+    initialised, as `python backend/app.py` does).
+    """
+    if flask_app is None:
+        from .app import create_app
+        from .db import init_db
+
+        flask_app = create_app(testing=False)
+        if "hms_tenants" not in flask_app.extensions:
+            with flask_app.app_context():
+                init_db(seed_demo_users=True)
+    return AsgiFrontend(flask_app)
+
+
+async def _read_body(receive):
+    chunks, size = [], 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > MAX_BODY:
+            return None
+        chunks.append(chunk)
+        if not message.get("more_body"):
+            break
+    return b"".join(chunks)
+
+
+async def _respond(send, status: int, headers, body: bytes):
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+def _environ(scope, body: bytes) -> dict:
+    """
+    WSGI environ for an ASGI http scope (PEP 3333 string rules).
+    """
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": str(server[0]),
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": "HTTP/" + scope.get("http_version", "1.1"),
+        "REMOTE_ADDR": client[0],
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope.get("headers", ()):
+        key = name.decode("latin-1").upper().replace("-", "_")
+        value = value.decode("latin-1")
+        if key == "CONTENT_TYPE":
+            environ[key] = value
+            continue
+        if key == "CONTENT_LENGTH":
+            continue
+        key = "HTTP_" + key
+        if key in environ:
+            sep = "; " if key == "HTTP_COOKIE" else ", "
+            value = environ[key] + sep + value
+        environ[key] = value
+    return environ
+
+
+# ---- minimal HTTP/1.1 server (no dependencies) ----------------
+
+async def serve(app, host: str = "127.0.0.1", port: int = 8001,
+                keepalive: float = 75.0, started=None):
+    """
+    Serve `app` (any ASGI http app) with keep-alive connections until
+    cancelled. started(server) is called once the socket is listening.
+    """
+    connections = set()
+
+    async def handle(reader, writer):
+        task = asyncio.current_task()
+        connections.add(task)
+        try:
+            await _connection(app, reader, writer, keepalive)
+        finally:
+            connections.discard(task)
+
+    server = await asyncio.start_server(handle, host, port, limit=MAX_HEAD, backlog=4096)
+    if started is not None:
+        started(server)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        for task in list(connections):
+            task.cancel()
+        await asyncio.gather(*connections, return_exceptions=True)
+
+
+class BackgroundServer:
+    """
+    serve() on its own thread and event loop (tests, benchmarks):
+
+        with BackgroundServer(app) as server:
+            http.client.HTTPConnection("127.0.0.1", server.port)
+    """
+
+    def __init__(self, app, host: str = "127.0.0.1", port: int = 0, keepalive: float = 75.0):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.keepalive = keepalive
+        self._loop = asyncio.new_event_loop()
+        self._task = None
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="hms-asgi-server", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        if not self._ready.wait(10):
+            raise RuntimeError("ASGI server did not start")
+        return self
+
+    def __exit__(self, *exc):
+        self._loop.call_soon_threadsafe(self._task.cancel)
+        self._thread.join(10)
+
+    def _run(self):
+        def started(server):
+            self.port = server.sockets[0].getsockname()[1]
+            self._ready.set()
+
+        self._task = self._loop.create_task(
+            serve(self.app, self.host, self.port, self.keepalive, started)
+        )
+        try:
+            self._loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._loop.close()
+
+
+async def _connection(app, reader, writer, keepalive):
+    client = writer.get_extra_info("peername") or ("", 0)
+    local = writer.get_extra_info("sockname") or ("localhost", 80)
+    try:
+        while True:
+            try:
+                head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), keepalive)
+            except (asyncio.TimeoutError, asyncio.IncompleteReadError,
+                    asyncio.LimitOverrunError, ConnectionError):
+                return
+            lines = head[:-4].decode("latin-1").split("\r\n")
+            try:
+                method, target, version = lines[0].split(" ")
+                headers = []
+                for line in lines[1:]:
+                    name, _, value = line.partition(":")
+                    headers.append((name.strip().lower().encode("latin-1"),
+                                    value.strip().encode("latin-1")))
+                fields = dict(headers)
+                if b"transfer-encoding" in fields:
+                    raise ValueError("chunked request bodies are not supported")
+                length = int(fields.get(b"content-length", b"0"))
+            except ValueError:
+                await _write(writer, 400, [], b"", keep_alive=False)
+                return
+            if length > MAX_BODY:
+                await _write(writer, 413, _JSON, _TOO_LARGE, keep_alive=False)
+                return
+            body = await reader.readexactly(length) if length else b""
+
+            path, _, query = target.partition("?")
+            keep_alive = (version == "HTTP/1.1"
+                          and fields.get(b"connection", b"").lower() != b"close")
+            scope = {
+                "type": "http",
+                "asgi": {"version": "3.0"},
+                "http_version": version[5:],
+                "method": method,
+                "scheme": "http",
+                "path": unquote(path),
+                "raw_path": path.encode("latin-1"),
+                "query_string": query.encode("latin-1"),
+                "root_path": "",
+                "headers": headers,
+                "client": client[:2],
+                "server": local[:2],
+            }
+            status, out_headers, out_body = await _run(app, scope, body)
+            await _write(writer, status, out_headers, out_body, keep_alive)
+            if not keep_alive:
+                return
+    except (ConnectionError, asyncio.IncompleteReadError):
+        return
+    finally:
+        writer.close()
+
+
+async def _run(app, scope, body):
+    sent = {"status": 500, "headers": [], "body": []}
+    delivered = False
+
+    async def receive():
+        nonlocal delivered
+        if not delivered:
+            delivered = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            sent["status"] = message["status"]
+            sent["headers"] = message.get("headers", [])
+        elif message["type"] == "http.response.body":
+            sent["body"].append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return sent["status"], sent["headers"], b"".join(sent["body"])
+
+
+async def _write(writer, status, headers, body, keep_alive):
+    try:
+        reason = HTTPStatus(status).phrase
+    except ValueError:
+        reason = ""
+    out = [f"HTTP/1.1 {status} {reason}\r\n".encode("latin-1")]
+    for name, value in headers:
+        if name not in (b"content-length", b"transfer-encoding", b"connection"):
+            out.append(name + b": " + value + b"\r\n")
+    out.append(b"content-length: %d\r\n" % len(body))
+    if not keep_alive:
+        out.append(b"connection: close\r\n")
+    out.append(b"\r\n")
+    out.append(body)
+    writer.write(b"".join(out))
+    await writer.drain()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Serve the HMS read endpoints from an asyncio event loop."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--keepalive", type=float, default=75.0,
+                        help="seconds an idle connection is kept open")
+    args = parser.parse_args(argv)
+
+    app = create_asgi_app()
+    print(f"Serving read endpoints on http://{args.host}:{args.port}")
+    try:
+        asyncio.run(serve(app, args.host, args.port, args.keepalive))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        app.close()
+
+
+if __name__ == "__main__":
+    main()
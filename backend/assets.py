@@ -0,0 +1,347 @@
+"""
+Static asset pipeline for the frontend/ pages.
+
+Build step (run before deploying):
+    python -m backend.assets build
+
+This:
+- fingerprints every file under frontend/static (api.js -> api.<hash>.js)
+- rewrites the "static/..." references inside the HTML templates to point
+  at the fingerprinted names
+- precompresses text assets with gzip (and brotli when the optional
+  `brotli` package is installed)
+- writes everything + manifest.json into frontend/dist/
+
+At startup the app loads the built manifest (or, if no build exists,
+compiles the same thing in memory from the source folders) so requests
+are answered from a dict lookup: no Path.exists() / stat per request.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import mimetypes
+import re
+from pathlib import Path
+
+try:
+    import brotli  # optional: pip install brotli
+except ImportError:  # pragma: no cover - depends on environment
+    brotli = None
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+FRONTEND_TEMPLATES = BASE_DIR / "frontend" / "templates"
+FRONTEND_STATIC = BASE_DIR / "frontend" / "static"
+FRONTEND_DIST = BASE_DIR / "frontend" / "dist"
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+# Only text formats are worth compressing; images are already compressed.
+COMPRESSIBLE_EXTS = {".html", ".js", ".css", ".svg", ".json", ".txt", ".map"}
+# Below this size the gzip/brotli framing overhead isn't worth it.
+MIN_COMPRESS_SIZE = 256
+
+# Long-lived caching for URLs whose name changes when the content changes.
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+# Pages and non-fingerprinted URLs: always revalidate (cheap 304 via ETag).
+REVALIDATE_CACHE = "no-cache"
+
+# Matches "static/js/api.js" / "/static/js/api.js" inside src="" / href="".
+_static_ref_re = re.compile(r"""(["'])(/?static/)([^"'?#]+)\1""")
+
+
+class Asset:
+    """
+    One servable file held in memory with its precompressed variants.
+    """
+
+    __slots__ = ("body", "gzip", "br", "etag", "mimetype", "immutable")
+
+    def __init__(self, body: bytes, mimetype: str, immutable: bool = False,
+                 gzip_body: bytes = None, br_body: bytes = None):
+        self.body = body
+        self.gzip = gzip_body
+        self.br = br_body
+        self.etag = _digest(body)
+        self.mimetype = mimetype
+        self.immutable = immutable
+
+    def variant(self, encoding: str):
+        """
+        Return the body for a content-coding ("br", "gzip", "identity").
+        """
+        if encoding == "br":
+            return self.br
+        if encoding == "gzip":
+            return self.gzip
+        return self.body
+
+
+class AssetManifest:
+    """
+    In-memory lookup tables:
+    - pages:  "dashboard.html"          -> Asset
+    - static: "js/api.js"               -> Asset (revalidate)
+              "js/api.1a2b3c4d5e.js"    -> Asset (immutable)
+    - fingerprints: "js/api.js"         -> "js/api.1a2b3c4d5e.js"
+    """
+
+    def __init__(self):
+        self.pages = {}
+        self.static = {}
+        self.fingerprints = {}
+
+    def page(self, path: str):
+        return self.pages.get(path)
+
+    def asset(self, path: str):
+        return self.static.get(path)
+
+    def url_for(self, rel_path: str) -> str:
+        """
+        Public URL of a static file (fingerprinted when known).
+        """
+        return "/static/" + self.fingerprints.get(rel_path, rel_path)
+
+    # ---- constructors ----------------------------------------------
+
+    @classmethod
+    def compile(cls, templates_dir=FRONTEND_TEMPLATES, static_dir=FRONTEND_STATIC):
+        """
+        Build the manifest in memory straight from the source folders.
+        """
+        manifest = cls()
+        templates_dir = Path(templates_dir)
+        static_dir = Path(static_dir)
+
+        for src in _walk(static_dir):
+            rel = src.relative_to(static_dir).as_posix()
+            body = src.read_bytes()
+            hashed = _fingerprinted_name(rel, body)
+            manifest.fingerprints[rel] = hashed
+            manifest.static[hashed] = _make_asset(body, rel, immutable=True)
+            # Keep the plain name working (old bookmarks, direct links) but
+            # let browsers revalidate it instead of caching it for a year.
+            manifest.static[rel] = _revalidating_alias(manifest.static[hashed])
+
+        for src in _walk(templates_dir):
+            rel = src.relative_to(templates_dir).as_posix()
+            body = src.read_bytes()
+            if rel.endswith(".html"):
+                body = _rewrite_static_refs(body, manifest.fingerprints)
+            manifest.pages[rel] = _make_asset(body, rel)
+
+        return manifest
+
+    @classmethod
+    def load(cls, dist_dir=FRONTEND_DIST):
+        """
+        Read a build produced by `build()` fully into memory.
+        Raises FileNotFoundError if there is no build.
+        """
+        dist_dir = Path(dist_dir)
+        meta = json.loads((dist_dir / MANIFEST_NAME).read_text("utf-8"))
+        if meta.get("version") != MANIFEST_VERSION:
+            raise ValueError("Unsupported asset manifest version")
+
+        manifest = cls()
+        manifest.fingerprints = dict(meta["fingerprints"])
+        for section, table in (("pages", manifest.pages), ("static", manifest.static)):
+            for rel, entry in meta[section].items():
+                table[rel] = _read_asset(dist_dir, entry)
+        for rel, hashed in manifest.fingerprints.items():
+            if hashed in manifest.static:
+                manifest.static[rel] = _revalidating_alias(manifest.static[hashed])
+        return manifest
+
+    @classmethod
+    def for_app(cls, dist_dir=FRONTEND_DIST, templates_dir=FRONTEND_TEMPLATES,
+                static_dir=FRONTEND_STATIC):
+        """
+        Prefer a prebuilt dist/ folder; otherwise compile from sources.
+        """
+        try:
+            return cls.load(dist_dir)
+        except FileNotFoundError:
+            return cls.compile(templates_dir, static_dir)
+
+
+def send_asset(asset: Asset):
+    """
+    Build the response for an asset:
+    - pick br > gzip > identity according to the client's Accept-Encoding
+    - immutable caching for fingerprinted names, revalidation otherwise
+    - ETag per encoding so If-None-Match gets a 304
+    """
+    from flask import Response, request
+
+    encoding = _negotiate_encoding(asset, request.accept_encodings)
+    resp = Response(asset.variant(encoding), mimetype=asset.mimetype)
+    if encoding != "identity":
+        resp.headers["Content-Encoding"] = encoding
+    if asset.gzip is not None or asset.br is not None:
+        resp.vary.add("Accept-Encoding")
+    resp.headers["Cache-Control"] = (
+        IMMUTABLE_CACHE if asset.immutable else REVALIDATE_CACHE
+    )
+    resp.set_etag(asset.etag if encoding == "identity" else f"{asset.etag}-{encoding}")
+    return resp.make_conditional(request)
+
+
+def _negotiate_encoding(asset: Asset, accept) -> str:
+    # Ties go to the earlier (smaller) encoding in this list.
+    best, best_q = "identity", 0
+    for encoding in ("br", "gzip"):
+        if asset.variant(encoding) is None:
+            continue
+        q = accept.quality(encoding)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def build(out_dir=FRONTEND_DIST, templates_dir=FRONTEND_TEMPLATES,
+          static_dir=FRONTEND_STATIC) -> AssetManifest:
+    """
+    Compile the assets and write them (plus .gz/.br siblings and
+    manifest.json) into out_dir. Returns the compiled manifest.
+    """
+    out_dir = Path(out_dir)
+    manifest = AssetManifest.compile(templates_dir, static_dir)
+    meta = {
+        "version": MANIFEST_VERSION,
+        "fingerprints": manifest.fingerprints,
+        "pages": {},
+        "static": {},
+    }
+
+    for rel, asset in manifest.pages.items():
+        meta["pages"][rel] = _write_asset(out_dir, "pages/" + rel, asset)
+    for rel, hashed in manifest.fingerprints.items():
+        meta["static"][hashed] = _write_asset(
+            out_dir, "static/" + hashed, manifest.static[hashed]
+        )
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    (out_dir / MANIFEST_NAME).write_text(
+        json.dumps(meta, indent=2, sort_keys=True), "utf-8"
+    )
+    return manifest
+
+
+# ---- helpers -------------------------------------------------
+
+def _walk(root: Path):
+    if not root.is_dir():
+        return []
+    return sorted(p for p in root.rglob("*") if p.is_file())
+
+
+def _digest(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()[:20]
+
+
+def _fingerprinted_name(rel: str, body: bytes) -> str:
+    path = Path(rel)
+    short = hashlib.sha256(body).hexdigest()[:10]
+    return path.with_name(f"{path.stem}.{short}{path.suffix}").as_posix()
+
+
+def _guess_mimetype(rel: str) -> str:
+    if rel.endswith(".js"):
+        return "text/javascript"
+    mimetype, _ = mimetypes.guess_type(rel)
+    return mimetype or "application/octet-stream"
+
+
+def _rewrite_static_refs(body: bytes, fingerprints: dict) -> bytes:
+    def repl(m):
+        quote, prefix, rel = m.groups()
+        return f"{quote}{prefix}{fingerprints.get(rel, rel)}{quote}"
+
+    return _static_ref_re.sub(repl, body.decode("utf-8")).encode("utf-8")
+
+
+def _compress(body: bytes, suffix: str):
+    """
+    Return (gzip_bytes, br_bytes); either may be None when compression
+    is not applicable or doesn't make the payload smaller.
+    """
+    if suffix not in COMPRESSIBLE_EXTS or len(body) < MIN_COMPRESS_SIZE:
+        return None, None
+
+    gz = gzip.compress(body, compresslevel=9, mtime=0)
+    if len(gz) >= len(body):
+        gz = None
+
+    br = None
+    if brotli is not None:
+        br = brotli.compress(body, quality=11)
+        if len(br) >= len(body):
+            br = None
+    return gz, br
+
+
+def _make_asset(body: bytes, rel: str, immutable: bool = False) -> Asset:
+    gz, br = _compress(body, Path(rel).suffix)
+    return Asset(body, _guess_mimetype(rel), immutable=immutable,
+                 gzip_body=gz, br_body=br)
+
+
+def _revalidating_alias(asset: Asset) -> Asset:
+    """
+    Same bytes as `asset`, but served with revalidation instead of
+    immutable caching (used for the non-fingerprinted alias).
+    """
+    return Asset(asset.body, asset.mimetype, immutable=False,
+                 gzip_body=asset.gzip, br_body=asset.br)
+
+
+def _write_asset(out_dir: Path, rel: str, asset: Asset) -> dict:
+    target = out_dir / rel
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_bytes(asset.body)
+    entry = {
+        "file": rel,
+        "mimetype": asset.mimetype,
+        "immutable": asset.immutable,
+        "encodings": [],
+    }
+    if asset.gzip is not None:
+        target.with_name(target.name + ".gz").write_bytes(asset.gzip)
+        entry["encodings"].append("gzip")
+    if asset.br is not None:
+        target.with_name(target.name + ".br").write_bytes(asset.br)
+        entry["encodings"].append("br")
+    return entry
+
+
+def _read_asset(dist_dir: Path, entry: dict) -> Asset:
+    target = dist_dir / entry["file"]
+    gz = br = None
+    if "gzip" in entry["encodings"]:
+        gz = target.with_name(target.name + ".gz").read_bytes()
+    if "br" in entry["encodings"]:
+        br = target.with_name(target.name + ".br").read_bytes()
+    return Asset(target.read_bytes(), entry["mimetype"],
+                 immutable=entry["immutable"], gzip_body=gz, br_body=br)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build frontend assets")
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("--out", default=str(FRONTEND_DIST),
+                        help="output folder (default: frontend/dist)")
+    args = parser.parse_args(argv)
+
+    manifest = build(args.out)
+    print(
+        f"Built {len(manifest.pages)} pages and "
+        f"{len(manifest.fingerprints)} static assets into {args.out}"
+        + ("" if brotli is not None else " (brotli not installed: gzip only)")
+    )
+
+
+if __name__ == "__main__":
+    main()
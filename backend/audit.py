@@ -0,0 +1,271 @@
+"""
+Audit trail: who read or changed which patient record.
+
+Routes call audit(...) after a successful operation. With
+AUDIT_MODE="async" (default) that only puts a tuple on a bounded
+in-process queue; a background thread group-commits the queue with one
+executemany per transaction every AUDIT_FLUSH_MS or AUDIT_BATCH_SIZE
+events, whichever comes first. So auditing adds no commit to the request.
+
+- Backpressure: if the queue is full, record() blocks for up to
+  AUDIT_ENQUEUE_TIMEOUT_MS; if it is still full the caller writes its own
+  event synchronously. Events are never dropped for being too many.
+- Shutdown: close() (registered with atexit) drains the queue.
+- Crash (kill -9, power loss): events still queued or in the batch being
+  assembled are lost, i.e. at most AUDIT_QUEUE_SIZE + AUDIT_BATCH_SIZE.
+- Write errors: the writer waits AUDIT_BUSY_TIMEOUT_MS for a lock, and a
+  batch that still fails with a lock/busy error is retried
+  AUDIT_WRITE_RETRIES times with doubling backoff. Only a batch that fails
+  all of them (or with any other error) is dropped; the writer's `dropped`
+  counts those events and the error is logged.
+
+AUDIT_MODE="sync" writes inline through get_db() (used by the tests, so
+audit rows take part in the per-test savepoint); "off" disables auditing.
+"""
+import atexit
+import logging
+import queue
+import sqlite3
+import threading
+import time
+
+from flask import current_app, request, session
+
+from .db import current_db_path, get_db
+from .timeutil import now_iso
+
+log = logging.getLogger(__name__)
+
+_INSERT_SQL = """
+    INSERT INTO audit_log
+        (ts, user_id, role, action, entity, entity_id, patient_id,
+         method, path)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?);
+"""
+
+_STOP = object()
+
+
+def audit(action: str, entity: str, entity_id: int = None, patient_id: int = None):
+    """
+    Record one audit event for the current request/user.
+    action: "read" | "create" | "update"
+    entity: "patient" | "appointment" | "prescription" | "billing" | ...
+    patient_id: whose chart was touched (if known), for per-patient lookups.
+    """
+    app = current_app._get_current_object()
+    mode = app.config.get("AUDIT_MODE", "async")
+    if mode == "off":
+        return
+    event = (
+        now_iso(),
+        session.get("user_id"),
+        session.get("role"),
+        action,
+        entity,
+        entity_id,
+        patient_id,
+        request.method,
+        request.path,
+    )
+    if mode == "sync":
+        conn = get_db(readonly=False)
+        conn.execute(_INSERT_SQL, event)
+        conn.commit()
+        conn.close()
+        return
+    writer = get_audit_writer(app)
+    db_path = current_db_path()
+    writer.record(event, None if db_path == writer.db_path else db_path)
+
+
+_writers_lock = threading.Lock()
+
+
+def get_audit_writer(app):
+    """
+    The app's background writer, started on first use (so config changes
+    made after create_app, e.g. DB_PATH in tests, are honoured).
+    """
+    writer = app.extensions.get("hms_audit")
+    if writer is None:
+        with _writers_lock:
+            writer = app.extensions.get("hms_audit")
+            if writer is None:
+                cfg = app.config
+                writer = AuditWriter(
+                    cfg["DB_PATH"],
+                    batch_size=cfg.get("AUDIT_BATCH_SIZE", 200),
+                    flush_ms=cfg.get("AUDIT_FLUSH_MS", 50),
+                    queue_size=cfg.get("AUDIT_QUEUE_SIZE", 10000),
+                    enqueue_timeout_ms=cfg.get("AUDIT_ENQUEUE_TIMEOUT_MS", 100),
+                    busy_timeout_ms=cfg.get("AUDIT_BUSY_TIMEOUT_MS", 5000),
+                    retries=cfg.get("AUDIT_WRITE_RETRIES", 5),
+                )
+                writer.start()
+                atexit.register(writer.close)
+                app.extensions["hms_audit"] = writer
+    return writer
+
+
+class AuditWriter:
+    """
+    Bounded queue + one daemon thread doing batched inserts.
+    """
+
+    def __init__(self, db_path: str, batch_size: int = 200, flush_ms: int = 50,
+                 queue_size: int = 10000, enqueue_timeout_ms: int = 100,
+                 busy_timeout_ms: int = 5000, retries: int = 5,
+                 retry_backoff_ms: int = 100):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_ms / 1000.0
+        self.enqueue_timeout = enqueue_timeout_ms / 1000.0
+        self.busy_timeout_ms = busy_timeout_ms
+        self.retries = retries
+        self.retry_backoff = retry_backoff_ms / 1000.0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._closed = False
+        # monitoring counters
+        self.written = 0
+        self.overflow_writes = 0
+        self.dropped = 0
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._run, name="audit-writer", daemon=True
+        )
+        self._thread.start()
+
+    def record(self, event: tuple, db_path: str = None):
+        """
+        Queue one event; db_path routes it to another database than the
+        writer's own (a tenant's, see tenancy.py).
+        """
+        item = event if db_path is None else (db_path, event)
+        if self._closed:
+            self._write_items([item])
+            return
+        try:
+            self._queue.put(item, timeout=self.enqueue_timeout)
+        except queue.Full:
+            # The writer can't keep up: make this caller pay for its own
+            # write rather than dropping the event.
+            self.overflow_writes += 1
+            self._write_items([item])
+
+    def close(self, timeout: float = 10.0):
+        """
+        Stop accepting queued events and wait for the backlog to be written.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+    # ---- writer thread ---------------------------------------------
+
+    def _connect(self, db_path: str = None) -> sqlite3.Connection:
+        db_path = db_path or self.db_path
+        conn = sqlite3.connect(
+            db_path, uri=db_path.startswith("file:"), check_same_thread=False,
+            timeout=self.busy_timeout_ms / 1000.0,
+        )
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)};")
+        return conn
+
+    def _run(self):
+        conn = self._connect()
+        stopping = False
+        try:
+            while not stopping:
+                item = self._queue.get()
+                if item is _STOP:
+                    break
+                batch = [item]
+                deadline = time.monotonic() + self.flush_interval
+                while len(batch) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = self._queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                    if item is _STOP:
+                        stopping = True
+                        break
+                    batch.append(item)
+                self._write_batch(conn, batch)
+
+            # drain whatever is left after the stop marker
+            rest = []
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not _STOP:
+                    rest.append(item)
+            for i in range(0, len(rest), self.batch_size):
+                self._write_batch(conn, rest[i:i + self.batch_size])
+        finally:
+            conn.close()
+
+    def _write_batch(self, conn: sqlite3.Connection, batch: list):
+        """
+        Plain events go through `conn`; (db_path, event) pairs are grouped
+        per database, one short-lived connection and commit each.
+        """
+        own = [item for item in batch if len(item) != 2]
+        if own:
+            self._write(conn, own)
+        if len(own) == len(batch):
+            return
+        routed = {}
+        for item in batch:
+            if len(item) == 2:
+                routed.setdefault(item[0], []).append(item[1])
+        for db_path, events in routed.items():
+            self._write_direct(events, db_path)
+
+    def _write(self, conn: sqlite3.Connection, batch: list):
+        delay = self.retry_backoff
+        for attempt in range(self.retries + 1):
+            try:
+                conn.executemany(_INSERT_SQL, batch)
+                conn.commit()
+                self.written += len(batch)
+                return
+            except sqlite3.OperationalError as exc:
+                conn.rollback()
+                error = exc
+                if attempt == self.retries:
+                    break
+                log.warning("audit: write of %d events failed (%s), retrying",
+                            len(batch), exc)
+                time.sleep(delay)
+                delay *= 2
+            except sqlite3.Error as exc:
+                conn.rollback()
+                error = exc
+                break
+        self.dropped += len(batch)
+        log.error("audit: dropped %d events: %s", len(batch), error)
+
+    def _write_items(self, items: list):
+        conn = self._connect()
+        try:
+            self._write_batch(conn, items)
+        finally:
+            conn.close()
+
+    def _write_direct(self, batch: list, db_path: str = None):
+        conn = self._connect(db_path)
+        try:
+            self._write(conn, batch)
+        finally:
+            conn.close()
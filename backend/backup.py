@@ -0,0 +1,315 @@
+"""
+Online snapshots of the live database (no downtime, no unsafe file copy).
+
+    python -m backend.backup [create] [--keep 7] [--no-compress]
+    python -m backend.backup verify <snapshot>
+    python -m backend.backup list
+
+create_snapshot() copies the DB with the SQLite backup API in steps of
+BACKUP_STEP_PAGES pages and sleeps BACKUP_SLEEP_MS between steps.
+- WAL (the app's mode): the copy runs inside one read transaction on the
+  source, so it is a point-in-time snapshot and writers are never blocked
+  (readers don't block writers under WAL); commits made meanwhile simply
+  aren't in the snapshot.
+- rollback journal: the source is only locked for one short step at a
+  time. Commits from other connections make SQLite restart a stepped copy;
+  after MAX_RESTARTS restarts the rest is copied in one step.
+
+Each snapshot is:
+- hms-<UTC timestamp>.db[.gz]   integrity-checked copy, optionally gzipped
+- <same name>.sha256            "<hex>  <name>" (sha256sum format)
+
+Only the newest `keep` snapshots are kept.
+"""
+import argparse
+import gzip
+import hashlib
+import os
+import shutil
+import sqlite3
+import time
+from datetime import datetime
+from pathlib import Path
+
+from .timeutil import ISO_FORMAT
+
+SNAPSHOT_PREFIX = "hms-"
+CHECKSUM_SUFFIX = ".sha256"
+MAX_RESTARTS = 3
+_CHUNK = 1024 * 1024
+# fsync the output every few MB: one huge fsync at the end stalls the
+# app's own commit fsyncs on the same disk for a long time
+_FSYNC_EVERY = 8 * _CHUNK
+
+
+class BackupError(Exception):
+    """A snapshot failed its integrity or checksum check."""
+
+
+class _Restarted(Exception):
+    pass
+
+
+def create_snapshot(db_path: str, backup_dir: str, step_pages: int = 256,
+                    sleep_ms: int = 10, compress: bool = True, keep: int = 7,
+                    now: datetime = None) -> dict:
+    """
+    Take one snapshot, write its checksum, prune old ones.
+    Returns {"name", "path", "sha256", "bytes", "pages", "seconds", "restarts"}.
+    """
+    started = time.perf_counter()
+    backup_dir = Path(backup_dir)
+    backup_dir.mkdir(parents=True, exist_ok=True)
+    stamp = (now or datetime.utcnow()).strftime(ISO_FORMAT).replace("-", "").replace(":", "")
+    name = f"{SNAPSHOT_PREFIX}{stamp}.db" + (".gz" if compress else "")
+    final = backup_dir / name
+    raw = backup_dir / f".{name}.raw.part"
+
+    try:
+        pages, restarts = _copy_database(db_path, raw, step_pages, sleep_ms / 1000.0)
+        _check_integrity(raw)
+        part = backup_dir / f".{name}.part"
+        digest = _store(raw, part, compress, sleep_ms / 1000.0)
+        os.replace(part, final)
+    finally:
+        for leftover in (raw, backup_dir / f".{name}.part"):
+            if leftover.exists():
+                leftover.unlink()
+
+    _checksum_path(final).write_text(f"{digest}  {name}\n", "utf-8")
+    prune_snapshots(backup_dir, keep)
+    return {
+        "name": name,
+        "path": str(final),
+        "sha256": digest,
+        "bytes": final.stat().st_size,
+        "pages": pages,
+        "seconds": round(time.perf_counter() - started, 3),
+        "restarts": restarts,
+    }
+
+
+def verify_snapshot(path) -> bool:
+    """
+    Check a snapshot against its .sha256 file and, after decompressing,
+    run PRAGMA integrity_check on it. Raises BackupError on mismatch.
+    """
+    path = Path(path)
+    sidecar = _checksum_path(path)
+    if not sidecar.exists():
+        raise BackupError(f"missing checksum file for {path.name}")
+    expected = sidecar.read_text("utf-8").split()[0]
+    if _sha256_file(path) != expected:
+        raise BackupError(f"checksum mismatch for {path.name}")
+
+    if path.suffix == ".gz":
+        tmp = path.with_name(f".{path.name}.verify")
+        try:
+            with gzip.open(path, "rb") as src, open(tmp, "wb") as dst:
+                shutil.copyfileobj(src, dst, _CHUNK)
+            _check_integrity(tmp)
+        finally:
+            if tmp.exists():
+                tmp.unlink()
+    else:
+        _check_integrity(path)
+    return True
+
+
+def list_snapshots(backup_dir) -> list:
+    """
+    Snapshots in backup_dir, newest first.
+    """
+    backup_dir = Path(backup_dir)
+    if not backup_dir.is_dir():
+        return []
+    found = [
+        p for p in backup_dir.iterdir()
+        if p.name.startswith(SNAPSHOT_PREFIX) and p.name.endswith((".db", ".db.gz"))
+    ]
+    # names embed a sortable UTC timestamp
+    return sorted(found, key=lambda p: p.name, reverse=True)
+
+
+def prune_snapshots(backup_dir, keep: int) -> list:
+    """
+    Delete all but the newest `keep` snapshots (and their checksums).
+    Returns the deleted snapshot paths.
+    """
+    doomed = list_snapshots(backup_dir)[max(keep, 1):]
+    for path in doomed:
+        path.unlink()
+        sidecar = _checksum_path(path)
+        if sidecar.exists():
+            sidecar.unlink()
+    return doomed
+
+
+# ---- helpers -------------------------------------------------
+
+def _copy_database(db_path: str, target: Path, step_pages: int, pause: float):
+    """
+    Stepped backup into `target`. Returns (pages, restarts).
+    """
+    src = sqlite3.connect(db_path, uri=db_path.startswith("file:"), timeout=30,
+                          isolation_level=None)
+    try:
+        wal = src.execute("PRAGMA journal_mode;").fetchone()[0] == "wal"
+        if wal:
+            # pin one snapshot for the whole copy
+            src.execute("BEGIN;")
+            src.execute("SELECT COUNT(*) FROM sqlite_master;").fetchone()
+        restarts = 0
+        while True:
+            dst = sqlite3.connect(str(target))
+            # scratch copy: integrity-checked, then durably written by _store
+            dst.execute("PRAGMA synchronous = OFF;")
+            state = {"remaining": None}
+
+            def progress(status, remaining, total):
+                # remaining going *up* means the source changed and SQLite
+                # started over
+                if state["remaining"] is not None and remaining > state["remaining"]:
+                    raise _Restarted()
+                state["remaining"] = remaining
+                if remaining and pause:
+                    time.sleep(pause)
+
+            try:
+                if restarts >= MAX_RESTARTS:
+                    src.backup(dst)                       # single step
+                else:
+                    src.backup(dst, pages=step_pages, progress=progress)
+                pages = dst.execute("PRAGMA page_count;").fetchone()[0]
+                return pages, restarts
+            except _Restarted:
+                restarts += 1
+            finally:
+                dst.close()
+    finally:
+        if src.in_transaction:
+            src.execute("COMMIT;")
+        src.close()
+
+
+def _check_integrity(path: Path):
+    conn = sqlite3.connect(str(path))
+    try:
+        result = conn.execute("PRAGMA integrity_check;").fetchone()[0]
+    finally:
+        conn.close()
+    if result != "ok":
+        raise BackupError(f"integrity_check failed: {result}")
+
+
+def _store(raw: Path, target: Path, compress: bool, pause: float = 0.0) -> str:
+    """
+    Write raw -> target (gzip-compressed if asked), fsyncing as it goes;
+    returns sha256 of the bytes written.
+    """
+    sha = hashlib.sha256()
+    with open(raw, "rb") as src, open(target, "wb") as out:
+        hashing = _Hashing(out, sha)
+        sink = gzip.GzipFile(filename="", mode="wb", fileobj=hashing,
+                             compresslevel=6, mtime=0) if compress else hashing
+        with sink:
+            for chunk in iter(lambda: src.read(_CHUNK), b""):
+                sink.write(chunk)
+                if hashing.unsynced >= _FSYNC_EVERY:
+                    hashing.sync()
+                    if pause:
+                        time.sleep(pause)
+        hashing.sync()
+    return sha.hexdigest()
+
+
+class _Hashing:
+    """
+    File wrapper that feeds everything written through a hash.
+    """
+
+    def __init__(self, fileobj, sha):
+        self._f = fileobj
+        self._sha = sha
+        self.unsynced = 0
+
+    def write(self, data):
+        self._sha.update(data)
+        self.unsynced += len(data)
+        return self._f.write(data)
+
+    def sync(self):
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        self.unsynced = 0
+
+    def flush(self):
+        self._f.flush()
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def _sha256_file(path: Path) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def _checksum_path(path: Path) -> Path:
+    return path.with_name(path.name + CHECKSUM_SUFFIX)
+
+
+def main(argv=None):
+    from .config import Config
+
+    parser = argparse.ArgumentParser(description="Online database snapshots")
+    parser.add_argument("command", nargs="?", default="create",
+                        choices=["create", "verify", "list"])
+    parser.add_argument("snapshot", nargs="?", help="file to verify")
+    parser.add_argument("--db", default=Config.DB_PATH)
+    parser.add_argument("--dir", default=Config.BACKUP_DIR)
+    parser.add_argument("--keep", type=int, default=Config.BACKUP_KEEP)
+    parser.add_argument("--step-pages", type=int, default=Config.BACKUP_STEP_PAGES)
+    parser.add_argument("--sleep-ms", type=int, default=Config.BACKUP_SLEEP_MS)
+    parser.add_argument("--no-compress", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        for path in list_snapshots(args.dir):
+            print(f"{path.name}\t{path.stat().st_size}")
+        return 0
+
+    if args.command == "verify":
+        target = args.snapshot or next(iter(list_snapshots(args.dir)), None)
+        if target is None:
+            parser.error("no snapshot to verify")
+        try:
+            verify_snapshot(target)
+        except BackupError as exc:
+            print(f"FAILED: {exc}")
+            return 1
+        print(f"OK: {Path(target).name}")
+        return 0
+
+    info = create_snapshot(
+        args.db, args.dir, step_pages=args.step_pages, sleep_ms=args.sleep_ms,
+        compress=not args.no_compress, keep=args.keep,
+    )
+    print(
+        f"Wrote {info['name']} ({info['bytes']} bytes, {info['pages']} pages) "
+        f"in {info['seconds']}s; sha256 {info['sha256']}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
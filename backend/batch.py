@@ -0,0 +1,102 @@
+"""
+POST /api/batch: several GETs against api_bp routes in one HTTP call.
+
+    {"requests": [{"path": "/api/appointments/2"},
+                  {"path": "/api/notifications?since=2025-01-01"}]}
+ -> {"ok": true, "responses": [{"status": 200, "body": {...}}, ...]}
+
+The outer request is authenticated once (login, CSRF). Each sub-request
+then runs as a normal route: same RBAC checks, same audit entries. It
+reuses the outer request's decoded session and forwards its tenant
+headers. Sub-requests run in a shared thread pool. Each one borrows a
+pooled read-only connection (get_db), so none of them opens a new one,
+and the GIL is released while SQLite works.
+
+Only GET sub-requests are accepted. Writes keep going through their own
+endpoints, where CSRF, Idempotency-Key and ordering semantics are simple.
+"""
+import json
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app, request, session
+from werkzeug.test import EnvironBuilder
+
+# headers a sub-request inherits (tenant selection, client identity)
+_FORWARDED = ("User-Agent", "X-Forwarded-For", "X-Forwarded-Proto")
+
+# WSGI environ flag on sub-requests (traffic capture records only the
+# outer POST /api/batch, which is what the client actually sent)
+SUBREQUEST_ENVIRON_KEY = "hms.batch_subrequest"
+
+_NOT_FOUND = b'{"ok":false,"error":"Not found"}'
+_INTERNAL_ERROR = b'{"ok":false,"error":"Internal error"}'
+
+_lock = threading.Lock()
+
+
+def _executor(app) -> ThreadPoolExecutor:
+    pool = app.extensions.get("hms_batch")
+    if pool is None:
+        with _lock:
+            pool = app.extensions.get("hms_batch")
+            if pool is None:
+                pool = ThreadPoolExecutor(
+                    max_workers=app.config["BATCH_WORKERS"],
+                    thread_name_prefix="hms-batch",
+                )
+                app.extensions["hms_batch"] = pool
+    return pool
+
+
+def run_batch(paths) -> bytes:
+    """
+    Run GET `paths` (already validated to start with /api/) and return
+    the JSON body {"ok": true, "responses": [{"status", "body"}, ...]},
+    in the same order. Sub-responses are spliced in as the bytes their
+    routes produced rather than parsed and re-encoded.
+    """
+    app = current_app._get_current_object()
+    names = _FORWARDED + (app.config.get("TENANT_HEADER", "X-Tenant-ID"),)
+    headers = {k: request.headers[k] for k in names if k in request.headers}
+    base_url = request.host_url          # keeps the subdomain (tenancy)
+    env = {"REMOTE_ADDR": request.remote_addr, SUBREQUEST_ENVIRON_KEY: True}
+    sess = session._get_current_object()
+
+    def run(path):
+        return _dispatch(app, path, base_url, headers, env, sess)
+
+    # While a test savepoint is open every get_db() is the same
+    # connection (db.begin_test_savepoint), so don't share it across threads
+    if len(paths) == 1 or app.extensions.get("hms_db_savepoint"):
+        results = [run(p) for p in paths]
+    else:
+        results = list(_executor(app).map(run, paths))
+    return (
+        b'{"ok":true,"responses":['
+        + b",".join(b'{"status":%d,"body":%s}' % r for r in results)
+        + b"]}"
+    )
+
+
+def _dispatch(app, path, base_url, headers, env, sess):
+    builder = EnvironBuilder(path=path, base_url=base_url, method="GET",
+                             headers=headers, environ_base=env)
+    ctx = app.request_context(builder.get_environ())
+    ctx.session = sess          # already decoded; don't parse the cookie again
+    with ctx:
+        rule = request.url_rule
+        if (request.routing_exception is not None or rule is None
+                or not rule.endpoint.startswith("api_bp.")
+                or rule.endpoint == "api_bp.batch"):
+            return 404, _NOT_FOUND
+        try:
+            response = app.full_dispatch_request()
+        except Exception:
+            app.log_exception(sys.exc_info())
+            return 500, _INTERNAL_ERROR
+        body = response.get_data()
+        if not response.is_json:
+            body = json.dumps(body.decode("utf-8", "replace")).encode()
+        return response.status_code, body.strip() or b"null"
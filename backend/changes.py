@@ -0,0 +1,185 @@
+"""
+Change-data-capture feed for downstream systems (lab, insurance, ...).
+
+init_db installs AFTER INSERT/UPDATE/DELETE triggers on the tables in
+CAPTURED_TABLES. Each write appends one compact record to change_log:
+
+    seq (monotonic, never reused) | ts | table_name | row_id | op (I/U/D)
+
+A consumer syncs with GET /api/changes?since=<last seq>&limit=N: one
+range scan on the change_log primary key, so the cost depends on how
+many changes there are, not on how big the tables are. It then fetches
+whatever rows it cares about by id.
+
+Consumers acknowledge what they have processed (POST /api/changes/ack).
+compact_changes() deletes everything every registered consumer has
+acknowledged; reading from before that point gets 410 (resync needed).
+
+cdc_state.suppress = 1 silences the triggers for the rest of the current
+write transaction's work. It is used for moves that are not real changes:
+archival to the cold tier and schema migrations.
+"""
+from .timeutil import now_iso
+
+CAPTURED_TABLES = ("patients", "appointments", "prescriptions", "billing")
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 5000
+COMPACT_BATCH = 5000
+
+_TRIGGER_SQL = """
+    CREATE TRIGGER IF NOT EXISTS cdc_{table}_{name}
+    AFTER {event} ON {table}
+    WHEN (SELECT suppress FROM cdc_state) = 0
+    BEGIN
+        INSERT INTO change_log (ts, table_name, row_id, op)
+        VALUES (strftime('%Y-%m-%dT%H:%M:%SZ', 'now'), '{table}', {ref}.id, '{op}');
+    END;
+"""
+
+_EVENTS = (
+    ("ins", "INSERT", "NEW", "I"),
+    ("upd", "UPDATE", "NEW", "U"),
+    ("del", "DELETE", "OLD", "D"),
+)
+
+
+def create_change_tables(cur):
+    """
+    change_log + bookkeeping tables (called by init_db).
+    """
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,   -- never reused
+            ts TEXT NOT NULL,
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            op TEXT NOT NULL CHECK(op IN ('I','U','D'))
+        );
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS change_consumers (
+            name TEXT PRIMARY KEY,
+            acked_seq INTEGER NOT NULL DEFAULT 0,
+            updated_at TEXT NOT NULL
+        );
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS cdc_state (
+            id INTEGER PRIMARY KEY CHECK(id = 1),
+            suppress INTEGER NOT NULL DEFAULT 0,
+            compacted_through INTEGER NOT NULL DEFAULT 0
+        );
+    """)
+    cur.execute("INSERT OR IGNORE INTO cdc_state (id) VALUES (1);")
+
+
+def create_change_triggers(cur):
+    """
+    Capture triggers. Runs after the migrations, because rebuilding a
+    table drops its triggers.
+    """
+    for table in CAPTURED_TABLES:
+        for name, event, ref, op in _EVENTS:
+            cur.execute(_TRIGGER_SQL.format(
+                table=table, name=name, event=event, ref=ref, op=op
+            ))
+
+
+def set_suppressed(cur, suppressed: bool):
+    """
+    Turn capture off/on; only call inside the write transaction doing
+    the non-change work, and turn it back on before committing.
+    """
+    cur.execute("UPDATE cdc_state SET suppress = ? WHERE id = 1;", (int(suppressed),))
+
+
+def fetch_changes(conn, since: int, limit: int = DEFAULT_LIMIT):
+    """
+    Changes with seq > since, oldest first.
+    Returns (changes, more) or raises ChangesCompacted.
+    """
+    compacted = conn.execute(
+        "SELECT compacted_through FROM cdc_state WHERE id = 1;"
+    ).fetchone()[0]
+    if since < compacted:
+        raise ChangesCompacted(compacted)
+    rows = conn.execute(
+        """
+        SELECT seq, ts, table_name, row_id, op
+          FROM change_log
+         WHERE seq > ?
+         ORDER BY seq
+         LIMIT ?;
+        """,
+        (since, limit + 1)
+    ).fetchall()
+    more = len(rows) > limit
+    return [
+        {"seq": r[0], "ts": r[1], "table": r[2], "id": r[3], "op": r[4]}
+        for r in rows[:limit]
+    ], more
+
+
+def change_head(conn) -> int:
+    """
+    seq of the newest change ever logged (0 if none); compaction doesn't
+    lower it.
+    """
+    row = conn.execute(
+        "SELECT seq FROM sqlite_sequence WHERE name = 'change_log';"
+    ).fetchone()
+    return row[0] if row else 0
+
+
+def acknowledge(conn, consumer: str, seq: int):
+    """
+    Record that `consumer` has processed everything up to `seq`
+    (never moves backwards, never past change_head: an ack can't let
+    compaction delete changes nobody has read yet). Caller commits.
+    """
+    conn.execute(
+        """
+        INSERT INTO change_consumers (name, acked_seq, updated_at)
+        VALUES (?, MIN(?, COALESCE((SELECT seq FROM sqlite_sequence
+                                     WHERE name = 'change_log'), 0)), ?)
+        ON CONFLICT(name) DO UPDATE
+           SET acked_seq = MAX(acked_seq, excluded.acked_seq),
+               updated_at = excluded.updated_at;
+        """,
+        (consumer, seq, now_iso())
+    )
+
+
+def compact_changes(conn, batch: int = COMPACT_BATCH) -> int:
+    """
+    Delete up to `batch` entries acknowledged by every consumer.
+    Returns how many were deleted. Caller commits.
+    """
+    row = conn.execute("SELECT MIN(acked_seq) FROM change_consumers;").fetchone()
+    if row[0] is None:
+        return 0                      # nobody registered: keep everything
+    last = conn.execute(
+        """
+        SELECT MAX(seq) FROM (
+            SELECT seq FROM change_log WHERE seq <= ? ORDER BY seq LIMIT ?
+        );
+        """,
+        (row[0], batch)
+    ).fetchone()[0]
+    if last is None:
+        return 0
+    deleted = conn.execute("DELETE FROM change_log WHERE seq <= ?;", (last,)).rowcount
+    conn.execute(
+        "UPDATE cdc_state SET compacted_through = MAX(compacted_through, ?) WHERE id = 1;",
+        (last,)
+    )
+    return deleted
+
+
+class ChangesCompacted(Exception):
+    """The requested position has already been compacted away."""
+
+    def __init__(self, compacted_through: int):
+        super().__init__(f"changes up to {compacted_through} were compacted")
+        self.compacted_through = compacted_through
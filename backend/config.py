@@ -18,6 +18,9 @@ class Config:
     # Database location (file-based for normal run)
     DB_PATH = os.environ.get("DB_PATH", str(BASE_DIR / "hms.db"))
 
+    # Idle read-only connections kept per database (GET requests)
+    DB_READ_POOL_SIZE = int(os.environ.get("DB_READ_POOL_SIZE", "8"))
+
     # CORS / cookies / sessions
     SESSION_COOKIE_HTTPONLY = True
     SESSION_COOKIE_SAMESITE = "Strict"
@@ -30,6 +33,128 @@ class Config:
     TESTING = os.environ.get("TESTING", "False").lower() == "true"
     DEBUG = os.environ.get("DEBUG", "False").lower() == "true"
 
+    # Output of `python -m backend.assets build`; compiled in memory if absent
+    ASSET_BUILD_DIR = os.environ.get(
+        "ASSET_BUILD_DIR", str(BASE_DIR.parent / "frontend" / "dist")
+    )
+
+    # Audit trail: "async" (batched background writer), "sync" or "off"
+    AUDIT_MODE = os.environ.get("AUDIT_MODE", "async")
+    AUDIT_BATCH_SIZE = int(os.environ.get("AUDIT_BATCH_SIZE", "200"))
+    AUDIT_FLUSH_MS = int(os.environ.get("AUDIT_FLUSH_MS", "50"))
+    AUDIT_QUEUE_SIZE = int(os.environ.get("AUDIT_QUEUE_SIZE", "10000"))
+    AUDIT_ENQUEUE_TIMEOUT_MS = int(os.environ.get("AUDIT_ENQUEUE_TIMEOUT_MS", "100"))
+    AUDIT_BUSY_TIMEOUT_MS = int(os.environ.get("AUDIT_BUSY_TIMEOUT_MS", "5000"))
+    AUDIT_WRITE_RETRIES = int(os.environ.get("AUDIT_WRITE_RETRIES", "5"))
+
+    # Hot/cold tiering (`python -m backend.archive`): finished rows older
+    # than ARCHIVE_AFTER_DAYS move to this attached database
+    ARCHIVE_DB_PATH = os.environ.get("ARCHIVE_DB_PATH", str(BASE_DIR / "archive.db"))
+    ARCHIVE_AFTER_DAYS = int(os.environ.get("ARCHIVE_AFTER_DAYS", "365"))
+    ARCHIVE_BATCH_SIZE = int(os.environ.get("ARCHIVE_BATCH_SIZE", "500"))
+
+    # Online snapshots (`python -m backend.backup`, POST /api/admin/backups)
+    BACKUP_DIR = os.environ.get("BACKUP_DIR", str(BASE_DIR / "backups"))
+    BACKUP_KEEP = int(os.environ.get("BACKUP_KEEP", "7"))
+    BACKUP_STEP_PAGES = int(os.environ.get("BACKUP_STEP_PAGES", "256"))
+    BACKUP_SLEEP_MS = int(os.environ.get("BACKUP_SLEEP_MS", "10"))
+    BACKUP_COMPRESS = os.environ.get("BACKUP_COMPRESS", "True").lower() == "true"
+
+    # Multi-facility tenancy (see tenancy.py): set TENANT_DB_DIR to serve
+    # one DB file per tenant, chosen by header or subdomain
+    TENANT_DB_DIR = os.environ.get("TENANT_DB_DIR", "")
+    TENANTS = os.environ.get("TENANTS", "")                  # "north,south"
+    TENANT_HEADER = os.environ.get("TENANT_HEADER", "X-Tenant-ID")
+    TENANT_BASE_DOMAIN = os.environ.get("TENANT_BASE_DOMAIN", "")
+    TENANT_MAX_OPEN = int(os.environ.get("TENANT_MAX_OPEN", "64"))
+    TENANT_IDLE_SECONDS = int(os.environ.get("TENANT_IDLE_SECONDS", "300"))
+    TENANT_SEED_DEMO_USERS = (
+        os.environ.get("TENANT_SEED_DEMO_USERS", "False").lower() == "true"
+    )
+
+    # Background jobs (`python -m backend.worker`, POST /api/jobs)
+    JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "2"))
+    JOB_VISIBILITY_SECONDS = float(os.environ.get("JOB_VISIBILITY_SECONDS", "300"))
+    JOB_POLL_SECONDS = float(os.environ.get("JOB_POLL_SECONDS", "0.5"))
+    JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", "5"))
+    JOBS_EXPORT_DIR = os.environ.get("JOBS_EXPORT_DIR", str(BASE_DIR / "exports"))
+
+    # Idempotency-Key response cache for POST retries (idempotency.py)
+    IDEMPOTENCY_TTL_SECONDS = int(os.environ.get("IDEMPOTENCY_TTL_SECONDS", "86400"))
+    IDEMPOTENCY_MAX_KEYS = int(os.environ.get("IDEMPOTENCY_MAX_KEYS", "10000"))
+    IDEMPOTENCY_WAIT_SECONDS = float(os.environ.get("IDEMPOTENCY_WAIT_SECONDS", "5"))
+    IDEMPOTENCY_LEASE_SECONDS = float(os.environ.get("IDEMPOTENCY_LEASE_SECONDS", "60"))
+
+    # POST /api/batch (batch.py): sub-requests per call, threads per app
+    BATCH_MAX_REQUESTS = int(os.environ.get("BATCH_MAX_REQUESTS", "20"))
+    BATCH_WORKERS = int(os.environ.get("BATCH_WORKERS", "4"))
+
+    # Optional ASGI front end for read routes (asgi.py): threads running
+    # Flask/SQLite work, and queued+running requests before answering 503
+    ASGI_WORKERS = int(os.environ.get("ASGI_WORKERS", "8"))
+    ASGI_MAX_PENDING = int(os.environ.get("ASGI_MAX_PENDING", "256"))
+
+    # Sessions (sessions.py): "server" keeps them in SQLite behind an
+    # opaque cookie ID; "cookie" is Flask's signed-cookie session
+    SESSION_BACKEND = os.environ.get("SESSION_BACKEND", "server")
+    SESSION_DB_PATH = os.environ.get("SESSION_DB_PATH", str(BASE_DIR / "sessions.db"))
+    SESSION_IDLE_SECONDS = int(os.environ.get("SESSION_IDLE_SECONDS", "28800"))
+    SESSION_TOUCH_SECONDS = int(os.environ.get("SESSION_TOUCH_SECONDS", "300"))
+    SESSION_CACHE_SIZE = int(os.environ.get("SESSION_CACHE_SIZE", "10000"))
+    SESSION_CACHE_SECONDS = float(os.environ.get("SESSION_CACHE_SECONDS", "5"))
+    SESSION_SWEEP_SECONDS = int(os.environ.get("SESSION_SWEEP_SECONDS", "300"))
+    SESSION_SWEEP_BATCH = int(os.environ.get("SESSION_SWEEP_BATCH", "500"))
+
+    # Clinic analytics (analytics.py): month cubes ending more than
+    # ANALYTICS_SETTLE_DAYS ago are cached for good, newer ones for
+    # ANALYTICS_OPEN_TTL_SECONDS; utilisation = booked slots of
+    # ANALYTICS_SLOT_MINUTES over ANALYTICS_HOURS_PER_DAY per weekday
+    ANALYTICS_SETTLE_DAYS = int(os.environ.get("ANALYTICS_SETTLE_DAYS", "7"))
+    ANALYTICS_OPEN_TTL_SECONDS = float(os.environ.get("ANALYTICS_OPEN_TTL_SECONDS", "60"))
+    ANALYTICS_CACHE_BUCKETS = int(os.environ.get("ANALYTICS_CACHE_BUCKETS", "4096"))
+    ANALYTICS_SLOT_MINUTES = int(os.environ.get("ANALYTICS_SLOT_MINUTES", "30"))
+    ANALYTICS_HOURS_PER_DAY = int(os.environ.get("ANALYTICS_HOURS_PER_DAY", "8"))
+    ANALYTICS_MAX_DAYS = int(os.environ.get("ANALYTICS_MAX_DAYS", "3660"))
+
+    # Day schedule (schedule.py): how many days are cached, and how long
+    # today's and future days are reused (this process drops a day itself
+    # when it books or updates an appointment on it)
+    SCHEDULE_CACHE_DAYS = int(os.environ.get("SCHEDULE_CACHE_DAYS", "1024"))
+    SCHEDULE_OPEN_TTL_SECONDS = float(os.environ.get("SCHEDULE_OPEN_TTL_SECONDS", "30"))
+
+    # Duplicate patients (dedupe.py): score that counts as a probable
+    # match, and how many are reported when registering a patient
+    DEDUPE_MIN_SCORE = float(os.environ.get("DEDUPE_MIN_SCORE", "0.8"))
+    DEDUPE_WARN_LIMIT = int(os.environ.get("DEDUPE_WARN_LIMIT", "5"))
+
+    # Medication catalogue (medications.py): CSV for `python -m
+    # backend.medications load`, how often the autocomplete index checks
+    # for a newer catalogue, and whether prescriptions must name an entry
+    MEDICATION_CSV = os.environ.get(
+        "MEDICATION_CSV", str(BASE_DIR / "data" / "medications.csv")
+    )
+    MEDICATION_RECHECK_SECONDS = float(os.environ.get("MEDICATION_RECHECK_SECONDS", "2"))
+    MEDICATION_REQUIRE_CATALOGUE = (
+        os.environ.get("MEDICATION_REQUIRE_CATALOGUE", "False").lower() == "true"
+    )
+
+    # Drug interactions (interactions.py): CSV for `python -m
+    # backend.interactions load`, and which of a patient's prescriptions
+    # count as current (created in the last N days, newest M of them)
+    INTERACTION_CSV = os.environ.get(
+        "INTERACTION_CSV", str(BASE_DIR / "data" / "interactions.csv")
+    )
+    INTERACTION_LOOKBACK_DAYS = int(os.environ.get("INTERACTION_LOOKBACK_DAYS", "90"))
+    INTERACTION_MAX_HISTORY = int(os.environ.get("INTERACTION_MAX_HISTORY", "200"))
+
+    # Traffic capture (traffic.py): when set, anonymised request shapes
+    # and timings for /api are appended to this file (JSON lines);
+    # SAMPLE is the fraction of requests kept, QUEUE how many lines may
+    # wait for the writer thread before new ones are dropped
+    TRAFFIC_CAPTURE_PATH = os.environ.get("TRAFFIC_CAPTURE_PATH", "")
+    TRAFFIC_CAPTURE_SAMPLE = float(os.environ.get("TRAFFIC_CAPTURE_SAMPLE", "1.0"))
+    TRAFFIC_CAPTURE_QUEUE = int(os.environ.get("TRAFFIC_CAPTURE_QUEUE", "10000"))
+
     # Token lifetime placeholder
     ACCESS_TOKEN_EXP_MIN = int(os.environ.get("ACCESS_TOKEN_EXP_MIN", "60"))
 
@@ -41,7 +166,21 @@ class TestingConfig(Config):
     """
     TESTING = True
     DEBUG = False
-    # In-memory DB so tests don't share state with real data
+    # In-memory DB so tests don't share state with real data.
+    # create_app turns this into a shared-cache in-memory database owned by
+    # the app (see db.attach_memory_database).
     DB_PATH = ":memory:"
+    # Write audit rows inline so they are rolled back with each test
+    AUDIT_MODE = "sync"
+    # No archive unless a test points this at a file
+    ARCHIVE_DB_PATH = None
+    TENANT_DB_DIR = ""
+    # Sessions live only as long as the app
+    SESSION_DB_PATH = ":memory:"
+    TRAFFIC_CAPTURE_PATH = ""
+    # Writes are rolled back after each test, so don't reuse open months
+    ANALYTICS_OPEN_TTL_SECONDS = 0
+    SCHEDULE_OPEN_TTL_SECONDS = 0
+    MEDICATION_RECHECK_SECONDS = 0
     # For tests it's fine to run without secure cookies
     SESSION_COOKIE_SECURE = False
@@ -1,48 +1,328 @@
+import itertools
+import queue
 import sqlite3
-from datetime import datetime
+import threading
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
 from werkzeug.security import generate_password_hash
-from flask import current_app
+from flask import current_app, has_request_context, request
+from .archive import attach_archive
+from .changes import create_change_tables, create_change_triggers, set_suppressed
+from .dedupe import backfill_match_keys, create_dedupe_tables
+from .interactions import (
+    DEFAULT_CSV as DEFAULT_INTERACTIONS_CSV, create_interaction_tables, load_interactions,
+    read_csv as read_interactions,
+)
+from .jobs import create_job_tables
+from .medications import DEFAULT_CSV, create_medication_tables, load_catalogue, read_csv
+from .timeutil import ISO_FORMAT, now_iso, parse_slot
 
-# ---- helpers -------------------------------------------------
-
-def _now_iso() -> str:
-    """UTC timestamp for audit fields."""
-    return datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
+# Requests with these methods get a read-only connection by default.
+_READ_METHODS = ("GET", "HEAD")
+DEFAULT_READ_POOL_SIZE = 8
 
+# ---- helpers -------------------------------------------------
 
-def get_db() -> sqlite3.Connection:
+def get_db(readonly: bool = None) -> sqlite3.Connection:
     """
-    Create a new sqlite3 connection.
+    Get a sqlite3 connection.
     - Enforce foreign keys.
     - Row factory returns dict-like rows.
-    We DO NOT store this globally; each call gets a fresh connection.
+
+    Writers: each call gets a fresh read/write connection (we DO NOT store
+    this globally).
+    Readers (readonly=True, or by default inside a GET/HEAD request): a
+    pooled `mode=ro` connection with query_only set; close() hands it back
+    to the pool. Under WAL, readers never wait for the writer.
+    (While a test savepoint is open everything shares one connection, see
+    begin_test_savepoint.)
     """
     app = current_app if current_app else None
     db_path = None
+    pool_size = DEFAULT_READ_POOL_SIZE
+    pool = None
     if app and app.config.get("DB_PATH"):
         db_path = app.config["DB_PATH"]
+        pool_size = app.config.get("DB_READ_POOL_SIZE", pool_size)
+        if app.extensions.get("hms_db_savepoint"):
+            return _SavepointConnection(app.extensions["hms_db_anchor"])
+        tenants = app.extensions.get("hms_tenants")
+        if tenants is not None and has_request_context():
+            # multi-tenant: this request's database (see tenancy.py)
+            tenant = tenants.for_request()
+            db_path, pool = tenant.db_path, tenant.pool
 
     # Fallback if somehow called before app init
     if not db_path:
         from .config import Config
         db_path = Config.DB_PATH
 
-    conn = sqlite3.connect(db_path)
+    if readonly is None:
+        readonly = has_request_context() and request.method in _READ_METHODS
+    if readonly:
+        return (pool or _reader_pool(db_path, pool_size)).acquire()
+
+    return _connect(db_path)
+
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path, uri=db_path.startswith("file:"))
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA foreign_keys = ON;")
     return conn
 
 
-def init_db(seed_demo_users: bool = True):
+def current_db_path() -> str:
+    """
+    Database file of the current request (its tenant's, when tenancy is
+    on), for code that opens its own connections (audit writer, backups).
+    """
+    tenants = current_app.extensions.get("hms_tenants")
+    if tenants is not None and has_request_context():
+        return tenants.for_request().db_path
+    return current_app.config["DB_PATH"]
+
+
+def current_archive_path():
+    """
+    Cold-tier archive of the current request's database (archive.py),
+    or None if archiving is not configured.
+    """
+    tenants = current_app.extensions.get("hms_tenants")
+    if tenants is not None and has_request_context():
+        return tenants.for_request().archive_path
+    return current_app.config.get("ARCHIVE_DB_PATH")
+
+
+def begin_read(conn):
+    """
+    Start a read transaction so several SELECTs see one snapshot.
+    (No-op if the connection is already inside a transaction.)
+    """
+    if not conn.in_transaction:
+        conn.execute("BEGIN;")
+
+
+@contextmanager
+def read_snapshot(archive_path: str = None):
+    """
+    Read-only connection inside one read transaction, for reports and
+    other multi-query reads that must be mutually consistent. Under WAL
+    the snapshot can stay open as long as needed without blocking writers.
+    archive_path: also ATTACH the cold-tier archive (see archive.py); this
+    has to happen before the transaction starts.
+
+        with read_snapshot() as conn:
+            ...
+    """
+    conn = get_db(readonly=True)
+    try:
+        if archive_path and not conn.in_transaction and Path(archive_path).exists():
+            attach_archive(conn, archive_path)
+        begin_read(conn)
+        yield conn
+    finally:
+        conn.close()
+
+
+# ---- read-only connection pools -------------------------------
+
+_reader_pools = {}
+_reader_pools_lock = threading.Lock()
+
+
+def _reader_pool(db_path: str, size: int):
+    pool = _reader_pools.get(db_path)
+    if pool is None:
+        with _reader_pools_lock:
+            pool = _reader_pools.get(db_path)
+            if pool is None:
+                pool = _reader_pools[db_path] = _ReaderPool(db_path, size)
+    return pool
+
+
+def close_reader_pools():
+    """
+    Close every idle pooled reader (tests, shutdown).
+    """
+    with _reader_pools_lock:
+        pools = list(_reader_pools.values())
+        _reader_pools.clear()
+    for pool in pools:
+        pool.close_all()
+
+
+class _ReaderPool:
+    """
+    Idle read-only connections for one database file, most recently used
+    first (keeps page caches warm). Holds at most `size` idle connections;
+    extra ones opened under load are closed when released.
+    """
+
+    def __init__(self, db_path: str, size: int):
+        self.db_path = db_path
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self.closed = False
+
+    def acquire(self):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._open()
+        return _PooledConnection(self, conn)
+
+    def release(self, conn: sqlite3.Connection):
+        if conn.in_transaction:
+            conn.rollback()
+        conn.set_trace_callback(None)
+        if not self.closed and self._idle.qsize() < self.size:
+            self._idle.put(conn)
+        else:
+            conn.close()
+
+    def close_all(self):
+        """
+        Close idle connections; ones still checked out are closed when
+        they are released.
+        """
+        self.closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def _open(self) -> sqlite3.Connection:
+        if self.db_path.startswith("file:"):
+            # already a URI (e.g. shared in-memory DB, which can't be mode=ro)
+            uri = self.db_path
+        else:
+            uri = Path(self.db_path).resolve().as_uri() + "?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA query_only = ON;")
+        return conn
+
+
+class _PooledConnection:
+    """
+    A pooled reader as handed out by get_db(); close() returns it.
+    """
+
+    def __init__(self, pool: _ReaderPool, conn: sqlite3.Connection):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def cursor(self):
+        return self._conn.cursor()
+
+    def execute(self, *args):
+        return self._conn.execute(*args)
+
+    def close(self):
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            self._pool.release(conn)
+
+
+# ---- in-memory databases / test isolation ---------------------
+# DB_PATH=":memory:" on its own would give every get_db() call a brand
+# new empty database. attach_memory_database() swaps it for a named
+# shared-cache in-memory database and keeps an "anchor" connection open
+# for the lifetime of the app, so the schema survives between requests.
+
+def attach_memory_database(app):
+    uri = f"file:hms-{uuid.uuid4().hex}?mode=memory&cache=shared"
+    anchor = sqlite3.connect(
+        uri, uri=True, check_same_thread=False, isolation_level=None
+    )
+    anchor.row_factory = sqlite3.Row
+    anchor.execute("PRAGMA foreign_keys = ON;")
+    app.config["DB_PATH"] = uri
+    app.extensions["hms_db_anchor"] = anchor
+    app.extensions["hms_db_savepoint"] = False
+
+
+def begin_test_savepoint(app):
+    """
+    Open a savepoint on the anchor connection. Until
+    rollback_test_savepoint() every get_db() call shares the anchor, so
+    everything a test writes (commits included) can be undone at once.
+    """
+    app.extensions["hms_db_anchor"].execute("SAVEPOINT hms_test;")
+    app.extensions["hms_db_savepoint"] = True
+
+
+def rollback_test_savepoint(app):
+    app.extensions["hms_db_savepoint"] = False
+    anchor = app.extensions["hms_db_anchor"]
+    anchor.execute("ROLLBACK TO hms_test;")
+    anchor.execute("RELEASE hms_test;")
+
+
+class _SavepointConnection:
+    """
+    What get_db() hands out while a test savepoint is open: the shared
+    anchor connection, with commit/rollback/close mapped onto a nested
+    savepoint so route code behaves exactly as with a real connection.
+    """
+
+    _ids = itertools.count()
+
+    def __init__(self, anchor: sqlite3.Connection):
+        self._conn = anchor
+        self._name = f"hms_sp_{next(self._ids)}"
+        self._closed = False
+        anchor.execute(f"SAVEPOINT {self._name};")
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def cursor(self):
+        return self._conn.cursor()
+
+    def execute(self, *args):
+        return self._conn.execute(*args)
+
+    def executemany(self, *args):
+        return self._conn.executemany(*args)
+
+    def commit(self):
+        self._conn.execute(f"RELEASE {self._name};")
+        self._conn.execute(f"SAVEPOINT {self._name};")
+
+    def rollback(self):
+        self._conn.execute(f"ROLLBACK TO {self._name};")
+
+    def close(self):
+        # Like sqlite3: closing without commit discards pending changes.
+        if not self._closed:
+            self._closed = True
+            self.rollback()
+            self._conn.execute(f"RELEASE {self._name};")
+
+
+def init_db(seed_demo_users: bool = True, db_path: str = None):
     """
     Create tables if missing.
     Optionally seed demo users for local/demo/testing usage.
     Safe to call multiple times.
+    db_path: initialise this file instead of the app's DB (tenancy.py).
     """
 
-    conn = get_db()
+    conn = _connect(db_path) if db_path else get_db(readonly=False)
     cur = conn.cursor()
 
+    # WAL: readers and the writer don't block each other. Persistent
+    # per database file; a no-op for in-memory databases.
+    if not conn.in_transaction:
+        cur.execute("PRAGMA journal_mode = WAL;")
+
     # USERS (RBAC)
     cur.execute("""
         CREATE TABLE IF NOT EXISTS users (
@@ -74,7 +354,9 @@ def init_db(seed_demo_users: bool = True):
     """)
 
     # APPOINTMENTS
-    # Prevent double booking: (doctor_id,start_time) UNIQUE.
+    # Version-0 shape. Migration 1 adds start_min (epoch minutes) and
+    # migration 2 swaps UNIQUE(doctor_id,start_time) for a partial unique
+    # index over scheduled appointments.
     cur.execute("""
         CREATE TABLE IF NOT EXISTS appointments (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -140,6 +422,74 @@ def init_db(seed_demo_users: bool = True):
         );
     """)
 
+    # AUDIT LOG (written in batches by audit.AuditWriter)
+    # No foreign keys on purpose: the trail must outlive deleted rows.
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS audit_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ts TEXT NOT NULL,
+            user_id INTEGER,
+            role TEXT,
+            action TEXT NOT NULL,              -- read / create / update
+            entity TEXT NOT NULL,              -- patient / appointment / ...
+            entity_id INTEGER,
+            patient_id INTEGER,                -- whose chart was touched
+            method TEXT,
+            path TEXT
+        );
+    """)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_audit_log_patient
+            ON audit_log(patient_id, ts);
+    """)
+
+    # Change-data-capture log (changes.py); its triggers are created
+    # after the migrations below
+    create_change_tables(cur)
+
+    # Background job queue (jobs.py)
+    create_job_tables(cur)
+
+    # Duplicate-patient blocking keys and review queue (dedupe.py)
+    create_dedupe_tables(cur)
+
+    # Medication catalogue (medications.py) and interactions (interactions.py)
+    create_medication_tables(cur)
+    create_interaction_tables(cur)
+
+    # Stored responses for Idempotency-Key retries (idempotency.py)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS idempotency_keys (
+            user_id INTEGER NOT NULL,
+            key TEXT NOT NULL,
+            request_hash TEXT NOT NULL,
+            status_code INTEGER,               -- NULL while in progress
+            response TEXT,
+            created_at REAL NOT NULL,          -- unix time
+            PRIMARY KEY (user_id, key)
+        );
+    """)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_idempotency_created
+            ON idempotency_keys(created_at);
+    """)
+
+    # Hot/cold tiering: per-table horizon of backend/archive.py
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS archive_state (
+            table_name TEXT PRIMARY KEY,
+            horizon NOT NULL                   -- start_min or created_at cutoff
+        );
+    """)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_notifications_user_created
+            ON notifications(user_id, created_at);
+    """)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_billing_patient_created
+            ON billing(patient_id, created_at);
+    """)
+
     # Seed demo users for convenience
     if seed_demo_users:
         demo_users = [
@@ -163,8 +513,252 @@ def init_db(seed_demo_users: bool = True):
                     generate_password_hash(pw_plain),
                     role,
                     full_name,
-                    _now_iso()
+                    now_iso()
                 ))
+        # ...and the bundled medication catalogue and interaction dataset
+        if cur.execute("SELECT version FROM medication_catalogue;").fetchone()[0] == 0:
+            load_catalogue(conn, read_csv(DEFAULT_CSV))
+        if not cur.execute("SELECT 1 FROM drug_interactions LIMIT 1;").fetchone():
+            load_interactions(conn, read_interactions(DEFAULT_INTERACTIONS_CSV))
+
+    conn.commit()
 
+    _apply_migrations(conn)
+    if seed_demo_users:
+        # columns that only exist once the migrations have run
+        cur.execute(
+            "UPDATE users SET department = 'General Medicine' "
+            "WHERE username = 'drsmith' AND department IS NULL;"
+        )
+    create_change_triggers(cur)
     conn.commit()
     conn.close()
+
+
+# ---- migrations ----------------------------------------------
+# The CREATE TABLE statements above are schema version 0. Every later
+# change is a numbered step below; PRAGMA user_version records how far a
+# database file has been upgraded, so existing hms.db files and fresh
+# databases end up with the same schema.
+
+_CREATED_AT_TABLES = (
+    "users", "patients", "appointments", "prescriptions",
+    "billing", "notifications",
+)
+
+
+def _migration_1_epoch_minutes(cur):
+    """
+    - appointments.start_min INTEGER (epoch minutes) + (doctor_id, start_min)
+      index, backfilled from start_time
+    - normalise created_at everywhere to "YYYY-MM-DDTHH:MM:SSZ" (routes used
+      to write datetime.isoformat() with microseconds and no Z)
+    """
+    cur.execute("ALTER TABLE appointments ADD COLUMN start_min INTEGER;")
+    cur.execute("SELECT id, start_time FROM appointments;")
+    cur.executemany(
+        "UPDATE appointments SET start_min = ? WHERE id = ?;",
+        [(parse_slot(r["start_time"]), r["id"]) for r in cur.fetchall()]
+    )
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_appointments_doctor_start
+            ON appointments(doctor_id, start_min);
+    """)
+    for table in _CREATED_AT_TABLES:
+        cur.execute(
+            f"UPDATE {table} "
+            f"SET created_at = strftime('{ISO_FORMAT}', created_at) "
+            f"WHERE created_at NOT LIKE '%Z' "
+            f"AND strftime('{ISO_FORMAT}', created_at) IS NOT NULL;"
+        )
+
+
+def _migration_2_partial_slot_index(cur):
+    """
+    Replace the table-level UNIQUE(doctor_id, start_time) with a partial
+    unique index over scheduled appointments only, so a canceled (or
+    completed) appointment no longer blocks its slot forever.
+    SQLite can't drop a table constraint, so the table is rebuilt
+    (foreign keys are switched off by _apply_migrations around this).
+    """
+    cur.execute("""
+        CREATE TABLE appointments_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            patient_id INTEGER NOT NULL,
+            doctor_id INTEGER NOT NULL,
+            start_time TEXT NOT NULL,          -- "YYYY-MM-DD HH:MM"
+            reason TEXT DEFAULT '',
+            status TEXT NOT NULL DEFAULT 'scheduled'
+                CHECK(status IN ('scheduled','completed','canceled')),
+            created_at TEXT NOT NULL,
+            start_min INTEGER,                 -- epoch minutes of start_time
+            FOREIGN KEY(patient_id) REFERENCES patients(id)
+                ON DELETE CASCADE,
+            FOREIGN KEY(doctor_id) REFERENCES users(id)
+                ON DELETE CASCADE
+        );
+    """)
+    cur.execute("""
+        INSERT INTO appointments_new
+            (id, patient_id, doctor_id, start_time, reason, status,
+             created_at, start_min)
+        SELECT id, patient_id, doctor_id, start_time, reason, status,
+               created_at, start_min
+          FROM appointments;
+    """)
+    cur.execute("DROP TABLE appointments;")
+    cur.execute("ALTER TABLE appointments_new RENAME TO appointments;")
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_appointments_doctor_start
+            ON appointments(doctor_id, start_min);
+    """)
+    # Prevent double booking: one *scheduled* appointment per doctor slot.
+    cur.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS ux_appointments_doctor_slot
+            ON appointments(doctor_id, start_min)
+         WHERE status = 'scheduled';
+    """)
+
+
+def _migration_3_analytics_index(cur):
+    """
+    Covering index for date-range scans across all doctors (analytics.py
+    aggregates (start_min, doctor_id, status) without touching the table).
+    """
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_appointments_start_doctor_status
+            ON appointments(start_min, doctor_id, status);
+    """)
+
+
+def _migration_4_patient_match_keys(cur):
+    """
+    Blocking keys (dedupe.py) for the patients registered before they
+    were maintained on insert.
+    """
+    backfill_match_keys(cur)
+
+
+def _migration_5_prescription_medication_id(cur):
+    """
+    prescriptions.medication_id: the catalogue entry (medications.py) the
+    free-text medication names, NULL if none.
+    """
+    cur.execute(
+        "ALTER TABLE prescriptions ADD COLUMN medication_id INTEGER "
+        "REFERENCES medications(id);"
+    )
+    cur.execute("""
+        UPDATE prescriptions
+           SET medication_id = (SELECT m.id FROM medications m
+                                 WHERE m.name = prescriptions.medication);
+    """)
+
+
+def _migration_6_prescription_history_index(cur):
+    """
+    A patient's recent prescriptions in one range scan (interactions.py
+    checks each new prescription against them).
+    """
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_prescriptions_patient_created
+            ON prescriptions(patient_id, created_at, medication_id);
+    """)
+
+
+def _migration_7_user_department(cur):
+    """
+    users.department (free text, NULL if unassigned) for the
+    GET /api/schedule?department= filter.
+    """
+    cur.execute("ALTER TABLE users ADD COLUMN department TEXT;")
+
+
+def _migration_8_prescription_appointment_index(cur):
+    """
+    Prescriptions by appointment: archive.py skips appointments that still
+    have prescriptions, and deleting an appointment looks up its children.
+    """
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_prescriptions_appointment
+            ON prescriptions(appointment_id);
+    """)
+
+
+def _migration_9_idempotency_lease(cur):
+    """
+    idempotency_keys.claimed_at: when the current owner claimed an
+    in-progress key, so a retry can take over a claim whose request died.
+    """
+    cur.execute("ALTER TABLE idempotency_keys ADD COLUMN claimed_at REAL;")
+    cur.execute("UPDATE idempotency_keys SET claimed_at = created_at;")
+
+
+# (version, migration, tables whose foreign keys it can break: the ones
+# it writes, plus the children of a table it rebuilds)
+MIGRATIONS = [
+    (1, _migration_1_epoch_minutes, _CREATED_AT_TABLES),
+    (2, _migration_2_partial_slot_index, ("appointments", "prescriptions")),
+    (3, _migration_3_analytics_index, ("appointments",)),
+    (4, _migration_4_patient_match_keys, ("patient_match_keys",)),
+    (5, _migration_5_prescription_medication_id, ("prescriptions",)),
+    (6, _migration_6_prescription_history_index, ("prescriptions",)),
+    (7, _migration_7_user_department, ("users",)),
+    (8, _migration_8_prescription_appointment_index, ("prescriptions",)),
+    (9, _migration_9_idempotency_lease, ("idempotency_keys",)),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def _dangling_keys(cur, tables) -> set:
+    """
+    foreign_key_check rows (table, rowid, parent, fk id) of `tables`.
+    """
+    return {
+        tuple(row)
+        for table in tables
+        for row in cur.execute(f"PRAGMA foreign_key_check({table});").fetchall()
+    }
+
+
+def _apply_migrations(conn: sqlite3.Connection):
+    """
+    Run every migration newer than the database's user_version, each in
+    its own write transaction (BEGIN IMMEDIATE also serialises two
+    processes starting up against the same file).
+
+    Foreign keys are off while migrating: table rebuilds DROP the old
+    table, which would otherwise fire ON DELETE CASCADE on its children.
+    foreign_key_check runs on the migration's tables before each commit
+    instead; only violations the migration added fail it (databases
+    archived before archive.py kept prescribed appointments hot already
+    have dangling prescriptions, and must still upgrade).
+    """
+    cur = conn.cursor()
+    if cur.execute("PRAGMA user_version;").fetchone()[0] >= SCHEMA_VERSION:
+        return
+    cur.execute("PRAGMA foreign_keys = OFF;")
+    try:
+        for version, migrate, tables in MIGRATIONS:
+            cur.execute("BEGIN IMMEDIATE;")
+            try:
+                current = cur.execute("PRAGMA user_version;").fetchone()[0]
+                if current >= version:
+                    conn.rollback()
+                    continue
+                dangling = _dangling_keys(cur, tables)
+                # rewriting rows is not a data change for CDC consumers
+                set_suppressed(cur, True)
+                migrate(cur)
+                set_suppressed(cur, False)
+                if _dangling_keys(cur, tables) - dangling:
+                    raise sqlite3.IntegrityError(
+                        f"migration {version} left dangling foreign keys"
+                    )
+                cur.execute(f"PRAGMA user_version = {version};")
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+    finally:
+        cur.execute("PRAGMA foreign_keys = ON;")
@@ -0,0 +1,332 @@
+"""
+Duplicate patient charts: blocking keys instead of pairwise comparison.
+
+Comparing every new chart with every existing one (or every pair, for a
+clean-up) is O(n) per registration and O(n^2) per scan. Instead each
+patient gets a few blocking keys when it is registered:
+
+    p:<last 10 digits of the phone>         "555-0100" -> "p:5550100"
+    n:<Soundex of last name>:<dob>          "Smyth", 1990-01-01 -> "n:S530:1990-01-01"
+
+stored in patient_match_keys (key, patient_id), a WITHOUT ROWID table
+clustered on key. Only patients sharing a key are ever compared:
+
+- find_matches() runs at registration. It looks up the new chart's keys
+  (two index probes) and scores the few charts found, so
+  POST /api/patients can warn about probable duplicates in milliseconds.
+- scan_duplicates() (the "duplicate_scan" job) walks the key index one
+  page of blocks at a time, scores the pairs inside each block and
+  upserts the ones scoring >= min_score into duplicate_candidates for
+  review (GET /api/patients/duplicates).
+
+Blocks larger than max_block (a shared clinic or care-home phone number)
+are skipped by the scan: they hold many pairs and few real duplicates.
+
+The score (0..1) weighs last name 0.4, first name 0.3 (Jaro-Winkler),
+date of birth 0.2 (0.1 for a single-field typo or swapped day/month) and
+phone 0.1.
+"""
+from .timeutil import now_iso
+
+MIN_SCORE = 0.8
+MAX_BLOCK = 50
+PAGE_BLOCKS = 1000
+
+_SOUNDEX = {}
+for _letters, _digit in (("BFPV", "1"), ("CGJKQSXZ", "2"), ("DT", "3"),
+                         ("L", "4"), ("MN", "5"), ("R", "6")):
+    for _c in _letters:
+        _SOUNDEX[_c] = _digit
+
+
+def create_dedupe_tables(cur):
+    """
+    Blocking keys + review queue (called by init_db; existing charts are
+    keyed by migration 4).
+    """
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS patient_match_keys (
+            key TEXT NOT NULL,
+            patient_id INTEGER NOT NULL,
+            PRIMARY KEY (key, patient_id),
+            FOREIGN KEY(patient_id) REFERENCES patients(id) ON DELETE CASCADE
+        ) WITHOUT ROWID;
+    """)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_patient_match_keys_patient
+            ON patient_match_keys(patient_id);
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS duplicate_candidates (
+            patient_a INTEGER NOT NULL,         -- patient_a < patient_b
+            patient_b INTEGER NOT NULL,
+            score REAL NOT NULL,
+            matched_on TEXT NOT NULL,           -- "phone" / "name_dob"
+            status TEXT NOT NULL DEFAULT 'open'
+                CHECK(status IN ('open','dismissed','merged')),
+            found_at TEXT NOT NULL,
+            PRIMARY KEY (patient_a, patient_b),
+            FOREIGN KEY(patient_a) REFERENCES patients(id) ON DELETE CASCADE,
+            FOREIGN KEY(patient_b) REFERENCES patients(id) ON DELETE CASCADE
+        ) WITHOUT ROWID;
+    """)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_duplicate_candidates_status
+            ON duplicate_candidates(status, score);
+    """)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_duplicate_candidates_b
+            ON duplicate_candidates(patient_b);
+    """)
+
+
+# ---- normalisation ---------------------------------------------
+
+def normalise_phone(phone: str):
+    """
+    Digits only, last 10 of them (drops country codes); None if fewer
+    than 7 digits remain.
+    """
+    digits = "".join(c for c in phone or "" if c.isdigit())[-10:]
+    return digits if len(digits) >= 7 else None
+
+
+def soundex(name: str) -> str:
+    """
+    American Soundex: "Robert" and "Rupert" -> "R163". "" for no letters.
+    """
+    letters = [c for c in (name or "").upper() if "A" <= c <= "Z"]
+    if not letters:
+        return ""
+    code = [letters[0]]
+    last = _SOUNDEX.get(letters[0], "")
+    for c in letters[1:]:
+        digit = _SOUNDEX.get(c, "")
+        if digit and digit != last:
+            code.append(digit)
+            if len(code) == 4:
+                break
+        if c not in "HW":                # H/W don't separate equal codes
+            last = digit
+    return "".join(code).ljust(4, "0")
+
+
+def blocking_keys(last_name: str, dob: str, phone: str) -> list:
+    keys = []
+    digits = normalise_phone(phone)
+    if digits:
+        keys.append("p:" + digits)
+    code = soundex(last_name)
+    if code and dob:
+        keys.append(f"n:{code}:{dob}")
+    return keys
+
+
+def add_match_keys(cur, patient_id: int, last_name: str, dob: str, phone: str):
+    """
+    Index a newly inserted patient (same transaction as the INSERT).
+    """
+    cur.executemany(
+        "INSERT OR IGNORE INTO patient_match_keys (key, patient_id) VALUES (?, ?);",
+        [(key, patient_id) for key in blocking_keys(last_name, dob, phone)],
+    )
+
+
+def backfill_match_keys(cur, batch: int = 10000) -> int:
+    """
+    Key every patient that has no keys yet; returns how many were keyed.
+    """
+    keyed = 0
+    last_id = 0
+    while True:
+        rows = cur.execute(
+            """
+            SELECT id, last_name, dob, phone FROM patients
+             WHERE id > ?
+               AND NOT EXISTS (SELECT 1 FROM patient_match_keys k
+                                WHERE k.patient_id = patients.id)
+             ORDER BY id LIMIT ?;
+            """,
+            (last_id, batch)
+        ).fetchall()
+        if not rows:
+            return keyed
+        cur.executemany(
+            "INSERT OR IGNORE INTO patient_match_keys (key, patient_id) VALUES (?, ?);",
+            [(key, r[0]) for r in rows for key in blocking_keys(r[1], r[2], r[3])],
+        )
+        keyed += len(rows)
+        last_id = rows[-1][0]
+
+
+# ---- scoring -----------------------------------------------------
+
+def jaro_winkler(a: str, b: str) -> float:
+    a, b = a.lower(), b.lower()
+    if a == b:
+        return 1.0 if a else 0.0
+    la, lb = len(a), len(b)
+    if not la or not lb:
+        return 0.0
+    window = max(la, lb) // 2 - 1
+    used = [False] * lb
+    matched_a = []
+    for i, c in enumerate(a):
+        for j in range(max(0, i - window), min(lb, i + window + 1)):
+            if not used[j] and b[j] == c:
+                used[j] = True
+                matched_a.append(c)
+                break
+    m = len(matched_a)
+    if not m:
+        return 0.0
+    matched_b = [b[j] for j in range(lb) if used[j]]
+    transpositions = sum(x != y for x, y in zip(matched_a, matched_b)) / 2
+    jaro = (m / la + m / lb + (m - transpositions) / m) / 3
+    prefix = 0
+    for x, y in zip(a[:4], b[:4]):
+        if x != y:
+            break
+        prefix += 1
+    return jaro + prefix * 0.1 * (1 - jaro)
+
+
+def _dob_similarity(a: str, b: str) -> float:
+    if a == b:
+        return 1.0
+    pa, pb = a.split("-"), b.split("-")
+    if len(pa) != 3 or len(pb) != 3:
+        return 0.0
+    if sum(x != y for x, y in zip(pa, pb)) == 1:
+        return 0.5
+    if pa[0] == pb[0] and pa[1] == pb[2] and pa[2] == pb[1]:
+        return 0.5
+    return 0.0
+
+
+def similarity(a, b) -> float:
+    """
+    a, b: (first_name, last_name, dob, phone) tuples.
+    """
+    score = (
+        0.4 * jaro_winkler(a[1], b[1])
+        + 0.3 * jaro_winkler(a[0], b[0])
+        + 0.2 * _dob_similarity(a[2], b[2])
+    )
+    if normalise_phone(a[3]) is not None and normalise_phone(a[3]) == normalise_phone(b[3]):
+        score += 0.1
+    return round(score, 4)
+
+
+# ---- registration check -----------------------------------------
+
+def find_matches(conn, first_name: str, last_name: str, dob: str, phone: str,
+                 min_score: float = MIN_SCORE, limit: int = 5,
+                 max_block: int = MAX_BLOCK) -> list:
+    """
+    Existing patients that probably are this person, best first:
+    [{"patient_id", "first_name", "last_name", "dob", "score"}].
+    """
+    keys = blocking_keys(last_name, dob, phone)
+    if not keys:
+        return []
+    marks = ",".join("?" * len(keys))
+    rows = conn.execute(
+        f"""
+        SELECT id, first_name, last_name, dob, phone FROM patients
+         WHERE id IN (SELECT patient_id FROM patient_match_keys
+                       WHERE key IN ({marks}) LIMIT ?);
+        """,
+        (*keys, max_block * len(keys))
+    ).fetchall()
+    probe = (first_name, last_name, dob, phone)
+    found = []
+    for row in rows:
+        score = similarity(probe, tuple(row[1:]))
+        if score >= min_score:
+            found.append({
+                "patient_id": row[0], "first_name": row[1], "last_name": row[2],
+                "dob": row[3], "score": score,
+            })
+    found.sort(key=lambda m: (-m["score"], m["patient_id"]))
+    return found[:limit]
+
+
+# ---- batch scan ----------------------------------------------------
+
+def _blocks_page(conn, after: str, page: int):
+    return conn.execute(
+        """
+        SELECT key, group_concat(patient_id) FROM patient_match_keys
+         WHERE key > ?
+         GROUP BY key HAVING COUNT(*) > 1
+         ORDER BY key LIMIT ?;
+        """,
+        (after, page)
+    ).fetchall()
+
+
+def scan_duplicates(conn, min_score: float = MIN_SCORE, max_block: int = MAX_BLOCK,
+                    page_blocks: int = PAGE_BLOCKS) -> dict:
+    """
+    Score every pair of patients sharing a blocking key and upsert those
+    scoring >= min_score into duplicate_candidates (reviewed pairs keep
+    their status). Commits once per page of blocks, so the write lock is
+    only held briefly. Safe to re-run.
+    """
+    stats = {"blocks": 0, "oversized": 0, "pairs": 0, "candidates": 0}
+    seen = set()                          # pairs sharing more than one key
+    after = ""
+    while True:
+        page = _blocks_page(conn, after, page_blocks)
+        if not page:
+            return stats
+        after = page[-1][0]
+        blocks = []
+        wanted = set()
+        for key, ids in page:
+            members = sorted(int(i) for i in ids.split(","))
+            if len(members) > max_block:
+                stats["oversized"] += 1
+                continue
+            blocks.append(("phone" if key.startswith("p:") else "name_dob", members))
+            wanted.update(members)
+        stats["blocks"] += len(page)
+
+        people = {}
+        wanted = list(wanted)
+        for i in range(0, len(wanted), 500):
+            chunk = wanted[i:i + 500]
+            for row in conn.execute(
+                "SELECT id, first_name, last_name, dob, phone FROM patients "
+                f"WHERE id IN ({','.join('?' * len(chunk))});", chunk
+            ):
+                people[row[0]] = tuple(row[1:])
+
+        found = []
+        stamp = now_iso()
+        for matched_on, members in blocks:
+            members = [m for m in members if m in people]
+            for i, a in enumerate(members):
+                for b in members[i + 1:]:
+                    if (a, b) in seen:
+                        continue
+                    seen.add((a, b))
+                    stats["pairs"] += 1
+                    score = similarity(people[a], people[b])
+                    if score >= min_score:
+                        found.append((a, b, score, matched_on, stamp))
+        if found:
+            conn.executemany(
+                """
+                INSERT INTO duplicate_candidates
+                    (patient_a, patient_b, score, matched_on, found_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (patient_a, patient_b) DO UPDATE
+                   SET score = excluded.score, found_at = excluded.found_at
+                 WHERE status = 'open';
+                """,
+                found
+            )
+            conn.commit()
+            stats["candidates"] += len(found)
@@ -0,0 +1,194 @@
+"""
+Idempotency-Key support for POST routes.
+
+The frontend sends a fresh key with every logical submission and reuses it
+when it retries after a network error. The first request with a key runs
+normally and its response is stored. Repeats get that stored response back
+(with an Idempotent-Replayed: true header) and the insert is not run again.
+
+    @api_bp.route("/patients", methods=["POST"])
+    @idempotent
+    def create_patient(): ...
+
+Rules:
+- Keys are scoped per user. Only logged-in callers are cached.
+- Claiming a key is an INSERT OR IGNORE on (user_id, key), so only one
+  of several concurrent duplicates gets to run the route. The others
+  wait (up to IDEMPOTENCY_WAIT_SECONDS) for its response, then replay
+  it, or get 409 if it's still in progress.
+- The same key with a different body/path is a client bug: 422.
+- 5xx, 401/403 (session or CSRF problems) and 409 responses and
+  exceptions release the key, so a retry runs the route again. So does a
+  failure to store the response (the route's own response still goes out).
+- A claim is a lease: if the request dies without storing or releasing
+  (worker killed), a retry takes the key over once the claim is older than
+  IDEMPOTENCY_LEASE_SECONDS instead of getting 409 until the TTL.
+- The table is bounded: rows expire after IDEMPOTENCY_TTL_SECONDS, and
+  every PRUNE_EVERY new keys the oldest beyond IDEMPOTENCY_MAX_KEYS are
+  dropped.
+"""
+import hashlib
+import logging
+import sqlite3
+import time
+from functools import wraps
+
+from flask import current_app, jsonify, request, session
+
+from .db import get_db
+
+log = logging.getLogger(__name__)
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LEN = 255
+PRUNE_EVERY = 100
+_POLL = 0.05
+# not worth replaying: fixing the session/CSRF token or waiting may help
+_NOT_STORED = frozenset((401, 403, 409))
+
+
+def idempotent(view):
+    """
+    Route decorator; a no-op unless the request carries Idempotency-Key.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(HEADER)
+        user_id = session.get("user_id")
+        if key is None or user_id is None:
+            return view(*args, **kwargs)
+        if not key or len(key) > MAX_KEY_LEN:
+            return jsonify({"ok": False, "error": f"Invalid {HEADER}"}), 400
+
+        digest = hashlib.sha256(
+            request.method.encode() + b" " + request.path.encode() + b"\n"
+            + request.get_data()
+        ).hexdigest()
+        cfg = current_app.config
+
+        if not _claim(user_id, key, digest, cfg["IDEMPOTENCY_TTL_SECONDS"],
+                      cfg["IDEMPOTENCY_MAX_KEYS"], cfg["IDEMPOTENCY_LEASE_SECONDS"]):
+            return _replay(user_id, key, digest, cfg["IDEMPOTENCY_WAIT_SECONDS"])
+
+        try:
+            response = current_app.make_response(view(*args, **kwargs))
+        except Exception:
+            _release(user_id, key)
+            raise
+        if response.status_code >= 500 or response.status_code in _NOT_STORED:
+            _release(user_id, key)
+        else:
+            try:
+                _store(user_id, key, response)
+            except sqlite3.Error:
+                log.exception("idempotency: could not store the response for a key")
+                try:
+                    _release(user_id, key)
+                except sqlite3.Error:
+                    pass                  # the lease runs out instead
+        return response
+
+    return wrapper
+
+
+# ---- helpers -------------------------------------------------
+
+def _claim(user_id, key, digest, ttl, max_keys, lease) -> bool:
+    """
+    True if this request now owns the key (and must run the route): a new
+    key, or a same-request claim still in progress after `lease` seconds.
+    """
+    now = time.time()
+    conn = get_db()
+    conn.execute(
+        "DELETE FROM idempotency_keys WHERE user_id = ? AND key = ? AND created_at < ?;",
+        (user_id, key, now - ttl)
+    )
+    cur = conn.execute(
+        """
+        INSERT OR IGNORE INTO idempotency_keys
+            (user_id, key, request_hash, created_at, claimed_at)
+        VALUES (?, ?, ?, ?, ?);
+        """,
+        (user_id, key, digest, now, now)
+    )
+    claimed = cur.rowcount == 1
+    if claimed and cur.lastrowid % PRUNE_EVERY == 0:
+        _prune(conn, now - ttl, max_keys)
+    elif not claimed:
+        claimed = conn.execute(
+            """
+            UPDATE idempotency_keys SET claimed_at = ?
+             WHERE user_id = ? AND key = ? AND request_hash = ?
+               AND status_code IS NULL AND claimed_at < ?;
+            """,
+            (now, user_id, key, digest, now - lease)
+        ).rowcount == 1
+    conn.commit()
+    conn.close()
+    return claimed
+
+
+def _prune(conn, expired_before, max_keys):
+    conn.execute("DELETE FROM idempotency_keys WHERE created_at < ?;", (expired_before,))
+    conn.execute(
+        """
+        DELETE FROM idempotency_keys
+         WHERE created_at < (SELECT created_at FROM idempotency_keys
+                              ORDER BY created_at DESC LIMIT 1 OFFSET ?);
+        """,
+        (max_keys - 1,)
+    )
+
+
+def _replay(user_id, key, digest, wait):
+    deadline = time.monotonic() + wait
+    while True:
+        conn = get_db(readonly=True)
+        row = conn.execute(
+            """
+            SELECT request_hash, status_code, response FROM idempotency_keys
+             WHERE user_id = ? AND key = ?;
+            """,
+            (user_id, key)
+        ).fetchone()
+        conn.close()
+        if row is None:
+            # the first attempt failed and released the key; let the
+            # client retry rather than racing another claim here
+            return jsonify({"ok": False, "error": "Retry the request"}), 409
+        if row["request_hash"] != digest:
+            return jsonify({
+                "ok": False, "error": f"{HEADER} was used for a different request",
+            }), 422
+        if row["status_code"] is not None:
+            response = current_app.response_class(
+                row["response"], status=row["status_code"], mimetype="application/json"
+            )
+            response.headers["Idempotent-Replayed"] = "true"
+            return response
+        if time.monotonic() >= deadline:
+            return jsonify({"ok": False, "error": "Request is still in progress"}), 409
+        time.sleep(_POLL)
+
+
+def _store(user_id, key, response):
+    conn = get_db()
+    conn.execute(
+        """
+        UPDATE idempotency_keys SET status_code = ?, response = ?
+         WHERE user_id = ? AND key = ?;
+        """,
+        (response.status_code, response.get_data(as_text=True), user_id, key)
+    )
+    conn.commit()
+    conn.close()
+
+
+def _release(user_id, key):
+    conn = get_db()
+    conn.execute(
+        "DELETE FROM idempotency_keys WHERE user_id = ? AND key = ?;", (user_id, key)
+    )
+    conn.commit()
+    conn.close()
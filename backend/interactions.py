@@ -0,0 +1,353 @@
+"""
+Drug-interaction checks against a precomputed interaction graph.
+
+The dataset (drug_interactions table) lists pairs of ingredients with a
+severity and a note. It is loaded from a CSV with columns ingredient_a,
+ingredient_b, severity, description:
+
+    python -m backend.interactions load [--csv backend/data/interactions.csv]
+
+Loading bumps medication_catalogue.version like a catalogue reload does.
+Demo databases are seeded from the bundled CSV by init_db.
+
+The dataset is keyed by ingredient, prescriptions by catalogue entry
+(medication_id). InteractionGraph joins the two once. A product's
+ingredients are its generic name split on "/", so co-amoxiclav carries
+amoxicillin's interactions. The graph stores, for every medication id,
+the medication ids it interacts with. The adjacency is compact (CSR):
+
+    _offsets[id] .. _offsets[id + 1]   its slice of _targets / _edges
+    _targets[i]                        the other medication id
+    _edges[i]                          row of `details` (severity, note)
+
+The graph lives in memory per database and is rebuilt when the catalogue
+version changes (medications.MedicationCatalogue).
+
+check_prescription() runs in create_prescription. One query on
+(patient_id, created_at) reads the patient's prescriptions from the last
+INTERACTION_LOOKBACK_DAYS, newest first, at most INTERACTION_MAX_HISTORY
+of them. The new medication's adjacency row is then scanned against
+them. Neither step depends on how long the patient's history is, so the
+check stays flat. audit_interactions() (the "interaction_audit" job)
+walks every patient's recent prescriptions the same way.
+
+Prescriptions without a medication_id (free text) are not checked.
+"""
+import argparse
+import csv
+import sqlite3
+import threading
+from array import array
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from flask import current_app
+
+from .medications import MedicationCatalogue
+from .timeutil import ISO_FORMAT, now_iso
+
+DEFAULT_CSV = Path(__file__).resolve().parent / "data" / "interactions.csv"
+CSV_COLUMNS = ("ingredient_a", "ingredient_b", "severity", "description")
+SEVERITIES = ("minor", "moderate", "major", "contraindicated")   # ascending
+LOOKBACK_DAYS = 90
+MAX_HISTORY = 200
+MAX_FINDINGS = 500
+
+_lock = threading.Lock()
+
+
+def create_interaction_tables(cur):
+    """
+    Ingredient-pair dataset (called by init_db).
+    """
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS drug_interactions (
+            ingredient_a TEXT NOT NULL,         -- ingredient_a < ingredient_b
+            ingredient_b TEXT NOT NULL,
+            severity TEXT NOT NULL CHECK(severity IN (
+                'minor','moderate','major','contraindicated'
+            )),
+            description TEXT NOT NULL,
+            PRIMARY KEY (ingredient_a, ingredient_b)
+        ) WITHOUT ROWID;
+    """)
+
+
+def ingredients(generic: str) -> list:
+    """
+    "amoxicillin/clavulanic acid" -> ["amoxicillin", "clavulanic acid"].
+    """
+    return [part for part in (p.strip() for p in generic.lower().split("/")) if part]
+
+
+# ---- loading -------------------------------------------------------
+
+def read_csv(path) -> list:
+    """
+    (ingredient_a, ingredient_b, severity, description) rows with a < b;
+    raises ValueError on a missing column, an unknown severity, a drug
+    paired with itself or a pair listed twice.
+    """
+    rows, seen = [], set()
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        missing = set(CSV_COLUMNS) - set(reader.fieldnames or ())
+        if missing:
+            raise ValueError(f"{path}: missing column(s) {sorted(missing)}")
+        for line, rec in enumerate(reader, start=2):
+            a = " ".join((rec["ingredient_a"] or "").lower().split())
+            b = " ".join((rec["ingredient_b"] or "").lower().split())
+            severity = (rec["severity"] or "").strip().lower()
+            if not a or not b or a == b:
+                raise ValueError(f"{path}:{line}: needs two different ingredients")
+            if severity not in SEVERITIES:
+                raise ValueError(f"{path}:{line}: severity must be one of {SEVERITIES}")
+            a, b = min(a, b), max(a, b)
+            if (a, b) in seen:
+                raise ValueError(f"{path}:{line}: duplicate pair {a!r}, {b!r}")
+            seen.add((a, b))
+            rows.append((a, b, severity, (rec["description"] or "").strip()))
+    return rows
+
+
+def load_interactions(conn, rows) -> dict:
+    """
+    Replace the dataset with `rows` and bump the catalogue version, so
+    cached graphs are rebuilt. Caller commits.
+    """
+    conn.execute("DELETE FROM drug_interactions;")
+    conn.executemany(
+        "INSERT INTO drug_interactions (ingredient_a, ingredient_b, severity, description) "
+        "VALUES (?, ?, ?, ?);",
+        rows
+    )
+    conn.execute(
+        "UPDATE medication_catalogue SET version = version + 1, loaded_at = ? WHERE id = 1;",
+        (now_iso(),)
+    )
+    version = conn.execute(
+        "SELECT version FROM medication_catalogue WHERE id = 1;"
+    ).fetchone()[0]
+    return {"pairs": len(rows), "version": version}
+
+
+# ---- the graph -----------------------------------------------------
+
+class InteractionGraph:
+    """
+    Medication-id adjacency (CSR) over the ingredient-pair dataset.
+    """
+
+    __slots__ = ("version", "details", "_offsets", "_targets", "_edges")
+
+    def __init__(self, medications, pairs, version: int = 0):
+        # medications: (id, generic); pairs: (a, b, severity, description)
+        self.version = version
+        by_ingredient = {}
+        top = 0
+        for mid, generic in medications:
+            top = max(top, mid)
+            for name in ingredients(generic):
+                by_ingredient.setdefault(name, []).append(mid)
+
+        self.details = []
+        edges = []                          # (medication, other, detail)
+        degree = [0] * (top + 2)
+        for a, b, severity, description in pairs:
+            left, right = by_ingredient.get(a), by_ingredient.get(b)
+            if not left or not right:
+                continue
+            k = len(self.details)
+            self.details.append((a, b, severity, description))
+            for m in left:
+                for n in right:
+                    if m != n:              # one product containing both
+                        edges.append((m, n, k))
+                        degree[m] += 1
+                        degree[n] += 1
+
+        offsets = array("I", [0]) * (top + 2)
+        for mid in range(top + 1):
+            offsets[mid + 1] = offsets[mid] + degree[mid]
+        fill = array("I", offsets)
+        self._targets = array("I", [0]) * offsets[-1]
+        self._edges = array("I", [0]) * offsets[-1]
+        for m, n, k in edges:
+            for src, dst in ((m, n), (n, m)):
+                i = fill[src]
+                self._targets[i] = dst
+                self._edges[i] = k
+                fill[src] = i + 1
+        self._offsets = offsets
+
+    def __len__(self):
+        return len(self._targets) // 2
+
+    def interactions_with(self, medication_id: int, others) -> list:
+        """
+        (other_id, detail_row) for every id in `others` (a set or dict)
+        that interacts with medication_id.
+        """
+        if not 0 <= medication_id < len(self._offsets) - 1:
+            return []
+        targets, edges = self._targets, self._edges
+        return [
+            (targets[i], edges[i])
+            for i in range(self._offsets[medication_id], self._offsets[medication_id + 1])
+            if targets[i] in others
+        ]
+
+
+def build_graph(conn) -> InteractionGraph:
+    version = conn.execute(
+        "SELECT version FROM medication_catalogue WHERE id = 1;"
+    ).fetchone()[0]
+    # retired entries too: old prescriptions still point at them
+    medications = conn.execute("SELECT id, generic FROM medications;").fetchall()
+    pairs = conn.execute(
+        "SELECT ingredient_a, ingredient_b, severity, description FROM drug_interactions;"
+    ).fetchall()
+    return InteractionGraph(
+        ((r[0], r[1]) for r in medications), (tuple(r) for r in pairs), version
+    )
+
+
+def graphs(app) -> MedicationCatalogue:
+    holder = app.extensions.get("hms_interactions")
+    if holder is None:
+        with _lock:
+            holder = app.extensions.get("hms_interactions")
+            if holder is None:
+                holder = MedicationCatalogue(
+                    app.config["MEDICATION_RECHECK_SECONDS"], build=build_graph
+                )
+                app.extensions["hms_interactions"] = holder
+    return holder
+
+
+# ---- checks --------------------------------------------------------
+
+def lookback_start(days: int) -> str:
+    """
+    created_at of the oldest prescription still considered current.
+    """
+    return (datetime.utcnow() - timedelta(days=days)).strftime(ISO_FORMAT)
+
+
+def _warning(graph, detail: int, row) -> dict:
+    a, b, severity, description = graph.details[detail]
+    return {
+        "prescription_id": row[0], "medication_id": row[1], "medication": row[2],
+        "severity": severity, "description": description, "ingredients": [a, b],
+    }
+
+
+def check_prescription(conn, graph: InteractionGraph, patient_id: int,
+                       medication_id: int, lookback_days: int = LOOKBACK_DAYS,
+                       max_history: int = MAX_HISTORY) -> list:
+    """
+    Warnings for prescribing medication_id to patient_id, most severe
+    first: [{"prescription_id", "medication_id", "medication", "severity",
+    "description", "ingredients"}], one per interacting current medication.
+    """
+    latest = {}
+    for row in conn.execute(
+        """
+        SELECT id, medication_id, medication FROM prescriptions
+         WHERE patient_id = ? AND created_at >= ? AND medication_id IS NOT NULL
+         ORDER BY created_at DESC LIMIT ?;
+        """,
+        (patient_id, lookback_start(lookback_days), max_history)
+    ):
+        latest.setdefault(row[1], tuple(row))
+    warnings = [
+        _warning(graph, detail, latest[other])
+        for other, detail in graph.interactions_with(medication_id, latest)
+    ]
+    warnings.sort(key=lambda w: (-SEVERITIES.index(w["severity"]), w["prescription_id"]))
+    return warnings
+
+
+def audit_interactions(conn, graph: InteractionGraph, lookback_days: int = LOOKBACK_DAYS,
+                       max_findings: int = MAX_FINDINGS) -> dict:
+    """
+    Every interacting pair among each patient's current prescriptions.
+    Returns counts per severity and up to max_findings findings, most
+    severe first: [{"patient_id", "prescription_a", "prescription_b",
+    "severity", "description"}] (prescription_a is the older one).
+    """
+    stats = {"patients": 0, "prescriptions": 0, "interactions": 0,
+             "by_severity": dict.fromkeys(SEVERITIES, 0)}
+    findings = []
+    patient, current, seen = None, {}, set()
+    for patient_id, rx_id, medication_id in conn.execute(
+        """
+        SELECT patient_id, id, medication_id FROM prescriptions
+         WHERE created_at >= ? AND medication_id IS NOT NULL
+         ORDER BY patient_id, created_at, id;
+        """,
+        (lookback_start(lookback_days),)
+    ):
+        if patient_id != patient:
+            patient, current, seen = patient_id, {}, set()
+            stats["patients"] += 1
+        stats["prescriptions"] += 1
+        for other, detail in graph.interactions_with(medication_id, current):
+            pair = (min(other, medication_id), max(other, medication_id), detail)
+            if pair in seen:                # a repeat prescription
+                continue
+            seen.add(pair)
+            severity = graph.details[detail][2]
+            stats["interactions"] += 1
+            stats["by_severity"][severity] += 1
+            findings.append({
+                "patient_id": patient_id, "prescription_a": current[other],
+                "prescription_b": rx_id, "severity": severity,
+                "description": graph.details[detail][3],
+            })
+        current[medication_id] = rx_id
+        if len(findings) > 2 * max_findings:
+            findings.sort(key=lambda f: -SEVERITIES.index(f["severity"]))
+            del findings[max_findings:]
+    findings.sort(key=lambda f: -SEVERITIES.index(f["severity"]))
+    stats["findings"] = findings[:max_findings]
+    return stats
+
+
+def check_current(conn, patient_id: int, medication_id: int) -> list:
+    """
+    check_prescription() with the current app's graph and settings.
+    """
+    app = current_app._get_current_object()
+    return check_prescription(
+        conn, graphs(app).index(), patient_id, medication_id,
+        app.config["INTERACTION_LOOKBACK_DAYS"], app.config["INTERACTION_MAX_HISTORY"],
+    )
+
+
+# ---- CLI -------------------------------------------------------------
+
+def main(argv=None):
+    from .config import Config
+
+    parser = argparse.ArgumentParser(description="Drug-interaction dataset")
+    sub = parser.add_subparsers(dest="command", required=True)
+    load = sub.add_parser("load", help="replace the interaction dataset from a CSV")
+    load.add_argument("--csv", default=Config.INTERACTION_CSV)
+    load.add_argument("--db", default=Config.DB_PATH)
+    args = parser.parse_args(argv)
+
+    rows = read_csv(args.csv)
+    conn = sqlite3.connect(args.db, timeout=30)
+    try:
+        conn.execute("BEGIN IMMEDIATE;")
+        result = load_interactions(conn, rows)
+        conn.commit()
+    finally:
+        conn.close()
+    print(f"{result['pairs']} interacting pairs loaded (catalogue version {result['version']})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,429 @@
+"""
+Durable background jobs in SQLite (exports, reports, reminder fan-out).
+
+    job_id = enqueue(conn, "revenue_report", {"from": "2025-01-01"}, priority=5)
+    python -m backend.worker --processes 4      # runs them
+
+Lifecycle (jobs.status):
+    queued --claim--> running --complete--> done
+                        |  \\--fail (attempts left)--> queued, retried later
+                        |   \\-fail (no attempts left)--> failed
+                        \\--lock expires (worker died)--> claimable again,
+                                                        failed if no attempts left
+
+- claim_job() is ONE statement, UPDATE ... WHERE id = (SELECT ...)
+  RETURNING ..., so two workers can never get the same job: SQLite runs
+  it under the write lock.
+- available_at is when the job may next be claimed: run-after time for
+  queued jobs, lock expiry (the visibility timeout) for running ones. A
+  worker that dies mid-job just lets its lock run out.
+- Higher priority first, then oldest available.
+- Failed attempts are retried after BACKOFF_BASE * 2^(attempt-1) seconds
+  (capped, with jitter) until max_attempts.
+- complete/fail only apply while the worker still owns the lock, so a
+  worker whose lock expired can't overwrite the new owner's result.
+
+Jobs run at least once: handlers must be safe to repeat.
+"""
+import csv
+import json
+import os
+import random
+import socket
+import time
+import uuid
+from pathlib import Path
+
+from .dedupe import MIN_SCORE, backfill_match_keys, scan_duplicates
+from .interactions import LOOKBACK_DAYS, audit_interactions, build_graph
+from .timeutil import format_slot, now_iso, now_minutes, parse_day
+
+DEFAULT_VISIBILITY = 300.0       # seconds a claim stays valid
+DEFAULT_MAX_ATTEMPTS = 5
+BACKOFF_BASE = 2.0
+BACKOFF_CAP = 600.0
+
+JOB_STATUSES = ("queued", "running", "done", "failed")
+
+# where patients_export writes (worker --export-dir / JOBS_EXPORT_DIR)
+EXPORT_DIR = os.environ.get(
+    "JOBS_EXPORT_DIR", str(Path(__file__).resolve().parent / "exports")
+)
+
+# kind -> callable(conn, payload) -> JSON-serialisable result
+JOB_HANDLERS = {}
+# kind -> roles allowed to submit it through POST /api/jobs
+JOB_ROLES = {}
+# kind -> callable(payload) -> {field: message} (empty when valid)
+_PAYLOAD_CHECKS = {}
+
+
+def job(kind: str, roles=("Admin",), check=None):
+    """
+    Register a handler for `kind`. `check` validates API-submitted
+    payloads up front, so bad input is a 400, not a job that fails
+    max_attempts times.
+    """
+    def register(fn):
+        JOB_HANDLERS[kind] = fn
+        JOB_ROLES[kind] = tuple(roles)
+        if check is not None:
+            _PAYLOAD_CHECKS[kind] = check
+        return fn
+    return register
+
+
+def check_payload(kind: str, payload: dict) -> dict:
+    check = _PAYLOAD_CHECKS.get(kind)
+    return check(payload) if check is not None else {}
+
+
+def create_job_tables(cur):
+    """
+    jobs table + claim index (called by init_db).
+    """
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            payload TEXT NOT NULL DEFAULT '{}',    -- JSON
+            status TEXT NOT NULL DEFAULT 'queued' CHECK(status IN (
+                'queued','running','done','failed'
+            )),
+            priority INTEGER NOT NULL DEFAULT 0,    -- higher runs first
+            attempts INTEGER NOT NULL DEFAULT 0,
+            max_attempts INTEGER NOT NULL DEFAULT 5,
+            available_at REAL NOT NULL,             -- unix time, see jobs.py
+            worker TEXT,
+            result TEXT,                            -- JSON
+            error TEXT,
+            created_by INTEGER,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL,
+            FOREIGN KEY(created_by) REFERENCES users(id) ON DELETE SET NULL
+        );
+    """)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_jobs_claim
+            ON jobs(priority DESC, available_at)
+            WHERE status IN ('queued','running');
+    """)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_jobs_created_by
+            ON jobs(created_by, id);
+    """)
+
+
+# ---- queue operations ----------------------------------------
+
+def enqueue(conn, kind: str, payload: dict = None, priority: int = 0,
+            max_attempts: int = DEFAULT_MAX_ATTEMPTS, delay: float = 0.0,
+            created_by: int = None) -> int:
+    """
+    Add a job; returns its id. Caller commits.
+    """
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"unknown job kind: {kind}")
+    stamp = now_iso()
+    cur = conn.execute(
+        """
+        INSERT INTO jobs (kind, payload, priority, max_attempts, available_at,
+                          created_by, created_at, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?);
+        """,
+        (kind, json.dumps(payload or {}), priority, max_attempts,
+         time.time() + delay, created_by, stamp, stamp)
+    )
+    return cur.lastrowid
+
+
+def claim_job(conn, worker: str, visibility: float = DEFAULT_VISIBILITY):
+    """
+    Atomically take the next runnable job, or None. Commits.
+    Returns dict(id, kind, payload, attempts, max_attempts).
+
+    A running job whose lease expired lost its worker (crash, OOM kill).
+    It is handed out again only while it has attempts left; otherwise it
+    is marked failed here, since no fail_job call will ever come for it.
+    """
+    now = time.time()
+    stamp = now_iso()
+    conn.execute(
+        """
+        UPDATE jobs
+           SET status = 'failed',
+               error = 'worker lost: lease expired on the last attempt',
+               updated_at = ?
+         WHERE status = 'running'
+           AND available_at <= ?
+           AND attempts >= max_attempts;
+        """,
+        (stamp, now)
+    )
+    row = conn.execute(
+        """
+        UPDATE jobs
+           SET status = 'running',
+               attempts = attempts + 1,
+               worker = ?,
+               available_at = ?,
+               updated_at = ?
+         WHERE id = (
+                SELECT id FROM jobs
+                 WHERE status IN ('queued','running')
+                   AND available_at <= ?
+                   AND attempts < max_attempts
+                 ORDER BY priority DESC, available_at, id
+                 LIMIT 1)
+        RETURNING id, kind, payload, attempts, max_attempts;
+        """,
+        (worker, now + visibility, stamp, now)
+    ).fetchone()
+    conn.commit()
+    if row is None:
+        return None
+    return {
+        "id": row[0], "kind": row[1], "payload": json.loads(row[2]),
+        "attempts": row[3], "max_attempts": row[4],
+    }
+
+
+def complete_job(conn, job_id: int, worker: str, result=None) -> bool:
+    """
+    Mark done (only if `worker` still holds the job). Commits.
+    """
+    cur = conn.execute(
+        """
+        UPDATE jobs
+           SET status = 'done', result = ?, error = NULL, updated_at = ?
+         WHERE id = ? AND worker = ? AND status = 'running';
+        """,
+        (json.dumps(result), now_iso(), job_id, worker)
+    )
+    conn.commit()
+    return cur.rowcount == 1
+
+
+def fail_job(conn, job: dict, worker: str, error: str) -> bool:
+    """
+    Schedule a retry with backoff, or mark failed when out of attempts.
+    Commits. Returns False if the worker no longer held the job.
+    """
+    if job["attempts"] >= job["max_attempts"]:
+        status, available_at = "failed", time.time()
+    else:
+        status, available_at = "queued", time.time() + backoff_delay(job["attempts"])
+    cur = conn.execute(
+        """
+        UPDATE jobs
+           SET status = ?, error = ?, available_at = ?, updated_at = ?
+         WHERE id = ? AND worker = ? AND status = 'running';
+        """,
+        (status, error[:2000], available_at, now_iso(), job["id"], worker)
+    )
+    conn.commit()
+    return cur.rowcount == 1
+
+
+def backoff_delay(attempt: int) -> float:
+    """
+    Seconds before retry number `attempt` (1-based), with +-20% jitter.
+    """
+    delay = min(BACKOFF_CAP, BACKOFF_BASE * 2 ** (attempt - 1))
+    return delay * random.uniform(0.8, 1.2)
+
+
+def run_one(conn, worker: str, visibility: float = DEFAULT_VISIBILITY):
+    """
+    Claim and run a single job. Returns the job dict, or None if the
+    queue had nothing runnable.
+    """
+    job_row = claim_job(conn, worker, visibility)
+    if job_row is None:
+        return None
+    handler = JOB_HANDLERS.get(job_row["kind"])
+    try:
+        if handler is None:
+            raise LookupError(f"no handler for {job_row['kind']}")
+        result = handler(conn, job_row["payload"])
+    except Exception as exc:
+        if conn.in_transaction:
+            conn.rollback()
+        fail_job(conn, job_row, worker, f"{type(exc).__name__}: {exc}")
+        job_row["status"] = "failed"
+    else:
+        complete_job(conn, job_row["id"], worker, result)
+        job_row["status"] = "done"
+    return job_row
+
+
+def worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def job_to_dict(row) -> dict:
+    """
+    API representation of a jobs row.
+    """
+    out = dict(row)
+    out["payload"] = json.loads(out["payload"]) if out["payload"] else {}
+    out["result"] = json.loads(out["result"]) if out["result"] else None
+    out.pop("available_at", None)
+    out.pop("worker", None)
+    return out
+
+
+# ---- job handlers --------------------------------------------
+
+@job("ping", roles=("Admin",))
+def _ping(conn, payload):
+    """Health check: proves a worker is alive and can reach the DB."""
+    conn.execute("SELECT 1;").fetchone()
+    return {"pong": True}
+
+
+def _check_report(payload):
+    return {
+        key: "must be YYYY-MM-DD"
+        for key in ("from", "to")
+        if payload.get(key) is not None and parse_day(payload[key]) is None
+    }
+
+
+@job("revenue_report", roles=("Admin", "Pharmacy"), check=_check_report)
+def _revenue_report(conn, payload):
+    """
+    Billing totals per status and per day. payload: {"from", "to"}
+    (optional "YYYY-MM-DD", to exclusive).
+    """
+    lo = (payload.get("from") or "0000-00-00") + "T00:00:00Z"
+    hi = (payload.get("to") or "9999-12-31") + "T00:00:00Z"
+    by_status = {
+        r[0]: {"count": r[1], "total": round(r[2], 2)}
+        for r in conn.execute(
+            """
+            SELECT status, COUNT(*), SUM(amount) FROM billing
+             WHERE created_at >= ? AND created_at < ?
+             GROUP BY status;
+            """,
+            (lo, hi)
+        )
+    }
+    by_day = [
+        {"day": r[0], "total": round(r[1], 2)}
+        for r in conn.execute(
+            """
+            SELECT substr(created_at, 1, 10) AS day, SUM(amount) FROM billing
+             WHERE created_at >= ? AND created_at < ?
+             GROUP BY day ORDER BY day;
+            """,
+            (lo, hi)
+        )
+    ]
+    return {"by_status": by_status, "by_day": by_day}
+
+
+@job("patients_export", roles=("Admin",))
+def _patients_export(conn, payload):
+    """
+    Demographics CSV (no medical history) written to EXPORT_DIR.
+    """
+    out_dir = Path(EXPORT_DIR)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    stamp = now_iso().replace(":", "").replace("-", "")
+    target = out_dir / f"patients-{stamp}-{uuid.uuid4().hex[:8]}.csv"
+    tmp = target.with_suffix(".csv.part")
+    count = 0
+    with open(tmp, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "first_name", "last_name", "dob", "phone", "created_at"])
+        for row in conn.execute(
+            "SELECT id, first_name, last_name, dob, phone, created_at "
+            "FROM patients ORDER BY id;"
+        ):
+            writer.writerow(tuple(row))
+            count += 1
+    os.replace(tmp, target)
+    return {"file": target.name, "rows": count}
+
+
+def _check_reminders(payload):
+    hours = payload.get("hours", 24)
+    if type(hours) is not int or not 1 <= hours <= 168:
+        return {"hours": "must be an integer between 1 and 168"}
+    return {}
+
+
+@job("appointment_reminders", roles=("Admin", "Staff"), check=_check_reminders)
+def _appointment_reminders(conn, payload):
+    """
+    Notify patients (with a login) about scheduled appointments in the
+    next `hours` (default 24). Re-running doesn't duplicate reminders.
+    """
+    hours = int(payload.get("hours", 24))
+    start = now_minutes()
+    rows = conn.execute(
+        """
+        SELECT a.start_min, p.owner_user_id, u.full_name
+          FROM appointments a
+          JOIN patients p ON p.id = a.patient_id
+          JOIN users u    ON u.id = a.doctor_id
+         WHERE a.status = 'scheduled'
+           AND a.start_min >= ? AND a.start_min < ?
+           AND p.owner_user_id IS NOT NULL;
+        """,
+        (start, start + hours * 60)
+    ).fetchall()
+    sent = 0
+    stamp = now_iso()
+    for start_min, user_id, doctor in rows:
+        message = f"Reminder: appointment with {doctor} at {format_slot(start_min)}"
+        cur = conn.execute(
+            """
+            INSERT INTO notifications (user_id, message, is_read, created_at)
+            SELECT ?, ?, 0, ?
+             WHERE NOT EXISTS (
+                   SELECT 1 FROM notifications WHERE user_id = ? AND message = ?);
+            """,
+            (user_id, message, stamp, user_id, message)
+        )
+        sent += cur.rowcount
+    conn.commit()
+    return {"appointments": len(rows), "sent": sent}
+
+
+def _check_duplicate_scan(payload):
+    score = payload.get("min_score", MIN_SCORE)
+    if type(score) not in (int, float) or not 0 < score <= 1:
+        return {"min_score": "must be a number in (0, 1]"}
+    return {}
+
+
+@job("duplicate_scan", roles=("Admin", "Staff"), check=_check_duplicate_scan)
+def _duplicate_scan(conn, payload):
+    """
+    Key any patients inserted without blocking keys, then score the
+    pairs inside each block into duplicate_candidates (dedupe.py).
+    payload: {"min_score": 0.8} (optional).
+    """
+    keyed = backfill_match_keys(conn.cursor())
+    conn.commit()
+    stats = scan_duplicates(conn, min_score=float(payload.get("min_score", MIN_SCORE)))
+    return {"keyed": keyed, **stats}
+
+
+def _check_interaction_audit(payload):
+    days = payload.get("days", LOOKBACK_DAYS)
+    if type(days) is not int or not 1 <= days <= 3660:
+        return {"days": "must be an integer between 1 and 3660"}
+    return {}
+
+
+@job("interaction_audit", roles=("Admin", "Pharmacy"), check=_check_interaction_audit)
+def _interaction_audit(conn, payload):
+    """
+    Interacting pairs among every patient's prescriptions from the last
+    `days` (default 90), see interactions.py. payload: {"days": 90}.
+    """
+    graph = build_graph(conn)
+    return audit_interactions(conn, graph, int(payload.get("days", LOOKBACK_DAYS)))
@@ -0,0 +1,81 @@
+"""
+JSON list responses built straight from a cursor.
+
+The list routes used to do
+
+    rows = [dict(r) for r in cur.fetchall()]      # sqlite3.Row list + dict list
+    return jsonify({"ok": True, "appointments": rows})   # str + bytes
+
+so the whole result existed four times over before a byte went out (and
+jsonify sorts every row's keys). json_rows() instead reads plain tuples
+CHUNK_ROWS at a time, pairs them with the cursor's column names and
+encodes each chunk straight to bytes:
+
+    return json_rows(cur, "appointments", close=conn.close)
+
+- Results that fit in one chunk are sent as one body with Content-Length.
+- Larger ones are streamed chunk by chunk, so peak memory is one chunk
+  however many rows match. The connection stays open until the last
+  chunk and is then released through `close`.
+- Encoding uses orjson when it's installed (pip install orjson), and
+  otherwise the standard library's C encoder with compact separators.
+
+Keys come out in SELECT order, not sorted.
+"""
+import json
+
+from flask import current_app
+
+try:
+    import orjson  # optional: pip install orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+CHUNK_ROWS = 500
+
+if orjson is not None:
+    encode = orjson.dumps
+else:
+    _encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"),
+                                check_circular=False)
+
+    def encode(obj) -> bytes:
+        return _encoder.encode(obj).encode("utf-8")
+
+
+def _encode_rows(columns, rows) -> bytes:
+    # '[{...},{...}]' without the brackets
+    return encode([dict(zip(columns, row)) for row in rows])[1:-1]
+
+
+def json_rows(cur, key: str, close=None, chunk_rows: int = None):
+    """
+    Response {"ok": true, <key>: [row objects]} for an executed SELECT.
+    `close` (e.g. conn.close) runs once the rows have been read.
+    """
+    chunk_rows = chunk_rows or CHUNK_ROWS
+    cur.row_factory = None                  # plain tuples from here on
+    columns = [d[0] for d in cur.description]
+    head = b'{"ok":true,' + encode(key) + b":["
+
+    first = cur.fetchmany(chunk_rows)
+    more = cur.fetchmany(chunk_rows) if len(first) == chunk_rows else []
+    if not more:
+        if close is not None:
+            close()
+        body = head + _encode_rows(columns, first) + b"]}"
+        return current_app.response_class(body, status=200, mimetype="application/json")
+
+    def stream():
+        try:
+            yield head + _encode_rows(columns, first)
+            rows = more
+            while rows:
+                yield b"," + _encode_rows(columns, rows)
+                rows = cur.fetchmany(chunk_rows)
+            yield b"]}"
+        finally:
+            if close is not None:
+                close()
+
+    return current_app.response_class(stream(), status=200, mimetype="application/json")
@@ -0,0 +1,311 @@
+"""
+Medication catalogue and prescription-name autocomplete.
+
+The catalogue (medications table) is loaded from a CSV with columns
+name, generic, form, strength:
+
+    python -m backend.medications load [--csv backend/data/medications.csv]
+
+New names are added, known ones updated, and names missing from the file
+are retired (active = 0; old prescriptions still point at them). Every
+load bumps medication_catalogue.version. Demo databases are seeded from
+the bundled CSV by init_db.
+
+GET /api/medications/suggest?q=amox is answered from a MedicationIndex
+held in memory per database, never from SQL. The index is two sorted
+lists of lower-cased keys, one of full product names and one of the
+words of the generic name ("clav" finds amoxicillin/clavulanic acid).
+Each list has a parallel array of row numbers. A prefix lookup is a
+bisect plus a short forward scan. The index is built on first use. It is
+rebuilt when the catalogue version changes, and the version is checked
+at most every MEDICATION_RECHECK_SECONDS.
+
+create_prescription links the free-text medication to the catalogue
+(prescriptions.medication_id) when it names an active entry. With
+MEDICATION_REQUIRE_CATALOGUE on, unknown names are refused.
+"""
+import argparse
+import csv
+import re
+import sqlite3
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+
+from flask import current_app
+
+from .timeutil import now_iso
+
+DEFAULT_CSV = Path(__file__).resolve().parent / "data" / "medications.csv"
+CSV_COLUMNS = ("name", "generic", "form", "strength")
+MAX_SUGGESTIONS = 25
+
+_WORD_RE = re.compile(r"[a-z][a-z0-9]+")
+_lock = threading.Lock()
+
+
+def create_medication_tables(cur):
+    """
+    Catalogue + its version counter (called by init_db).
+    """
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS medications (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE COLLATE NOCASE,   -- product label
+            generic TEXT NOT NULL,                      -- active ingredient(s)
+            form TEXT NOT NULL DEFAULT '',
+            strength TEXT NOT NULL DEFAULT '',
+            active INTEGER NOT NULL DEFAULT 1
+        );
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS medication_catalogue (
+            id INTEGER PRIMARY KEY CHECK(id = 1),
+            version INTEGER NOT NULL,
+            loaded_at TEXT
+        );
+    """)
+    cur.execute(
+        "INSERT OR IGNORE INTO medication_catalogue (id, version) VALUES (1, 0);"
+    )
+
+
+# ---- loading -------------------------------------------------------
+
+def read_csv(path) -> list:
+    """
+    (name, generic, form, strength) rows; raises ValueError on a missing
+    column, an empty name or a name listed twice.
+    """
+    rows, seen = [], set()
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        missing = set(CSV_COLUMNS) - set(reader.fieldnames or ())
+        if missing:
+            raise ValueError(f"{path}: missing column(s) {sorted(missing)}")
+        for line, rec in enumerate(reader, start=2):
+            name = " ".join((rec["name"] or "").split())
+            if not name:
+                raise ValueError(f"{path}:{line}: empty name")
+            if name.lower() in seen:
+                raise ValueError(f"{path}:{line}: duplicate name {name!r}")
+            seen.add(name.lower())
+            rows.append((
+                name,
+                (rec["generic"] or "").strip().lower() or name.lower(),
+                (rec["form"] or "").strip(),
+                (rec["strength"] or "").strip(),
+            ))
+    return rows
+
+
+def load_catalogue(conn, rows) -> dict:
+    """
+    Make the active catalogue exactly `rows`. Caller commits.
+    Returns {"added", "updated", "retired", "version"}.
+    """
+    current = {
+        r[1].lower(): (r[0], tuple(r[2:]))
+        for r in conn.execute(
+            "SELECT id, name, generic, form, strength, active FROM medications;"
+        )
+    }
+    added = updated = 0
+    wanted = set()
+    for name, generic, form, strength in rows:
+        key = name.lower()
+        wanted.add(key)
+        known = current.get(key)
+        if known is None:
+            added += 1
+        elif known[1] != (generic, form, strength, 1):
+            updated += 1
+        else:
+            continue
+        conn.execute(
+            """
+            INSERT INTO medications (name, generic, form, strength, active)
+            VALUES (?, ?, ?, ?, 1)
+            ON CONFLICT(name) DO UPDATE
+               SET generic = excluded.generic, form = excluded.form,
+                   strength = excluded.strength, active = 1;
+            """,
+            (name, generic, form, strength)
+        )
+    retire = [(mid,) for key, (mid, state) in current.items()
+              if key not in wanted and state[3]]
+    conn.executemany("UPDATE medications SET active = 0 WHERE id = ?;", retire)
+    conn.execute(
+        "UPDATE medication_catalogue SET version = version + 1, loaded_at = ? WHERE id = 1;",
+        (now_iso(),)
+    )
+    version = conn.execute(
+        "SELECT version FROM medication_catalogue WHERE id = 1;"
+    ).fetchone()[0]
+    return {"added": added, "updated": updated, "retired": len(retire), "version": version}
+
+
+def resolve(conn, name: str):
+    """
+    id of the active catalogue entry called `name` (case-insensitive),
+    or None.
+    """
+    row = conn.execute(
+        "SELECT id FROM medications WHERE name = ? AND active = 1;",
+        (" ".join(name.split()),)
+    ).fetchone()
+    return row[0] if row else None
+
+
+# ---- in-memory prefix index -----------------------------------------
+
+class MedicationIndex:
+    """
+    Sorted-array prefix index over the active catalogue.
+    """
+
+    __slots__ = ("version", "rows", "_name_keys", "_name_refs", "_word_keys", "_word_refs")
+
+    def __init__(self, rows, version: int = 0):
+        # rows: (id, name, generic, form, strength)
+        self.version = version
+        self.rows = list(rows)
+        names = sorted((r[1].lower(), i) for i, r in enumerate(self.rows))
+        words = sorted({
+            (word, i)
+            for i, r in enumerate(self.rows)
+            for word in _WORD_RE.findall(r[2].lower())
+            if not r[1].lower().startswith(word)
+        })
+        self._name_keys = [k for k, _ in names]
+        self._name_refs = array("I", (i for _, i in names))
+        self._word_keys = [k for k, _ in words]
+        self._word_refs = array("I", (i for _, i in words))
+
+    def __len__(self):
+        return len(self.rows)
+
+    def suggest(self, prefix: str, limit: int = 10) -> list:
+        """
+        Entries whose name (first) or a generic-name word starts with
+        `prefix`, case-insensitively, at most `limit` of them.
+        """
+        prefix = " ".join(prefix.lower().split())
+        if not prefix:
+            return []
+        found, seen = [], set()
+        for keys, refs in ((self._name_keys, self._name_refs),
+                           (self._word_keys, self._word_refs)):
+            i = bisect_left(keys, prefix)
+            while i < len(keys) and keys[i].startswith(prefix):
+                ref = refs[i]
+                if ref not in seen:
+                    seen.add(ref)
+                    found.append(self.rows[ref])
+                    if len(found) >= limit:
+                        return found
+                i += 1
+        return found
+
+
+def build_index(conn) -> MedicationIndex:
+    version = conn.execute(
+        "SELECT version FROM medication_catalogue WHERE id = 1;"
+    ).fetchone()[0]
+    rows = conn.execute(
+        "SELECT id, name, generic, form, strength FROM medications WHERE active = 1;"
+    ).fetchall()
+    return MedicationIndex((tuple(r) for r in rows), version)
+
+
+class MedicationCatalogue:
+    """
+    Per-app holder of one structure built from the catalogue per database
+    file: a MedicationIndex by default, or whatever `build(conn)` returns
+    (it needs a .version; interactions.py keeps its graph this way).
+    """
+
+    def __init__(self, recheck_seconds: float = 2.0, build=build_index):
+        self.recheck_seconds = recheck_seconds
+        self._build = build
+        self._lock = threading.Lock()
+        self._indexes = {}                  # db_path -> (index, checked_at)
+
+    def index(self) -> MedicationIndex:
+        from .db import current_db_path, get_db     # db.py imports this module
+
+        db_path = current_db_path()
+        entry = self._indexes.get(db_path)
+        now = time.monotonic()
+        if entry is not None and now - entry[1] < self.recheck_seconds:
+            return entry[0]
+        with self._lock:
+            entry = self._indexes.get(db_path)
+            if entry is not None and now - entry[1] < self.recheck_seconds:
+                return entry[0]
+            conn = get_db(readonly=True)
+            try:
+                version = conn.execute(
+                    "SELECT version FROM medication_catalogue WHERE id = 1;"
+                ).fetchone()[0]
+                if entry is not None and entry[0].version == version:
+                    index = entry[0]
+                else:
+                    index = self._build(conn)
+            finally:
+                conn.close()
+            self._indexes[db_path] = (index, now)
+            return index
+
+    def invalidate(self):
+        with self._lock:
+            self._indexes.clear()
+
+
+def catalogue(app) -> MedicationCatalogue:
+    holder = app.extensions.get("hms_medications")
+    if holder is None:
+        with _lock:
+            holder = app.extensions.get("hms_medications")
+            if holder is None:
+                holder = MedicationCatalogue(app.config["MEDICATION_RECHECK_SECONDS"])
+                app.extensions["hms_medications"] = holder
+    return holder
+
+
+def suggest(prefix: str, limit: int = 10) -> list:
+    """
+    Suggestions for the current request's database.
+    """
+    return catalogue(current_app._get_current_object()).index().suggest(prefix, limit)
+
+
+# ---- CLI -------------------------------------------------------------
+
+def main(argv=None):
+    from .config import Config
+
+    parser = argparse.ArgumentParser(description="Medication catalogue")
+    sub = parser.add_subparsers(dest="command", required=True)
+    load = sub.add_parser("load", help="load/replace the catalogue from a CSV")
+    load.add_argument("--csv", default=Config.MEDICATION_CSV)
+    load.add_argument("--db", default=Config.DB_PATH)
+    args = parser.parse_args(argv)
+
+    rows = read_csv(args.csv)
+    conn = sqlite3.connect(args.db, timeout=30)
+    try:
+        conn.execute("BEGIN IMMEDIATE;")
+        result = load_catalogue(conn, rows)
+        conn.commit()
+    finally:
+        conn.close()
+    print(f"{len(rows)} entries: {result['added']} added, {result['updated']} updated, "
+          f"{result['retired']} retired (version {result['version']})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
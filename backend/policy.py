@@ -0,0 +1,220 @@
+"""
+Role-based access policy: one declarative table, compiled at import.
+
+POLICY maps permission -> {role: row scope}. Routes declare what they
+need with a decorator instead of hand-written role lists:
+
+    @api_bp.route("/billing/<int:patient_id>", methods=["GET"])
+    @requires("billing.read")
+    def view_billing(patient_id): ...
+
+Row scopes say WHICH rows a role may touch under a permission:
+    any       every row
+    own       rows of patient charts the user owns (patients.owner_user_id)
+    assigned  rows where the user is the doctor
+    self      rows that belong to the user (notifications, jobs, ...)
+
+Compilation turns each permission into
+- a bitmask of the roles holding it, so the role gate is one AND, and
+- per role, a ready-made SQL predicate once the route says which
+  columns hold the patient / doctor / user id:
+
+    _SCOPE = bind("billing.read", patient="patient_id")
+    where, params = _SCOPE.predicate()     # current user
+    -> ("1", ())                                              Admin
+    -> ("patient_id IN (SELECT id FROM patients WHERE owner_user_id = ?)", (5,))
+
+GET /api/policy shows the table (see describe()).
+"""
+from functools import wraps
+
+from flask import jsonify, request, session
+
+from .security import require_login, validate_csrf_token
+
+ROLES = ("Admin", "Staff", "Doctor", "Pharmacy", "Patient")
+ROLE_BITS = {role: 1 << i for i, role in enumerate(ROLES)}
+
+ANY, OWN, ASSIGNED, SELF = "any", "own", "assigned", "self"
+
+_MUTATING = frozenset(("POST", "PUT", "PATCH", "DELETE"))
+
+# scope -> (SQL template over {patient}/{doctor}/{user} columns, needs uid)
+_SCOPE_SQL = {
+    ANY: ("1", False),
+    OWN: ("{patient} IN (SELECT id FROM patients WHERE owner_user_id = ?)", True),
+    ASSIGNED: ("{doctor} = ?", True),
+    SELF: ("{user} = ?", True),
+}
+
+_STAFF = {"Admin": ANY, "Staff": ANY}
+_CLINICAL = {"Admin": ANY, "Staff": ANY, "Doctor": ANY}
+_EVERYONE = {role: ANY for role in ROLES}
+
+POLICY = {
+    # patients
+    "patient.create":       dict(_STAFF),
+    "patient.read":         dict(_CLINICAL, Pharmacy=ANY, Patient=OWN),
+    "patient.history":      dict(_CLINICAL, Patient=OWN),   # else redacted
+    "patient.dedupe":       dict(_STAFF),
+    # appointments
+    "appointment.create":   dict(_STAFF, Patient=OWN),
+    "appointment.read":     dict(_CLINICAL, Patient=OWN),
+    "appointment.schedule": dict(_CLINICAL),                 # every doctor's day
+    "appointment.complete": dict(_STAFF, Doctor=ASSIGNED),
+    "appointment.cancel":   dict(_STAFF, Doctor=ASSIGNED, Patient=OWN),
+    # prescriptions
+    "medication.read":      dict(_CLINICAL, Pharmacy=ANY),
+    "prescription.create":  {"Doctor": ASSIGNED},
+    "prescription.read":    dict(_CLINICAL, Pharmacy=ANY, Patient=OWN),
+    # billing
+    "billing.create":       {"Admin": ANY, "Pharmacy": ANY},
+    "billing.read":         dict(_STAFF, Pharmacy=ANY, Patient=OWN),
+    # per-user data
+    "notification.read":    {role: SELF for role in ROLES},
+    # background jobs (which kinds each role may submit: jobs.JOB_ROLES)
+    "job.submit":           {"Admin": ANY, "Staff": ANY, "Pharmacy": ANY},
+    "job.read":             {"Admin": ANY, "Staff": SELF, "Pharmacy": SELF},
+    # reporting (per-doctor figures; a Doctor sees only their own)
+    "analytics.read":       dict(_STAFF, Doctor=ASSIGNED),
+    # integrations / operations
+    "changes.read":         {"Admin": ANY},
+    "changes.ack":          {"Admin": ANY},
+    "backup.manage":        {"Admin": ANY},
+    "session.revoke":       {"Admin": ANY},
+    "user.manage":          {"Admin": ANY},
+    # plumbing every logged-in user may use
+    "session.end":          dict(_EVERYONE),                 # logout
+    "batch":                dict(_EVERYONE),
+    "policy.read":          dict(_EVERYONE),
+}
+
+
+class Permission:
+    """
+    Compiled form of one POLICY entry.
+    """
+
+    __slots__ = ("name", "mask", "scopes")
+
+    def __init__(self, name: str, grants: dict):
+        unknown = set(grants) - set(ROLES)
+        if unknown:
+            raise ValueError(f"{name}: unknown role(s) {sorted(unknown)}")
+        bad = {s for s in grants.values() if s not in _SCOPE_SQL}
+        if bad:
+            raise ValueError(f"{name}: unknown scope(s) {sorted(bad)}")
+        self.name = name
+        self.mask = 0
+        for role in grants:
+            self.mask |= ROLE_BITS[role]
+        self.scopes = dict(grants)
+
+
+PERMISSIONS = {name: Permission(name, grants) for name, grants in POLICY.items()}
+
+
+class BoundScope:
+    """
+    A permission's row scopes rendered for one query's columns.
+    """
+
+    __slots__ = ("permission", "_sql")
+
+    def __init__(self, permission: Permission, columns: dict):
+        self.permission = permission
+        self._sql = {}
+        for role, scope in permission.scopes.items():
+            template, needs_uid = _SCOPE_SQL[scope]
+            try:
+                self._sql[role] = (template.format(**columns), needs_uid)
+            except KeyError as exc:
+                raise ValueError(
+                    f"{permission.name}: scope {scope!r} needs column {exc}"
+                ) from None
+
+    def predicate(self):
+        """
+        (sql, params) restricting rows to the current user's scope;
+        ("0", ()) if the role doesn't hold the permission at all.
+        """
+        entry = self._sql.get(session.get("role"))
+        if entry is None:
+            return "0", ()
+        sql, needs_uid = entry
+        return sql, ((session["user_id"],) if needs_uid else ())
+
+    def unrestricted(self) -> bool:
+        return self.permission.scopes.get(session.get("role")) == ANY
+
+
+def bind(name: str, **columns) -> BoundScope:
+    """
+    Compile `name`'s row scopes against columns, e.g.
+    bind("appointment.read", patient="a.patient_id").
+    """
+    return BoundScope(PERMISSIONS[name], columns)
+
+
+def allows(name: str) -> bool:
+    """
+    Does the current user's role hold `name` (in any scope)?
+    """
+    return bool(PERMISSIONS[name].mask & ROLE_BITS.get(session.get("role"), 0))
+
+
+def requires(*names):
+    """
+    Route decorator: logged in, role holds ANY of `names`, CSRF on
+    mutating methods. Row scoping is up to the route (bind()).
+    """
+    mask = 0
+    for name in names:
+        mask |= PERMISSIONS[name].mask          # KeyError at import = typo
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not require_login():
+                return jsonify({"ok": False, "error": "Unauthorized"}), 401
+            if not mask & ROLE_BITS.get(session["role"], 0):
+                return jsonify({"ok": False, "error": "Forbidden"}), 403
+            if request.method in _MUTATING and not validate_csrf_token(
+                request.headers.get("X-CSRF-Token", "")
+            ):
+                return jsonify({"ok": False, "error": "Invalid or missing CSRF token"}), 403
+            return view(*args, **kwargs)
+
+        wrapper.permissions = names
+        return wrapper
+
+    return decorator
+
+
+def describe(app, role: str = None) -> dict:
+    """
+    Effective permissions (all roles, or just `role`) and which
+    permission guards each route.
+    """
+    roles = ROLES if role is None else (role,)
+    permissions = {
+        name: {r: perm.scopes[r] for r in roles if r in perm.scopes}
+        for name, perm in PERMISSIONS.items()
+    }
+    routes = []
+    for rule in sorted(app.url_map.iter_rules(), key=lambda r: r.rule):
+        names = getattr(app.view_functions[rule.endpoint], "permissions", None)
+        if names is None:
+            continue
+        if role is not None and not any(role in PERMISSIONS[n].scopes for n in names):
+            continue
+        routes.append({
+            "rule": rule.rule,
+            "methods": sorted(rule.methods - {"HEAD", "OPTIONS"}),
+            "permissions": list(names),
+        })
+    return {
+        "roles": list(roles),
+        "permissions": {k: v for k, v in permissions.items() if v},
+        "routes": routes,
+    }
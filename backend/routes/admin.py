@@ -0,0 +1,151 @@
+import os
+import threading
+
+from flask import Blueprint, current_app, jsonify, request
+
+from ..audit import audit
+from ..backup import create_snapshot, list_snapshots
+from ..db import current_db_path, get_db
+from ..policy import requires
+from ..schemas import USER_DEPARTMENT
+from ..tenancy import current_tenant
+
+admin_bp = Blueprint("admin_bp", __name__, url_prefix="/api/admin")
+
+_backup_lock = threading.Lock()
+
+
+# ---- helpers ----
+
+class _BackupState:
+    """
+    At most one snapshot runs at a time per tenant (per app when tenancy
+    is off); the last result (or error) is kept for GET
+    /api/admin/backups.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.thread = None
+        self.last = None
+        self.error = None
+
+    @property
+    def running(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+
+def _backup_state(app) -> _BackupState:
+    # {tenant (None without tenancy): state}: one clinic's backup neither
+    # blocks nor shows up in another's
+    with _backup_lock:
+        states = app.extensions.setdefault("hms_backup", {})
+        return states.setdefault(current_tenant(), _BackupState())
+
+
+def _backup_dir() -> str:
+    # tenants keep separate snapshot folders (and retention)
+    tenant = current_tenant()
+    base = current_app.config["BACKUP_DIR"]
+    return os.path.join(base, tenant) if tenant else base
+
+
+def _run_backup(state: _BackupState, cfg: dict):
+    try:
+        state.last = create_snapshot(
+            cfg["DB_PATH"], cfg["BACKUP_DIR"],
+            step_pages=cfg["BACKUP_STEP_PAGES"], sleep_ms=cfg["BACKUP_SLEEP_MS"],
+            compress=cfg["BACKUP_COMPRESS"], keep=cfg["BACKUP_KEEP"],
+        )
+        state.error = None
+    except Exception as exc:  # reported through GET, not raised in a thread
+        state.error = str(exc)
+
+
+# ------------------------------------------------------------------
+# BACKUPS (Admin only)
+# POST starts an online snapshot in the background (202); GET reports
+# whether one is running, the last result and the retained snapshots.
+# ------------------------------------------------------------------
+
+@admin_bp.route("/backups", methods=["POST"])
+@requires("backup.manage")
+def start_backup():
+    app = current_app._get_current_object()
+    state = _backup_state(app)
+    with state.lock:
+        if state.running:
+            return jsonify({"ok": False, "error": "Backup already running"}), 409
+        cfg = {k: app.config[k] for k in (
+            "BACKUP_STEP_PAGES", "BACKUP_SLEEP_MS", "BACKUP_COMPRESS", "BACKUP_KEEP",
+        )}
+        cfg["DB_PATH"] = current_db_path()
+        cfg["BACKUP_DIR"] = _backup_dir()
+        state.thread = threading.Thread(
+            target=_run_backup, args=(state, cfg), name="db-backup", daemon=True
+        )
+        state.thread.start()
+
+    return jsonify({"ok": True, "running": True}), 202
+
+
+@admin_bp.route("/backups", methods=["GET"])
+@requires("backup.manage")
+def backup_status():
+    state = _backup_state(current_app)
+    snapshots = [
+        {"name": p.name, "bytes": p.stat().st_size}
+        for p in list_snapshots(_backup_dir())
+    ]
+    return jsonify({
+        "ok": True,
+        "running": state.running,
+        "last": state.last,
+        "error": state.error,
+        "snapshots": snapshots,
+    }), 200
+
+
+# ------------------------------------------------------------------
+# SESSIONS (Admin only)
+# DELETE logs a user out everywhere (in this tenant). Other processes
+# stop honouring their cached copy within SESSION_CACHE_SECONDS.
+# ------------------------------------------------------------------
+
+@admin_bp.route("/users/<int:user_id>/sessions", methods=["DELETE"])
+@requires("session.revoke")
+def revoke_sessions(user_id: int):
+    store = current_app.extensions.get("hms_sessions")
+    if store is None:
+        return jsonify({"ok": False, "error": "Server-side sessions are disabled"}), 409
+
+    revoked = store.revoke_user(user_id, current_tenant())
+    audit("revoke", "session", user_id)
+    return jsonify({"ok": True, "revoked": len(revoked)}), 200
+
+
+# ------------------------------------------------------------------
+# USERS (Admin only)
+# PUT /users/<id>/department {"department": "Cardiology"} assigns the
+# department GET /api/schedule?department= filters doctors by; an empty
+# value clears it.
+# ------------------------------------------------------------------
+
+@admin_bp.route("/users/<int:user_id>/department", methods=["PUT"])
+@requires("user.manage")
+def set_department(user_id: int):
+    data, errors = USER_DEPARTMENT.validate(request.json or {})
+    if errors:
+        return jsonify({"ok": False, "error": "Invalid input", "fields": errors}), 400
+    department = data.get("department") or None
+
+    conn = get_db()
+    cur = conn.execute(
+        "UPDATE users SET department = ? WHERE id = ?;", (department, user_id)
+    )
+    conn.commit()
+    conn.close()
+    if cur.rowcount != 1:
+        return jsonify({"ok": False, "error": "Not found"}), 404
+    audit("update", "user", user_id)
+    return jsonify({"ok": True, "user_id": user_id, "department": department}), 200
@@ -1,16 +1,36 @@
-from flask import Blueprint, request, jsonify, session
-from datetime import datetime
+from flask import Blueprint, current_app, request, jsonify, session
 import sqlite3
 
-from ..db import get_db
-from ..security import require_login_and_csrf
-from ..validators import (
-    validate_name,
-    validate_phone,
-    validate_datetime,
-    validate_amount,
-    validate_positive_int,
-    sanitize_text,
+from ..analytics import month_start, range_cube, summarise
+from ..archive import tiered_select
+from ..audit import audit
+from ..batch import run_batch
+from ..changes import (
+    DEFAULT_LIMIT, MAX_LIMIT, ChangesCompacted, acknowledge, change_head,
+    compact_changes, fetch_changes,
+)
+from ..dedupe import add_match_keys, find_matches
+from ..db import current_archive_path, get_db, read_snapshot
+from ..idempotency import idempotent
+from ..interactions import check_current as check_interactions
+from ..jobs import JOB_ROLES, JOB_STATUSES, check_payload, enqueue, job_to_dict
+from ..jsonrows import json_rows
+from ..medications import MAX_SUGGESTIONS, resolve as resolve_medication, suggest
+from ..timeutil import (
+    MINUTES_PER_DAY, day_of, format_slot, now_iso, now_minutes, parse_bound,
+    parse_day, parse_slot,
+)
+from ..policy import allows, bind, describe, requires
+from ..schedule import day_schedule, invalidate_day
+from ..schemas import (
+    PATIENT_CREATE,
+    APPOINTMENT_CREATE,
+    APPOINTMENT_STATUS,
+    PRESCRIPTION_CREATE,
+    BILL_CREATE,
+    CHANGES_ACK,
+    JOB_CREATE,
+    BATCH_ITEM,
 )
 
 api_bp = Blueprint("api_bp", __name__, url_prefix="/api")
@@ -20,81 +40,92 @@ api_bp = Blueprint("api_bp", __name__, url_prefix="/api")
 # Internal helpers (not routes)
 # ------------------------------------------------------------------
 
-def _patient_visible_to_current_user(patient_row: dict) -> bool:
+def _redact_history(row: dict) -> dict:
     """
-    Visibility rules for patient record (including medical_history):
-    - Admin / Staff / Doctor: can see all patients
-    - That specific Patient: can see themselves
-    - Pharmacy: can see demographics but NOT medical_history
-      => We enforce redaction later.
+    medical_history is only shown to roles holding patient.history
+    (Pharmacy sees demographics only).
     """
-    user_role = session.get("role")
-    user_id = session.get("user_id")
-    if user_role in ("Admin", "Staff", "Doctor"):
-        return True
-    if user_role == "Patient":
-        # If this patient is linked to this user_id via owner_user_id, allow.
-        return patient_row.get("owner_user_id") == user_id
-    if user_role == "Pharmacy":
-        return True  # Pharmacy can see limited info (we'll redact history)
-    return False
+    row = dict(row)
+    if not allows("patient.history"):
+        row["medical_history"] = "[REDACTED]"
+    return row
 
 
-def _redact_patient_for_pharmacy(row: dict) -> dict:
+def _scoped_row(conn, sql: str, scope, row_id: int):
     """
-    Pharmacy should not see full medical_history.
+    Fetch one row by id together with whether the current user's row
+    scope covers it. `sql` selects from the table and has "{scope}" where
+    the select list continues, e.g. "SELECT *, {scope} FROM patients".
+    Returns (row_dict_or_None, in_scope).
     """
-    if session.get("role") == "Pharmacy":
-        redacted = dict(row)
-        redacted["medical_history"] = "[REDACTED]"
-        return redacted
-    return dict(row)
+    where, params = scope.predicate()
+    row = conn.execute(
+        sql.format(scope=f"({where}) AS in_scope") + " WHERE id = ?;",
+        (*params, row_id)
+    ).fetchone()
+    if row is None:
+        return None, False
+    row = dict(row)
+    return row, bool(row.pop("in_scope"))
 
 
-def _role_allows_billing_creation(role: str) -> bool:
-    # Only Admin or Pharmacy can create billing entries
-    return role in ("Admin", "Pharmacy")
+def _patient_in_scope(conn, scope, patient_id: int) -> bool:
+    """
+    Per-patient lists: does the caller's scope cover this chart?
+    (Unrestricted roles skip the lookup.)
+    """
+    if scope.unrestricted():
+        return True
+    where, params = scope.predicate()
+    return conn.execute(
+        f"SELECT 1 FROM patients WHERE id = ? AND {where};", (patient_id, *params)
+    ).fetchone() is not None
+
+
+def _invalid_input(errors: dict):
+    """
+    400 response with field-level detail from a schema.
+    """
+    return jsonify({"ok": False, "error": "Invalid input", "fields": errors}), 400
 
 
-def _role_allows_billing_view(role: str) -> bool:
-    # Admin / Pharmacy / Staff can view any;
-    # Patients can view their own later when filtered.
-    return role in ("Admin", "Pharmacy", "Staff", "Patient")
+def _since_arg():
+    """
+    Optional ?since=YYYY-MM-DD lower bound for created_at-ordered lists.
+    Returns (iso_or_None, None) or (None, error_response). Lists without
+    `since` include archived rows; recent ranges stay on the hot table.
+    """
+    value = request.args.get("since")
+    if not value:
+        return None, None
+    if parse_day(value) is None:
+        return None, _invalid_input({"since": "must be YYYY-MM-DD"})
+    return value + "T00:00:00Z", None
 
 
 # ------------------------------------------------------------------
 # PATIENT REGISTRATION
 # Only Admin or Staff can register patients.
+# The response lists "possible_duplicates": existing charts that share a
+# blocking key (phone, or surname sound + DOB) and score as the same
+# person (backend/dedupe.py). The patient is registered either way.
 # ------------------------------------------------------------------
 
 @api_bp.route("/patients", methods=["POST"])
+@requires("patient.create")
+@idempotent
 def create_patient():
-    ok, err = require_login_and_csrf(allowed_roles=["Admin", "Staff"])
-    if not ok:
-        msg, code = err
-        return jsonify({"ok": False, "error": msg}), code
-
-    data = request.json or {}
-    fn = sanitize_text(data.get("first_name", ""), max_len=50)
-    ln = sanitize_text(data.get("last_name", ""), max_len=50)
-    dob = sanitize_text(data.get("dob", ""), max_len=10)  # "YYYY-MM-DD"
-    phone = sanitize_text(data.get("phone", ""), max_len=20)
-    history = sanitize_text(data.get("medical_history", ""), max_len=2000)
-    owner_user_id = data.get("owner_user_id")  # (optional) link to Patient user account
-
-    # Validate required fields
-    if (
-        not validate_name(fn)
-        or not validate_name(ln)
-        or not dob
-        or not validate_phone(phone)
-    ):
-        return jsonify({"ok": False, "error": "Invalid input"}), 400
+    data, errors = PATIENT_CREATE.validate(request.json or {})
+    if errors:
+        return _invalid_input(errors)
+    fn = data["first_name"]
+    ln = data["last_name"]
+    dob = data["dob"]
+    phone = data["phone"]
+    history = data["medical_history"]
+    owner_user_id = data["owner_user_id"]  # (optional) link to Patient user account
 
     # owner_user_id (if provided) must refer to a user with role=Patient
-    if owner_user_id is not None and not validate_positive_int(owner_user_id):
-        return jsonify({"ok": False, "error": "Invalid owner_user_id"}), 400
-
     conn = get_db()
     cur = conn.cursor()
 
@@ -105,6 +136,11 @@ def create_patient():
             conn.close()
             return jsonify({"ok": False, "error": "Invalid owner user link"}), 400
 
+    matches = find_matches(
+        conn, fn, ln, dob, phone,
+        min_score=current_app.config["DEDUPE_MIN_SCORE"],
+        limit=current_app.config["DEDUPE_WARN_LIMIT"],
+    )
     cur.execute(
         """
         INSERT INTO patients
@@ -119,48 +155,191 @@ def create_patient():
             phone,
             history,
             owner_user_id,
-            datetime.utcnow().isoformat()
+            now_iso()
         )
     )
-    conn.commit()
     new_id = cur.lastrowid
+    add_match_keys(cur, new_id, ln, dob, phone)
+    conn.commit()
     conn.close()
 
-    return jsonify({"ok": True, "patient_id": new_id}), 201
+    audit("create", "patient", new_id, patient_id=new_id)
+    return jsonify({"ok": True, "patient_id": new_id, "possible_duplicates": matches}), 201
+
+
+@api_bp.route("/patients/duplicates", methods=["GET"])
+@requires("patient.dedupe")
+def list_duplicate_candidates():
+    """
+    GET /api/patients/duplicates[?min_score=0.9]
+    Open pairs found by the "duplicate_scan" job, best score first.
+    """
+    try:
+        min_score = float(request.args.get("min_score", 0))
+    except ValueError:
+        return _invalid_input({"min_score": "must be a number"})
+
+    conn = get_db()
+    cur = conn.execute(
+        """
+        SELECT d.patient_a,
+               d.patient_b,
+               d.score,
+               d.matched_on,
+               d.found_at,
+               a.first_name || ' ' || a.last_name AS name_a,
+               b.first_name || ' ' || b.last_name AS name_b,
+               a.dob AS dob_a,
+               b.dob AS dob_b
+          FROM duplicate_candidates d
+          JOIN patients a ON a.id = d.patient_a
+          JOIN patients b ON b.id = d.patient_b
+         WHERE d.status = 'open' AND d.score >= ?
+         ORDER BY d.score DESC, d.patient_a, d.patient_b
+         LIMIT 200;
+        """,
+        (min_score,)
+    )
+    audit("read", "duplicate_list")
+    return json_rows(cur, "candidates", close=conn.close)
 
 
 # ------------------------------------------------------------------
 # PATIENT FETCH (details)
-# Visible to Admin, Staff, Doctor, Pharmacy (redacted), and that Patient.
+# Visible to Admin, Staff, Doctor, Pharmacy (redacted), and that Patient
+# (policy: patient.read / patient.history).
 # ------------------------------------------------------------------
 
+_PATIENT_SCOPE = bind("patient.read", patient="id")
+
 @api_bp.route("/patients/<int:patient_id>", methods=["GET"])
+@requires("patient.read")
 def get_patient(patient_id: int):
-    ok, err = require_login_and_csrf(
-        allowed_roles=["Admin", "Staff", "Doctor", "Patient", "Pharmacy"]
-    )
-    if not ok:
-        msg, code = err
-        return jsonify({"ok": False, "error": msg}), code
-
     conn = get_db()
-    cur = conn.cursor()
-    cur.execute("SELECT * FROM patients WHERE id = ?;", (patient_id,))
-    row = cur.fetchone()
+    row, in_scope = _scoped_row(
+        conn, "SELECT *, {scope} FROM patients", _PATIENT_SCOPE, patient_id
+    )
     conn.close()
 
     if not row:
         return jsonify({"ok": False, "error": "Not found"}), 404
+    if not in_scope:
+        return jsonify({"ok": False, "error": "Forbidden"}), 403
 
-    row = dict(row)
+    audit("read", "patient", patient_id, patient_id=patient_id)
+    return jsonify({"ok": True, "patient": _redact_history(row)}), 200
 
-    if not _patient_visible_to_current_user(row):
-        return jsonify({"ok": False, "error": "Forbidden"}), 403
 
-    # Redact if pharmacy
-    safe_row = _redact_patient_for_pharmacy(row)
+# ------------------------------------------------------------------
+# PATIENT SUMMARY ("patient 360")
+# GET /api/patients/<id>/summary[?fields=appointments,prescriptions,billing]
+# Record + appointments + prescriptions + bills in one round trip:
+# one connection, one read transaction, at most four SELECTs.
+# Same permissions as the individual endpoints, section by section
+# (_SUMMARY_SECTIONS). Sections the caller may not see are left out by
+# default; asking for one explicitly is a 403.
+# ------------------------------------------------------------------
+
+_SUMMARY_SECTIONS = {
+    "appointments": "appointment.read",
+    "prescriptions": "prescription.read",
+    "billing": "billing.read",
+}
+
+# Per section: (SELECT with "{t}" for the table, ORDER BY over result
+# columns, tiered table or None). Each takes (patient_id, lower bound).
+# Tiered sections also read archived rows (see archive.py): the summary
+# covers the whole history unless ?since= starts after the horizon.
+_SUMMARY_QUERIES = {
+    "appointments": ("""
+        SELECT a.id,
+               a.doctor_id,
+               a.start_time,
+               a.start_min,
+               a.reason,
+               a.status,
+               a.created_at,
+               u.full_name AS doctor_name
+          FROM {t} a
+          JOIN users u ON u.id = a.doctor_id
+         WHERE a.patient_id = ?
+           AND a.start_min >= ?
+    """, "start_min DESC", "appointments"),
+    "prescriptions": ("""
+        SELECT id,
+               appointment_id,
+               doctor_id,
+               patient_id,
+               medication,
+               instructions,
+               created_at
+          FROM {t}
+         WHERE patient_id = ?
+           AND created_at >= ?
+    """, "created_at DESC", None),
+    "billing": ("""
+        SELECT id,
+               patient_id,
+               amount,
+               status,
+               description,
+               created_at
+          FROM {t}
+         WHERE patient_id = ?
+           AND created_at >= ?
+    """, "created_at DESC", "billing"),
+}
+
+
+@api_bp.route("/patients/<int:patient_id>/summary", methods=["GET"])
+@requires("patient.read")
+def patient_summary(patient_id: int):
+    requested = request.args.get("fields")
+    if requested:
+        sections = [f.strip() for f in requested.split(",") if f.strip()]
+        unknown = [f for f in sections if f not in _SUMMARY_SECTIONS]
+        if unknown:
+            return _invalid_input({"fields": "unknown section(s): " + ", ".join(unknown)})
+        if not all(allows(_SUMMARY_SECTIONS[f]) for f in sections):
+            return jsonify({"ok": False, "error": "Forbidden"}), 403
+    else:
+        sections = [f for f, perm in _SUMMARY_SECTIONS.items() if allows(perm)]
+    since, bad = _since_arg()
+    if bad:
+        return bad
+    since_min = parse_bound(request.args["since"]) if since else None
+
+    # One read transaction so all sections come from the same snapshot.
+    archive_path = current_archive_path()
+    with read_snapshot(archive_path) as conn:
+        # the chart's scope covers its sections: every section is
+        # either unrestricted or "own" for this role
+        row, in_scope = _scoped_row(
+            conn, "SELECT *, {scope} FROM patients", _PATIENT_SCOPE, patient_id
+        )
+        if not row:
+            return jsonify({"ok": False, "error": "Not found"}), 404
+        if not in_scope:
+            return jsonify({"ok": False, "error": "Forbidden"}), 403
 
-    return jsonify({"ok": True, "patient": safe_row}), 200
+        result = {"ok": True, "patient": _redact_history(row)}
+        for section in sections:
+            sql, order_by, tiered = _SUMMARY_QUERIES[section]
+            if section == "appointments":
+                lower, floor = since_min, -(2 ** 62)
+            else:
+                lower, floor = since, ""
+            params = (patient_id, floor if lower is None else lower)
+            if tiered:
+                cur = tiered_select(conn, tiered, sql, params, order_by,
+                                    lower_bound=lower, archive_path=archive_path)
+            else:
+                cur = conn.execute(sql.format(t=section) + f" ORDER BY {order_by};",
+                                   params)
+            result[section] = [dict(r) for r in cur.fetchall()]
+
+    audit("read", "patient_summary", patient_id, patient_id=patient_id)
+    return jsonify(result), 200
 
 
 # ------------------------------------------------------------------
@@ -170,44 +349,48 @@ def get_patient(patient_id: int):
 # - Admin, Staff, Patient can create.
 # - Validate doctor_id refers to a Doctor.
 # - Validate datetime format.
-# - UNIQUE(doctor_id,start_time) to block double booking -> 409 on violation.
+# - Partial UNIQUE index on (doctor_id,start_min) over *scheduled*
+#   appointments blocks double booking -> 409 on violation.
+#   Canceled/completed appointments free their slot.
+# Status changes (PUT .../status):
+# - scheduled -> completed | canceled, nothing else.
+# - Admin/Staff: any appointment. Doctor: their own. Patient: cancel own.
+# (policy: appointment.create / .read / .complete / .cancel)
 # ------------------------------------------------------------------
 
+_APPT_CREATE_SCOPE = bind("appointment.create", patient="id")
+_APPT_READ_SCOPE = bind("appointment.read", patient="a.patient_id")
+_APPT_STATUS_SCOPES = {
+    "completed": bind("appointment.complete", patient="patient_id", doctor="doctor_id"),
+    "canceled": bind("appointment.cancel", patient="patient_id", doctor="doctor_id"),
+}
+
 @api_bp.route("/appointments", methods=["POST"])
+@requires("appointment.create")
+@idempotent
 def create_appointment():
-    ok, err = require_login_and_csrf(allowed_roles=["Admin", "Staff", "Patient"])
-    if not ok:
-        msg, code = err
-        return jsonify({"ok": False, "error": msg}), code
-
-    data = request.json or {}
-    patient_id = data.get("patient_id")
-    doctor_id = data.get("doctor_id")
-    start_time = data.get("start_time", "")
-    reason = sanitize_text(data.get("reason", ""), max_len=200)
-
-    if (
-        not validate_positive_int(patient_id)
-        or not validate_positive_int(doctor_id)
-        or not validate_datetime(start_time)
-    ):
-        return jsonify({"ok": False, "error": "Invalid input"}), 400
+    data, errors = APPOINTMENT_CREATE.validate(request.json or {})
+    if errors:
+        return _invalid_input(errors)
+    patient_id = data["patient_id"]
+    doctor_id = data["doctor_id"]
+    start_min = parse_slot(data["start_time"])
+    start_time = format_slot(start_min)
+    reason = data["reason"]
 
     conn = get_db()
     cur = conn.cursor()
 
-    # check patient exists
-    cur.execute("SELECT id, owner_user_id FROM patients WHERE id = ?;", (patient_id,))
-    prow = cur.fetchone()
+    # check patient exists (and, for Patients, is their own chart)
+    prow, in_scope = _scoped_row(
+        conn, "SELECT id, {scope} FROM patients", _APPT_CREATE_SCOPE, patient_id
+    )
     if not prow:
         conn.close()
         return jsonify({"ok": False, "error": "Unknown patient"}), 400
-
-    # if caller is Patient role, enforce self-booking
-    if session["role"] == "Patient":
-        if prow["owner_user_id"] != session["user_id"]:
-            conn.close()
-            return jsonify({"ok": False, "error": "Forbidden"}), 403
+    if not in_scope:
+        conn.close()
+        return jsonify({"ok": False, "error": "Forbidden"}), 403
 
     # check doctor exists AND has role Doctor
     cur.execute("SELECT id, role FROM users WHERE id = ?;", (doctor_id,))
@@ -220,21 +403,23 @@ def create_appointment():
         cur.execute(
             """
             INSERT INTO appointments
-                (patient_id, doctor_id, start_time, reason, status, created_at)
-            VALUES (?, ?, ?, ?, 'scheduled', ?);
+                (patient_id, doctor_id, start_time, start_min, reason,
+                 status, created_at)
+            VALUES (?, ?, ?, ?, ?, 'scheduled', ?);
             """,
             (
                 patient_id,
                 doctor_id,
                 start_time,
+                start_min,
                 reason,
-                datetime.utcnow().isoformat()
+                now_iso()
             )
         )
         conn.commit()
         new_id = cur.lastrowid
     except sqlite3.IntegrityError as e:
-        # UNIQUE(doctor_id,start_time) violation -> double booking
+        # ux_appointments_doctor_slot violation -> double booking
         conn.rollback()
         conn.close()
         return jsonify({
@@ -244,153 +429,276 @@ def create_appointment():
         }), 409
 
     conn.close()
+    invalidate_day(start_min)
+    audit("create", "appointment", new_id, patient_id=patient_id)
     return jsonify({"ok": True, "appointment_id": new_id}), 201
 
 
-@api_bp.route("/appointments/<int:doctor_id>", methods=["GET"])
-def list_appointments_for_doctor(doctor_id: int):
+@api_bp.route("/appointments/<int:appointment_id>/status", methods=["PUT"])
+@requires("appointment.complete", "appointment.cancel")
+def update_appointment_status(appointment_id: int):
     """
-    GET /api/appointments/<doctor_id>
-    Admin/Staff/Doctor can view all appointments for that doctor.
-    Patient can only see appointments where patient.owner_user_id == themselves
-    Pharmacy should NOT see appointments (privacy).
-    """
-    ok, err = require_login_and_csrf(
-        allowed_roles=["Admin", "Staff", "Doctor", "Patient"]
-    )
-    if not ok:
-        msg, code = err
-        return jsonify({"ok": False, "error": msg}), code
+    PUT /api/appointments/<appointment_id>/status
+    Body: { "status": "completed"|"canceled", "expected_status": "scheduled" }
 
-    # Pharmacy role is not in allowed_roles above, so it's already blocked.
+    A single compare-and-set UPDATE (... WHERE status = ?) with the
+    caller's row scope folded into the WHERE clause, so two concurrent
+    requests can never both "win": the loser matches 0 rows and gets 409.
+    """
+    data, errors = APPOINTMENT_STATUS.validate(request.json or {})
+    if errors:
+        return _invalid_input(errors)
+    new_status = data["status"]
+    expected = data["expected_status"] or "scheduled"
+
+    # e.g. Patients may cancel but not complete
+    scope = _APPT_STATUS_SCOPES[new_status]
+    if not allows(scope.permission.name):
+        return jsonify({"ok": False, "error": "Forbidden"}), 403
+    where, scope_params = scope.predicate()
 
     conn = get_db()
     cur = conn.cursor()
     cur.execute(
+        "UPDATE appointments SET status = ? "
+        f"WHERE id = ? AND status = ? AND {where} RETURNING start_min;",
+        (new_status, appointment_id, expected, *scope_params)
+    )
+    updated = cur.fetchone()
+    if updated is not None:
+        conn.commit()
+        conn.close()
+        invalidate_day(updated[0])
+        audit("update", "appointment", appointment_id)
+        return jsonify({
+            "ok": True,
+            "appointment_id": appointment_id,
+            "status": new_status
+        }), 200
+    conn.rollback()
+
+    # Nothing matched: work out why, for a useful error.
+    row, in_scope = _scoped_row(
+        conn, "SELECT status, {scope} FROM appointments", scope, appointment_id
+    )
+    conn.close()
+
+    if not row:
+        return jsonify({"ok": False, "error": "Not found"}), 404
+    if not in_scope:
+        return jsonify({"ok": False, "error": "Forbidden"}), 403
+    return jsonify({
+        "ok": False,
+        "error": f"Appointment is {row['status']}, expected {expected}",
+        "current_status": row["status"]
+    }), 409
+
+
+@api_bp.route("/appointments/<int:doctor_id>", methods=["GET"])
+@requires("appointment.read")
+def list_appointments_for_doctor(doctor_id: int):
+    """
+    GET /api/appointments/<doctor_id>[?from=...&to=...]
+    from/to are optional "YYYY-MM-DD" or "YYYY-MM-DD HH:MM" bounds
+    (from inclusive, to exclusive) answered from the
+    (doctor_id, start_min) index. Archived appointments are included
+    unless `from` starts after the archive horizon.
+    Rows outside the caller's "appointment.read" scope (a Patient's
+    own charts) are filtered in SQL.
+    """
+    lo = hi = None
+    if request.args.get("from"):
+        lo = parse_bound(request.args["from"])
+        if lo is None:
+            return _invalid_input({"from": "must be YYYY-MM-DD[ HH:MM]"})
+    if request.args.get("to"):
+        hi = parse_bound(request.args["to"])
+        if hi is None:
+            return _invalid_input({"to": "must be YYYY-MM-DD[ HH:MM]"})
+
+    where, scope_params = _APPT_READ_SCOPE.predicate()
+    # Archived (finished, old) appointments are only read when the range
+    # starts before the archive horizon (or has no start).
+    conn = get_db()
+    cur = tiered_select(
+        conn,
+        "appointments",
         """
         SELECT a.id,
                a.patient_id,
                a.doctor_id,
                a.start_time,
+               a.start_min,
                a.reason,
                a.status,
                a.created_at,
                p.first_name || ' ' || p.last_name AS patient_name,
-               u.full_name AS doctor_name,
-               p.owner_user_id AS patient_owner_uid
-          FROM appointments a
+               u.full_name AS doctor_name
+          FROM {t} a
           JOIN patients p ON p.id = a.patient_id
           JOIN users u    ON u.id = a.doctor_id
          WHERE a.doctor_id = ?
-         ORDER BY a.start_time ASC;
-        """,
-        (doctor_id,)
+           AND a.start_min >= ?
+           AND a.start_min < ?
+           AND """ + where,
+        (
+            doctor_id,
+            lo if lo is not None else -(2 ** 62),
+            hi if hi is not None else 2 ** 62,
+            *scope_params,
+        ),
+        "start_min ASC",
+        lower_bound=lo,
+        archive_path=current_archive_path(),
     )
-    rows = [dict(r) for r in cur.fetchall()]
-    conn.close()
+    audit("read", "appointment_list", doctor_id)
+    return json_rows(cur, "appointments", close=conn.close)
 
-    role = session["role"]
-    uid = session["user_id"]
 
-    if role == "Patient":
-        # keep only rows where this patient belongs to this user
-        rows = [r for r in rows if r["patient_owner_uid"] == uid]
+# ------------------------------------------------------------------
+# SCHEDULE (Admin / Staff / Doctor)
+# GET /api/schedule?date=YYYY-MM-DD[&department=Cardiology]
+#     -> every doctor's appointments that day (default: today), grouped
+#        by doctor, from one range scan. Cached per day; bookings and
+#        status changes drop their day. See backend/schedule.py.
+# ------------------------------------------------------------------
 
-    # Drop patient_owner_uid from response
-    for r in rows:
-        if "patient_owner_uid" in r:
-            del r["patient_owner_uid"]
+@api_bp.route("/schedule", methods=["GET"])
+@requires("appointment.schedule")
+def hospital_schedule():
+    now = now_minutes()
+    day = now - now % MINUTES_PER_DAY
+    if request.args.get("date"):
+        day = parse_day(request.args["date"])
+        if day is None:
+            return _invalid_input({"date": "must be YYYY-MM-DD"})
+    department = request.args.get("department", "").strip()
+    if len(department) > 64:
+        return _invalid_input({"department": "must be at most 64 characters"})
+
+    doctors, cached = day_schedule(day, department or None)
+    audit("read", "schedule")
+    return jsonify({
+        "ok": True,
+        "date": day_of(day),
+        "department": department or None,
+        "doctors": doctors,
+        "cached": cached,
+    }), 200
+
+
+# ------------------------------------------------------------------
+# MEDICATION CATALOGUE (autocomplete for prescriptions)
+# GET /api/medications/suggest?q=amox[&limit=10]
+#     -> active catalogue entries whose name, or a word of their generic
+#        name, starts with q. Served from an in-memory index
+#        (backend/medications.py).
+# ------------------------------------------------------------------
+
+@api_bp.route("/medications/suggest", methods=["GET"])
+@requires("medication.read")
+def suggest_medications():
+    q = request.args.get("q", "")
+    try:
+        limit = int(request.args.get("limit", 10))
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= MAX_SUGGESTIONS:
+        return _invalid_input({"limit": f"must be between 1 and {MAX_SUGGESTIONS}"})
+    if len(q) > 100:
+        return _invalid_input({"q": "must be at most 100 characters"})
 
-    return jsonify({"ok": True, "appointments": rows}), 200
+    return jsonify({"ok": True, "medications": [
+        {"id": mid, "name": name, "generic": generic, "form": form, "strength": strength}
+        for mid, name, generic, form, strength in suggest(q, limit)
+    ]}), 200
 
 
 # ------------------------------------------------------------------
 # PRESCRIPTIONS
-# Only Doctor can create prescriptions.
+# Only Doctor can create prescriptions, on their own appointments. The
+# response warns about interactions with the patient's current ones.
 # Viewing:
 #   - Doctor / Pharmacy / Admin / Staff: can view any patient's prescriptions
 #   - Patient: can ONLY view theirs.
 # ------------------------------------------------------------------
 
+_RX_CREATE_SCOPE = bind("prescription.create", doctor="doctor_id")
+_RX_READ_SCOPE = bind("prescription.read", patient="id")
+
+
 @api_bp.route("/prescriptions", methods=["POST"])
+@requires("prescription.create")
+@idempotent
 def create_prescription():
-    ok, err = require_login_and_csrf(allowed_roles=["Doctor"])
-    if not ok:
-        msg, code = err
-        return jsonify({"ok": False, "error": msg}), code
-
-    data = request.json or {}
-    appointment_id = data.get("appointment_id")
-    patient_id = data.get("patient_id")
-    medication = sanitize_text(data.get("medication", ""), max_len=200)
-    instructions = sanitize_text(data.get("instructions", ""), max_len=500)
-
-    if (
-        not validate_positive_int(appointment_id)
-        or not validate_positive_int(patient_id)
-        or not medication
-        or not instructions
-    ):
-        return jsonify({"ok": False, "error": "Invalid input"}), 400
+    data, errors = PRESCRIPTION_CREATE.validate(request.json or {})
+    if errors:
+        return _invalid_input(errors)
+    appointment_id = data["appointment_id"]
+    patient_id = data["patient_id"]
+    medication = data["medication"]
+    instructions = data["instructions"]
 
     conn = get_db()
     cur = conn.cursor()
 
-    # Verify that appointment exists and matches patient_id and doctor_id==session user
-    cur.execute(
-        """
-        SELECT id, doctor_id, patient_id
-          FROM appointments
-         WHERE id = ?;
-        """,
-        (appointment_id,)
+    # The appointment must exist, be for this patient and be the caller's own
+    arow, in_scope = _scoped_row(
+        conn, "SELECT patient_id, {scope} FROM appointments", _RX_CREATE_SCOPE,
+        appointment_id
     )
-    arow = cur.fetchone()
-    if (
-        not arow
-        or arow["patient_id"] != patient_id
-        or arow["doctor_id"] != session["user_id"]
-    ):
+    if not arow or not in_scope or arow["patient_id"] != patient_id:
         conn.close()
         return jsonify({"ok": False, "error": "Appointment mismatch/unauthorized"}), 403
 
+    medication_id = resolve_medication(conn, medication)
+    if medication_id is None and current_app.config["MEDICATION_REQUIRE_CATALOGUE"]:
+        conn.close()
+        return _invalid_input({"medication": "not in the medication catalogue"})
+    # checked against the patient's other current prescriptions; warns only.
+    # A name outside the catalogue can't be checked: that is reported as
+    # skipped (interactions null), never as an empty "no interactions".
+    interactions = None
+    if medication_id is not None:
+        interactions = check_interactions(conn, patient_id, medication_id)
+
     cur.execute(
         """
         INSERT INTO prescriptions
             (appointment_id, doctor_id, patient_id,
-             medication, instructions, created_at)
-        VALUES (?, ?, ?, ?, ?, ?);
+             medication, medication_id, instructions, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?);
         """,
         (
             appointment_id,
             session["user_id"],
             patient_id,
             medication,
+            medication_id,
             instructions,
-            datetime.utcnow().isoformat()
+            now_iso()
         )
     )
     conn.commit()
     new_id = cur.lastrowid
     conn.close()
 
-    return jsonify({"ok": True, "prescription_id": new_id}), 201
+    audit("create", "prescription", new_id, patient_id=patient_id)
+    return jsonify({
+        "ok": True, "prescription_id": new_id, "medication_id": medication_id,
+        "interactions": interactions,
+        "interaction_check": "skipped" if interactions is None else "done",
+    }), 201
 
 
 @api_bp.route("/prescriptions/<int:patient_id>", methods=["GET"])
+@requires("prescription.read")
 def view_prescriptions(patient_id: int):
-    ok, err = require_login_and_csrf(
-        allowed_roles=["Doctor", "Pharmacy", "Admin", "Staff", "Patient"]
-    )
-    if not ok:
-        msg, code = err
-        return jsonify({"ok": False, "error": msg}), code
-
-    # Patient can ONLY view their own prescriptions
-    if session["role"] == "Patient" and session["user_id"] != patient_id:
+    conn = get_db()
+    if not _patient_in_scope(conn, _RX_READ_SCOPE, patient_id):
+        conn.close()
         return jsonify({"ok": False, "error": "Forbidden"}), 403
 
-    conn = get_db()
     cur = conn.cursor()
     cur.execute(
         """
@@ -399,6 +707,7 @@ def view_prescriptions(patient_id: int):
                doctor_id,
                patient_id,
                medication,
+               medication_id,
                instructions,
                created_at
           FROM prescriptions
@@ -407,10 +716,8 @@ def view_prescriptions(patient_id: int):
         """,
         (patient_id,)
     )
-    rows = [dict(r) for r in cur.fetchall()]
-    conn.close()
-
-    return jsonify({"ok": True, "prescriptions": rows}), 200
+    audit("read", "prescription_list", patient_id, patient_id=patient_id)
+    return json_rows(cur, "prescriptions", close=conn.close)
 
 
 # ------------------------------------------------------------------
@@ -423,22 +730,19 @@ def view_prescriptions(patient_id: int):
 #   - Patient: can view only their own entries
 # ------------------------------------------------------------------
 
-@api_bp.route("/billing", methods=["POST"])
-def create_bill():
-    ok, err = require_login_and_csrf(
-        allowed_roles=["Admin", "Pharmacy"]
-    )
-    if not ok:
-        msg, code = err
-        return jsonify({"ok": False, "error": msg}), code
+_BILLING_READ_SCOPE = bind("billing.read", patient="id")
 
-    data = request.json or {}
-    patient_id = data.get("patient_id")
-    amount = data.get("amount")
-    description = sanitize_text(data.get("description", ""), max_len=200)
 
-    if (not validate_positive_int(patient_id)) or (not validate_amount(amount)):
-        return jsonify({"ok": False, "error": "Invalid input"}), 400
+@api_bp.route("/billing", methods=["POST"])
+@requires("billing.create")
+@idempotent
+def create_bill():
+    data, errors = BILL_CREATE.validate(request.json or {})
+    if errors:
+        return _invalid_input(errors)
+    patient_id = data["patient_id"]
+    amount = data["amount"]
+    description = data["description"]
 
     conn = get_db()
     cur = conn.cursor()
@@ -450,34 +754,33 @@ def create_bill():
         """,
         (
             patient_id,
-            float(amount),
+            amount,
             description,
-            datetime.utcnow().isoformat()
+            now_iso()
         )
     )
     conn.commit()
     new_id = cur.lastrowid
     conn.close()
 
+    audit("create", "billing", new_id, patient_id=patient_id)
     return jsonify({"ok": True, "bill_id": new_id}), 201
 
 
 @api_bp.route("/billing/<int:patient_id>", methods=["GET"])
+@requires("billing.read")
 def view_billing(patient_id: int):
-    ok, err = require_login_and_csrf(
-        allowed_roles=["Admin", "Pharmacy", "Staff", "Patient"]
-    )
-    if not ok:
-        msg, code = err
-        return jsonify({"ok": False, "error": msg}), code
-
-    # If I'm a Patient, I can only see my own bills.
-    if session["role"] == "Patient" and session["user_id"] != patient_id:
-        return jsonify({"ok": False, "error": "Forbidden"}), 403
+    since, bad = _since_arg()
+    if bad:
+        return bad
 
     conn = get_db()
-    cur = conn.cursor()
-    cur.execute(
+    if not _patient_in_scope(conn, _BILLING_READ_SCOPE, patient_id):
+        conn.close()
+        return jsonify({"ok": False, "error": "Forbidden"}), 403
+    cur = tiered_select(
+        conn,
+        "billing",
         """
         SELECT id,
                patient_id,
@@ -485,16 +788,17 @@ def view_billing(patient_id: int):
                status,
                description,
                created_at
-          FROM billing
+          FROM {t}
          WHERE patient_id = ?
-         ORDER BY created_at DESC;
+           AND created_at >= ?
         """,
-        (patient_id,)
+        (patient_id, since or ""),
+        "created_at DESC",
+        lower_bound=since,
+        archive_path=current_archive_path(),
     )
-    rows = [dict(r) for r in cur.fetchall()]
-    conn.close()
-
-    return jsonify({"ok": True, "billing": rows}), 200
+    audit("read", "billing_list", patient_id, patient_id=patient_id)
+    return json_rows(cur, "billing", close=conn.close)
 
 
 # ------------------------------------------------------------------
@@ -502,32 +806,261 @@ def view_billing(patient_id: int):
 # User can only fetch their own notifications.
 # ------------------------------------------------------------------
 
+_NOTIFICATION_SCOPE = bind("notification.read", user="user_id")
+
+
 @api_bp.route("/notifications", methods=["GET"])
+@requires("notification.read")
 def my_notifications():
-    ok, err = require_login_and_csrf(
-        allowed_roles=["Admin", "Staff", "Doctor", "Pharmacy", "Patient"]
-    )
-    if not ok:
-        msg, code = err
-        return jsonify({"ok": False, "error": msg}), code
-
-    uid = session["user_id"]
+    since, bad = _since_arg()
+    if bad:
+        return bad
 
+    where, params = _NOTIFICATION_SCOPE.predicate()
     conn = get_db()
-    cur = conn.cursor()
-    cur.execute(
+    cur = tiered_select(
+        conn,
+        "notifications",
         """
         SELECT id,
                message,
                is_read,
                created_at
-          FROM notifications
-         WHERE user_id = ?
-         ORDER BY created_at DESC;
-        """,
-        (uid,)
+          FROM {t}
+         WHERE created_at >= ?
+           AND """ + where,
+        (since or "", *params),
+        "created_at DESC",
+        lower_bound=since,
+        archive_path=current_archive_path(),
     )
-    rows = [dict(r) for r in cur.fetchall()]
+    return json_rows(cur, "notifications", close=conn.close)
+
+
+# ------------------------------------------------------------------
+# CHANGE FEED (Admin / integrations)
+# GET  /api/changes?since=<seq>&limit=N -> changes with seq > since,
+#      oldest first, plus "next" (the since= for the next call) and
+#      "more". 410 if that range was already compacted.
+# POST /api/changes/ack {"consumer": "...", "seq": N} -> record progress
+#      and compact what every consumer has acknowledged.
+# ------------------------------------------------------------------
+
+@api_bp.route("/changes", methods=["GET"])
+@requires("changes.read")
+def list_changes():
+    try:
+        since = int(request.args.get("since", 0))
+        limit = int(request.args.get("limit", DEFAULT_LIMIT))
+    except ValueError:
+        return _invalid_input({"since": "must be an integer", "limit": "must be an integer"})
+    if since < 0 or not 1 <= limit <= MAX_LIMIT:
+        return _invalid_input({"limit": f"must be between 1 and {MAX_LIMIT}"})
+
+    conn = get_db()
+    try:
+        changes, more = fetch_changes(conn, since, limit)
+    except ChangesCompacted as exc:
+        return jsonify({
+            "ok": False,
+            "error": "Changes compacted; resync required",
+            "compacted_through": exc.compacted_through,
+        }), 410
+    finally:
+        conn.close()
+
+    return jsonify({
+        "ok": True,
+        "changes": changes,
+        "next": changes[-1]["seq"] if changes else since,
+        "more": more,
+    }), 200
+
+
+@api_bp.route("/changes/ack", methods=["POST"])
+@requires("changes.ack")
+def ack_changes():
+    data, errors = CHANGES_ACK.validate(request.json or {})
+    if errors:
+        return _invalid_input(errors)
+
+    conn = get_db()
+    head = change_head(conn)
+    if data["seq"] > head:
+        conn.close()
+        return _invalid_input({"seq": f"Beyond the newest change ({head})"})
+    acknowledge(conn, data["consumer"], data["seq"])
+    compacted = compact_changes(conn)
+    conn.commit()
+    conn.close()
+
+    return jsonify({"ok": True, "compacted": compacted}), 200
+
+
+# ------------------------------------------------------------------
+# BACKGROUND JOBS (exports, reports, reminders; run by backend.worker)
+# POST /api/jobs {"kind": ..., "payload": {...}, "priority": 0-9}
+#      -> 202 {"job_id"}; which kinds a role may submit: jobs.JOB_ROLES
+# GET  /api/jobs?status=...  -> your recent jobs (Admin: everyone's)
+# GET  /api/jobs/<id>        -> status / result / error
+# ------------------------------------------------------------------
+
+_JOB_READ_SCOPE = bind("job.read", user="created_by")
+_JOB_COLUMNS = """
+    id, kind, payload, status, priority, attempts, max_attempts,
+    result, error, created_by, created_at, updated_at
+"""
+
+
+@api_bp.route("/jobs", methods=["POST"])
+@requires("job.submit")
+@idempotent
+def submit_job():
+    data, errors = JOB_CREATE.validate(request.json or {})
+    if errors:
+        return _invalid_input(errors)
+    priority = data["priority"] or 0
+    if priority > 9:
+        return _invalid_input({"priority": "must be between 0 and 9"})
+    if session["role"] not in JOB_ROLES[data["kind"]]:
+        return jsonify({"ok": False, "error": "Forbidden"}), 403
+    errors = check_payload(data["kind"], data["payload"])
+    if errors:
+        return _invalid_input(errors)
+
+    conn = get_db()
+    job_id = enqueue(
+        conn, data["kind"], data["payload"], priority=priority,
+        max_attempts=current_app.config["JOB_MAX_ATTEMPTS"],
+        created_by=session["user_id"],
+    )
+    conn.commit()
     conn.close()
 
-    return jsonify({"ok": True, "notifications": rows}), 200
+    audit("create", "job", job_id)
+    return jsonify({"ok": True, "job_id": job_id, "status": "queued"}), 202
+
+
+@api_bp.route("/jobs", methods=["GET"])
+@requires("job.read")
+def list_jobs():
+    status = request.args.get("status")
+    if status is not None and status not in JOB_STATUSES:
+        return _invalid_input({"status": "must be one of: " + ", ".join(JOB_STATUSES)})
+
+    scope, params = _JOB_READ_SCOPE.predicate()
+    sql = f"SELECT {_JOB_COLUMNS} FROM jobs WHERE {scope}"
+    params = list(params)
+    if status is not None:
+        sql += " AND status = ?"
+        params.append(status)
+    sql += " ORDER BY id DESC LIMIT 50;"
+
+    conn = get_db()
+    rows = [job_to_dict(r) for r in conn.execute(sql, params).fetchall()]
+    conn.close()
+
+    return jsonify({"ok": True, "jobs": rows}), 200
+
+
+@api_bp.route("/jobs/<int:job_id>", methods=["GET"])
+@requires("job.read")
+def get_job(job_id: int):
+    conn = get_db()
+    row, in_scope = _scoped_row(
+        conn, "SELECT" + _JOB_COLUMNS + ", {scope} FROM jobs", _JOB_READ_SCOPE, job_id
+    )
+    conn.close()
+
+    # someone else's job looks the same as a missing one
+    if not in_scope:
+        return jsonify({"ok": False, "error": "Job not found"}), 404
+    return jsonify({"ok": True, "job": job_to_dict(row)}), 200
+
+
+# ------------------------------------------------------------------
+# ANALYTICS (Admin / Staff; a Doctor sees their own figures)
+# GET /api/analytics/appointments?from=YYYY-MM-DD&to=YYYY-MM-DD
+#     (from inclusive, to exclusive; default: the current month)
+#     -> totals, per-doctor utilisation and cancel / no-show rates,
+#        weekly load histogram. See backend/analytics.py.
+# ------------------------------------------------------------------
+
+_ANALYTICS_SCOPE = bind("analytics.read", doctor="doctor_id")
+
+
+@api_bp.route("/analytics/appointments", methods=["GET"])
+@requires("analytics.read")
+def appointment_analytics():
+    this_month = month_start(now_minutes())
+    lo, hi = this_month, month_start(this_month + 32 * MINUTES_PER_DAY)
+    errors = {}
+    for arg in ("from", "to"):
+        value = request.args.get(arg)
+        if value:
+            day = parse_day(value)
+            if day is None:
+                errors[arg] = "must be YYYY-MM-DD"
+            elif arg == "from":
+                lo = day
+            else:
+                hi = day
+    if errors:
+        return _invalid_input(errors)
+    max_days = current_app.config["ANALYTICS_MAX_DAYS"]
+    if not 0 < hi - lo <= max_days * MINUTES_PER_DAY:
+        return _invalid_input({"to": f"must be 1 to {max_days} days after from"})
+
+    cube, cached, computed = range_cube(lo, hi)
+    only_doctor = None if _ANALYTICS_SCOPE.unrestricted() else session["user_id"]
+
+    conn = get_db()
+    doctors = {
+        r["id"]: r["full_name"]
+        for r in conn.execute("SELECT id, full_name FROM users WHERE role = 'Doctor';")
+    }
+    conn.close()
+
+    report = summarise(cube, lo, hi, doctors, only_doctor)
+    return jsonify({
+        "ok": True,
+        "from": day_of(lo),
+        "to": day_of(hi),
+        **report,
+        "months": {"cached": cached, "computed": computed},
+    }), 200
+
+
+# ------------------------------------------------------------------
+# BATCH (any logged-in user)
+# POST /api/batch {"requests": [{"path": "/api/notifications"}, ...]}
+#      -> {"responses": [{"status", "body"}, ...]} in request order.
+# GET sub-requests only; each one is checked like a direct call.
+# ------------------------------------------------------------------
+
+@api_bp.route("/batch", methods=["POST"])
+@requires("batch")
+def batch():
+    items = (request.json or {}).get("requests")
+    limit = current_app.config["BATCH_MAX_REQUESTS"]
+    if isinstance(items, list) and not 1 <= len(items) <= limit:
+        return _invalid_input({"requests": f"must hold 1 to {limit} entries"})
+    items, errors = BATCH_ITEM.validate_many(items)
+    if errors:
+        return _invalid_input(errors)
+
+    body = run_batch([item["path"] for item in items])
+    return current_app.response_class(body, status=200, mimetype="application/json")
+
+
+# ------------------------------------------------------------------
+# POLICY (introspection; see backend/policy.py)
+# GET /api/policy -> permissions, row scopes and the routes they guard.
+# Admin sees every role; everyone else sees their own.
+# ------------------------------------------------------------------
+
+@api_bp.route("/policy", methods=["GET"])
+@requires("policy.read")
+def policy():
+    role = None if session["role"] == "Admin" else session["role"]
+    return jsonify({"ok": True, **describe(current_app, role)}), 200
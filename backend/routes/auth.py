@@ -1,11 +1,12 @@
 from flask import Blueprint, request, jsonify, session
 from werkzeug.security import check_password_hash
 from ..db import get_db
+from ..policy import requires
 from ..security import (
     create_session_user,
     logout_user,
     generate_csrf_token,
-    require_login_and_csrf,
+    require_login,
 )
 
 auth_bp = Blueprint("auth_bp", __name__, url_prefix="/api/auth")
@@ -50,19 +51,12 @@ def login():
 
 
 @auth_bp.route("/logout", methods=["POST"])
+@requires("session.end")
 def logout():
     """
     POST /api/auth/logout
-    State-changing -> must require login, role check (any role),
-    and CSRF.
+    State-changing -> must require login (any role) and CSRF.
     """
-    ok, err = require_login_and_csrf(
-        allowed_roles=["Admin", "Doctor", "Staff", "Pharmacy", "Patient"]
-    )
-    if not ok:
-        msg, code = err
-        return jsonify({"ok": False, "error": msg}), code
-
     logout_user()
     return jsonify({"ok": True}), 200
 
@@ -72,9 +66,10 @@ def me():
     """
     GET /api/auth/me
     Returns current session user info + csrf token.
-    Does NOT require CSRF (read-only), but does require login.
+    Does NOT require CSRF (read-only), but does require login
+    (to the current tenant).
     """
-    if "user_id" not in session or "role" not in session:
+    if not require_login():
         return jsonify({"ok": False, "error": "Unauthorized"}), 401
 
     return jsonify({
@@ -0,0 +1,129 @@
+"""
+Whole-hospital day schedule (GET /api/schedule?date=&department=).
+
+Every doctor's appointments for one day come from a single range scan
+over idx_appointments_start_doctor_status (start_min, doctor_id, status,
+migration 3). The rows are grouped by doctor in Python. Before this,
+reception's day view needed one GET /api/appointments/<doctor_id> per
+doctor.
+
+Days are cached per (database, day) in an LRU (analytics.CubeCache):
+- days that are over are kept until evicted (SCHEDULE_CACHE_DAYS
+  entries),
+- today and later days are reused for SCHEDULE_OPEN_TTL_SECONDS.
+
+Booking an appointment or changing its status drops that day from this
+process's cache (invalidate_day). Other processes pick the change up
+when their TTL runs out; for days that are over, only when the entry is
+evicted or the process restarts.
+
+The cache holds appointments only. The doctor list, and so the
+department filter, is read fresh on every request, because doctors
+change department without touching appointments.
+"""
+import threading
+
+from flask import current_app
+
+from .analytics import CubeCache
+from .archive import ARCHIVE_ALIAS, reaches_archive
+from .db import current_archive_path, current_db_path, read_snapshot
+from .timeutil import MINUTES_PER_DAY, now_minutes
+
+_DAY_SQL = """
+    SELECT a.doctor_id, a.id, a.start_time, a.patient_id,
+           p.first_name || ' ' || p.last_name, a.reason, a.status, a.start_min
+      FROM {t} a
+      JOIN main.patients p ON p.id = a.patient_id
+     WHERE a.start_min >= ? AND a.start_min < ?
+"""
+
+_FIELDS = ("id", "start_time", "patient_id", "patient_name", "reason", "status")
+
+_lock = threading.Lock()
+
+
+def _cache(app) -> CubeCache:
+    cache = app.extensions.get("hms_schedule")
+    if cache is None:
+        with _lock:
+            cache = app.extensions.get("hms_schedule")
+            if cache is None:
+                cache = CubeCache(app.config["SCHEDULE_CACHE_DAYS"])
+                app.extensions["hms_schedule"] = cache
+    return cache
+
+
+def day_appointments(conn, day: int, archived: bool = False) -> dict:
+    """
+    {doctor_id: [appointment, ...]} for the day starting at `day` (epoch
+    minutes), each list in start order. archived: also read the
+    cold-tier copy (must be attached).
+    """
+    params = (day, day + MINUTES_PER_DAY)
+    sql = _DAY_SQL.format(t="main.appointments")
+    if archived:
+        sql += " UNION ALL " + _DAY_SQL.format(t=f"{ARCHIVE_ALIAS}.appointments")
+        params += params
+    # index order (start_min, doctor_id) needs no sort; appending keeps
+    # each doctor's list in start order
+    by_doctor = {}
+    for row in conn.execute(sql + " ORDER BY start_min;", params):
+        appointments = by_doctor.get(row[0])
+        if appointments is None:
+            appointments = by_doctor[row[0]] = []
+        appointments.append(dict(zip(_FIELDS, row[1:7])))
+    return by_doctor
+
+
+def day_schedule(day: int, department: str = None):
+    """
+    The current request's database's schedule for `day`:
+    ([{"doctor_id", "doctor_name", "department", "appointments"}], cached).
+    Doctors without appointments that day are listed with none.
+    """
+    app = current_app._get_current_object()
+    cache = _cache(app)
+    key = (current_db_path(), day)
+    archive_path = current_archive_path()
+
+    by_doctor = cache.get(key)
+    cached = by_doctor is not None
+    with read_snapshot(None if cached else archive_path) as conn:
+        if not cached:
+            attached = archive_path and ARCHIVE_ALIAS in {
+                row[1] for row in conn.execute("PRAGMA database_list;")
+            }
+            by_doctor = day_appointments(
+                conn, day, attached and reaches_archive(conn, "appointments", day)
+            )
+            ttl = app.config["SCHEDULE_OPEN_TTL_SECONDS"]
+            if day + MINUTES_PER_DAY <= now_minutes():
+                cache.put(key, by_doctor)
+            elif ttl > 0:
+                cache.put(key, by_doctor, ttl)
+        where, params = "role = 'Doctor'", ()
+        if department:
+            where, params = "role = 'Doctor' AND department = ? COLLATE NOCASE", (department,)
+        doctors = conn.execute(
+            f"SELECT id, full_name, department FROM users WHERE {where} ORDER BY full_name, id;",
+            params
+        ).fetchall()
+
+    return [
+        {"doctor_id": d[0], "doctor_name": d[1], "department": d[2],
+         "appointments": by_doctor.get(d[0], [])}
+        for d in doctors
+    ], cached
+
+
+def invalidate_day(start_min: int):
+    """
+    Forget the cached schedule of the day containing start_min (call
+    after a write to an appointment on that day).
+    """
+    app = current_app._get_current_object()
+    cache = app.extensions.get("hms_schedule")
+    if cache is not None:
+        day = start_min - start_min % MINUTES_PER_DAY
+        cache.discard((current_db_path(), day))
@@ -1,7 +1,9 @@
 import secrets
 import hmac
 import time
-from flask import session, request
+from flask import session
+
+from .tenancy import current_tenant
 
 # ------------------------
 # CSRF handling
@@ -51,8 +53,14 @@ def create_session_user(user_id: int, role: str):
     """
     Save the authenticated user in the server-side session.
     """
+    # new session ID on login, so one planted before login is useless
+    regenerate = getattr(session, "regenerate", None)
+    if regenerate is not None:
+        regenerate()
     session["user_id"] = user_id
     session["role"] = role
+    # the clinic this login belongs to (None when tenancy is off)
+    session["tenant"] = current_tenant()
     # rotate CSRF on login
     session["csrf_token"] = secrets.token_hex(32)
     session["csrf_ts"] = int(time.time())
@@ -67,46 +75,11 @@ def logout_user():
 
 def require_login() -> bool:
     """
-    True if session has a logged-in user.
-    """
-    return "user_id" in session and "role" in session
-
-
-def require_role(allowed_roles):
-    """
-    Check that current user has one of the allowed roles.
-    allowed_roles is a list like ["Admin", "Doctor"].
-    """
-    if not require_login():
-        return False
-    user_role = session.get("role")
-    return user_role in allowed_roles
-
-
-def require_login_and_csrf(allowed_roles=None):
-    """
-    Unified gatekeeper for protected routes.
-
-    Returns (True, None) if access allowed, OR
-    (False, ("Message", http_status_code)) if blocked.
-
-    Enforces:
-    - Logged-in user
-    - RBAC (if allowed_roles provided)
-    - CSRF for mutating methods
+    True if session has a logged-in user (of the current tenant).
     """
-    # Must be logged in
-    if not require_login():
-        return (False, ("Unauthorized", 401))
-
-    # Must have required role(s) if specified
-    if allowed_roles and not require_role(allowed_roles):
-        return (False, ("Forbidden", 403))
-
-    # Enforce CSRF only on mutating verbs
-    if request.method in ("POST", "PUT", "PATCH", "DELETE"):
-        client_token = request.headers.get("X-CSRF-Token", "")
-        if not validate_csrf_token(client_token):
-            return (False, ("Invalid or missing CSRF token", 403))
+    return (
+        "user_id" in session
+        and "role" in session
+        and session.get("tenant") == current_tenant()
+    )
 
-    return (True, None)
@@ -0,0 +1,380 @@
+"""
+Server-side sessions: the cookie carries an opaque random ID, the
+session itself lives in SQLite.
+
+Flask's default session is the whole dict, signed, in the cookie. It is
+decoded and checked on every request and, because the app marks every
+session non-permanent in before_request, re-serialised and re-signed on
+every response. Also, nothing on the server can revoke it. With
+SESSION_BACKEND = "server" (the default) create_app installs
+ServerSessionInterface instead:
+
+- Cookie: secrets.token_urlsafe(32). The table stores sha256(cookie), so
+  a copy of the database holds no usable cookies.
+- Record: one row per session with compact JSON data, user_id/tenant
+  columns (for revocation) and expires_at. The idle timeout is
+  SESSION_IDLE_SECONDS. A request that changes nothing does not write.
+  The expiry is pushed forward at most once per SESSION_TOUCH_SECONDS.
+- Reads go through an in-process LRU (SESSION_CACHE_SIZE entries). An
+  entry is re-read from SQLite after SESSION_CACHE_SECONDS, which bounds
+  how long another process keeps honouring a revoked session.
+- Expired rows are swept in batches of SESSION_SWEEP_BATCH, at most one
+  batch per request and only once every SESSION_SWEEP_SECONDS while
+  there is nothing left to delete, so a sweep never holds the write lock
+  for long.
+- The session ID changes when someone logs in (see
+  security.create_session_user). Logout deletes the row.
+
+The store sits behind a small interface (SessionStore), so another
+backend can replace SQLiteSessionStore without touching the Flask side.
+"""
+import hashlib
+import json
+import secrets
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id         TEXT PRIMARY KEY,            -- sha256 of the cookie value
+    tenant     TEXT NOT NULL DEFAULT '',
+    user_id    INTEGER,
+    data       TEXT NOT NULL,               -- compact JSON
+    expires_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_sessions_expiry ON sessions (expires_at);
+CREATE INDEX IF NOT EXISTS idx_sessions_user ON sessions (tenant, user_id);
+"""
+
+MAX_SID_LEN = 64
+
+
+def _key(sid: str) -> str:
+    return hashlib.sha256(sid.encode()).hexdigest()
+
+
+def _owner(data: dict):
+    return data.get("tenant") or "", data.get("user_id")
+
+
+class SessionStore(ABC):
+    """
+    Where session records live. Keys are already hashed cookie values;
+    data is the session dict. load() returns (data, expires_at) or None.
+    A store missing any of these methods cannot be instantiated.
+    """
+
+    sweep_batch = 500
+
+    @abstractmethod
+    def load(self, key: str):
+        raise NotImplementedError
+
+    @abstractmethod
+    def save(self, key: str, data: dict, expires_at: float):
+        raise NotImplementedError
+
+    @abstractmethod
+    def touch(self, key: str, expires_at: float):
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    @abstractmethod
+    def revoke_user(self, user_id: int, tenant: str = None) -> list:
+        """Delete every session of that user; returns their keys."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def sweep(self, now: float) -> int:
+        """Delete up to sweep_batch expired sessions; returns how many."""
+        raise NotImplementedError
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Sessions table in its own database file (or ":memory:"). One
+    autocommit connection per process, shared under a lock; every
+    statement is a single short row operation.
+    """
+
+    def __init__(self, db_path: str, sweep_batch: int = 500):
+        self.sweep_batch = sweep_batch
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False,
+                                     isolation_level=None)
+        if db_path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode = WAL;")
+            self._conn.execute("PRAGMA synchronous = NORMAL;")
+            self._conn.execute("PRAGMA busy_timeout = 5000;")
+        self._conn.executescript(_SCHEMA)
+
+    def load(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, expires_at FROM sessions WHERE id = ?;", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def save(self, key, data, expires_at):
+        tenant, user_id = _owner(data)
+        blob = json.dumps(data, separators=(",", ":"))
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO sessions (id, tenant, user_id, data, expires_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (id) DO UPDATE SET
+                    tenant = excluded.tenant, user_id = excluded.user_id,
+                    data = excluded.data, expires_at = excluded.expires_at;
+                """,
+                (key, tenant, user_id, blob, expires_at)
+            )
+
+    def touch(self, key, expires_at):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE sessions SET expires_at = ? WHERE id = ?;", (expires_at, key)
+            )
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE id = ?;", (key,))
+
+    def revoke_user(self, user_id, tenant=None):
+        with self._lock:
+            rows = self._conn.execute(
+                "DELETE FROM sessions WHERE tenant = ? AND user_id = ? RETURNING id;",
+                (tenant or "", user_id)
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def sweep(self, now):
+        with self._lock:
+            return self._conn.execute(
+                """
+                DELETE FROM sessions
+                 WHERE id IN (SELECT id FROM sessions
+                               WHERE expires_at < ? LIMIT ?);
+                """,
+                (now, self.sweep_batch)
+            ).rowcount
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sessions;").fetchone()[0]
+
+
+class CachedSessionStore(SessionStore):
+    """
+    Bounded LRU in front of another store. Writes go through; cached
+    reads are trusted for `ttl` seconds.
+    """
+
+    def __init__(self, store: SessionStore, size: int = 10000, ttl: float = 5.0):
+        self.store = store
+        self.sweep_batch = store.sweep_batch
+        self.size = size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()       # key -> (data, expires_at, cached_at)
+
+    def load(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[2] < self.ttl:
+                self._entries.move_to_end(key)
+                return entry[0], entry[1]
+        record = self.store.load(key)
+        if record is None:
+            self._forget(key)
+        else:
+            self._remember(key, record[0], record[1])
+        return record
+
+    def save(self, key, data, expires_at):
+        self.store.save(key, data, expires_at)
+        self._remember(key, data, expires_at)
+
+    def touch(self, key, expires_at):
+        self.store.touch(key, expires_at)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries[key] = (entry[0], expires_at, entry[2])
+
+    def delete(self, key):
+        self.store.delete(key)
+        self._forget(key)
+
+    def revoke_user(self, user_id, tenant=None):
+        keys = self.store.revoke_user(user_id, tenant)
+        for key in keys:
+            self._forget(key)
+        return keys
+
+    def sweep(self, now):
+        # expired cache entries are rejected on load and age out of the LRU
+        return self.store.sweep(now)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remember(self, key, data, expires_at):
+        with self._lock:
+            self._entries[key] = (data, expires_at, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def _forget(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class ServerSession(CallbackDict, SessionMixin):
+    """
+    Session dict for one request: the stored data plus its ID.
+    """
+
+    def __init__(self, initial=None, sid: str = None, expires_at: float = 0.0):
+        def on_update(self):
+            self.modified = True
+            self.accessed = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.expires_at = expires_at
+        self.modified = False
+        self.accessed = False
+        self.rotate = False
+
+    def __getitem__(self, key):
+        self.accessed = True
+        return super().__getitem__(key)
+
+    def get(self, key, default=None):
+        self.accessed = True
+        return super().get(key, default)
+
+    def setdefault(self, key, default=None):
+        self.accessed = True
+        return super().setdefault(key, default)
+
+    # The cookie always lasts until the browser closes; the real lifetime
+    # is the server-side idle timeout, so `permanent` is not stored.
+    @property
+    def permanent(self) -> bool:
+        return False
+
+    @permanent.setter
+    def permanent(self, value: bool):
+        pass
+
+    def regenerate(self):
+        """
+        Issue a new ID when this response is saved (login).
+        """
+        self.rotate = True
+        self.modified = True
+
+
+class ServerSessionInterface(SessionInterface):
+    """
+    Flask session interface over a SessionStore (see module docstring).
+    """
+
+    def __init__(self, store: SessionStore, idle_seconds: int = 28800,
+                 touch_seconds: int = 300, sweep_seconds: int = 300):
+        self.store = store
+        self.idle_seconds = idle_seconds
+        self.touch_seconds = touch_seconds
+        self.sweep_seconds = sweep_seconds
+        self._next_sweep = 0.0
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid and len(sid) <= MAX_SID_LEN:
+            record = self.store.load(_key(sid))
+            if record is not None and record[1] > time.time():
+                return ServerSession(dict(record[0]), sid, record[1])
+        return ServerSession()
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        now = time.time()
+        self._maybe_sweep(now)
+        if session.accessed:
+            response.vary.add("Cookie")
+
+        if not session:
+            # logged out (or never had anything worth keeping)
+            if session.sid is not None:
+                self.store.delete(_key(session.sid))
+                response.delete_cookie(
+                    name, domain=domain, path=path,
+                    secure=self.get_cookie_secure(app),
+                    samesite=self.get_cookie_samesite(app),
+                    httponly=self.get_cookie_httponly(app),
+                )
+            return
+
+        expires_at = now + self.idle_seconds
+        if session.sid is None or session.rotate:
+            if session.sid is not None:
+                self.store.delete(_key(session.sid))
+            sid = secrets.token_urlsafe(32)
+            self.store.save(_key(sid), dict(session), expires_at)
+            response.set_cookie(
+                name, sid, domain=domain, path=path,
+                secure=self.get_cookie_secure(app),
+                samesite=self.get_cookie_samesite(app),
+                httponly=self.get_cookie_httponly(app),
+            )
+            response.vary.add("Cookie")
+        elif session.modified:
+            self.store.save(_key(session.sid), dict(session), expires_at)
+        elif session.expires_at + self.touch_seconds < expires_at:
+            self.store.touch(_key(session.sid), expires_at)
+
+    def _maybe_sweep(self, now: float):
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + self.sweep_seconds
+        if self.store.sweep(now) >= self.store.sweep_batch:
+            self._next_sweep = now      # full batch: more left, the next request continues
+
+    # ---- construction ----
+
+    @classmethod
+    def from_config(cls, cfg) -> "ServerSessionInterface":
+        store = SQLiteSessionStore(cfg["SESSION_DB_PATH"], cfg["SESSION_SWEEP_BATCH"])
+        return cls(
+            CachedSessionStore(store, cfg["SESSION_CACHE_SIZE"], cfg["SESSION_CACHE_SECONDS"]),
+            idle_seconds=cfg["SESSION_IDLE_SECONDS"],
+            touch_seconds=cfg["SESSION_TOUCH_SECONDS"],
+            sweep_seconds=cfg["SESSION_SWEEP_SECONDS"],
+        )
+
+
+def init_sessions(app):
+    """
+    Install server-side sessions on `app` (create_app does this unless
+    SESSION_BACKEND = "cookie").
+    """
+    interface = ServerSessionInterface.from_config(app.config)
+    app.session_interface = interface
+    app.extensions["hms_sessions"] = interface.store
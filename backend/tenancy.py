@@ -0,0 +1,201 @@
+"""
+Multi-facility tenancy: one deployment, one SQLite file per clinic.
+
+Enabled by setting TENANT_DB_DIR. Each request's tenant comes from
+- the X-Tenant-ID header (TENANT_HEADER), or
+- the subdomain under TENANT_BASE_DOMAIN ("north.hms.example" -> "north")
+and maps to <TENANT_DB_DIR>/<tenant>.db (archive: <tenant>.archive.db).
+It's resolved lazily, on the first get_db() of the request, so static
+pages never touch a database.
+
+Known tenants are the ones listed in TENANTS plus any whose file already
+exists; anything else is a 404, so a header can't create files.
+
+TenantRegistry keeps an LRU of at most TENANT_MAX_OPEN tenants with an
+open reader pool; the least recently used one (or any idle longer than
+TENANT_IDLE_SECONDS) is evicted and its pooled connections closed. This
+bounds file descriptors and page-cache memory no matter how many tenants
+exist. init_db (and so the migrations) runs once per tenant per process,
+on first access.
+
+Sessions remember the tenant they were created in (security.py), so a
+login at one clinic is not valid at another.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from flask import current_app, g, jsonify, request
+
+from .db import DEFAULT_READ_POOL_SIZE, _ReaderPool, init_db
+
+_tenant_re = re.compile(r"^[a-z0-9][a-z0-9-]{0,62}$")
+
+
+class UnknownTenant(Exception):
+    """The request names no tenant, or one this deployment doesn't have."""
+
+
+class Tenant:
+    """
+    One open tenant: its files and its pool of read-only connections.
+    """
+
+    __slots__ = ("name", "db_path", "archive_path", "pool", "last_used")
+
+    def __init__(self, name: str, db_path: str, archive_path: str, pool_size: int):
+        self.name = name
+        self.db_path = db_path
+        self.archive_path = archive_path
+        self.pool = _ReaderPool(db_path, pool_size)
+        self.last_used = time.monotonic()
+
+
+class TenantRegistry:
+    """
+    Bounded LRU of open tenants (see module docstring).
+    """
+
+    def __init__(self, db_dir: str, tenants=(), max_open: int = 64,
+                 idle_seconds: float = 300.0, pool_size: int = DEFAULT_READ_POOL_SIZE,
+                 seed_demo_users: bool = False, header: str = "X-Tenant-ID",
+                 base_domain: str = ""):
+        self.db_dir = Path(db_dir)
+        self.known = frozenset(tenants)
+        self.max_open = max(1, max_open)
+        self.idle_seconds = idle_seconds
+        self.pool_size = pool_size
+        self.seed_demo_users = seed_demo_users
+        self.header = header
+        self.base_domain = base_domain.lower().lstrip(".")
+        self._open = OrderedDict()          # name -> Tenant, oldest first
+        self._lock = threading.Lock()
+        self._initialized = set()
+        self._init_locks = {}
+        self.evictions = 0
+
+    @classmethod
+    def from_config(cls, cfg) -> "TenantRegistry":
+        return cls(
+            cfg["TENANT_DB_DIR"],
+            tenants=[t.strip() for t in cfg.get("TENANTS", "").split(",") if t.strip()],
+            max_open=cfg.get("TENANT_MAX_OPEN", 64),
+            idle_seconds=cfg.get("TENANT_IDLE_SECONDS", 300),
+            pool_size=cfg.get("DB_READ_POOL_SIZE", DEFAULT_READ_POOL_SIZE),
+            seed_demo_users=cfg.get("TENANT_SEED_DEMO_USERS", False),
+            header=cfg.get("TENANT_HEADER", "X-Tenant-ID"),
+            base_domain=cfg.get("TENANT_BASE_DOMAIN", ""),
+        )
+
+    # ---- per request -----------------------------------------------
+
+    def for_request(self) -> Tenant:
+        """
+        The current request's tenant (resolved once, cached on flask.g).
+        """
+        tenant = g.get("hms_tenant")
+        if tenant is None:
+            tenant = g.hms_tenant = self.get(self.resolve_name())
+        return tenant
+
+    def resolve_name(self) -> str:
+        name = request.headers.get(self.header)
+        if not name and self.base_domain:
+            host = request.host.split(":", 1)[0].lower()
+            suffix = "." + self.base_domain
+            if host.endswith(suffix):
+                name = host[:-len(suffix)]
+        if not name:
+            raise UnknownTenant("No tenant")
+        return name.strip().lower()
+
+    # ---- registry --------------------------------------------------
+
+    def get(self, name: str) -> Tenant:
+        """
+        Open (or reuse) a tenant, initialising its DB on first access.
+        """
+        if not _tenant_re.match(name):
+            raise UnknownTenant("Unknown tenant")
+        now = time.monotonic()
+        with self._lock:
+            tenant = self._open.get(name)
+            if tenant is not None:
+                self._open.move_to_end(name)
+                tenant.last_used = now
+            evicted = self._evict_idle(now)
+        if tenant is None:
+            tenant = self._open_tenant(name)
+            with self._lock:
+                current = self._open.get(name)
+                if current is not None:
+                    # another thread opened it meanwhile; keep theirs
+                    tenant.pool.close_all()
+                    tenant = current
+                else:
+                    self._open[name] = tenant
+                self._open.move_to_end(name)
+                while len(self._open) > self.max_open:
+                    evicted.append(self._open.popitem(last=False)[1])
+        for old in evicted:
+            self.evictions += 1
+            old.pool.close_all()
+        return tenant
+
+    def open_count(self) -> int:
+        return len(self._open)
+
+    def close_all(self):
+        with self._lock:
+            tenants = list(self._open.values())
+            self._open.clear()
+        for tenant in tenants:
+            tenant.pool.close_all()
+
+    def _evict_idle(self, now: float) -> list:
+        evicted = []
+        cutoff = now - self.idle_seconds
+        while self._open:
+            oldest = next(iter(self._open.values()))
+            if oldest.last_used >= cutoff:
+                break
+            evicted.append(self._open.popitem(last=False)[1])
+        return evicted
+
+    def _open_tenant(self, name: str) -> Tenant:
+        db_path = self.db_dir / f"{name}.db"
+        if name not in self._initialized:
+            if name not in self.known and not db_path.exists():
+                raise UnknownTenant("Unknown tenant")
+            with self._lock:
+                init_lock = self._init_locks.setdefault(name, threading.Lock())
+            with init_lock:
+                if name not in self._initialized:
+                    self.db_dir.mkdir(parents=True, exist_ok=True)
+                    init_db(seed_demo_users=self.seed_demo_users, db_path=str(db_path))
+                    self._initialized.add(name)
+        return Tenant(name, str(db_path), str(self.db_dir / f"{name}.archive.db"),
+                      self.pool_size)
+
+
+def current_tenant():
+    """
+    Name of the current request's tenant, or None when tenancy is off.
+    """
+    tenants = current_app.extensions.get("hms_tenants")
+    if tenants is None:
+        return None
+    return tenants.for_request().name
+
+
+def init_tenancy(app):
+    """
+    Turn on tenancy for `app` (create_app does this when TENANT_DB_DIR is set).
+    """
+    app.extensions["hms_tenants"] = TenantRegistry.from_config(app.config)
+
+    @app.errorhandler(UnknownTenant)
+    def unknown_tenant(exc):
+        return jsonify({"ok": False, "error": str(exc)}), 404
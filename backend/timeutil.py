@@ -0,0 +1,99 @@
+"""
+Time helpers shared by the routes and the DB layer.
+
+Storage conventions:
+- created_at (every table): "YYYY-MM-DDTHH:MM:SSZ", UTC, from now_iso()
+- appointment slots: "YYYY-MM-DD HH:MM" for display (start_time) plus
+  start_min = minutes since 1970-01-01 00:00 as INTEGER for indexing,
+  ordering and range queries. Slots are clinic wall-clock times, so no
+  timezone conversion is applied in either direction.
+"""
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+SLOT_FORMAT = "%Y-%m-%d %H:%M"
+ISO_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+MINUTES_PER_DAY = 24 * 60
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+_EPOCH = datetime(1970, 1, 1)
+
+
+def now_iso() -> str:
+    """UTC timestamp for audit fields."""
+    return datetime.utcnow().strftime(ISO_FORMAT)
+
+
+def parse_slot(value) -> int:
+    """
+    "YYYY-MM-DD HH:MM" -> epoch minutes, or None if malformed.
+    Fixed-format slicing (no strptime); results are memoised because the
+    same handful of slot strings arrive over and over.
+    """
+    if type(value) is not str or len(value) != 16:
+        return None
+    return _parse_slot(value)
+
+
+def parse_day(value) -> int:
+    """
+    "YYYY-MM-DD" -> epoch minutes of that day's 00:00, or None.
+    """
+    if type(value) is not str or len(value) != 10:
+        return None
+    return _parse_slot(value + " 00:00")
+
+
+def parse_bound(value) -> int:
+    """
+    Range-query bound: accepts a full slot or a bare day.
+    """
+    if type(value) is str and len(value) == 10:
+        return parse_day(value)
+    return parse_slot(value)
+
+
+def format_slot(minutes: int) -> str:
+    """
+    Epoch minutes -> "YYYY-MM-DD HH:MM".
+    """
+    return (_EPOCH + timedelta(minutes=minutes)).strftime(SLOT_FORMAT)
+
+
+def day_of(minutes: int) -> str:
+    """
+    Epoch minutes -> "YYYY-MM-DD".
+    """
+    return date.fromordinal(_EPOCH_ORDINAL + minutes // MINUTES_PER_DAY).isoformat()
+
+
+def now_minutes() -> int:
+    """
+    Current clinic wall-clock time as epoch minutes.
+    """
+    now = datetime.now()
+    return (
+        (now.toordinal() - _EPOCH_ORDINAL) * MINUTES_PER_DAY
+        + now.hour * 60
+        + now.minute
+    )
+
+
+@lru_cache(maxsize=4096)
+def _parse_slot(value: str):
+    if (
+        value[4] != "-" or value[7] != "-" or value[10] != " " or value[13] != ":"
+        or not value.isascii()
+    ):
+        return None
+    y, mo, d, h, mi = value[0:4], value[5:7], value[8:10], value[11:13], value[14:16]
+    if not (y.isdigit() and mo.isdigit() and d.isdigit() and h.isdigit() and mi.isdigit()):
+        return None
+    hour, minute = int(h), int(mi)
+    if hour > 23 or minute > 59:
+        return None
+    try:
+        ordinal = date(int(y), int(mo), int(d)).toordinal()
+    except ValueError:
+        return None
+    return (ordinal - _EPOCH_ORDINAL) * MINUTES_PER_DAY + hour * 60 + minute
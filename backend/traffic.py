@@ -0,0 +1,669 @@
+"""
+Traffic capture and replay for performance regression tests.
+
+Synthetic benchmarks hit one route in a loop. Real clinics don't: logins
+pile up at 8am, dashboards poll, billing lands at shift end. This module
+records what real traffic looks like, with nothing identifying, and
+plays it back against a throwaway instance.
+
+Capture (opt-in): set TRAFFIC_CAPTURE_PATH and create_app installs
+before/after-request hooks. For every /api request they append one JSON
+line:
+
+    {"t": 1767254400123,          wall time, epoch ms
+     "r": "Staff",                session role after the request (or null)
+     "m": "POST", "u": "/api/appointments/<int:appointment_id>/status",
+     "s": 200,                    status code
+     "d": 1840,                   server time in microseconds (to the end
+                                  of the body for streamed responses)
+     "q": {"from": "date"},       query string shape
+     "b": {"status": {"=": "canceled"}, "patient_id": "int"}}   body shape
+
+Only the route template is kept, never the URL (no ids). Values are
+replaced by their shape: "int", "num", "bool", "null", "date"
+(YYYY-MM-DD), "slot" (YYYY-MM-DD HH:MM), "iso", "digits:N" or "str:N"
+(credentials, SECRET_KEYS: just "str").
+Lists become {"[]": [length, element shape]}. Values of KEEP_VALUES keys
+(statuses, job kinds, paging limits) are kept as {"=": value}, because
+they change what the server does and are never personal data. No
+usernames, cookies, IPs or headers are recorded. A POST /api/batch is
+one entry; its sub-requests are not recorded separately (a replay would
+send them twice), but its body keeps each sub-request's route template
+and query shape, {"route": ..., "q": ...}. TRAFFIC_CAPTURE_SAMPLE
+keeps a fraction of requests. Lines go through a bounded queue to a
+writer thread. When the queue is full, lines are dropped and counted;
+the request never waits.
+
+Replay:
+
+    python -m backend.traffic replay capture.jsonl --speed 4 --concurrency 16
+
+This starts a local instance on a temporary database seeded with demo
+users and synthetic patients (seed_synthetic). It logs one session in
+per role with the demo credentials. Then it sends every captured request
+at its original offset divided by --speed (--speed 0: as fast as the
+pool allows). URL arguments and body values are generated from the
+shapes. Ids come from the seeded rows, and slots are random future
+half-hours. Use --base-url to aim at an instance that is already running
+and demo-seeded. Logins are replayed as real logins on a fresh client;
+logouts are skipped, since they would end the shared session. The report
+gives per-route count, error count, latency p50/p90/p99/max and the
+captured p50 for comparison.
+"""
+import argparse
+import atexit
+import json
+import logging
+import queue
+import random
+import re
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import CookieJar
+from pathlib import Path
+from urllib.parse import parse_qsl, urlsplit
+
+from flask import g, request, session
+from werkzeug.datastructures import MultiDict
+from werkzeug.exceptions import HTTPException
+
+from .batch import SUBREQUEST_ENVIRON_KEY
+
+log = logging.getLogger(__name__)
+
+# body / query keys whose values are kept verbatim (enums, small numbers)
+KEEP_VALUES = frozenset((
+    "status", "expected_status", "kind", "limit", "fields", "priority", "min_score",
+))
+# credentials: not even their length is recorded
+SECRET_KEYS = frozenset(("username", "password", "current_password", "new_password"))
+MAX_KEYS = 50
+MAX_STRING = 32
+
+# what seed_demo_users creates (db.init_db)
+DEMO_LOGINS = {
+    "Admin": ("admin", "admin123"),
+    "Doctor": ("drsmith", "doctor123"),
+    "Staff": ("reception", "staff123"),
+    "Pharmacy": ("pharma", "pharma123"),
+    "Patient": ("alice", "patient123"),
+}
+
+_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+_SLOT_RE = re.compile(r"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}$")
+_ISO_RE = re.compile(r"^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}Z?$")
+_DIGITS_RE = re.compile(r"^[\d ()+.-]+$")
+_ARG_RE = re.compile(r"<(?:[a-z]+:)?([a-z_]+)>")
+
+# TestingConfig overrides that would make a replay unrepresentative
+_PRODUCTION_KEYS = (
+    "AUDIT_MODE", "ANALYTICS_OPEN_TTL_SECONDS", "SCHEDULE_OPEN_TTL_SECONDS",
+    "MEDICATION_RECHECK_SECONDS",
+)
+
+_STOP = object()
+_lock = threading.Lock()
+
+
+# ---- shapes ----------------------------------------------------------
+
+def shape_of(value, key: str = None):
+    """
+    Anonymised description of a JSON value (see module docstring).
+    """
+    if key in KEEP_VALUES and (
+        type(value) in (int, float, bool) or (type(value) is str and len(value) <= MAX_STRING)
+    ):
+        return {"=": value}
+    if value is None:
+        return "null"
+    if key in SECRET_KEYS:
+        return "str"
+    if type(value) is bool:
+        return "bool"
+    if type(value) is int:
+        return "int"
+    if type(value) is float:
+        return "num"
+    if type(value) is str:
+        if _SLOT_RE.match(value):
+            return "slot"
+        if _DATE_RE.match(value):
+            return "date"
+        if _ISO_RE.match(value):
+            return "iso"
+        if value and _DIGITS_RE.match(value):
+            return f"digits:{len(value)}"
+        return f"str:{len(value)}"
+    if isinstance(value, list):
+        return {"[]": [len(value), shape_of(value[0], key) if value else "null"]}
+    if isinstance(value, dict):
+        return {str(k): shape_of(v, str(k)) for k, v in list(value.items())[:MAX_KEYS]}
+    return "null"
+
+
+def _query_shape(args):
+    if not args:
+        return None
+    return {k: shape_of(v, k) for k, v in list(args.items())[:MAX_KEYS]}
+
+
+def _batch_shape(adapter, body):
+    """
+    POST /api/batch body with every sub-request path reduced to
+    {"route": template, "q": query shape}, in order (a list shape would
+    keep only the first).
+    """
+    items = body.get("requests") if isinstance(body, dict) else None
+    if not isinstance(items, list):
+        return shape_of(body)
+    shaped = []
+    for item in items[:MAX_KEYS]:
+        path = item.get("path") if isinstance(item, dict) else None
+        if not isinstance(path, str):
+            shaped.append(shape_of(item))
+            continue
+        url = urlsplit(path)
+        try:
+            rule, _ = adapter.match(url.path, method="GET", return_rule=True)
+        except HTTPException:
+            shaped.append({"path": shape_of(path)})
+            continue
+        shaped.append({"path": {"route": rule.rule,
+                                "q": _query_shape(MultiDict(parse_qsl(url.query)))}})
+    return {"requests": shaped}
+
+
+class Synthesizer:
+    """
+    Generates concrete values for shapes; `pools` maps id names
+    ("patient_id", ...) to ids that exist in the target database.
+    """
+
+    def __init__(self, pools: dict, seed: int = 0):
+        self.pools = {k: list(v) for k, v in pools.items() if v}
+        self.rng = random.Random(seed)
+
+    def ident(self, name: str) -> int:
+        pool = self.pools.get(name)
+        return self.rng.choice(pool) if pool else self.rng.randint(1, 50)
+
+    def value(self, shape, key: str = ""):
+        rng = self.rng
+        if isinstance(shape, list):
+            return [self.value(element, key) for element in shape]
+        if isinstance(shape, dict):
+            if "=" in shape:
+                return shape["="]
+            if "route" in shape:
+                return self.url(shape["route"], shape["q"])
+            if "[]" in shape:
+                length, element = shape["[]"]
+                return [self.value(element, key) for _ in range(min(length, 100))]
+            return {k: self.value(v, k) for k, v in shape.items()}
+        if shape == "int":
+            return self.ident(key) if key.endswith("id") else rng.randint(1, 100)
+        if shape == "num":
+            return round(rng.uniform(5, 500), 2)
+        if shape == "bool":
+            return rng.random() < 0.5
+        if shape == "date":
+            return time.strftime("%Y-%m-%d", time.gmtime(time.time() + rng.randint(-30, 30) * 86400))
+        if shape == "slot":
+            day = time.gmtime(time.time() + rng.randint(1, 60) * 86400)
+            return time.strftime("%Y-%m-%d", day) + f" {rng.randint(8, 16):02d}:{rng.choice((0, 30)):02d}"
+        if shape == "iso":
+            return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        if isinstance(shape, str) and shape.startswith("digits:"):
+            return "555" + "".join(str(rng.randrange(10)) for _ in range(max(4, int(shape[7:]) - 3)))
+        if isinstance(shape, str) and shape.startswith("str"):
+            n = int(shape[4:]) if shape[3:4] == ":" else 8
+            return "".join(rng.choice("aeioubcdfghklmnprst") for _ in range(n)).capitalize()
+        return None
+
+    def url(self, rule: str, query) -> str:
+        path = _ARG_RE.sub(lambda m: str(self.ident(m.group(1))), rule)
+        if query:
+            pairs = [(k, self.value(v, k)) for k, v in query.items()]
+            path += "?" + "&".join(
+                f"{urllib.request.quote(k)}={urllib.request.quote(str(v))}" for k, v in pairs
+            )
+        return path
+
+
+# ---- capture ---------------------------------------------------------
+
+class CaptureWriter:
+    """
+    Bounded queue + one daemon thread appending lines to the capture file.
+    """
+
+    def __init__(self, path: str, queue_size: int = 10000):
+        self.path = path
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._run, name="traffic-capture", daemon=True)
+        self._closed = False
+        self.written = 0
+        self.dropped = 0
+        self._thread.start()
+
+    def record(self, line: str):
+        if self._closed:
+            return
+        try:
+            self._queue.put_nowait(line)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, timeout: float = 10.0):
+        """
+        Write what is queued and stop.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _run(self):
+        with open(self.path, "a", encoding="utf-8") as f:
+            while True:
+                line = self._queue.get()
+                if line is _STOP:
+                    break
+                f.write(line)
+                self.written += 1
+                if self._queue.empty():
+                    f.flush()
+
+
+def init_capture(app):
+    """
+    Install the capture hooks (create_app does this when
+    TRAFFIC_CAPTURE_PATH is set).
+    """
+    writer = CaptureWriter(app.config["TRAFFIC_CAPTURE_PATH"],
+                           app.config["TRAFFIC_CAPTURE_QUEUE"])
+    atexit.register(writer.close)
+    app.extensions["hms_traffic"] = writer
+    sample = app.config["TRAFFIC_CAPTURE_SAMPLE"]
+    rng = random.Random()
+
+    @app.before_request
+    def _capture_start():
+        if (request.path.startswith("/api/")
+                and not request.environ.get(SUBREQUEST_ENVIRON_KEY)
+                and (sample >= 1 or rng.random() < sample)):
+            g.traffic_started = time.perf_counter()
+
+    @app.after_request
+    def _capture_record(response):
+        started = g.pop("traffic_started", None)
+        if started is None or request.url_rule is None:
+            return response
+        entry = {
+            "t": int(time.time() * 1000),
+            "r": session.get("role"),
+            "m": request.method,
+            "u": request.url_rule.rule,
+            "s": response.status_code,
+            "q": _query_shape(request.args),
+            "b": None,
+        }
+        if request.is_json:
+            body = request.get_json(silent=True)
+            if request.url_rule.endpoint == "api_bp.batch":
+                entry["b"] = _batch_shape(app.url_map.bind(request.host), body)
+            else:
+                entry["b"] = shape_of(body)
+
+        def finish():
+            entry["d"] = int((time.perf_counter() - started) * 1e6)
+            writer.record(json.dumps(entry, separators=(",", ":")) + "\n")
+
+        if response.is_streamed:
+            # json_rows: time it once the whole body has been sent
+            response.call_on_close(finish)
+        else:
+            finish()
+        return response
+
+
+def read_capture(path) -> list:
+    """
+    Captured entries in time order (unparseable lines are skipped).
+    """
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(entry, dict) and {"t", "m", "u"} <= entry.keys():
+                entries.append(entry)
+    entries.sort(key=lambda e: e["t"])
+    return entries
+
+
+# ---- synthetic target --------------------------------------------------
+
+def seed_synthetic(conn, patients: int = 2000, doctors: int = 10, seed: int = 0) -> dict:
+    """
+    Patients, doctors, appointments (past and upcoming), prescriptions and
+    bills on top of the demo users; patient 1 belongs to the demo Patient.
+    Returns the id pools for Synthesizer. Commits.
+    """
+    from .changes import set_suppressed
+    from .dedupe import backfill_match_keys
+    from .timeutil import format_slot, now_iso, now_minutes
+
+    rng = random.Random(seed)
+    stamp = now_iso()
+    cur = conn.cursor()
+    cur.execute("BEGIN;")
+    set_suppressed(cur, True)
+    first = cur.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM users;").fetchone()[0]
+    cur.executemany(
+        "INSERT INTO users (id, username, password_hash, role, full_name, created_at) "
+        "VALUES (?, ?, '-', 'Doctor', ?, ?);",
+        [(first + d, f"replay_doc{d}", f"Dr. Replay {d}", stamp) for d in range(doctors)],
+    )
+    doctor_ids = [2] + [first + d for d in range(doctors)]
+    base = cur.execute("SELECT COALESCE(MAX(id), 0) FROM patients;").fetchone()[0]
+    cur.executemany(
+        "INSERT INTO patients (id, first_name, last_name, dob, phone, owner_user_id, created_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?);",
+        [
+            (base + i, f"Synth{i}", rng.choice(("Lee", "Okafor", "Novak", "Silva", "Khan")),
+             f"{rng.randint(1940, 2015)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+             f"555{rng.randrange(10 ** 7):07d}", 5 if base + i == 1 else None, stamp)
+            for i in range(1, patients + 1)
+        ],
+    )
+    backfill_match_keys(cur)
+
+    # ~3 visits per patient within 60 days either side of today, one
+    # per doctor per half-hour slot
+    now = now_minutes()
+    day0 = now - now % 1440 - 60 * 1440
+    appointments, used = [], set()
+    for pid in range(base + 1, base + patients + 1):
+        for _ in range(3):
+            doctor = rng.choice(doctor_ids)
+            slot = day0 + rng.randrange(120) * 1440 + 8 * 60 + rng.randrange(18) * 30
+            if (doctor, slot) in used:
+                continue
+            used.add((doctor, slot))
+            status = ("scheduled" if slot > now
+                      else rng.choice(("completed", "completed", "canceled")))
+            appointments.append((pid, doctor, format_slot(slot), slot, status, stamp))
+    cur.executemany(
+        "INSERT INTO appointments (patient_id, doctor_id, start_time, start_min, reason, "
+        "status, created_at) VALUES (?, ?, ?, ?, 'Check-up', ?, ?);",
+        appointments,
+    )
+    medications = cur.execute("SELECT id, name FROM medications WHERE active = 1;").fetchall()
+    done = cur.execute(
+        "SELECT id, patient_id, doctor_id FROM appointments WHERE status = 'completed';"
+    ).fetchall()
+    if medications:
+        cur.executemany(
+            "INSERT INTO prescriptions (appointment_id, doctor_id, patient_id, medication, "
+            "medication_id, instructions, created_at) VALUES (?, ?, ?, ?, ?, 'As directed', ?);",
+            [(a[0], a[2], a[1], m[1], m[0], stamp)
+             for a in done for m in [rng.choice(medications)]],
+        )
+    cur.executemany(
+        "INSERT INTO billing (patient_id, amount, status, description, created_at) "
+        "VALUES (?, ?, ?, 'Consultation', ?);",
+        [(a[1], round(rng.uniform(20, 300), 2), rng.choice(("paid", "unpaid")), stamp)
+         for a in done],
+    )
+    set_suppressed(cur, False)
+    conn.commit()
+
+    return {
+        "patient_id": range(base + 1, base + patients + 1),
+        "doctor_id": doctor_ids,
+        "appointment_id": [r[0] for r in cur.execute("SELECT id FROM appointments;")],
+        "user_id": [r[0] for r in cur.execute("SELECT id FROM users;")],
+        "job_id": [1],
+    }
+
+
+class LocalInstance:
+    """
+    The app on a temporary, synthetically seeded database, served by
+    Werkzeug's threaded server on a free local port.
+    """
+
+    def __init__(self, patients: int = 2000, doctors: int = 10, db_dir: str = None):
+        from werkzeug.serving import make_server
+
+        from .app import create_app
+        from .config import Config
+        from .db import get_db, init_db
+
+        self._tmp = None
+        if db_dir is None:
+            self._tmp = tempfile.TemporaryDirectory(prefix="hms-replay-")
+            db_dir = self._tmp.name
+        # testing=True keeps sessions in memory and leaves the developer's
+        # files alone; caches and audit then go back to production settings
+        app = create_app(testing=True)
+        for key in _PRODUCTION_KEYS:
+            app.config[key] = getattr(Config, key)
+        app.config.update(TESTING=False, DB_PATH=str(Path(db_dir) / "replay.db"))
+        with app.app_context():
+            init_db(seed_demo_users=True)
+            conn = get_db(readonly=False)
+            self.pools = seed_synthetic(conn, patients, doctors)
+            conn.close()
+        logging.getLogger("werkzeug").setLevel(logging.ERROR)
+        self._server = make_server("127.0.0.1", 0, app, threaded=True)
+        self.base_url = f"http://127.0.0.1:{self._server.server_port}"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._server.shutdown()
+        self._thread.join(10)
+        if self._tmp is not None:
+            self._tmp.cleanup()
+
+
+# ---- replay ----------------------------------------------------------
+
+class _Client:
+    """
+    One cookie jar (= one session) plus its CSRF token.
+    """
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()))
+        self.csrf = None
+
+    def send(self, method: str, path: str, body=None):
+        data = None if body is None else json.dumps(body).encode()
+        req = urllib.request.Request(self.base_url + path, data=data, method=method)
+        if data is not None:
+            req.add_header("Content-Type", "application/json")
+        if self.csrf:
+            req.add_header("X-CSRF-Token", self.csrf)
+        try:
+            with self.opener.open(req, timeout=60) as r:
+                return r.status, r.read()
+        except urllib.error.HTTPError as e:
+            e.read()
+            return e.code, b""
+
+    def login(self, username: str, password: str) -> int:
+        status, body = self.send("POST", "/api/auth/login",
+                                 {"username": username, "password": password})
+        if status == 200:
+            self.csrf = json.loads(body)["csrf_token"]
+        return status
+
+
+def _percentile(ordered: list, p: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+def replay(entries, base_url: str, pools: dict, speed: float = 1.0, concurrency: int = 8,
+           logins: dict = None, seed: int = 0) -> dict:
+    """
+    Send `entries` (read_capture) to base_url. speed: time compression
+    (0 = no pacing). Returns {"routes": {"METHOD rule": stats}, "sent",
+    "skipped", "lag_ms_p99", "seconds"}.
+    """
+    logins = logins or DEMO_LOGINS
+    synth = Synthesizer(pools, seed)
+    clients = {}
+    for role, (username, password) in logins.items():
+        client = _Client(base_url)
+        if client.login(username, password) == 200:
+            clients[role] = client
+    anonymous = _Client(base_url)
+
+    results = {}                            # key -> [latencies], errors, captured
+    results_lock = threading.Lock()
+    lags = []
+
+    def run(entry, key, path, body):
+        role = entry.get("r")
+        if entry["u"] == "/api/auth/login":
+            client = _Client(base_url)
+            user = logins.get(role) or next(iter(logins.values()))
+            body = {"username": user[0], "password": user[1]}
+        else:
+            client = clients.get(role, anonymous)
+        t0 = time.perf_counter()
+        try:
+            status, _ = client.send(entry["m"], path, body)
+        except OSError:
+            status = 599
+        elapsed = (time.perf_counter() - t0) * 1000
+        with results_lock:
+            stats = results[key]
+            stats["ms"].append(elapsed)
+            stats["errors"] += status >= 500
+            stats["status"][status] = stats["status"].get(status, 0) + 1
+
+    sent = skipped = 0
+    started = time.perf_counter()
+    t_first = entries[0]["t"] if entries else 0
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for entry in entries:
+            if entry["u"] == "/api/auth/logout":
+                skipped += 1
+                continue
+            key = f"{entry['m']} {entry['u']}"
+            path = synth.url(entry["u"], entry.get("q"))
+            body = synth.value(entry["b"]) if entry.get("b") not in (None, "null") else None
+            if speed > 0:
+                due = started + (entry["t"] - t_first) / 1000 / speed
+                wait = due - time.perf_counter()
+                if wait > 0:
+                    time.sleep(wait)
+                else:
+                    lags.append(-wait * 1000)
+            with results_lock:
+                stats = results.setdefault(key, {"ms": [], "errors": 0, "status": {}, "captured": []})
+                if entry.get("d") is not None:
+                    stats["captured"].append(entry["d"] / 1000)
+            pool.submit(run, entry, key, path, body)
+            sent += 1
+    seconds = time.perf_counter() - started
+
+    routes = {}
+    for key, stats in sorted(results.items()):
+        ordered = sorted(stats["ms"])
+        if not ordered:
+            continue
+        routes[key] = {
+            "count": len(ordered),
+            "errors": stats["errors"],
+            "status": {str(k): v for k, v in sorted(stats["status"].items())},
+            "p50": round(_percentile(ordered, 0.5), 2),
+            "p90": round(_percentile(ordered, 0.9), 2),
+            "p99": round(_percentile(ordered, 0.99), 2),
+            "max": round(ordered[-1], 2),
+            "captured_p50": (round(statistics.median(stats["captured"]), 2)
+                             if stats["captured"] else None),
+        }
+    lags.sort()
+    return {
+        "routes": routes,
+        "sent": sent,
+        "skipped": skipped,
+        "seconds": round(seconds, 2),
+        "lag_ms_p99": round(_percentile(lags, 0.99), 1) if lags else 0.0,
+    }
+
+
+def format_report(report: dict) -> str:
+    lines = [f"{'route':<55} {'n':>6} {'err':>4} {'p50':>8} {'p90':>8} {'p99':>8} "
+             f"{'max':>8} {'capt50':>8}"]
+    for key, r in report["routes"].items():
+        captured = "-" if r["captured_p50"] is None else f"{r['captured_p50']:.2f}"
+        lines.append(f"{key:<55} {r['count']:>6} {r['errors']:>4} {r['p50']:>8.2f} "
+                     f"{r['p90']:>8.2f} {r['p99']:>8.2f} {r['max']:>8.2f} {captured:>8}")
+    lines.append(f"{report['sent']} requests in {report['seconds']} s, {report['skipped']} "
+                 f"skipped, dispatch lag p99 {report['lag_ms_p99']} ms (latencies in ms)")
+    return "\n".join(lines)
+
+
+# ---- CLI -------------------------------------------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay captured traffic")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rp = sub.add_parser("replay", help="replay a capture and report latencies per route")
+    rp.add_argument("capture")
+    rp.add_argument("--base-url", default="",
+                    help="running demo-seeded instance (default: start a local one)")
+    rp.add_argument("--speed", type=float, default=1.0,
+                    help="time compression, 0 = as fast as possible")
+    rp.add_argument("--concurrency", type=int, default=8)
+    rp.add_argument("--patients", type=int, default=2000,
+                    help="synthetic patients to seed (or assume, with --base-url)")
+    rp.add_argument("--limit", type=int, default=0, help="replay only the first N requests")
+    rp.add_argument("--json", default="", help="also write the report here")
+    args = parser.parse_args(argv)
+
+    entries = read_capture(args.capture)
+    if args.limit:
+        entries = entries[:args.limit]
+    if not entries:
+        print("capture is empty", file=sys.stderr)
+        return 1
+
+    instance = None
+    if args.base_url:
+        base_url = args.base_url.rstrip("/")
+        pools = {"patient_id": range(1, args.patients + 1), "doctor_id": [2]}
+    else:
+        instance = LocalInstance(patients=args.patients)
+        base_url, pools = instance.base_url, instance.pools
+    try:
+        report = replay(entries, base_url, pools, args.speed, args.concurrency)
+    finally:
+        if instance is not None:
+            instance.close()
+
+    print(format_report(report))
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,6 +1,7 @@
 import re
-from datetime import datetime
+from .timeutil import parse_slot
 
+_tag_re = re.compile(r"<[^>]*?>")
 def sanitize_text(s: str, max_len: int = 500):
     """
     Basic sanitizer:
@@ -11,7 +12,8 @@ def sanitize_text(s: str, max_len: int = 500):
     if s is None:
         return ""
     s = s.strip()
-    s = re.sub(r"<[^>]*?>", "", s)
+    if "<" in s:
+        s = _tag_re.sub("", s)
     if len(s) > max_len:
         s = s[:max_len]
     return s
@@ -65,8 +67,4 @@ def validate_datetime(dt_str: str) -> bool:
     """
     Expect "YYYY-MM-DD HH:MM"
     """
-    try:
-        datetime.strptime(dt_str, "%Y-%m-%d %H:%M")
-        return True
-    except (TypeError, ValueError):
-        return False
+    return parse_slot(dt_str) is not None
@@ -0,0 +1,123 @@
+"""
+Background job worker pool (see jobs.py).
+
+    python -m backend.worker                  # 2 processes, run forever
+    python -m backend.worker --processes 8
+    python -m backend.worker --once           # drain the queue, then exit (cron)
+    python -m backend.worker --db a.db --db b.db   # several tenant files
+
+Each process has its own connection and polls: claim, run, record the
+outcome, repeat. When the queue is empty it sleeps, backing off from
+--poll up to 8x that, and wakes quickly again once work shows up.
+SIGTERM/SIGINT let the current job finish before the process exits.
+"""
+import argparse
+import multiprocessing
+import signal
+import sqlite3
+import threading
+import time
+
+from . import jobs
+
+_stopping = False
+
+
+def _request_stop(signum, frame):
+    global _stopping
+    _stopping = True
+
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON;")
+    conn.execute("PRAGMA busy_timeout = 30000;")
+    return conn
+
+
+def run_worker(db_paths, visibility: float = jobs.DEFAULT_VISIBILITY,
+               poll: float = 0.5, once: bool = False, name: str = None) -> int:
+    """
+    Process jobs from `db_paths` until stopped (or, with once=True,
+    until none of them has anything runnable). Returns jobs processed.
+    """
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, _request_stop)
+        signal.signal(signal.SIGINT, _request_stop)
+    name = name or jobs.worker_name()
+    conns = [_connect(p) for p in db_paths]
+    processed = 0
+    idle = poll
+    try:
+        while not _stopping:
+            ran = 0
+            for conn in conns:
+                if jobs.run_one(conn, name, visibility) is not None:
+                    ran += 1
+            processed += ran
+            if ran:
+                idle = poll
+                continue
+            if once:
+                break
+            time.sleep(idle)
+            idle = min(idle * 2, poll * 8)
+    finally:
+        for conn in conns:
+            conn.close()
+    return processed
+
+
+def start_pool(db_paths, processes: int = 2, **kwargs):
+    """
+    Start `processes` workers; returns the Process objects (already running).
+    """
+    pool = []
+    for _ in range(processes):
+        proc = multiprocessing.Process(
+            target=run_worker, args=(db_paths,), kwargs=kwargs, daemon=False
+        )
+        proc.start()
+        pool.append(proc)
+    return pool
+
+
+def main(argv=None):
+    from .config import Config
+
+    parser = argparse.ArgumentParser(description="Run background jobs")
+    parser.add_argument("--db", action="append",
+                        help="database file (repeatable; default DB_PATH)")
+    parser.add_argument("--processes", type=int, default=Config.JOB_WORKERS)
+    parser.add_argument("--visibility", type=float,
+                        default=Config.JOB_VISIBILITY_SECONDS,
+                        help="seconds before an unfinished job is handed out again")
+    parser.add_argument("--poll", type=float, default=Config.JOB_POLL_SECONDS)
+    parser.add_argument("--export-dir", default=Config.JOBS_EXPORT_DIR)
+    parser.add_argument("--once", action="store_true",
+                        help="exit once the queue is empty")
+    args = parser.parse_args(argv)
+
+    jobs.EXPORT_DIR = args.export_dir
+    db_paths = args.db or [Config.DB_PATH]
+    options = dict(visibility=args.visibility, poll=args.poll, once=args.once)
+
+    if args.processes <= 1:
+        run_worker(db_paths, **options)
+        return 0
+
+    pool = start_pool(db_paths, args.processes, **options)
+    # Ctrl-C reaches the children directly; SIGTERM to the parent is
+    # passed on. Either way each child finishes its current job first.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda signum, frame: [
+        proc.terminate() for proc in pool if proc.is_alive()
+    ])
+    for proc in pool:
+        proc.join()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
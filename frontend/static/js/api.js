@@ -15,17 +15,40 @@ async function apiGet(path) {
   return { status: res.status, data };
 }
 
-// Helper: POST request with JSON body and CSRF
-async function apiPost(path, bodyObj) {
-  const res = await fetch(path, {
-    method: "POST",
-    credentials: "include",
-    headers: {
-      "Content-Type": "application/json",
-      "X-CSRF-Token": CSRF_TOKEN
-    },
-    body: JSON.stringify(bodyObj || {})
-  });
+// One key per logical submission; retries reuse it so the server
+// replays the first response instead of inserting twice.
+function newIdempotencyKey() {
+  if (window.crypto && crypto.randomUUID) {
+    return crypto.randomUUID();
+  }
+  return Date.now().toString(36) + "-" + Math.random().toString(36).slice(2);
+}
+
+// Helper: POST request with JSON body and CSRF.
+// Network failures are retried (same Idempotency-Key) up to `retries` times.
+async function apiPost(path, bodyObj, retries = 2) {
+  const key = newIdempotencyKey();
+  let res;
+  for (let attempt = 0; ; attempt++) {
+    try {
+      res = await fetch(path, {
+        method: "POST",
+        credentials: "include",
+        headers: {
+          "Content-Type": "application/json",
+          "X-CSRF-Token": CSRF_TOKEN,
+          "Idempotency-Key": key
+        },
+        body: JSON.stringify(bodyObj || {})
+      });
+      break;
+    } catch (err) {
+      if (attempt >= retries) {
+        throw err;
+      }
+      await new Promise(r => setTimeout(r, 500 * (attempt + 1)));
+    }
+  }
   const data = await res.json().catch(() => ({}));
   // token may rotate
   if (data && data.csrf_token) {
@@ -34,6 +57,18 @@ async function apiPost(path, bodyObj) {
   return { status: res.status, data };
 }
 
+// Helper: several GETs in one round trip (POST /api/batch).
+// Returns [{status, data}] in the order of `paths`.
+async function apiBatch(paths) {
+  const { status, data } = await apiPost("/api/batch", {
+    requests: paths.map(path => ({ path }))
+  });
+  if (status !== 200 || !data.ok) {
+    return paths.map(() => ({ status, data }));
+  }
+  return data.responses.map(r => ({ status: r.status, data: r.body || {} }));
+}
+
 // Helper: PUT request with JSON body and CSRF
 async function apiPut(path, bodyObj) {
   const res = await fetch(path, {
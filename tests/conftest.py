@@ -1,17 +1,60 @@
 import pytest
 from backend.app import create_app
-from backend.db import init_db
+from backend.db import (
+    init_db,
+    get_db,
+    begin_test_savepoint,
+    rollback_test_savepoint,
+)
+from backend.timeutil import now_iso
 
-@pytest.fixture
-def app():
+
+def seed_demo_patients():
+    """
+    Test seed data on top of init_db's demo users:
+    patient #1 is Alice's chart (owner_user_id -> user `alice`).
+    """
+    conn = get_db()
+    cur = conn.cursor()
+    cur.execute("SELECT id FROM users WHERE username = 'alice';")
+    alice_id = cur.fetchone()["id"]
+    cur.execute(
+        """
+        INSERT INTO patients
+            (first_name, last_name, dob, phone, medical_history,
+             owner_user_id, created_at)
+        VALUES ('Alice', 'Patient', '1990-01-01', '555-0100', 'None', ?, ?);
+        """,
+        (alice_id, now_iso())
+    )
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture(scope="session")
+def _session_app():
     """
-    Create a fresh Flask app in testing mode with an in-memory DB.
-    Initializes schema + demo users.
+    One Flask app (shared-cache in-memory DB) for the whole test session.
+    Schema + demo users + demo patients are built exactly once.
     """
     flask_app = create_app(testing=True)
     with flask_app.app_context():
         init_db(seed_demo_users=True)
-    yield flask_app
+        seed_demo_patients()
+    return flask_app
+
+
+@pytest.fixture
+def app(_session_app):
+    """
+    The session app, with everything the test writes wrapped in a
+    savepoint that is rolled back afterwards.
+    """
+    begin_test_savepoint(_session_app)
+    try:
+        yield _session_app
+    finally:
+        rollback_test_savepoint(_session_app)
 
 
 @pytest.fixture
@@ -0,0 +1,115 @@
+import pytest
+from backend.app import create_app
+from backend.db import get_db, init_db
+from backend.timeutil import format_slot, now_minutes, parse_slot
+from tests.conftest import auth_and_get_csrf_as_role
+
+URL = "/api/analytics/appointments?from=2024-01-01&to=2024-03-01"
+
+# (doctor, slot, status); 2024-01-01 and 2024-02-05 are Mondays
+APPOINTMENTS = [
+    (2, "2024-01-01 09:00", "completed"),
+    (2, "2024-01-01 09:30", "completed"),
+    (2, "2024-01-02 10:00", "canceled"),
+    (2, "2024-01-03 09:00", "scheduled"),     # never closed out: a no-show
+    (6, "2024-02-05 14:00", "completed"),
+]
+
+
+def _book(conn, doctor_id, start_min, status):
+    conn.execute(
+        "INSERT INTO appointments (patient_id, doctor_id, start_time, status, "
+        "created_at, start_min) VALUES (1, ?, ?, ?, '2024-01-01T00:00:00Z', ?);",
+        (doctor_id, format_slot(start_min), status, start_min),
+    )
+
+
+@pytest.fixture
+def app(tmp_path):
+    flask_app = create_app(testing=True)
+    flask_app.config["DB_PATH"] = str(tmp_path / "analytics.db")
+    with flask_app.app_context():
+        init_db(seed_demo_users=True)
+        conn = get_db()
+        conn.execute(
+            "INSERT INTO users (username, password_hash, role, full_name, created_at) "
+            "VALUES ('drjones', '-', 'Doctor', 'Dr. Ann Jones', '2024-01-01T00:00:00Z');"
+        )
+        conn.execute(
+            "INSERT INTO patients (first_name, last_name, dob, phone, owner_user_id, created_at) "
+            "VALUES ('Alice', 'Patient', '1990-01-01', '555-0100', 5, '2024-01-01T00:00:00Z');"
+        )
+        for doctor_id, slot, status in APPOINTMENTS:
+            _book(conn, doctor_id, parse_slot(slot), status)
+        conn.commit()
+        conn.close()
+    return flask_app
+
+
+def test_report_figures(app):
+    client = app.test_client()
+    auth_and_get_csrf_as_role(client, "reception", "staff123")
+    data = client.get(URL).get_json()
+
+    assert data["totals"] == {
+        "appointments": 5, "completed": 3, "canceled": 1, "no_show": 1,
+        "upcoming": 0, "cancel_rate": 0.2, "no_show_rate": 0.25,
+    }
+    smith, jones = data["doctors"]
+    assert (smith["doctor_id"], smith["doctor_name"]) == (2, "Dr. John Smith")
+    assert smith["appointments"] == 4 and smith["booked_hours"] == 1.5
+    # Jan + Feb 2024: 23 + 21 weekdays of 8 hours
+    assert smith["utilisation"] == round(1.5 / (44 * 8), 4)
+    assert jones["completed"] == 1 and jones["cancel_rate"] == 0.0
+    assert data["load"][0][9] == 2 and data["load"][2][9] == 1
+    assert data["load"][1][10] == 0                          # canceled
+    assert data["busiest_hours"][0] == {"weekday": 0, "hour": 9, "appointments": 2}
+
+
+def test_roles_and_doctor_scope(app):
+    client = app.test_client()
+    auth_and_get_csrf_as_role(client, "drsmith", "doctor123")
+    data = client.get(URL).get_json()
+    assert [d["doctor_id"] for d in data["doctors"]] == [2]
+    assert data["totals"]["appointments"] == 4
+    assert data["load"][0][14] == 0                          # Dr Jones' Monday
+
+    for username, password in (("pharma", "pharma123"), ("alice", "patient123")):
+        auth_and_get_csrf_as_role(client, username, password)
+        assert client.get(URL).status_code == 403
+
+
+def test_settled_months_are_cached(app):
+    client = app.test_client()
+    auth_and_get_csrf_as_role(client, "admin", "admin123")
+    assert client.get(URL).get_json()["months"] == {"cached": 0, "computed": 2}
+
+    with app.app_context():
+        conn = get_db()
+        _book(conn, 2, parse_slot("2024-01-04 11:00"), "completed")
+        conn.commit()
+        conn.close()
+
+    data = client.get(URL).get_json()
+    assert data["months"] == {"cached": 2, "computed": 0}
+    assert data["totals"]["appointments"] == 5                # settled: kept
+    # a partial month is always computed
+    data = client.get("/api/analytics/appointments?from=2024-01-04&to=2024-02-01").get_json()
+    assert data["months"] == {"cached": 0, "computed": 1}
+    assert data["totals"]["completed"] == 1
+
+
+def test_current_month_and_validation(app):
+    with app.app_context():
+        conn = get_db()
+        _book(conn, 2, now_minutes() + 60, "scheduled")
+        conn.commit()
+        conn.close()
+    client = app.test_client()
+    auth_and_get_csrf_as_role(client, "admin", "admin123")
+    data = client.get("/api/analytics/appointments").get_json()
+    assert data["totals"]["upcoming"] == 1 and data["totals"]["no_show"] == 0
+
+    for query in ("from=2024-13-01", "from=2024-02-01&to=2024-02-01", "to=yesterday"):
+        r = client.get("/api/analytics/appointments?" + query)
+        assert r.status_code == 400, query
@@ -0,0 +1,151 @@
+import threading
+import pytest
+from backend.app import create_app
+from backend.db import init_db, get_db
+
+SLOT = "2025-11-03 09:30"
+
+
+@pytest.fixture
+def app(tmp_path):
+    flask_app = create_app(testing=True)
+    flask_app.config["DB_PATH"] = str(tmp_path / "status.db")
+    with flask_app.app_context():
+        init_db(seed_demo_users=True)
+    return flask_app
+
+
+def _login(client, username, password):
+    r = client.post("/api/auth/login", json={
+        "username": username,
+        "password": password
+    })
+    assert r.status_code == 200
+    return r.get_json()["csrf_token"]
+
+
+def _setup_patient_and_appointment(client, csrf):
+    r = client.post(
+        "/api/patients",
+        json={"first_name": "Amy", "last_name": "Pond", "dob": "1990-01-01",
+              "phone": "555-0000", "owner_user_id": 5},
+        headers={"X-CSRF-Token": csrf},
+    )
+    pid = r.get_json()["patient_id"]
+    r = client.post(
+        "/api/appointments",
+        json={"patient_id": pid, "doctor_id": 2, "start_time": SLOT},
+        headers={"X-CSRF-Token": csrf},
+    )
+    assert r.status_code == 201
+    return pid, r.get_json()["appointment_id"]
+
+
+def test_cancel_frees_slot_for_rebooking(app):
+    client = app.test_client()
+    csrf = _login(client, "reception", "staff123")
+    pid, appt = _setup_patient_and_appointment(client, csrf)
+
+    r = client.put(f"/api/appointments/{appt}/status",
+                   json={"status": "canceled"}, headers={"X-CSRF-Token": csrf})
+    assert r.status_code == 200
+    assert r.get_json()["status"] == "canceled"
+
+    # second transition from a terminal state is a CAS miss
+    r = client.put(f"/api/appointments/{appt}/status",
+                   json={"status": "completed"}, headers={"X-CSRF-Token": csrf})
+    assert r.status_code == 409
+    assert r.get_json()["current_status"] == "canceled"
+
+    r = client.post(
+        "/api/appointments",
+        json={"patient_id": pid, "doctor_id": 2, "start_time": SLOT},
+        headers={"X-CSRF-Token": csrf},
+    )
+    assert r.status_code == 201
+
+
+def test_status_rules_by_role(app):
+    staff = app.test_client()
+    csrf = _login(staff, "reception", "staff123")
+    _, appt = _setup_patient_and_appointment(staff, csrf)
+
+    patient = app.test_client()
+    csrf_pat = _login(patient, "alice", "patient123")
+    r = patient.put(f"/api/appointments/{appt}/status",
+                    json={"status": "completed"}, headers={"X-CSRF-Token": csrf_pat})
+    assert r.status_code == 403
+
+    pharma = app.test_client()
+    csrf_ph = _login(pharma, "pharma", "pharma123")
+    r = pharma.put(f"/api/appointments/{appt}/status",
+                   json={"status": "canceled"}, headers={"X-CSRF-Token": csrf_ph})
+    assert r.status_code == 403
+
+    r = staff.put(f"/api/appointments/{appt}/status",
+                  json={"status": "no-show"}, headers={"X-CSRF-Token": csrf})
+    assert r.status_code == 400
+    assert "status" in r.get_json()["fields"]
+
+    r = staff.put("/api/appointments/9999/status",
+                  json={"status": "canceled"}, headers={"X-CSRF-Token": csrf})
+    assert r.status_code == 404
+
+    doctor = app.test_client()
+    csrf_doc = _login(doctor, "drsmith", "doctor123")
+    r = doctor.put(f"/api/appointments/{appt}/status",
+                   json={"status": "completed"}, headers={"X-CSRF-Token": csrf_doc})
+    assert r.status_code == 200
+
+
+def test_concurrent_cancel_and_rebook_same_slot(app):
+    """
+    Many clients race to cancel the same appointment and then book its
+    slot. Exactly one cancel and exactly one rebooking may succeed.
+    """
+    setup = app.test_client()
+    csrf = _login(setup, "reception", "staff123")
+    pid, appt = _setup_patient_and_appointment(setup, csrf)
+
+    workers = 12
+    clients = []
+    for _ in range(workers):
+        c = app.test_client()
+        clients.append((c, _login(c, "reception", "staff123")))
+
+    barrier = threading.Barrier(workers)
+    cancel_codes, book_codes = [], []
+    lock = threading.Lock()
+
+    def race(client, token):
+        barrier.wait()
+        r1 = client.put(f"/api/appointments/{appt}/status",
+                        json={"status": "canceled"},
+                        headers={"X-CSRF-Token": token})
+        r2 = client.post(
+            "/api/appointments",
+            json={"patient_id": pid, "doctor_id": 2, "start_time": SLOT},
+            headers={"X-CSRF-Token": token},
+        )
+        with lock:
+            cancel_codes.append(r1.status_code)
+            book_codes.append(r2.status_code)
+
+    threads = [threading.Thread(target=race, args=ct) for ct in clients]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sorted(cancel_codes) == [200] + [409] * (workers - 1)
+    assert sorted(book_codes) == [201] + [409] * (workers - 1)
+
+    with app.app_context():
+        conn = get_db()
+        scheduled = conn.execute(
+            "SELECT COUNT(*) FROM appointments "
+            "WHERE doctor_id = 2 AND start_time = ? AND status = 'scheduled';",
+            (SLOT,)
+        ).fetchone()[0]
+        conn.close()
+    assert scheduled == 1
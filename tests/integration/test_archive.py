@@ -0,0 +1,194 @@
+from datetime import datetime
+import pytest
+from backend.app import create_app
+from backend.archive import archive_old_rows, reaches_archive
+from backend import db
+from backend.db import init_db, get_db
+from tests.conftest import login_as
+
+NOW = datetime(2026, 1, 1)  # cutoff with the default 365 days: 2025-01-01
+
+
+@pytest.fixture
+def app(tmp_path):
+    flask_app = create_app(testing=True)
+    flask_app.config["DB_PATH"] = str(tmp_path / "hot.db")
+    flask_app.config["ARCHIVE_DB_PATH"] = str(tmp_path / "archive.db")
+    with flask_app.app_context():
+        init_db(seed_demo_users=True)
+        conn = get_db(readonly=False)
+        conn.execute(
+            "INSERT INTO patients (id, first_name, last_name, dob, phone, "
+            "medical_history, owner_user_id, created_at) "
+            "VALUES (1, 'Amy', 'Pond', '1990-01-01', '555', '', 5, '2019-01-01T00:00:00Z');"
+        )
+        conn.executemany(
+            "INSERT INTO appointments (id, patient_id, doctor_id, start_time, start_min, "
+            "reason, status, created_at) VALUES (?, 1, 2, ?, ?, '', ?, '2019-01-01T00:00:00Z');",
+            [
+                (1, "2020-03-01 09:00", 26384220, "completed"),   # archived
+                (2, "2020-03-02 09:00", 26385660, "scheduled"),   # old but open: stays
+                (3, "2025-06-01 10:00", 29146200, "completed"),   # recent: stays
+                (4, "2020-03-03 09:00", 26387100, "completed"),   # prescribed: stays
+            ],
+        )
+        conn.execute(
+            "INSERT INTO prescriptions (appointment_id, doctor_id, patient_id, "
+            "medication, instructions, created_at) "
+            "VALUES (4, 2, 1, 'Ibuprofen', 'Daily', '2020-03-03T09:30:00Z');"
+        )
+        conn.executemany(
+            "INSERT INTO notifications (user_id, message, is_read, created_at) "
+            "VALUES (1, ?, ?, ?);",
+            [
+                ("old read", 1, "2020-01-01T00:00:00Z"),     # archived
+                ("old unread", 0, "2020-01-01T00:00:00Z"),   # stays
+                ("new read", 1, "2025-12-01T00:00:00Z"),     # stays
+            ],
+        )
+        conn.executemany(
+            "INSERT INTO billing (patient_id, amount, status, description, created_at) "
+            "VALUES (1, ?, ?, '', ?);",
+            [
+                (10.0, "paid", "2020-01-01T00:00:00Z"),     # archived
+                (20.0, "unpaid", "2020-01-01T00:00:00Z"),   # stays
+            ],
+        )
+        conn.commit()
+        conn.close()
+    return flask_app
+
+
+def _archive(app, **kw):
+    return archive_old_rows(app.config["DB_PATH"], app.config["ARCHIVE_DB_PATH"],
+                            now=NOW, batch_size=1, **kw)
+
+
+def _hot_count(app, table):
+    with app.app_context():
+        conn = get_db(readonly=False)
+        n = conn.execute(f"SELECT COUNT(*) FROM {table};").fetchone()[0]
+        conn.close()
+    return n
+
+
+def test_job_moves_only_old_finished_rows(app):
+    assert _archive(app) == {"appointments": 1, "notifications": 1, "billing": 1}
+    assert _hot_count(app, "appointments") == 3
+    assert _hot_count(app, "notifications") == 2
+    assert _hot_count(app, "billing") == 1
+    # appointments with prescriptions stay hot, so no key dangles
+    assert _hot_count(app, "prescriptions") == 1
+    with app.app_context():
+        conn = get_db(readonly=False)
+        assert conn.execute("PRAGMA foreign_key_check;").fetchall() == []
+        conn.close()
+    # rerunning finds nothing new
+    assert _archive(app) == {"appointments": 0, "notifications": 0, "billing": 0}
+
+
+def test_archiving_is_not_a_delete_for_the_change_feed(app):
+    _archive(app)
+    with app.app_context():
+        conn = get_db(readonly=False)
+        deletes = conn.execute("SELECT COUNT(*) FROM change_log WHERE op = 'D';").fetchone()[0]
+        conn.close()
+    assert deletes == 0
+
+
+def test_horizon_decides_whether_reads_reach_archive(app):
+    with app.app_context():
+        conn = get_db(readonly=False)
+        assert not reaches_archive(conn, "appointments")
+        conn.close()
+    _archive(app)
+    with app.app_context():
+        conn = get_db(readonly=False)
+        assert reaches_archive(conn, "appointments")            # unbounded
+        assert reaches_archive(conn, "appointments", 26384220)  # 2020
+        assert not reaches_archive(conn, "appointments", 29146200)  # 2025-06
+        assert not reaches_archive(conn, "billing", "2025-06-01T00:00:00Z")
+        conn.close()
+
+
+def test_list_endpoints_are_transparent(app):
+    _archive(app)
+    client = app.test_client()
+    login_as(client, "admin", "admin123")
+
+    recent = client.get("/api/appointments/2?from=2025-01-01").get_json()["appointments"]
+    assert [a["id"] for a in recent] == [3]
+    everything = client.get("/api/appointments/2").get_json()["appointments"]
+    assert [a["id"] for a in everything] == [1, 2, 4, 3]
+    old = client.get("/api/appointments/2?from=2020-01-01&to=2021-01-01").get_json()
+    assert [a["id"] for a in old["appointments"]] == [1, 2, 4]
+
+    notes = client.get("/api/notifications").get_json()["notifications"]
+    assert sorted(n["message"] for n in notes) == ["new read", "old read", "old unread"]
+    notes = client.get("/api/notifications?since=2025-01-01").get_json()["notifications"]
+    assert [n["message"] for n in notes] == ["new read"]
+    assert client.get("/api/notifications?since=yesterday").status_code == 400
+
+    bills = client.get("/api/billing/1").get_json()["billing"]
+    assert sorted(b["amount"] for b in bills) == [10.0, 20.0]
+
+
+def test_summary_includes_archived_history(app):
+    _archive(app)
+    client = app.test_client()
+    login_as(client, "admin", "admin123")
+    body = client.get("/api/patients/1/summary").get_json()
+    assert [a["id"] for a in body["appointments"]] == [3, 4, 2, 1]
+    assert len(body["billing"]) == 2
+    assert len(body["prescriptions"]) == 1
+    body = client.get("/api/patients/1/summary?since=2025-01-01").get_json()
+    assert [a["id"] for a in body["appointments"]] == [3]
+    assert body["billing"] == [] and body["prescriptions"] == []
+    assert client.get("/api/patients/1/summary?since=soon").status_code == 400
+
+
+def test_missing_archive_file_is_not_an_error(app, tmp_path):
+    _archive(app)
+    (tmp_path / "archive.db").unlink()
+    client = app.test_client()
+    login_as(client, "admin", "admin123")
+    r = client.get("/api/appointments/2")
+    assert r.status_code == 200
+    assert [a["id"] for a in r.get_json()["appointments"]] == [2, 4, 3]
+
+
+def test_recent_reads_do_not_attach_archive(app):
+    _archive(app)
+    client = app.test_client()
+    login_as(client, "admin", "admin123")
+    client.get("/api/appointments/2?from=2025-01-01")
+    with app.test_request_context("/api/appointments/2", method="GET"):
+        conn = get_db()
+        names = {row[1] for row in conn.execute("PRAGMA database_list;")}
+        conn.close()
+    assert "archive" not in names
+
+
+def test_archived_database_still_migrates(app, monkeypatch):
+    # rerun migration 8, which checks prescriptions' foreign keys
+    monkeypatch.setattr(db, "MIGRATIONS", db.MIGRATIONS[:8])
+    monkeypatch.setattr(db, "SCHEMA_VERSION", 8)
+    _archive(app)
+    with app.app_context():
+        conn = get_db(readonly=False)
+        # what archiving used to leave behind: a prescription whose
+        # appointment went to the archive
+        conn.execute("PRAGMA foreign_keys = OFF;")
+        conn.execute(
+            "INSERT INTO prescriptions (appointment_id, doctor_id, patient_id, "
+            "medication, instructions, created_at) "
+            "VALUES (1, 2, 1, 'Aspirin', 'Daily', '2020-03-01T09:30:00Z');"
+        )
+        conn.execute("DROP INDEX idx_prescriptions_appointment;")
+        conn.execute("PRAGMA user_version = 7;")
+        conn.commit()
+        conn.close()
+        init_db(seed_demo_users=True)
+        conn = get_db(readonly=False)
+        assert conn.execute("PRAGMA user_version;").fetchone()[0] == 8
+        conn.close()
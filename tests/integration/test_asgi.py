@@ -0,0 +1,108 @@
+import asyncio
+import http.client
+import json
+
+import pytest
+from backend.app import create_app
+from backend.asgi import AsgiFrontend, BackgroundServer, _run
+from backend.db import get_db, init_db
+
+
+@pytest.fixture
+def file_app(tmp_path):
+    flask_app = create_app(testing=True)
+    flask_app.config["DB_PATH"] = str(tmp_path / "asgi.db")
+    with flask_app.app_context():
+        init_db(seed_demo_users=True)
+        conn = get_db()
+        conn.execute(
+            "INSERT INTO patients (first_name, last_name, dob, phone, owner_user_id, created_at) "
+            "VALUES ('Alice', 'Patient', '1990-01-01', '555-0100', 5, '2025-01-01T00:00:00Z');"
+        )
+        conn.commit()
+        conn.close()
+    return flask_app
+
+
+@pytest.fixture
+def asgi(file_app):
+    frontend = AsgiFrontend(file_app, workers=2)
+    yield frontend
+    frontend.close()
+
+
+def _call(app, method, path, body=None, cookie=None):
+    headers = [(b"host", b"localhost")]
+    if cookie:
+        headers.append((b"cookie", cookie.encode()))
+    data = b""
+    if body is not None:
+        data = json.dumps(body).encode()
+        headers.append((b"content-type", b"application/json"))
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": method, "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": query.encode(), "root_path": "", "headers": headers,
+        "client": ("127.0.0.1", 5555), "server": ("localhost", 80),
+    }
+    status, out, payload = asyncio.run(_run(app, scope, data))
+    return status, dict(out), json.loads(payload)
+
+
+def _login(app, username, password):
+    status, headers, _ = _call(app, "POST", "/api/auth/login",
+                               {"username": username, "password": password})
+    assert status == 200
+    return headers[b"set-cookie"].decode().split(";", 1)[0]
+
+
+def test_read_routes_match_flask(file_app, asgi):
+    cookie = _login(asgi, "admin", "admin123")
+    client = file_app.test_client()
+    client.post("/api/auth/login", json={"username": "admin", "password": "admin123"})
+    for path in ("/api/patients/1", "/api/patients/1/summary", "/api/appointments/2",
+                 "/api/prescriptions/1", "/api/billing/1", "/api/notifications"):
+        status, _, body = _call(asgi, "GET", path, cookie=cookie)
+        direct = client.get(path)
+        assert status == direct.status_code == 200, path
+        assert body == direct.get_json()
+
+
+def test_same_access_checks_and_only_read_routes(asgi):
+    assert _call(asgi, "GET", "/api/notifications")[0] == 401
+    cookie = _login(asgi, "pharma", "pharma123")
+    assert _call(asgi, "GET", "/api/appointments/2", cookie=cookie)[0] == 403
+    status, _, body = _call(asgi, "GET", "/api/patients/1", cookie=cookie)
+    assert body["patient"]["medical_history"] == "[REDACTED]"
+    assert _call(asgi, "GET", "/api/notifications?since=bad", cookie=cookie)[0] == 400
+    # writes and other routes stay on the Flask server
+    for method, path in (("POST", "/api/billing"), ("GET", "/api/jobs"),
+                         ("GET", "/api/changes"), ("GET", "/")):
+        assert _call(asgi, method, path, body={}, cookie=cookie)[0] == 404
+
+
+def test_busy_frontend_answers_503(asgi):
+    asgi.pending = asgi.max_pending
+    status, headers, _ = _call(asgi, "GET", "/api/notifications")
+    assert status == 503 and headers[b"retry-after"] == b"1"
+
+
+def test_builtin_server_keeps_connections_alive(asgi):
+    with BackgroundServer(asgi) as server:
+        conn = http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+        conn.request("POST", "/api/auth/login",
+                     body=json.dumps({"username": "alice", "password": "patient123"}),
+                     headers={"Content-Type": "application/json"})
+        r = conn.getresponse()
+        assert r.status == 200
+        cookie = r.getheader("Set-Cookie").split(";", 1)[0]
+        r.read()
+        sock = conn.sock
+        for path in ("/api/billing/1", "/api/prescriptions/1", "/api/nope"):
+            conn.request("GET", path, headers={"Cookie": cookie})
+            r = conn.getresponse()
+            assert r.status == (404 if path == "/api/nope" else 200)
+            r.read()
+            assert conn.sock is sock                    # same connection throughout
+        conn.close()
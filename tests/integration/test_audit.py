@@ -0,0 +1,154 @@
+import sqlite3
+import subprocess
+import sys
+import textwrap
+import threading
+from pathlib import Path
+import pytest
+from backend.app import create_app
+from backend.audit import AuditWriter, get_audit_writer
+from backend.db import init_db, get_db
+from tests.conftest import auth_and_get_csrf_as_role
+
+
+def _audit_rows(db_path):
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute(
+        "SELECT user_id, role, action, entity, entity_id, patient_id FROM audit_log "
+        "ORDER BY id;"
+    ).fetchall()
+    conn.close()
+    return rows
+
+
+def _event(i):
+    return ("2025-01-01T00:00:00Z", 1, "Admin", "read", "patient", i, i, "GET", "/x")
+
+
+@pytest.fixture
+def file_db(tmp_path):
+    path = str(tmp_path / "audit.db")
+    app = create_app(testing=True)
+    app.config["DB_PATH"] = path
+    with app.app_context():
+        init_db(seed_demo_users=True)
+    return app, path
+
+
+def test_sync_mode_records_reads_and_writes(app, client):
+    csrf = auth_and_get_csrf_as_role(client, "admin", "admin123")
+    assert client.get("/api/patients/1").status_code == 200
+    r = client.post("/api/billing", json={"patient_id": 1, "amount": 5},
+                    headers={"X-CSRF-Token": csrf})
+    assert r.status_code == 201
+
+    with app.app_context():
+        conn = get_db()
+        rows = conn.execute(
+            "SELECT role, action, entity, patient_id FROM audit_log ORDER BY id;"
+        ).fetchall()
+        conn.close()
+    assert [tuple(r) for r in rows] == [
+        ("Admin", "read", "patient", 1),
+        ("Admin", "create", "billing", 1),
+    ]
+
+
+def test_failed_requests_are_not_audited(app, client):
+    auth_and_get_csrf_as_role(client, "pharma", "pharma123")
+    assert client.get("/api/appointments/2").status_code == 403
+    with app.app_context():
+        conn = get_db()
+        n = conn.execute("SELECT COUNT(*) FROM audit_log;").fetchone()[0]
+        conn.close()
+    assert n == 0
+
+
+def test_async_mode_group_commits_and_drains_on_close(file_db):
+    app, path = file_db
+    app.config["AUDIT_MODE"] = "async"
+    app.config["AUDIT_FLUSH_MS"] = 1000  # long window: only close() flushes
+    client = app.test_client()
+    auth_and_get_csrf_as_role(client, "admin", "admin123")
+    for _ in range(5):
+        assert client.get("/api/notifications").status_code == 200
+        assert client.get("/api/appointments/2").status_code == 200
+
+    writer = get_audit_writer(app)
+    writer.close()
+    rows = _audit_rows(path)
+    assert len(rows) == 5
+    assert all(r[2:4] == ("read", "appointment_list") for r in rows)
+
+
+def test_backpressure_falls_back_to_direct_writes(file_db):
+    _, path = file_db
+    writer = AuditWriter(path, queue_size=2, enqueue_timeout_ms=1)
+    # thread not started yet -> queue fills after 2 events
+    for i in range(5):
+        writer.record(_event(i))
+    assert writer.overflow_writes == 3
+    assert len(_audit_rows(path)) == 3
+
+    writer.start()
+    writer.close()
+    assert sorted(r[4] for r in _audit_rows(path)) == [0, 1, 2, 3, 4]
+
+
+def _hold_write_lock(path):
+    blocker = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+    blocker.execute("BEGIN IMMEDIATE;")
+    return blocker
+
+
+def test_locked_database_is_retried_not_dropped(file_db):
+    _, path = file_db
+    writer = AuditWriter(path, busy_timeout_ms=10, retries=5, retry_backoff_ms=20)
+    blocker = _hold_write_lock(path)
+    # the lock goes away after a few retries
+    threading.Timer(0.1, blocker.rollback).start()
+    writer._write_items([_event(2)])
+    blocker.close()
+    assert writer.dropped == 0
+    assert [r[4] for r in _audit_rows(path)] == [2]
+
+
+def test_writes_that_keep_failing_are_counted(file_db):
+    _, path = file_db
+    writer = AuditWriter(path, busy_timeout_ms=10, retries=2, retry_backoff_ms=1)
+    blocker = _hold_write_lock(path)
+    writer._write_items([_event(1), _event(2)])
+    blocker.rollback()
+    blocker.close()
+    assert writer.dropped == 2 and writer.written == 0
+    assert _audit_rows(path) == []
+
+
+def test_crash_loses_at_most_queue_plus_batch(file_db):
+    """
+    Enqueue events in a child process and kill it without close().
+    Everything already committed survives; the loss is bounded by what
+    can sit in the queue plus one batch being assembled.
+    """
+    _, path = file_db
+    total, queue_size, batch_size = 3000, 200, 50
+    script = textwrap.dedent(f"""
+        import os
+        from backend.audit import AuditWriter
+        w = AuditWriter({path!r}, batch_size={batch_size}, flush_ms=20,
+                        queue_size={queue_size}, enqueue_timeout_ms=1000)
+        w.start()
+        for i in range({total}):
+            w.record(("2025-01-01T00:00:00Z", 1, "Admin", "read",
+                      "patient", i, i, "GET", "/x"))
+        os._exit(9)  # crash: no drain, no atexit
+    """)
+    repo_root = Path(__file__).resolve().parents[2]
+    subprocess.run([sys.executable, "-c", script], cwd=repo_root,
+                   check=False, timeout=60)
+
+    survived = len(_audit_rows(path))
+    lost = total - survived
+    print(f"\naudit crash test: {lost} of {total} events lost "
+          f"(bound {queue_size + batch_size})")
+    assert 0 <= lost <= queue_size + batch_size
@@ -0,0 +1,143 @@
+import gzip
+import sqlite3
+import time
+from datetime import datetime
+from pathlib import Path
+import pytest
+from backend.app import create_app
+from backend.backup import (
+    BackupError, create_snapshot, list_snapshots, verify_snapshot,
+)
+from backend.db import init_db
+import backend.backup as backup_module
+from tests.conftest import auth_and_get_csrf_as_role
+
+
+@pytest.fixture
+def app(tmp_path):
+    flask_app = create_app(testing=True)
+    flask_app.config["DB_PATH"] = str(tmp_path / "live.db")
+    flask_app.config["BACKUP_DIR"] = str(tmp_path / "backups")
+    flask_app.config["BACKUP_SLEEP_MS"] = 0
+    with flask_app.app_context():
+        init_db(seed_demo_users=True)
+    return flask_app
+
+
+def test_snapshot_roundtrip(app, tmp_path):
+    info = create_snapshot(app.config["DB_PATH"], app.config["BACKUP_DIR"], step_pages=2)
+    assert info["name"].endswith(".db.gz")
+    assert verify_snapshot(info["path"])
+
+    restored = tmp_path / "restored.db"
+    with gzip.open(info["path"], "rb") as src:
+        restored.write_bytes(src.read())
+    conn = sqlite3.connect(str(restored))
+    users = conn.execute("SELECT username FROM users ORDER BY id;").fetchall()
+    conn.close()
+    assert [u[0] for u in users][:2] == ["admin", "drsmith"]
+
+
+def test_uncompressed_snapshot(app):
+    info = create_snapshot(app.config["DB_PATH"], app.config["BACKUP_DIR"],
+                           compress=False)
+    assert info["name"].endswith(".db")
+    assert verify_snapshot(info["path"])
+
+
+def test_tampered_snapshot_fails_verification(app):
+    info = create_snapshot(app.config["DB_PATH"], app.config["BACKUP_DIR"])
+    with open(info["path"], "r+b") as f:
+        f.seek(40)
+        byte = f.read(1)
+        f.seek(40)
+        f.write(bytes([byte[0] ^ 0xFF]))
+    with pytest.raises(BackupError):
+        verify_snapshot(info["path"])
+
+
+def test_retention_keeps_newest(app):
+    for day in range(1, 6):
+        create_snapshot(app.config["DB_PATH"], app.config["BACKUP_DIR"], keep=3,
+                        now=datetime(2026, 1, day))
+    names = [p.name for p in list_snapshots(app.config["BACKUP_DIR"])]
+    assert names == [
+        "hms-20260105T000000Z.db.gz",
+        "hms-20260104T000000Z.db.gz",
+        "hms-20260103T000000Z.db.gz",
+    ]
+    leftovers = list(Path(app.config["BACKUP_DIR"]).iterdir())
+    assert len(leftovers) == 6  # 3 snapshots + 3 checksum files
+
+
+def _fill_and_write_during_backup(app, monkeypatch, journal_mode):
+    conn = sqlite3.connect(app.config["DB_PATH"])
+    conn.execute(f"PRAGMA journal_mode = {journal_mode};")
+    conn.executemany(
+        "INSERT INTO notifications (user_id, message, is_read, created_at) "
+        "VALUES (1, ?, 0, '2025-01-01T00:00:00Z');",
+        [("x" * 500,)] * 2000,
+    )
+    conn.commit()
+
+    def write_between_steps(*_):
+        conn.execute(
+            "INSERT INTO notifications (user_id, message, is_read, created_at) "
+            "VALUES (1, 'during backup', 0, '2025-01-01T00:00:00Z');"
+        )
+        conn.commit()
+
+    monkeypatch.setattr(backup_module.time, "sleep", write_between_steps)
+    try:
+        return create_snapshot(app.config["DB_PATH"], app.config["BACKUP_DIR"],
+                               step_pages=5, sleep_ms=1, compress=False)
+    finally:
+        monkeypatch.undo()
+        conn.close()
+
+
+def _count_notifications(path):
+    conn = sqlite3.connect(path)
+    n = conn.execute("SELECT COUNT(*) FROM notifications;").fetchone()[0]
+    conn.close()
+    return n
+
+
+def test_wal_snapshot_is_point_in_time(app, monkeypatch):
+    info = _fill_and_write_during_backup(app, monkeypatch, "wal")
+    # writers committed between steps without restarting the copy, and
+    # none of their rows leaked into the snapshot
+    assert info["restarts"] == 0
+    assert _count_notifications(info["path"]) == 2000
+    assert verify_snapshot(info["path"])
+
+
+def test_rollback_journal_snapshot_survives_restarts(app, monkeypatch):
+    info = _fill_and_write_during_backup(app, monkeypatch, "delete")
+    # stepped copy kept restarting, then finished in one step
+    assert info["restarts"] >= 1
+    assert verify_snapshot(info["path"])
+
+
+def test_admin_endpoint(app):
+    client = app.test_client()
+    csrf = auth_and_get_csrf_as_role(client, "admin", "admin123")
+    r = client.post("/api/admin/backups", headers={"X-CSRF-Token": csrf})
+    assert r.status_code == 202
+
+    deadline = time.time() + 10
+    while True:
+        body = client.get("/api/admin/backups").get_json()
+        if not body["running"] or time.time() > deadline:
+            break
+        time.sleep(0.05)
+    assert body["error"] is None
+    assert body["last"]["name"] == body["snapshots"][0]["name"]
+
+
+def test_backup_endpoint_is_admin_only(app):
+    client = app.test_client()
+    csrf = auth_and_get_csrf_as_role(client, "reception", "staff123")
+    r = client.post("/api/admin/backups", headers={"X-CSRF-Token": csrf})
+    assert r.status_code == 403
+    assert client.get("/api/admin/backups").status_code == 403
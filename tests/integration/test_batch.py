@@ -0,0 +1,67 @@
+import pytest
+from backend.app import create_app
+from backend.db import init_db
+from tests.conftest import auth_and_get_csrf_as_role
+
+
+def _batch(client, csrf, *paths):
+    return client.post("/api/batch", json={"requests": [{"path": p} for p in paths]},
+                       headers={"X-CSRF-Token": csrf})
+
+
+def test_batch_matches_individual_calls(client):
+    csrf = auth_and_get_csrf_as_role(client, "admin", "admin123")
+    paths = ("/api/appointments/2", "/api/notifications", "/api/patients/1")
+    r = _batch(client, csrf, *paths)
+    assert r.status_code == 200
+    responses = r.get_json()["responses"]
+    assert len(responses) == len(paths)
+    for path, sub in zip(paths, responses):
+        direct = client.get(path)
+        assert sub["status"] == direct.status_code == 200
+        assert sub["body"] == direct.get_json()
+
+
+def test_sub_requests_keep_their_own_access_checks(client):
+    csrf = auth_and_get_csrf_as_role(client, "pharma", "pharma123")
+    responses = _batch(
+        client, csrf, "/api/notifications", "/api/appointments/2",
+        "/api/changes", "/api/nope", "/api/batch",
+    ).get_json()["responses"]
+    assert [r["status"] for r in responses] == [200, 403, 403, 404, 404]
+
+
+def test_batch_is_validated_and_needs_login(client):
+    assert client.post("/api/batch", json={"requests": [{"path": "/api/notifications"}]}
+                       ).status_code == 401
+    csrf = auth_and_get_csrf_as_role(client, "admin", "admin123")
+    assert _batch(client, csrf).status_code == 400
+    assert _batch(client, csrf, *["/api/notifications"] * 21).status_code == 400
+    assert _batch(client, csrf, "/static/js/api.js").status_code == 400
+    # other blueprints aren't reachable through the batch
+    assert _batch(client, csrf, "/api/auth/me").get_json()["responses"][0]["status"] == 404
+    r = client.post("/api/batch", json={"requests": [
+        {"method": "POST", "path": "/api/patients"},
+    ]}, headers={"X-CSRF-Token": csrf})
+    assert r.status_code == 400
+    r = client.post("/api/batch", json={"requests": [{"path": "/api/notifications"}]})
+    assert r.status_code == 403        # CSRF on the outer request
+
+
+@pytest.fixture
+def file_app(tmp_path):
+    flask_app = create_app(testing=True)
+    flask_app.config["DB_PATH"] = str(tmp_path / "batch.db")
+    with flask_app.app_context():
+        init_db(seed_demo_users=True)
+    return flask_app
+
+
+def test_parallel_sub_requests_on_a_file_db(file_app):
+    client = file_app.test_client()
+    csrf = auth_and_get_csrf_as_role(client, "drsmith", "doctor123")
+    paths = ["/api/appointments/2", "/api/notifications"] * 4
+    responses = _batch(client, csrf, *paths).get_json()["responses"]
+    assert [r["status"] for r in responses] == [200] * len(paths)
+    assert all("appointments" in r["body"] for r in responses[::2])
+    assert all("notifications" in r["body"] for r in responses[1::2])
@@ -0,0 +1,114 @@
+from backend.changes import acknowledge, change_head
+from backend.db import get_db
+from tests.conftest import auth_and_get_csrf_as_role
+
+
+def _head(client):
+    """Current end of the feed."""
+    body = client.get("/api/changes?limit=5000").get_json()
+    while body["more"]:
+        body = client.get(f"/api/changes?since={body['next']}&limit=5000").get_json()
+    return body["next"]
+
+
+def _new_patient(client, csrf):
+    r = client.post("/api/patients", json={
+        "first_name": "Rory", "last_name": "Williams", "dob": "1988-05-05",
+        "phone": "555-1234",
+    }, headers={"X-CSRF-Token": csrf})
+    assert r.status_code == 201
+    return r.get_json()["patient_id"]
+
+
+def test_writes_show_up_in_order(client):
+    csrf = auth_and_get_csrf_as_role(client, "admin", "admin123")
+    start = _head(client)
+
+    pid = _new_patient(client, csrf)
+    r = client.post("/api/appointments", json={
+        "patient_id": pid, "doctor_id": 2, "start_time": "2031-02-03 10:00",
+    }, headers={"X-CSRF-Token": csrf})
+    appt_id = r.get_json()["appointment_id"]
+    client.put(f"/api/appointments/{appt_id}/status", json={"status": "canceled"},
+               headers={"X-CSRF-Token": csrf})
+
+    body = client.get(f"/api/changes?since={start}").get_json()
+    got = [(c["table"], c["id"], c["op"]) for c in body["changes"]]
+    assert got == [
+        ("patients", pid, "I"),
+        ("appointments", appt_id, "I"),
+        ("appointments", appt_id, "U"),
+    ]
+    assert body["next"] == body["changes"][-1]["seq"]
+    assert body["more"] is False
+    # caught up: nothing new
+    again = client.get(f"/api/changes?since={body['next']}").get_json()
+    assert again["changes"] == [] and again["next"] == body["next"]
+
+
+def test_batches(client):
+    csrf = auth_and_get_csrf_as_role(client, "admin", "admin123")
+    start = _head(client)
+    for _ in range(3):
+        _new_patient(client, csrf)
+
+    first = client.get(f"/api/changes?since={start}&limit=2").get_json()
+    assert len(first["changes"]) == 2 and first["more"] is True
+    rest = client.get(f"/api/changes?since={first['next']}&limit=2").get_json()
+    assert len(rest["changes"]) == 1 and rest["more"] is False
+
+
+def test_ack_compacts_and_old_cursors_get_410(client):
+    csrf = auth_and_get_csrf_as_role(client, "admin", "admin123")
+    _new_patient(client, csrf)
+    head = _head(client)
+
+    r = client.post("/api/changes/ack", json={"consumer": "lab", "seq": head},
+                    headers={"X-CSRF-Token": csrf})
+    assert r.status_code == 200
+    assert r.get_json()["compacted"] >= 1
+
+    r = client.get("/api/changes?since=0")
+    assert r.status_code == 410
+    assert r.get_json()["compacted_through"] == head
+    assert client.get(f"/api/changes?since={head}").status_code == 200
+
+    # a second consumer that hasn't caught up holds compaction back
+    pid = _new_patient(client, csrf)
+    client.post("/api/changes/ack", json={"consumer": "insurance", "seq": head},
+                headers={"X-CSRF-Token": csrf})
+    r = client.post("/api/changes/ack", json={"consumer": "lab", "seq": head + 10},
+                    headers={"X-CSRF-Token": csrf})
+    assert r.status_code == 400 and "seq" in r.get_json()["fields"]
+    latest = client.get(f"/api/changes?since={head}").get_json()["next"]
+    r = client.post("/api/changes/ack", json={"consumer": "lab", "seq": latest},
+                    headers={"X-CSRF-Token": csrf})
+    assert r.get_json()["compacted"] == 0
+    ids = [c["id"] for c in client.get(f"/api/changes?since={head}").get_json()["changes"]]
+    assert pid in ids
+
+
+def test_ack_is_clamped_to_the_head(app):
+    with app.app_context():
+        conn = get_db()
+        head = change_head(conn)
+        acknowledge(conn, "lab", head + 100)
+        acked = conn.execute(
+            "SELECT acked_seq FROM change_consumers WHERE name = 'lab';"
+        ).fetchone()[0]
+        conn.rollback()
+        conn.close()
+    assert acked == head
+
+
+def test_feed_is_admin_only_and_validated(client):
+    csrf = auth_and_get_csrf_as_role(client, "admin", "admin123")
+    assert client.get("/api/changes?since=abc").status_code == 400
+    assert client.get("/api/changes?limit=0").status_code == 400
+    r = client.post("/api/changes/ack", json={"consumer": "bad name!", "seq": 1},
+                    headers={"X-CSRF-Token": csrf})
+    assert r.status_code == 400
+
+    client.post("/api/auth/logout", headers={"X-CSRF-Token": csrf})
+    auth_and_get_csrf_as_role(client, "reception", "staff123")
+    assert client.get("/api/changes").status_code == 403
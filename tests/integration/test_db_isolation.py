@@ -0,0 +1,54 @@
+from backend.app import create_app
+from backend.db import init_db, get_db
+from tests.conftest import auth_and_get_csrf_as_role
+
+
+def _patient_count(app):
+    with app.app_context():
+        conn = get_db()
+        n = conn.execute("SELECT COUNT(*) FROM patients;").fetchone()[0]
+        conn.close()
+    return n
+
+
+def test_memory_db_survives_between_connections():
+    # Before: each get_db() on ":memory:" saw a brand new empty database.
+    app = create_app(testing=True)
+    with app.app_context():
+        init_db(seed_demo_users=True)
+        conn = get_db()
+        users = conn.execute("SELECT COUNT(*) FROM users;").fetchone()[0]
+        conn.close()
+    assert users == 5
+
+
+def test_writes_are_visible_within_a_test(app, client):
+    before = _patient_count(app)
+    csrf = auth_and_get_csrf_as_role(client, "reception", "staff123")
+    r = client.post(
+        "/api/patients",
+        json={"first_name": "Rory", "last_name": "Williams",
+              "dob": "1988-03-01", "phone": "555-0200"},
+        headers={"X-CSRF-Token": csrf},
+    )
+    assert r.status_code == 201
+    assert _patient_count(app) == before + 1
+
+
+def test_previous_test_was_rolled_back(app):
+    # only the session seed (Alice's chart) is left
+    assert _patient_count(app) == 1
+
+
+def test_route_level_rollback_still_works(app, client):
+    csrf = auth_and_get_csrf_as_role(client, "reception", "staff123")
+    body = {"patient_id": 1, "doctor_id": 2, "start_time": "2025-12-01 10:00"}
+    h = {"X-CSRF-Token": csrf}
+    assert client.post("/api/appointments", json=body, headers=h).status_code == 201
+    # the 409 path calls conn.rollback(); the first booking must survive it
+    assert client.post("/api/appointments", json=body, headers=h).status_code == 409
+    with app.app_context():
+        conn = get_db()
+        n = conn.execute("SELECT COUNT(*) FROM appointments;").fetchone()[0]
+        conn.close()
+    assert n == 1
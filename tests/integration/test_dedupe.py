@@ -0,0 +1,50 @@
+from backend import jobs
+from backend.db import get_db
+from tests.conftest import auth_and_get_csrf_as_role
+
+
+def _register(client, csrf, first, last, dob, phone):
+    r = client.post("/api/patients", headers={"X-CSRF-Token": csrf}, json={
+        "first_name": first, "last_name": last, "dob": dob, "phone": phone,
+    })
+    assert r.status_code == 201
+    return r.get_json()
+
+
+def test_registration_warns_about_probable_duplicates(client):
+    csrf = auth_and_get_csrf_as_role(client, "reception", "staff123")
+    first = _register(client, csrf, "Robert", "Marley", "1970-02-06", "555-0199")
+    assert first["possible_duplicates"] == []
+
+    # same person: nickname, misspelt surname, formatted phone
+    second = _register(client, csrf, "Rob", "Marly", "1970-02-06", "(555) 0199")
+    [match] = second["possible_duplicates"]
+    assert match["patient_id"] == first["patient_id"]
+    assert match["first_name"] == "Robert" and 0.8 <= match["score"] < 1
+
+    # same phone, different person (a relative): no warning
+    other = _register(client, csrf, "Cedella", "Marley", "1990-08-23", "555-0199")
+    assert other["possible_duplicates"] == []
+
+
+def test_scan_job_fills_the_review_queue(app, client):
+    csrf = auth_and_get_csrf_as_role(client, "admin", "admin123")
+    # Alice's seeded chart was inserted without blocking keys
+    _register(client, csrf, "Alice", "Patient", "1990-01-01", "555 0100")
+    r = client.post("/api/jobs", json={"kind": "duplicate_scan"},
+                    headers={"X-CSRF-Token": csrf})
+    assert r.status_code == 202
+
+    with app.app_context():
+        job = jobs.run_one(get_db(), "w1", 60)
+    assert job["status"] == "done"
+    result = client.get(f"/api/jobs/{job['id']}").get_json()["job"]["result"]
+    assert result["keyed"] >= 1 and result["candidates"] >= 1
+
+    candidates = client.get("/api/patients/duplicates?min_score=0.99").get_json()["candidates"]
+    pair = [c for c in candidates if c["patient_a"] == 1]
+    assert pair and pair[0]["score"] == 1.0 and pair[0]["name_b"] == "Alice Patient"
+
+    assert client.get("/api/patients/duplicates?min_score=x").status_code == 400
+    auth_and_get_csrf_as_role(client, "drsmith", "doctor123")
+    assert client.get("/api/patients/duplicates").status_code == 403
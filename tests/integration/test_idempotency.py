@@ -0,0 +1,143 @@
+import sqlite3
+import threading
+
+import pytest
+from backend import idempotency
+from backend.app import create_app
+from backend.db import get_db, init_db
+from tests.conftest import auth_and_get_csrf_as_role
+
+PATIENT = {
+    "first_name": "Clara", "last_name": "Oswald", "dob": "1986-11-23",
+    "phone": "555-0101",
+}
+
+
+def _post(client, csrf, key, body=PATIENT, path="/api/patients"):
+    return client.post(path, json=body, headers={
+        "X-CSRF-Token": csrf, "Idempotency-Key": key,
+    })
+
+
+def _count_patients(app):
+    with app.app_context():
+        conn = get_db()
+        n = conn.execute(
+            "SELECT COUNT(*) FROM patients WHERE last_name = 'Oswald';"
+        ).fetchone()[0]
+        conn.close()
+    return n
+
+
+def test_retry_replays_first_response(app, client):
+    csrf = auth_and_get_csrf_as_role(client, "admin", "admin123")
+    first = _post(client, csrf, "k-1")
+    again = _post(client, csrf, "k-1")
+    assert first.status_code == again.status_code == 201
+    assert again.get_json() == first.get_json()
+    assert again.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    assert _count_patients(app) == 1
+
+    # a new key is a new submission
+    assert _post(client, csrf, "k-2").get_json()["patient_id"] != first.get_json()["patient_id"]
+
+
+def test_key_reuse_with_other_body_is_rejected(client):
+    csrf = auth_and_get_csrf_as_role(client, "admin", "admin123")
+    assert _post(client, csrf, "k-1").status_code == 201
+    r = _post(client, csrf, "k-1", body=dict(PATIENT, first_name="Oswin"))
+    assert r.status_code == 422
+    assert _post(client, csrf, "x" * 300).status_code == 400
+
+
+def test_auth_failures_are_not_cached(app, client):
+    auth_and_get_csrf_as_role(client, "admin", "admin123")
+    r = _post(client, "wrong-token", "k-1")
+    assert r.status_code == 403
+    csrf = auth_and_get_csrf_as_role(client, "admin", "admin123")
+    assert _post(client, csrf, "k-1").status_code == 201
+
+
+def test_expired_keys_run_again_and_table_stays_bounded(app, client, monkeypatch):
+    csrf = auth_and_get_csrf_as_role(client, "admin", "admin123")
+    _post(client, csrf, "old")
+    with app.app_context():
+        conn = get_db()
+        conn.execute("UPDATE idempotency_keys SET created_at = 0;")
+        conn.commit()
+    assert "Idempotent-Replayed" not in _post(client, csrf, "old").headers
+    assert _count_patients(app) == 2
+
+    monkeypatch.setattr(idempotency, "PRUNE_EVERY", 1)
+    app.config["IDEMPOTENCY_MAX_KEYS"] = 5
+    for i in range(12):
+        _post(client, csrf, f"bulk-{i}", path="/api/billing",
+              body={"patient_id": 1, "amount": i})
+    with app.app_context():
+        conn = get_db()
+        assert conn.execute("SELECT COUNT(*) FROM idempotency_keys;").fetchone()[0] <= 5
+
+
+def test_dead_claim_is_taken_over_after_the_lease(app, client):
+    csrf = auth_and_get_csrf_as_role(client, "admin", "admin123")
+    app.config["IDEMPOTENCY_WAIT_SECONDS"] = 0
+    assert _post(client, csrf, "k-1").status_code == 201
+    with app.app_context():
+        conn = get_db()
+        # what a killed worker leaves: a claim with no stored response
+        conn.execute("UPDATE idempotency_keys SET status_code = NULL, response = NULL;")
+        conn.commit()
+    assert _post(client, csrf, "k-1").status_code == 409        # lease still held
+    with app.app_context():
+        conn = get_db()
+        conn.execute("UPDATE idempotency_keys SET claimed_at = claimed_at - 3600;")
+        conn.commit()
+    r = _post(client, csrf, "k-1")
+    assert r.status_code == 201 and "Idempotent-Replayed" not in r.headers
+    assert _post(client, csrf, "k-1").headers["Idempotent-Replayed"] == "true"
+
+
+def test_failed_store_releases_the_key(app, client, monkeypatch):
+    csrf = auth_and_get_csrf_as_role(client, "admin", "admin123")
+
+    def broken_store(*args):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(idempotency, "_store", broken_store)
+    assert _post(client, csrf, "k-1").status_code == 201
+    monkeypatch.undo()
+    r = _post(client, csrf, "k-1")
+    assert r.status_code == 201 and "Idempotent-Replayed" not in r.headers
+
+
+@pytest.fixture
+def file_app(tmp_path):
+    flask_app = create_app(testing=True)
+    flask_app.config["DB_PATH"] = str(tmp_path / "idem.db")
+    with flask_app.app_context():
+        init_db(seed_demo_users=True)
+    return flask_app
+
+
+def test_racing_duplicates_insert_once(file_app):
+    racers = 8
+    clients = [file_app.test_client() for _ in range(racers)]
+    tokens = [auth_and_get_csrf_as_role(c, "admin", "admin123") for c in clients]
+    barrier = threading.Barrier(racers)
+    results = [None] * racers
+
+    def race(i):
+        barrier.wait()
+        r = _post(clients[i], tokens[i], "same-key")
+        results[i] = (r.status_code, r.get_json())
+
+    threads = [threading.Thread(target=race, args=(i,)) for i in range(racers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert {code for code, _ in results} == {201}
+    assert len({body["patient_id"] for _, body in results}) == 1
+    assert _count_patients(file_app) == 1
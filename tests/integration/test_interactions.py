@@ -0,0 +1,45 @@
+from backend import jobs
+from backend.db import get_db
+from tests.conftest import auth_and_get_csrf_as_role
+
+
+def test_prescribing_warns_and_audit_finds_it(app, client):
+    csrf = auth_and_get_csrf_as_role(client, "reception", "staff123")
+    r = client.post("/api/appointments", headers={"X-CSRF-Token": csrf}, json={
+        "patient_id": 1, "doctor_id": 2, "start_time": "2031-03-05 10:00",
+    })
+    appointment_id = r.get_json()["appointment_id"]
+
+    csrf = auth_and_get_csrf_as_role(client, "drsmith", "doctor123")
+
+    def prescribe(medication):
+        r = client.post("/api/prescriptions", headers={"X-CSRF-Token": csrf}, json={
+            "appointment_id": appointment_id, "patient_id": 1,
+            "medication": medication, "instructions": "Once daily",
+        })
+        assert r.status_code == 201
+        return r.get_json()
+
+    aspirin = prescribe("Aspirin 75 mg tablet")
+    assert aspirin["interactions"] == [] and aspirin["interaction_check"] == "done"
+    [warning] = prescribe("Warfarin 5 mg tablet")["interactions"]
+    assert warning["prescription_id"] == aspirin["prescription_id"]
+    assert warning["severity"] == "major" and warning["medication"] == "Aspirin 75 mg tablet"
+    # not in the catalogue (or misspelt): not checked, and says so
+    tea = prescribe("Herbal tea")
+    assert tea["interactions"] is None and tea["interaction_check"] == "skipped"
+    assert prescribe("Warfarn 5 mg tablet")["interaction_check"] == "skipped"
+
+    csrf = auth_and_get_csrf_as_role(client, "pharma", "pharma123")
+    assert client.post("/api/jobs", json={"kind": "interaction_audit", "payload": {"days": 0}},
+                       headers={"X-CSRF-Token": csrf}).status_code == 400
+    r = client.post("/api/jobs", json={"kind": "interaction_audit"},
+                    headers={"X-CSRF-Token": csrf})
+    assert r.status_code == 202
+    with app.app_context():
+        job = jobs.run_one(get_db(), "w1", 60)
+    assert job["status"] == "done"
+    result = client.get(f"/api/jobs/{job['id']}").get_json()["job"]["result"]
+    assert result["by_severity"]["major"] >= 1
+    assert {"patient_id": 1, "prescription_a": aspirin["prescription_id"],
+            "severity": "major"}.items() <= result["findings"][0].items()
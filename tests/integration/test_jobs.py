@@ -0,0 +1,142 @@
+import time
+
+from backend import jobs
+from backend.db import get_db
+from backend.timeutil import format_slot, now_minutes
+from tests.conftest import auth_and_get_csrf_as_role
+
+
+def _submit(client, csrf, kind, payload=None, priority=None):
+    body = {"kind": kind, "payload": payload or {}}
+    if priority is not None:
+        body["priority"] = priority
+    return client.post("/api/jobs", json=body, headers={"X-CSRF-Token": csrf})
+
+
+def _run(app, worker="w1", visibility=60):
+    with app.app_context():
+        return jobs.run_one(get_db(), worker, visibility)
+
+
+def test_submit_run_and_poll(app, client):
+    csrf = auth_and_get_csrf_as_role(client, "admin", "admin123")
+    r = client.post("/api/billing", json={"patient_id": 1, "amount": 40},
+                    headers={"X-CSRF-Token": csrf})
+    assert r.status_code == 201
+
+    r = _submit(client, csrf, "revenue_report")
+    assert r.status_code == 202
+    job_id = r.get_json()["job_id"]
+    assert client.get(f"/api/jobs/{job_id}").get_json()["job"]["status"] == "queued"
+
+    assert _run(app)["id"] == job_id
+    job = client.get(f"/api/jobs/{job_id}").get_json()["job"]
+    assert job["status"] == "done" and job["attempts"] == 1
+    assert job["result"]["by_status"]["unpaid"]["total"] >= 40
+    assert _run(app) is None
+
+    listed = client.get("/api/jobs?status=done").get_json()["jobs"]
+    assert job_id in [j["id"] for j in listed]
+
+
+def test_higher_priority_runs_first(app, client):
+    csrf = auth_and_get_csrf_as_role(client, "admin", "admin123")
+    low = _submit(client, csrf, "ping").get_json()["job_id"]
+    high = _submit(client, csrf, "ping", priority=9).get_json()["job_id"]
+    assert [_run(app)["id"], _run(app)["id"]] == [high, low]
+
+
+def test_failures_back_off_then_give_up(app, monkeypatch):
+    calls = []
+
+    def broken(conn, payload):
+        calls.append(1)
+        raise RuntimeError("boom")
+
+    monkeypatch.setitem(jobs.JOB_HANDLERS, "ping", broken)
+    with app.app_context():
+        conn = get_db()
+        job_id = jobs.enqueue(conn, "ping", max_attempts=2)
+        conn.commit()
+
+        assert jobs.run_one(conn, "w1")["status"] == "failed"
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?;", (job_id,)).fetchone()
+        assert row["status"] == "queued" and row["attempts"] == 1
+        assert "boom" in row["error"]
+        assert row["available_at"] > time.time()      # backing off
+        assert jobs.run_one(conn, "w1") is None
+
+        conn.execute("UPDATE jobs SET available_at = 0 WHERE id = ?;", (job_id,))
+        jobs.run_one(conn, "w1")
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?;", (job_id,)).fetchone()
+        assert row["status"] == "failed" and row["attempts"] == 2
+        assert jobs.run_one(conn, "w1") is None
+    assert len(calls) == 2
+
+
+def test_expired_claim_is_handed_out_again(app):
+    with app.app_context():
+        conn = get_db()
+        job_id = jobs.enqueue(conn, "ping")
+        conn.commit()
+
+        stale = jobs.claim_job(conn, "dead-worker", visibility=0)
+        assert stale["id"] == job_id
+        fresh = jobs.claim_job(conn, "w2", visibility=60)
+        assert fresh["id"] == job_id and fresh["attempts"] == 2
+        # the first worker lost its claim; its late result is ignored
+        assert not jobs.complete_job(conn, job_id, "dead-worker", {"late": True})
+        assert jobs.complete_job(conn, job_id, "w2", {"pong": True})
+        assert jobs.claim_job(conn, "w3") is None
+
+
+def test_job_that_keeps_killing_its_worker_fails(app):
+    with app.app_context():
+        conn = get_db()
+        job_id = jobs.enqueue(conn, "ping", max_attempts=2)
+        conn.commit()
+
+        assert jobs.claim_job(conn, "dead-1", visibility=0)["attempts"] == 1
+        assert jobs.claim_job(conn, "dead-2", visibility=0)["attempts"] == 2
+        # out of attempts: not handed out a third time, marked failed instead
+        assert jobs.claim_job(conn, "w3", visibility=0) is None
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?;", (job_id,)).fetchone()
+        assert row["status"] == "failed" and row["attempts"] == 2
+        assert row["error"].startswith("worker lost")
+
+
+def test_reminders_fan_out_once(app, client):
+    csrf = auth_and_get_csrf_as_role(client, "reception", "staff123")
+    soon = format_slot(now_minutes() + 180)   # same clock as the job
+    r = client.post("/api/appointments", json={
+        "patient_id": 1, "doctor_id": 2, "start_time": soon,
+    }, headers={"X-CSRF-Token": csrf})
+    assert r.status_code == 201
+
+    for expected in (1, 0):
+        job_id = _submit(client, csrf, "appointment_reminders", {"hours": 6}).get_json()["job_id"]
+        _run(app)
+        job = client.get(f"/api/jobs/{job_id}").get_json()["job"]
+        assert job["result"]["sent"] == expected
+
+
+def test_roles_and_validation(client):
+    csrf = auth_and_get_csrf_as_role(client, "reception", "staff123")
+    assert _submit(client, csrf, "patients_export").status_code == 403
+    assert _submit(client, csrf, "nope").status_code == 400
+    r = _submit(client, csrf, "appointment_reminders", {"hours": 1000})
+    assert r.status_code == 400
+    mine = _submit(client, csrf, "appointment_reminders").get_json()["job_id"]
+    client.post("/api/auth/logout", headers={"X-CSRF-Token": csrf})
+
+    csrf = auth_and_get_csrf_as_role(client, "pharma", "pharma123")
+    r = _submit(client, csrf, "revenue_report", {"from": "last tuesday"})
+    assert r.status_code == 400
+    assert _submit(client, csrf, "ping", priority=20).status_code == 400
+    # other people's jobs are invisible
+    assert client.get(f"/api/jobs/{mine}").status_code == 404
+    assert client.get("/api/jobs").get_json()["jobs"] == []
+    client.post("/api/auth/logout", headers={"X-CSRF-Token": csrf})
+
+    auth_and_get_csrf_as_role(client, "alice", "patient123")
+    assert client.get("/api/jobs").status_code == 403
@@ -0,0 +1,54 @@
+from backend.db import get_db
+from backend.medications import DEFAULT_CSV, load_catalogue, read_csv
+from tests.conftest import auth_and_get_csrf_as_role
+
+
+def _suggest(client, q, **args):
+    return client.get("/api/medications/suggest", query_string={"q": q, **args})
+
+
+def test_suggest_and_reload(app, client):
+    auth_and_get_csrf_as_role(client, "pharma", "pharma123")
+    names = [m["name"] for m in _suggest(client, "amox").get_json()["medications"]]
+    assert names[:2] == ["Amoxicillin 250 mg capsule", "Amoxicillin 500 mg capsule"]
+    assert _suggest(client, "zan").get_json()["medications"] == []
+    assert _suggest(client, "a", limit=0).status_code == 400
+
+    with app.app_context():
+        conn = get_db()
+        load_catalogue(conn, read_csv(DEFAULT_CSV) + [
+            ("Zanamivir 5 mg inhaler", "zanamivir", "inhaler", "5 mg"),
+        ])
+        conn.commit()
+        conn.close()
+    [entry] = _suggest(client, "ZAN").get_json()["medications"]
+    assert entry["generic"] == "zanamivir" and entry["form"] == "inhaler"
+
+    auth_and_get_csrf_as_role(client, "alice", "patient123")
+    assert _suggest(client, "amox").status_code == 403
+
+
+def test_prescriptions_link_to_the_catalogue(app, client, monkeypatch):
+    csrf = auth_and_get_csrf_as_role(client, "reception", "staff123")
+    r = client.post("/api/appointments", headers={"X-CSRF-Token": csrf}, json={
+        "patient_id": 1, "doctor_id": 2, "start_time": "2031-03-04 10:00",
+    })
+    appointment_id = r.get_json()["appointment_id"]
+
+    csrf = auth_and_get_csrf_as_role(client, "drsmith", "doctor123")
+
+    def prescribe(medication):
+        return client.post("/api/prescriptions", headers={"X-CSRF-Token": csrf}, json={
+            "appointment_id": appointment_id, "patient_id": 1,
+            "medication": medication, "instructions": "As directed",
+        })
+
+    linked = prescribe("amoxicillin 500 mg capsule").get_json()["medication_id"]
+    assert linked is not None
+    assert prescribe("Herbal tea").get_json()["medication_id"] is None
+    listed = client.get("/api/prescriptions/1").get_json()["prescriptions"]
+    assert {p["medication_id"] for p in listed} >= {linked, None}
+
+    monkeypatch.setitem(app.config, "MEDICATION_REQUIRE_CATALOGUE", True)
+    r = prescribe("Herbal tea")
+    assert r.status_code == 400 and "medication" in r.get_json()["fields"]
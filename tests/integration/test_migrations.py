@@ -0,0 +1,119 @@
+import sqlite3
+import pytest
+from backend.app import create_app
+from backend.db import init_db, get_db, SCHEMA_VERSION
+
+# Tables as they were created before schema versioning existed.
+LEGACY_SCHEMA = """
+CREATE TABLE users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT UNIQUE NOT NULL,
+    password_hash TEXT NOT NULL,
+    role TEXT NOT NULL,
+    full_name TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE TABLE patients (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    first_name TEXT NOT NULL,
+    last_name TEXT NOT NULL,
+    dob TEXT NOT NULL,
+    phone TEXT NOT NULL,
+    medical_history TEXT DEFAULT '',
+    owner_user_id INTEGER,
+    created_at TEXT NOT NULL
+);
+CREATE TABLE appointments (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    patient_id INTEGER NOT NULL,
+    doctor_id INTEGER NOT NULL,
+    start_time TEXT NOT NULL,
+    reason TEXT DEFAULT '',
+    status TEXT NOT NULL DEFAULT 'scheduled'
+        CHECK(status IN ('scheduled','completed','canceled')),
+    created_at TEXT NOT NULL,
+    UNIQUE(doctor_id, start_time)
+);
+CREATE TABLE prescriptions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    appointment_id INTEGER NOT NULL,
+    doctor_id INTEGER NOT NULL,
+    patient_id INTEGER NOT NULL,
+    medication TEXT NOT NULL,
+    instructions TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    FOREIGN KEY(appointment_id) REFERENCES appointments(id)
+        ON DELETE CASCADE
+);
+INSERT INTO users VALUES (1, 'drwho', 'x', 'Doctor', 'Dr Who', '2025-01-01T08:00:00Z');
+INSERT INTO patients VALUES (1, 'Amy', 'Pond', '1990-01-01', '555-0000', '', NULL,
+                             '2025-01-02T09:15:42.123456');
+INSERT INTO appointments VALUES (1, 1, 1, '2025-10-24 13:30', '', 'scheduled',
+                                 '2025-01-03T10:00:00.5');
+INSERT INTO appointments VALUES (2, 1, 1, '2025-10-24 09:00', '', 'scheduled',
+                                 '2025-01-03T10:00:01Z');
+INSERT INTO prescriptions VALUES (1, 1, 1, 1, 'Amoxicillin', '500mg', '2025-01-03T10:30:00Z');
+"""
+
+
+@pytest.fixture
+def app(tmp_path):
+    db_file = tmp_path / "legacy.db"
+    raw = sqlite3.connect(db_file)
+    raw.executescript(LEGACY_SCHEMA)
+    raw.close()
+
+    flask_app = create_app(testing=True)
+    flask_app.config["DB_PATH"] = str(db_file)
+    return flask_app
+
+
+def test_legacy_db_is_upgraded(app):
+    with app.app_context():
+        init_db(seed_demo_users=False)
+        conn = get_db()
+        version = conn.execute("PRAGMA user_version;").fetchone()[0]
+        rows = conn.execute(
+            "SELECT id, start_min FROM appointments ORDER BY start_min;"
+        ).fetchall()
+        prescriptions = conn.execute("SELECT COUNT(*) FROM prescriptions;").fetchone()[0]
+        created = conn.execute(
+            "SELECT created_at FROM patients UNION ALL "
+            "SELECT created_at FROM appointments;"
+        ).fetchall()
+        conn.close()
+
+    assert version == SCHEMA_VERSION
+    # integer ordering puts 09:00 before 13:30
+    assert [r["id"] for r in rows] == [2, 1]
+    assert all(r["start_min"] is not None for r in rows)
+    # rebuilding appointments must not cascade-delete its children
+    assert prescriptions == 1
+    assert sorted(r["created_at"] for r in created) == [
+        "2025-01-02T09:15:42Z", "2025-01-03T10:00:00Z", "2025-01-03T10:00:01Z",
+    ]
+
+
+def test_init_db_is_idempotent(app):
+    with app.app_context():
+        init_db(seed_demo_users=True)
+        init_db(seed_demo_users=True)
+        conn = get_db()
+        version = conn.execute("PRAGMA user_version;").fetchone()[0]
+        conn.close()
+    assert version == SCHEMA_VERSION
+
+
+def test_appointment_range_query(app):
+    with app.app_context():
+        init_db(seed_demo_users=True)
+    client = app.test_client()
+    client.post("/api/auth/login", json={"username": "admin", "password": "admin123"})
+
+    r = client.get("/api/appointments/1?from=2025-10-24 10:00&to=2025-10-25")
+    assert r.status_code == 200
+    assert [a["id"] for a in r.get_json()["appointments"]] == [1]
+
+    r = client.get("/api/appointments/1?from=yesterday")
+    assert r.status_code == 400
+    assert "from" in r.get_json()["fields"]
@@ -0,0 +1,134 @@
+import pytest
+from backend.app import create_app
+from backend.db import init_db, get_db
+import backend.db as db_module
+import backend.routes.api as api_module
+
+
+@pytest.fixture
+def app(tmp_path):
+    flask_app = create_app(testing=True)
+    flask_app.config["DB_PATH"] = str(tmp_path / "summary.db")
+    with flask_app.app_context():
+        init_db(seed_demo_users=True)
+    return flask_app
+
+
+@pytest.fixture
+def seeded(app):
+    """
+    One patient (owned by alice, user 5) with a few appointments,
+    prescriptions and bills.
+    """
+    client = app.test_client()
+    r = client.post("/api/auth/login", json={"username": "admin", "password": "admin123"})
+    csrf = r.get_json()["csrf_token"]
+    h = {"X-CSRF-Token": csrf}
+    pid = client.post("/api/patients", json={
+        "first_name": "Amy", "last_name": "Pond", "dob": "1990-01-01",
+        "phone": "555-0000", "medical_history": "Asthma", "owner_user_id": 5,
+    }, headers=h).get_json()["patient_id"]
+    appt_ids = []
+    for i in range(3):
+        r = client.post("/api/appointments", json={
+            "patient_id": pid, "doctor_id": 2, "start_time": f"2025-11-0{i + 1} 09:00",
+        }, headers=h)
+        appt_ids.append(r.get_json()["appointment_id"])
+        client.post("/api/billing", json={"patient_id": pid, "amount": 10 + i}, headers=h)
+    with app.app_context():
+        conn = get_db()
+        conn.executemany(
+            "INSERT INTO prescriptions (appointment_id, doctor_id, patient_id, "
+            "medication, instructions, created_at) VALUES (?, 2, ?, 'Ibuprofen', "
+            "'200mg', '2025-11-01T10:00:00Z');",
+            [(a, pid) for a in appt_ids],
+        )
+        conn.commit()
+        conn.close()
+    return pid
+
+
+def _client_as(app, username, password):
+    client = app.test_client()
+    r = client.post("/api/auth/login", json={"username": username, "password": password})
+    assert r.status_code == 200
+    return client
+
+
+class _QueryCounter:
+    """
+    Wraps get_db() (as the routes and read_snapshot see it) to count
+    connections and SELECTs.
+    """
+
+    def __init__(self, monkeypatch):
+        self.connections = 0
+        self.selects = 0
+        monkeypatch.setattr(api_module, "get_db", self._get_db)
+        monkeypatch.setattr(db_module, "get_db", self._get_db)
+
+    def _get_db(self, *args, **kwargs):
+        conn = get_db(*args, **kwargs)
+        self.connections += 1
+        conn.set_trace_callback(self._trace)
+        return conn
+
+    def _trace(self, sql):
+        if sql.lstrip().upper().startswith("SELECT"):
+            self.selects += 1
+
+
+def test_summary_returns_all_sections_for_admin(app, seeded):
+    client = _client_as(app, "admin", "admin123")
+    data = client.get(f"/api/patients/{seeded}/summary").get_json()
+    assert data["ok"] is True
+    assert data["patient"]["medical_history"] == "Asthma"
+    assert len(data["appointments"]) == 3
+    assert len(data["prescriptions"]) == 3
+    assert len(data["billing"]) == 3
+
+
+def test_field_selection(app, seeded):
+    client = _client_as(app, "admin", "admin123")
+    data = client.get(f"/api/patients/{seeded}/summary?fields=billing").get_json()
+    assert set(data) == {"ok", "patient", "billing"}
+
+    r = client.get(f"/api/patients/{seeded}/summary?fields=labs")
+    assert r.status_code == 400
+
+
+def test_rbac_and_redaction(app, seeded):
+    pharma = _client_as(app, "pharma", "pharma123")
+    data = pharma.get(f"/api/patients/{seeded}/summary").get_json()
+    assert data["patient"]["medical_history"] == "[REDACTED]"
+    assert "appointments" not in data
+    assert "billing" in data
+    r = pharma.get(f"/api/patients/{seeded}/summary?fields=appointments")
+    assert r.status_code == 403
+
+    doctor = _client_as(app, "drsmith", "doctor123")
+    data = doctor.get(f"/api/patients/{seeded}/summary").get_json()
+    assert "billing" not in data
+
+    # alice owns this chart
+    alice = _client_as(app, "alice", "patient123")
+    assert alice.get(f"/api/patients/{seeded}/summary").status_code == 200
+    assert alice.get("/api/patients/999/summary").status_code == 404
+
+
+def test_summary_uses_one_connection_and_fixed_queries(app, seeded, monkeypatch):
+    client = _client_as(app, "admin", "admin123")
+
+    separate = _QueryCounter(monkeypatch)
+    for url in (f"/api/patients/{seeded}", f"/api/prescriptions/{seeded}",
+                f"/api/billing/{seeded}"):
+        assert client.get(url).status_code == 200
+
+    combined = _QueryCounter(monkeypatch)
+    assert client.get(f"/api/patients/{seeded}/summary").status_code == 200
+
+    assert separate.connections == 3
+    assert combined.connections == 1
+    # patient + appointments + prescriptions + billing, independent of row counts
+    assert combined.selects == 4
+
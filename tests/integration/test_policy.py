@@ -0,0 +1,81 @@
+from backend.policy import PERMISSIONS, ROLE_BITS
+from tests.conftest import auth_and_get_csrf_as_role
+
+USERS = {
+    "Admin": ("admin", "admin123"),
+    "Staff": ("reception", "staff123"),
+    "Doctor": ("drsmith", "doctor123"),
+    "Pharmacy": ("pharma", "pharma123"),
+    "Patient": ("alice", "patient123"),
+}
+# URL arguments: Alice's chart, Dr Smith, ids that may or may not exist,
+# and the pharmacist (whose sessions Admin revokes before they log in)
+ARGS = {"patient_id": 1, "doctor_id": 2, "appointment_id": 1, "job_id": 1, "user_id": 4}
+# would really start a snapshot
+SKIP = {("POST", "/api/admin/backups")}
+
+
+def _guarded_routes(app):
+    for rule in app.url_map.iter_rules():
+        if rule.endpoint.split(".")[0] not in ("api_bp", "admin_bp"):
+            continue
+        view = app.view_functions[rule.endpoint]
+        assert getattr(view, "permissions", None), f"{rule.rule} has no @requires"
+        mask = 0
+        for name in view.permissions:
+            mask |= PERMISSIONS[name].mask
+        url = rule.rule
+        for arg in rule.arguments:
+            url = url.replace(f"<int:{arg}>", str(ARGS[arg]))
+        for method in sorted(rule.methods - {"HEAD", "OPTIONS"}):
+            yield method, rule.rule, url, mask
+
+
+def test_every_route_against_every_role(app, client):
+    routes = list(_guarded_routes(app))
+    assert len(routes) >= 20
+
+    for method, rule, url, _ in routes:
+        r = client.open(url, method=method, json={})
+        assert r.status_code == 401, (method, rule)
+
+    for role, (username, password) in USERS.items():
+        csrf = auth_and_get_csrf_as_role(client, username, password)
+        for method, rule, url, mask in routes:
+            allowed = bool(mask & ROLE_BITS[role])
+            if allowed and (method, rule) in SKIP:
+                continue
+            r = client.open(url, method=method, json={}, headers={"X-CSRF-Token": csrf})
+            if allowed:
+                assert r.status_code not in (401, 403), (role, method, rule, r.get_json())
+            else:
+                assert r.status_code == 403, (role, method, rule)
+                assert r.get_json()["error"] == "Forbidden"
+
+
+def test_row_scopes(client):
+    # Alice holds billing.read, but only for her own chart (#1)
+    auth_and_get_csrf_as_role(client, "alice", "patient123")
+    assert client.get("/api/billing/1").status_code == 200
+    assert client.get("/api/prescriptions/1").status_code == 200
+    assert client.get("/api/billing/5").status_code == 403       # her user id
+    assert client.get("/api/prescriptions/2").status_code == 403
+
+    auth_and_get_csrf_as_role(client, "pharma", "pharma123")
+    assert client.get("/api/billing/5").status_code == 200
+
+
+def test_policy_endpoint(client):
+    auth_and_get_csrf_as_role(client, "admin", "admin123")
+    data = client.get("/api/policy").get_json()
+    assert data["roles"] == list(USERS)
+    assert data["permissions"]["billing.read"]["Patient"] == "own"
+    rules = {(r["rule"], tuple(r["methods"])) for r in data["routes"]}
+    assert ("/api/admin/backups", ("POST",)) in rules
+
+    auth_and_get_csrf_as_role(client, "alice", "patient123")
+    data = client.get("/api/policy").get_json()
+    assert data["roles"] == ["Patient"]
+    assert "backup.manage" not in data["permissions"]
+    assert all(not r["rule"].startswith("/api/admin") for r in data["routes"])
+    assert data["permissions"]["notification.read"] == {"Patient": "self"}
@@ -0,0 +1,70 @@
+import sqlite3
+import pytest
+from backend.app import create_app
+from backend.db import init_db, get_db, read_snapshot
+
+
+@pytest.fixture
+def app(tmp_path):
+    flask_app = create_app(testing=True)
+    flask_app.config["DB_PATH"] = str(tmp_path / "routing.db")
+    with flask_app.app_context():
+        init_db(seed_demo_users=True)
+    return flask_app
+
+
+def test_file_db_runs_in_wal_mode(app):
+    with app.app_context():
+        conn = get_db()
+        mode = conn.execute("PRAGMA journal_mode;").fetchone()[0]
+        conn.close()
+    assert mode == "wal"
+
+
+def test_readonly_connection_rejects_writes(app):
+    with app.app_context():
+        conn = get_db(readonly=True)
+        assert conn.execute("PRAGMA query_only;").fetchone()[0] == 1
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("DELETE FROM users;")
+        conn.close()
+
+
+def test_get_requests_default_to_pooled_readers(app):
+    with app.test_request_context("/api/notifications", method="GET"):
+        first = get_db()
+        raw = first._conn
+        assert first.execute("PRAGMA query_only;").fetchone()[0] == 1
+        first.close()
+        second = get_db()
+        # LIFO pool hands the same connection back
+        assert second._conn is raw
+        second.close()
+
+    with app.test_request_context("/api/patients", method="POST"):
+        writer = get_db()
+        assert writer.execute("PRAGMA query_only;").fetchone()[0] == 0
+        writer.close()
+
+
+def test_snapshot_is_stable_while_writer_commits(app):
+    with app.app_context():
+        with read_snapshot() as snap:
+            before = snap.execute("SELECT COUNT(*) FROM users;").fetchone()[0]
+
+            writer = get_db(readonly=False)
+            writer.execute(
+                "INSERT INTO users (username, password_hash, role, full_name, created_at) "
+                "VALUES ('temp', 'x', 'Staff', 'Temp', '2025-01-01T00:00:00Z');"
+            )
+            writer.commit()
+            writer.close()
+
+            during = snap.execute("SELECT COUNT(*) FROM users;").fetchone()[0]
+
+        conn = get_db(readonly=True)
+        after = conn.execute("SELECT COUNT(*) FROM users;").fetchone()[0]
+        conn.close()
+
+    assert during == before
+    assert after == before + 1
@@ -1,22 +1,3 @@
-import pytest
-from backend.app import create_app
-from backend.db import init_db
-import os
-
-@pytest.fixture
-def client(monkeypatch, tmp_path):
-    db_file = tmp_path / "roles.db"
-    monkeypatch.setenv("SECRET_KEY", "rolessecret")
-    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{db_file}")
-    monkeypatch.setenv("TESTING", "True")
-    monkeypatch.setenv("DEBUG", "False")
-
-    init_db()
-    app = create_app()
-    app.config["TESTING"] = True
-    with app.test_client() as c:
-        yield c
-
 def _login(client, username, password):
     r = client.post("/api/auth/login", json={
         "username": username,
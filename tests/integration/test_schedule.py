@@ -0,0 +1,69 @@
+from backend.analytics import CubeCache
+from backend.db import get_db
+from tests.conftest import auth_and_get_csrf_as_role
+
+DAY = "2031-03-06"
+
+
+def _book(client, csrf, doctor_id, when):
+    r = client.post("/api/appointments", headers={"X-CSRF-Token": csrf}, json={
+        "patient_id": 1, "doctor_id": doctor_id, "start_time": f"{DAY} {when}",
+    })
+    assert r.status_code == 201
+    return r.get_json()["appointment_id"]
+
+
+def _schedule(client, **args):
+    r = client.get("/api/schedule", query_string={"date": DAY, **args})
+    assert r.status_code == 200
+    body = r.get_json()
+    return {d["doctor_name"]: d for d in body["doctors"]}, body["cached"]
+
+
+def test_day_schedule_cache_and_departments(app, client, monkeypatch):
+    monkeypatch.setitem(app.extensions, "hms_schedule", CubeCache(16))
+    monkeypatch.setitem(app.config, "SCHEDULE_OPEN_TTL_SECONDS", 60)
+    with app.app_context():
+        conn = get_db()
+        conn.execute(
+            "INSERT INTO users (id, username, password_hash, role, full_name, created_at) "
+            "VALUES (90, 'drjones', '-', 'Doctor', 'Dr. Ann Jones', '2025-01-01T00:00:00Z');"
+        )
+        conn.commit()
+        conn.close()
+
+    csrf = auth_and_get_csrf_as_role(client, "reception", "staff123")
+    late = _book(client, csrf, 2, "11:00")
+    _book(client, csrf, 2, "09:30")
+    doctors, cached = _schedule(client)
+    assert not cached
+    assert [a["start_time"] for a in doctors["Dr. John Smith"]["appointments"]] == [
+        f"{DAY} 09:30", f"{DAY} 11:00"]
+    assert doctors["Dr. John Smith"]["appointments"][0]["patient_name"] == "Alice Patient"
+    assert doctors["Dr. Ann Jones"]["appointments"] == []
+    assert _schedule(client)[1]
+
+    # booking and status changes drop the cached day
+    _book(client, csrf, 90, "10:00")
+    doctors, cached = _schedule(client)
+    assert not cached and len(doctors["Dr. Ann Jones"]["appointments"]) == 1
+    r = client.put(f"/api/appointments/{late}/status", headers={"X-CSRF-Token": csrf},
+                   json={"status": "canceled"})
+    assert r.status_code == 200
+    doctors, cached = _schedule(client)
+    assert not cached and doctors["Dr. John Smith"]["appointments"][1]["status"] == "canceled"
+
+    # departments are read fresh, the day stays cached
+    csrf = auth_and_get_csrf_as_role(client, "admin", "admin123")
+    r = client.put("/api/admin/users/90/department", headers={"X-CSRF-Token": csrf},
+                   json={"department": "Cardiology"})
+    assert r.get_json()["department"] == "Cardiology"
+    doctors, cached = _schedule(client, department="cardiology")
+    assert cached and list(doctors) == ["Dr. Ann Jones"]
+    assert list(_schedule(client, department="General Medicine")[0]) == ["Dr. John Smith"]
+    assert client.put("/api/admin/users/999/department", headers={"X-CSRF-Token": csrf},
+                      json={"department": "X"}).status_code == 404
+
+    assert client.get("/api/schedule?date=06-03-2031").status_code == 400
+    auth_and_get_csrf_as_role(client, "alice", "patient123")
+    assert client.get("/api/schedule").status_code == 403
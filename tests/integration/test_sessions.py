@@ -0,0 +1,55 @@
+from tests.conftest import auth_and_get_csrf_as_role
+
+
+def _sid(client):
+    cookie = client.get_cookie("session")
+    return cookie.value if cookie else None
+
+
+def _me(client):
+    return client.get("/api/auth/me").status_code
+
+
+def test_cookie_is_an_opaque_id(app, client):
+    auth_and_get_csrf_as_role(client, "alice", "patient123")
+    sid = _sid(client)
+    assert len(sid) == 43 and "." not in sid          # no signed payload
+    store = app.extensions["hms_sessions"].store
+    assert store.load(sid) is None                    # stored under its hash
+
+    r = client.get("/api/auth/me")
+    assert r.status_code == 200
+    assert r.get_json()["user"] == {"id": 5, "role": "Patient"}
+    assert "Set-Cookie" not in r.headers              # nothing re-signed
+
+
+def test_login_rotates_and_logout_deletes(client):
+    client.get("/api/auth/csrf-token")                # anonymous session
+    before = _sid(client)
+    csrf = auth_and_get_csrf_as_role(client, "alice", "patient123")
+    after = _sid(client)
+    assert before and after != before
+
+    assert client.post("/api/auth/logout").status_code == 403    # no CSRF token
+    assert client.post("/api/auth/logout", headers={"X-CSRF-Token": csrf}).status_code == 200
+    assert _sid(client) is None
+    assert client.post("/api/auth/logout", headers={"X-CSRF-Token": csrf}).status_code == 401
+    client.set_cookie("session", after)               # replaying the old cookie
+    assert _me(client) == 401
+
+
+def test_admin_revokes_every_session_of_a_user(app):
+    phone, laptop, admin = (app.test_client() for _ in range(3))
+    auth_and_get_csrf_as_role(phone, "alice", "patient123")
+    alice_csrf = auth_and_get_csrf_as_role(laptop, "alice", "patient123")
+    admin_csrf = auth_and_get_csrf_as_role(admin, "admin", "admin123")
+
+    r = laptop.delete("/api/admin/users/5/sessions", headers={"X-CSRF-Token": alice_csrf})
+    assert r.status_code == 403
+
+    r = admin.delete("/api/admin/users/5/sessions", headers={"X-CSRF-Token": admin_csrf})
+    assert r.status_code == 200
+    assert r.get_json()["revoked"] >= 2      # (plus any left by earlier tests)
+    assert _me(phone) == _me(laptop) == 401
+    assert _me(admin) == 200
+
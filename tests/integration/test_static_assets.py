@@ -0,0 +1,64 @@
+import gzip
+import pytest
+from backend.app import create_app
+
+
+@pytest.fixture
+def app():
+    flask_app = create_app(testing=True)
+    return flask_app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def test_page_is_served_with_revalidation(client):
+    r = client.get("/dashboard.html")
+    assert r.status_code == 200
+    assert r.headers["Cache-Control"] == "no-cache"
+    assert r.headers.get("ETag")
+
+
+def test_fingerprinted_asset_is_immutable_and_gzipped(app, client):
+    assets = app.extensions["hms_assets"]
+    url = assets.url_for("js/api.js")
+    assert url != "/static/js/api.js"
+
+    r = client.get(url, headers={"Accept-Encoding": "gzip, deflate"})
+    assert r.status_code == 200
+    assert "immutable" in r.headers["Cache-Control"]
+    assert r.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in r.headers["Vary"]
+    assert b"apiGet" in gzip.decompress(r.data)
+
+
+def test_identity_when_client_does_not_accept_gzip(app, client):
+    url = app.extensions["hms_assets"].url_for("js/api.js")
+    r = client.get(url, headers={"Accept-Encoding": "identity"})
+    assert r.status_code == 200
+    assert "Content-Encoding" not in r.headers
+    assert b"apiGet" in r.data
+
+
+def test_html_references_fingerprinted_assets(app, client):
+    assets = app.extensions["hms_assets"]
+    r = client.get("/dashboard.html")
+    html = r.get_data(as_text=True)
+    assert assets.url_for("js/api.js").lstrip("/") in html
+
+
+def test_etag_gives_304(client):
+    first = client.get("/static/css/style.css")
+    assert first.status_code == 200
+    again = client.get(
+        "/static/css/style.css",
+        headers={"If-None-Match": first.headers["ETag"]},
+    )
+    assert again.status_code == 304
+
+
+def test_unknown_path_is_404(client):
+    assert client.get("/nope.html").status_code == 404
+    assert client.get("/static/../backend/config.py").status_code == 404
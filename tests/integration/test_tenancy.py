@@ -0,0 +1,149 @@
+import pytest
+from backend.app import create_app
+from backend.tenancy import TenantRegistry, init_tenancy
+
+
+@pytest.fixture
+def app(tmp_path):
+    flask_app = create_app(testing=True)
+    flask_app.config.update(
+        TENANT_DB_DIR=str(tmp_path / "tenants"),
+        TENANTS="north,south",
+        TENANT_SEED_DEMO_USERS=True,
+        TENANT_BASE_DOMAIN="hms.example",
+    )
+    init_tenancy(flask_app)
+    return flask_app
+
+
+def _login(client, tenant):
+    r = client.post("/api/auth/login", json={"username": "admin", "password": "admin123"},
+                    headers={"X-Tenant-ID": tenant})
+    assert r.status_code == 200
+    return r.get_json()["csrf_token"]
+
+
+def test_tenant_is_required_and_must_be_known(app, tmp_path):
+    client = app.test_client()
+    creds = {"username": "admin", "password": "admin123"}
+    assert client.post("/api/auth/login", json=creds).status_code == 404
+    for bad in ("west", "../north", "North Clinic"):
+        r = client.post("/api/auth/login", json=creds, headers={"X-Tenant-ID": bad})
+        assert r.status_code == 404
+    assert not (tmp_path / "tenants" / "west.db").exists()
+    # pages don't need a tenant
+    assert client.get("/").status_code == 200
+
+
+def test_databases_are_created_lazily_and_isolated(app, tmp_path):
+    north_db = tmp_path / "tenants" / "north.db"
+    south_db = tmp_path / "tenants" / "south.db"
+    assert not north_db.exists()
+
+    north = app.test_client()
+    csrf = _login(north, "north")
+    assert north_db.exists() and not south_db.exists()
+    r = north.post("/api/patients", json={
+        "first_name": "Amy", "last_name": "Pond", "dob": "1990-01-01",
+        "phone": "555-0000",
+    }, headers={"X-CSRF-Token": csrf, "X-Tenant-ID": "north"})
+    assert r.status_code == 201
+    pid = r.get_json()["patient_id"]
+
+    south = app.test_client()
+    _login(south, "south")
+    r = south.get(f"/api/patients/{pid}", headers={"X-Tenant-ID": "south"})
+    assert r.status_code == 404
+    r = north.get(f"/api/patients/{pid}", headers={"X-Tenant-ID": "north"})
+    assert r.status_code == 200
+
+
+def test_session_is_bound_to_its_tenant(app):
+    client = app.test_client()
+    _login(client, "north")
+    assert client.get("/api/notifications", headers={"X-Tenant-ID": "north"}).status_code == 200
+    assert client.get("/api/notifications", headers={"X-Tenant-ID": "south"}).status_code == 401
+    assert client.get("/api/auth/me", headers={"X-Tenant-ID": "north"}).status_code == 200
+    assert client.get("/api/auth/me", headers={"X-Tenant-ID": "south"}).status_code == 401
+
+
+def test_subdomain_selects_tenant(app):
+    client = app.test_client()
+    r = client.post("/api/auth/login", json={"username": "admin", "password": "admin123"},
+                    base_url="http://south.hms.example")
+    assert r.status_code == 200
+    r = client.get("/api/notifications", base_url="http://south.hms.example")
+    assert r.status_code == 200
+
+
+def test_registry_evicts_least_recently_used(tmp_path):
+    registry = TenantRegistry(str(tmp_path), tenants=["a", "b", "c"], max_open=2)
+    a = registry.get("a")
+    registry.get("b")
+    registry.get("a")          # a is now most recent
+    registry.get("c")          # evicts b
+    assert registry.open_count() == 2
+    assert registry.evictions == 1
+    assert not a.pool.closed
+    # b comes back without re-running init_db, a is evicted next
+    registry.get("b")
+    assert a.pool.closed and registry.evictions == 2
+
+
+def test_registry_evicts_idle_tenants(tmp_path):
+    registry = TenantRegistry(str(tmp_path), tenants=["a", "b"], idle_seconds=0)
+    a = registry.get("a")
+    registry.get("b")
+    assert a.pool.closed
+    assert registry.open_count() == 1
+
+
+def test_async_audit_events_land_in_the_tenant_db(app, tmp_path):
+    import sqlite3
+    from backend.audit import get_audit_writer
+
+    app.config["AUDIT_MODE"] = "async"
+    client = app.test_client()
+    csrf = _login(client, "north")
+    r = client.post("/api/patients", json={
+        "first_name": "Amy", "last_name": "Pond", "dob": "1990-01-01",
+        "phone": "555-0000",
+    }, headers={"X-CSRF-Token": csrf, "X-Tenant-ID": "north"})
+    assert r.status_code == 201
+    get_audit_writer(app).close()
+
+    conn = sqlite3.connect(str(tmp_path / "tenants" / "north.db"))
+    rows = conn.execute("SELECT action, entity FROM audit_log;").fetchall()
+    conn.close()
+    assert ("create", "patient") in rows
+
+
+def test_backups_are_per_tenant(app, monkeypatch):
+    import threading
+    import time
+    from backend.routes import admin
+
+    release = threading.Event()
+
+    def slow_snapshot(db_path, backup_dir, **kw):
+        release.wait(10)
+        return {"name": db_path.rsplit("/", 1)[-1], "path": db_path}
+
+    monkeypatch.setattr(admin, "create_snapshot", slow_snapshot)
+    north, south = app.test_client(), app.test_client()
+    north_csrf, south_csrf = _login(north, "north"), _login(south, "south")
+    as_north = {"X-CSRF-Token": north_csrf, "X-Tenant-ID": "north"}
+    as_south = {"X-CSRF-Token": south_csrf, "X-Tenant-ID": "south"}
+
+    assert north.post("/api/admin/backups", headers=as_north).status_code == 202
+    assert north.post("/api/admin/backups", headers=as_north).status_code == 409
+    # north's running backup doesn't block south
+    assert south.post("/api/admin/backups", headers=as_south).status_code == 202
+    release.set()
+    for client, headers, name in ((north, as_north, "north.db"), (south, as_south, "south.db")):
+        for _ in range(200):
+            body = client.get("/api/admin/backups", headers=headers).get_json()
+            if not body["running"]:
+                break
+            time.sleep(0.05)
+        assert body["last"]["name"] == name
@@ -0,0 +1,92 @@
+from backend import traffic
+from backend.app import create_app
+from backend.config import TestingConfig
+from backend.db import init_db
+from tests.conftest import auth_and_get_csrf_as_role, seed_demo_patients
+
+
+def _capturing_app(capture, monkeypatch):
+    monkeypatch.setattr(TestingConfig, "TRAFFIC_CAPTURE_PATH", str(capture))
+    app = create_app(testing=True)
+    with app.app_context():
+        init_db(seed_demo_users=True)
+        seed_demo_patients()
+    return app
+
+
+def test_capture_is_anonymous_and_replays(tmp_path, monkeypatch):
+    capture = tmp_path / "capture.jsonl"
+    app = _capturing_app(capture, monkeypatch)
+
+    client = app.test_client()
+    csrf = auth_and_get_csrf_as_role(client, "reception", "staff123")
+    headers = {"X-CSRF-Token": csrf}
+    assert client.get("/api/patients/1").status_code == 200
+    assert client.post("/api/patients", headers=headers, json={
+        "first_name": "Zebedee", "last_name": "Quartermaine", "dob": "1971-02-03",
+        "phone": "555-0199",
+    }).status_code == 201
+    r = client.post("/api/appointments", headers=headers, json={
+        "patient_id": 1, "doctor_id": 2, "start_time": "2031-03-04 10:30",
+    })
+    assert client.put(f"/api/appointments/{r.get_json()['appointment_id']}/status",
+                      headers=headers, json={"status": "canceled"}).status_code == 200
+    assert client.get("/api/schedule?date=2031-03-04").status_code == 200
+    assert client.get("/dashboard.html").status_code in (200, 404)    # not /api
+    app.extensions["hms_traffic"].close()
+
+    text = capture.read_text()
+    for secret in ("Zebedee", "Quartermaine", "1971", "0199", "reception", "staff123",
+                   "Alice", "2031-03-04", csrf):
+        assert secret not in text
+    entries = traffic.read_capture(capture)
+    assert [(e["m"], e["u"]) for e in entries] == [
+        ("POST", "/api/auth/login"),
+        ("GET", "/api/patients/<int:patient_id>"),
+        ("POST", "/api/patients"),
+        ("POST", "/api/appointments"),
+        ("PUT", "/api/appointments/<int:appointment_id>/status"),
+        ("GET", "/api/schedule"),
+    ]
+    assert {e["r"] for e in entries} == {"Staff"}
+    assert entries[4]["b"] == {"status": {"=": "canceled"}}
+    assert entries[5]["q"] == {"date": "date"}
+    assert all(e["d"] > 0 for e in entries)
+
+    instance = traffic.LocalInstance(patients=50, doctors=2, db_dir=str(tmp_path))
+    try:
+        report = traffic.replay(entries * 3, instance.base_url, instance.pools,
+                                speed=0, concurrency=4)
+    finally:
+        instance.close()
+    assert report["sent"] == 18
+    routes = report["routes"]
+    assert routes["GET /api/schedule"]["count"] == 3
+    assert routes["POST /api/auth/login"]["status"] == {"200": 3}
+    assert routes["POST /api/patients"]["status"] == {"201": 3}
+    assert all(r["errors"] == 0 for r in routes.values())
+    assert routes["GET /api/patients/<int:patient_id>"]["captured_p50"] > 0
+
+
+def test_batch_is_one_entry_with_its_routes(tmp_path, monkeypatch):
+    capture = tmp_path / "capture.jsonl"
+    app = _capturing_app(capture, monkeypatch)
+    client = app.test_client()
+    csrf = auth_and_get_csrf_as_role(client, "admin", "admin123")
+    r = client.post("/api/batch", headers={"X-CSRF-Token": csrf}, json={"requests": [
+        {"path": "/api/patients/1"}, {"path": "/api/notifications?since=2025-01-01"},
+    ]})
+    assert r.status_code == 200
+    app.extensions["hms_traffic"].close()
+
+    entries = traffic.read_capture(capture)
+    # the sub-requests are not recorded on their own
+    assert [e["u"] for e in entries] == ["/api/auth/login", "/api/batch"]
+    assert entries[1]["b"] == {"requests": [
+        {"path": {"route": "/api/patients/<int:patient_id>", "q": None}},
+        {"path": {"route": "/api/notifications", "q": {"since": "date"}}},
+    ]}
+    synth = traffic.Synthesizer({"patient_id": [9]})
+    body = synth.value(entries[1]["b"])
+    assert body["requests"][0] == {"path": "/api/patients/9"}
+    assert body["requests"][1]["path"].startswith("/api/notifications?since=")
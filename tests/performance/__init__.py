@@ -0,0 +1 @@
+# Marks tests/performance as a package.
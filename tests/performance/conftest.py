@@ -0,0 +1,26 @@
+"""
+Benchmarks are opt-in: they build large databases and print timings, so
+a plain `pytest` (CI) skips them. Run them with
+
+    HMS_BENCH=1 pytest -s tests/performance
+
+Default sizes are small; each module reads its own HMS_BENCH_* size from
+the environment for full-scale runs. Benchmarks assert structural facts
+(results agree, query/thread/connection counts, recall), never wall-clock
+times, which vary too much between machines to gate on.
+"""
+import os
+from pathlib import Path
+
+import pytest
+
+_HERE = Path(__file__).resolve().parent
+
+
+def pytest_collection_modifyitems(config, items):
+    if os.environ.get("HMS_BENCH", "").lower() in ("1", "true", "yes"):
+        return
+    skip = pytest.mark.skip(reason="benchmark; set HMS_BENCH=1 to run")
+    for item in items:
+        if _HERE in Path(item.fspath).resolve().parents:
+            item.add_marker(skip)
@@ -0,0 +1,107 @@
+"""
+Clinic analytics over HMS_BENCH_APPOINTMENTS appointments (200k by
+default, 10M for the full run): the straightforward version (stream
+every row into Python and count there) vs. analytics.range_cube, cold
+(every month aggregated by SQLite) and warm (settled months from the
+cache). Run with -s to see the numbers.
+
+40 doctors, 10% canceled, 10% never closed out (no-shows); 10M rows
+span two years. Setup alone takes a while at that size.
+"""
+import os
+import time
+import pytest
+from backend import analytics
+from backend.analytics import range_cube, summarise
+from backend.app import create_app
+from backend.changes import set_suppressed
+from backend.db import get_db, init_db
+from backend.timeutil import parse_day
+
+APPOINTMENTS = int(os.environ.get("HMS_BENCH_APPOINTMENTS", "200000"))
+DOCTORS = 40
+FIRST_DOCTOR = 6                                 # after the demo users
+START = parse_day("2023-01-01")
+LO, HI = START, parse_day("2025-01-01")
+
+
+@pytest.fixture(scope="module")
+def app(tmp_path_factory):
+    flask_app = create_app(testing=True)
+    flask_app.config["DB_PATH"] = str(tmp_path_factory.mktemp("analytics") / "big.db")
+    with flask_app.app_context():
+        init_db(seed_demo_users=True)
+        conn = get_db(readonly=False)
+        cur = conn.cursor()
+        cur.execute("BEGIN;")
+        set_suppressed(cur, True)
+        cur.executemany(
+            "INSERT INTO users (id, username, password_hash, role, full_name, created_at) "
+            "VALUES (?, ?, '-', 'Doctor', ?, '2023-01-01T00:00:00Z');",
+            [(FIRST_DOCTOR + d, f"doc{d}", f"Dr. {d}") for d in range(DOCTORS)],
+        )
+        cur.execute(
+            "INSERT INTO patients (id, first_name, last_name, dob, phone, created_at) "
+            "VALUES (1, 'Bench', 'Patient', '1990-01-01', '555', '2023-01-01T00:00:00Z');"
+        )
+        # each doctor's slots are 4 minutes apart (2 years for 10M rows)
+        cur.execute(f"""
+            WITH RECURSIVE n(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM n
+                                    WHERE i < {APPOINTMENTS - 1})
+            INSERT INTO appointments
+                (patient_id, doctor_id, start_time, reason, status, created_at, start_min)
+            SELECT 1, {FIRST_DOCTOR} + i % {DOCTORS}, '', '',
+                   CASE i % 10 WHEN 0 THEN 'canceled' WHEN 1 THEN 'scheduled'
+                               ELSE 'completed' END,
+                   '2023-01-01T00:00:00Z', {START} + (i / {DOCTORS}) * 4
+              FROM n;
+        """)
+        set_suppressed(cur, False)
+        conn.commit()
+        conn.close()
+    return flask_app
+
+
+def _python_cube(lo, hi):
+    # what the endpoint would do without SQL-side aggregation
+    conn = get_db(readonly=True)
+    now = analytics.now_minutes()
+    cube = {}
+    codes = {"completed": 0, "canceled": 1}
+    for doctor_id, status, start_min in conn.execute(
+        "SELECT doctor_id, status, start_min FROM appointments "
+        "WHERE start_min >= ? AND start_min < ?;", (lo, hi)
+    ):
+        outcome = codes.get(status, 2 if start_min < now else 3)
+        how = ((start_min // 1440 + 3) % 7) * 24 + (start_min % 1440) // 60
+        key = (doctor_id * 4 + outcome) * 168 + how
+        cube[key] = cube.get(key, 0) + 1
+    conn.close()
+    return cube
+
+
+def _timed(fn):
+    t0 = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - t0) * 1000
+
+
+def test_range_aggregation(app):
+    with app.test_request_context("/api/analytics/appointments"):
+        naive, naive_ms = _timed(lambda: _python_cube(LO, HI))
+        (cold, _, computed), cold_ms = _timed(lambda: range_cube(LO, HI))
+        (warm, cached, recomputed), warm_ms = _timed(lambda: range_cube(LO, HI))
+        # one more month than is cached: only that month is scanned
+        (_, _, extra), extra_ms = _timed(lambda: range_cube(LO, parse_day("2025-02-01")))
+        report, report_ms = _timed(lambda: summarise(warm, LO, HI, {}))
+
+    print(f"\n{APPOINTMENTS:,} appointments, {DOCTORS} doctors, 24 months:")
+    print(f"  rows into Python, counted there:  {naive_ms:9.1f} ms")
+    print(f"  SQL cube, {computed} months computed:    {cold_ms:9.1f} ms")
+    print(f"  SQL cube, {cached} months cached:      {warm_ms:9.2f} ms")
+    print(f"  cached + one more month:          {extra_ms:9.2f} ms")
+    print(f"  report from the cube:             {report_ms:9.2f} ms")
+    assert naive == cold == warm
+    assert report["totals"]["appointments"] == APPOINTMENTS
+    # the warm run is served from the cache; one more month scans one month
+    assert computed == cached == 24 and recomputed == 0 and extra == 1
@@ -0,0 +1,106 @@
+"""
+Hot/cold tiering: history keeps growing, the archive job runs after each
+batch of history, and the hot tables (and the queries over them) should
+not grow with it.
+"""
+import statistics
+import time
+from datetime import datetime
+import pytest
+from backend.app import create_app
+from backend.archive import archive_old_rows, tiered_select
+from backend.db import init_db, get_db
+from backend.timeutil import parse_slot
+
+ROUNDS = 3
+OLD_PER_ROUND = 20000
+RECENT = 200
+NOW = datetime(2026, 1, 1)
+RECENT_FROM = parse_slot("2025-06-01 00:00")
+OLD_START = parse_slot("2015-01-01 08:00")
+
+
+@pytest.fixture
+def app(tmp_path):
+    flask_app = create_app(testing=True)
+    flask_app.config["DB_PATH"] = str(tmp_path / "hot.db")
+    flask_app.config["ARCHIVE_DB_PATH"] = str(tmp_path / "archive.db")
+    with flask_app.app_context():
+        init_db(seed_demo_users=True)
+        conn = get_db(readonly=False)
+        conn.execute(
+            "INSERT INTO patients (id, first_name, last_name, dob, phone, "
+            "medical_history, owner_user_id, created_at) "
+            "VALUES (1, 'Amy', 'Pond', '1990-01-01', '555', '', 5, '2015-01-01T00:00:00Z');"
+        )
+        conn.executemany(
+            "INSERT INTO appointments (patient_id, doctor_id, start_time, start_min, "
+            "reason, status, created_at) VALUES (1, 2, '', ?, '', 'scheduled', "
+            "'2025-01-01T00:00:00Z');",
+            [(RECENT_FROM + 30 * i,) for i in range(RECENT)],
+        )
+        conn.commit()
+        conn.close()
+    return flask_app
+
+
+def _add_history(app, round_no):
+    with app.app_context():
+        conn = get_db(readonly=False)
+        base = OLD_START + round_no * OLD_PER_ROUND * 30
+        conn.executemany(
+            "INSERT INTO appointments (patient_id, doctor_id, start_time, start_min, "
+            "reason, status, created_at) VALUES (1, 2, '', ?, '', 'completed', "
+            "'2015-01-01T00:00:00Z');",
+            [(base + 30 * i,) for i in range(OLD_PER_ROUND)],
+        )
+        conn.executemany(
+            "INSERT INTO notifications (user_id, message, is_read, created_at) "
+            "VALUES (1, 'old', 1, '2015-01-01T00:00:00Z');",
+            [()] * OLD_PER_ROUND,
+        )
+        conn.commit()
+        conn.close()
+
+
+def _measure(app):
+    with app.app_context():
+        conn = get_db(readonly=True)
+        hot = conn.execute("SELECT COUNT(*) FROM appointments;").fetchone()[0]
+        timings = []
+        for _ in range(50):
+            t0 = time.perf_counter()
+            rows = tiered_select(
+                conn, "appointments",
+                "SELECT a.id, a.start_min, a.status FROM {t} a "
+                "WHERE a.doctor_id = ? AND a.start_min >= ?",
+                (2, RECENT_FROM), "start_min ASC",
+                lower_bound=RECENT_FROM, archive_path=app.config["ARCHIVE_DB_PATH"],
+            ).fetchall()
+            # dashboard-style scan of the whole hot table
+            conn.execute(
+                "SELECT COUNT(*) FROM appointments WHERE status = 'scheduled';"
+            ).fetchone()
+            timings.append(time.perf_counter() - t0)
+        conn.close()
+    assert len(rows) == RECENT
+    return hot, statistics.median(timings)
+
+
+def test_hot_tables_stay_flat_as_history_grows(app):
+    results = []
+    for round_no in range(ROUNDS):
+        _add_history(app, round_no)
+        moved = archive_old_rows(app.config["DB_PATH"], app.config["ARCHIVE_DB_PATH"],
+                                 now=NOW, batch_size=2000)
+        assert moved["appointments"] == OLD_PER_ROUND
+        assert moved["notifications"] == OLD_PER_ROUND
+        results.append(_measure(app))
+
+    for i, (hot, median) in enumerate(results):
+        total = RECENT + (i + 1) * OLD_PER_ROUND
+        print(f"\nhistory={total:>6} hot appointments={hot:>4} "
+              f"recent query median={median * 1000:.3f} ms")
+
+    # the hot tier holds the recent rows only, however much history there is
+    assert {hot for hot, _ in results} == {RECENT}
@@ -0,0 +1,106 @@
+"""
+Hundreds of idle keep-alive clients (HMS_BENCH_IDLE_CLIENTS, 500 by
+default; thousands for the full run): Werkzeug's threaded server (what
+`python backend/app.py` runs) vs. the ASGI front end's event loop. Run
+with -s to see the numbers.
+
+Each idle client holds an open connection without a request in flight
+(a browser between polls). Werkzeug parks a handler thread on every one
+of them. It also answers with "Connection: close", so its clients
+reconnect for each request. The event loop holds them as coroutines and
+keeps connections alive. With all of them attached we count the
+server's threads and time an active client's GET /api/notifications.
+"""
+import http.client
+import logging
+import os
+import socket
+import statistics
+import threading
+import time
+import pytest
+from werkzeug.serving import make_server
+from backend.app import create_app
+from backend.asgi import AsgiFrontend, BackgroundServer
+from backend.db import get_db, init_db
+from tests.conftest import auth_and_get_csrf_as_role
+
+IDLE_CLIENTS = int(os.environ.get("HMS_BENCH_IDLE_CLIENTS", "500"))
+ACTIVE_ROUNDS = 200
+
+
+@pytest.fixture
+def flask_app(tmp_path):
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    app = create_app(testing=True)
+    app.config["DB_PATH"] = str(tmp_path / "asgi_bench.db")
+    with app.app_context():
+        init_db(seed_demo_users=True)
+        conn = get_db()
+        conn.executemany(
+            "INSERT INTO notifications (user_id, message, created_at) "
+            "VALUES (3, ?, '2025-01-01T00:00:00Z');",
+            [(f"note {i}",) for i in range(20)],
+        )
+        conn.commit()
+        conn.close()
+    return app
+
+
+def _get(conn, path, cookie):
+    conn.request("GET", path, headers={"Cookie": cookie})
+    r = conn.getresponse()
+    r.read()
+    return r.status
+
+
+def _under_idle_load(port, cookie):
+    baseline = threading.active_count()
+    idle = []
+    try:
+        for _ in range(IDLE_CLIENTS):
+            idle.append(socket.create_connection(("127.0.0.1", port), timeout=30))
+        time.sleep(0.5)                  # let the server accept them all
+
+        active = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        samples = []
+        for _ in range(ACTIVE_ROUNDS):
+            t0 = time.perf_counter()
+            assert _get(active, "/api/notifications", cookie) == 200
+            samples.append(time.perf_counter() - t0)
+        active.close()
+        threads = threading.active_count() - baseline
+        return threads, statistics.median(samples) * 1000
+    finally:
+        for conn in idle:
+            conn.close()
+
+
+def test_idle_keepalive_clients(flask_app):
+    client = flask_app.test_client()
+    auth_and_get_csrf_as_role(client, "reception", "staff123")
+    cookie = "session=" + client.get_cookie("session").value
+
+    server = make_server("127.0.0.1", 0, flask_app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        wsgi_threads, wsgi_ms = _under_idle_load(server.server_port, cookie)
+    finally:
+        server.shutdown()
+        thread.join(10)
+
+    frontend = AsgiFrontend(flask_app)
+    with BackgroundServer(frontend) as asgi_server:
+        asgi_threads, asgi_ms = _under_idle_load(asgi_server.port, cookie)
+    frontend.close()
+
+    print(f"\n{IDLE_CLIENTS} idle keep-alive clients:")
+    print(f"  werkzeug threaded: {wsgi_threads} extra threads, "
+          f"active GET median {wsgi_ms:.2f} ms")
+    print(f"  asgi event loop:   {asgi_threads} extra threads, "
+          f"active GET median {asgi_ms:.2f} ms")
+    # threads stay bounded by the worker pool (+ the loop's thread), and
+    # every active request was answered (_under_idle_load asserts 200s)
+    assert asgi_threads <= flask_app.config["ASGI_WORKERS"] + 2
+    assert wsgi_threads >= IDLE_CLIENTS * 0.9
@@ -0,0 +1,71 @@
+"""
+Request latency of an audited read (GET /api/patients/<id>) with the
+audit trail off, written synchronously (one extra commit per request)
+and written by the batched background writer.
+"""
+import sqlite3
+import time
+import pytest
+from backend.app import create_app
+from backend.audit import get_audit_writer
+from backend.db import init_db
+
+ROUNDS = 300
+
+
+def _measure(app):
+    client = app.test_client()
+    r = client.post("/api/auth/login", json={"username": "admin", "password": "admin123"})
+    h = {"X-CSRF-Token": r.get_json()["csrf_token"]}
+    pid = client.post("/api/patients", json={
+        "first_name": "Bench", "last_name": "Mark", "dob": "1990-01-01",
+        "phone": "555-0000",
+    }, headers=h).get_json()["patient_id"]
+
+    samples = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        client.get(f"/api/patients/{pid}")
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return samples[len(samples) // 2] * 1000, samples[int(len(samples) * 0.95)] * 1000
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    apps = []
+
+    def make(mode):
+        app = create_app(testing=True)
+        app.config["DB_PATH"] = str(tmp_path / f"audit-{mode}.db")
+        app.config["AUDIT_MODE"] = mode
+        with app.app_context():
+            init_db(seed_demo_users=True)
+        apps.append(app)
+        return app
+
+    yield make
+    for app in apps:
+        if app.config["AUDIT_MODE"] == "async":
+            get_audit_writer(app).close()
+
+
+def _audited_reads(app) -> int:
+    conn = sqlite3.connect(app.config["DB_PATH"])
+    n = conn.execute(
+        "SELECT COUNT(*) FROM audit_log WHERE action = 'read' AND entity = 'patient';"
+    ).fetchone()[0]
+    conn.close()
+    return n
+
+
+def test_audit_latency_off_sync_async(make_app):
+    apps = {mode: make_app(mode) for mode in ("off", "sync", "async")}
+    results = {mode: _measure(app) for mode, app in apps.items()}
+    for mode, (p50, p95) in results.items():
+        print(f"\naudit {mode:5s}: p50 {p50:.3f} ms, p95 {p95:.3f} ms", end="")
+    print()
+    get_audit_writer(apps["async"]).close()
+    # batching loses nothing: every read is in the trail once the writer drains
+    assert _audited_reads(apps["sync"]) == _audited_reads(apps["async"]) == ROUNDS
+    assert _audited_reads(apps["off"]) == 0
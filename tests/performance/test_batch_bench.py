@@ -0,0 +1,90 @@
+"""
+Dashboard load: the widgets' GETs one after another (what
+dashboard.html used to do) vs. one POST /api/batch. Run with -s to
+see the numbers.
+
+The in-process test client has no network, so the measured times are
+server cost only. There the batch roughly breaks even: the work is
+Python-bound, so the thread pool can't overlap much of it. Page latency
+is estimated by adding one RTT_MS per HTTP round trip, and that is where
+the batch wins.
+"""
+import statistics
+import time
+import pytest
+from backend.app import create_app
+from backend.db import get_db, init_db
+from backend.timeutil import format_slot
+from tests.conftest import auth_and_get_csrf_as_role
+
+ROUNDS = 150
+APPOINTMENTS = 300
+NOTIFICATIONS = 300
+DASHBOARD = ["/api/appointments/2", "/api/notifications"]
+RTT_MS = 20            # a clinic's Wi-Fi to the server, conservatively
+
+
+@pytest.fixture
+def app(tmp_path):
+    flask_app = create_app(testing=True)
+    flask_app.config["DB_PATH"] = str(tmp_path / "dash.db")
+    with flask_app.app_context():
+        init_db(seed_demo_users=True)
+        conn = get_db()
+        conn.execute(
+            "INSERT INTO patients (first_name, last_name, dob, phone, created_at) "
+            "VALUES ('A', 'B', '1990-01-01', '555', '2025-01-01T00:00:00Z');"
+        )
+        conn.executemany(
+            "INSERT INTO appointments (patient_id, doctor_id, start_time, start_min, "
+            "status, created_at) VALUES (1, 2, ?, ?, 'scheduled', '2025-01-01T00:00:00Z');",
+            [(format_slot(29000000 + 30 * i), 29000000 + 30 * i)
+             for i in range(APPOINTMENTS)],
+        )
+        conn.executemany(
+            "INSERT INTO notifications (user_id, message, created_at) "
+            "VALUES (2, ?, '2025-01-01T00:00:00Z');",
+            [(f"note {i}",) for i in range(NOTIFICATIONS)],
+        )
+        conn.commit()
+        conn.close()
+    return flask_app
+
+
+def _median_ms(fn):
+    fn()                                         # warm up pools/caches
+    samples = []
+    for _ in range(ROUNDS):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples) * 1000
+
+
+def test_dashboard_batch_vs_sequential(app):
+    client = app.test_client()
+    csrf = auth_and_get_csrf_as_role(client, "drsmith", "doctor123")
+
+    def sequential():
+        for path in DASHBOARD:
+            assert client.get(path).status_code == 200
+
+    def batched():
+        r = client.post("/api/batch", json={"requests": [{"path": p} for p in DASHBOARD]},
+                        headers={"X-CSRF-Token": csrf})
+        assert [s["status"] for s in r.get_json()["responses"]] == [200, 200]
+
+    seq_ms = _median_ms(sequential)
+    batch_ms = _median_ms(batched)
+    seq_page = seq_ms + len(DASHBOARD) * RTT_MS
+    batch_page = batch_ms + RTT_MS
+    print(f"\ndashboard ({len(DASHBOARD)} widgets) server time: sequential "
+          f"{seq_ms:.2f} ms, batch {batch_ms:.2f} ms")
+    print(f"page latency at {RTT_MS} ms RTT: sequential {seq_page:.1f} ms, "
+          f"batch {batch_page:.1f} ms ({seq_page / batch_page:.2f}x)")
+    # one round trip instead of one per widget, with the same answers
+    r = client.post("/api/batch", json={"requests": [{"path": p} for p in DASHBOARD]},
+                    headers={"X-CSRF-Token": csrf})
+    assert [s["body"] for s in r.get_json()["responses"]] == [
+        client.get(path).get_json() for path in DASHBOARD
+    ]
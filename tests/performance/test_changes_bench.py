@@ -0,0 +1,93 @@
+"""
+Incremental sync cost: reading the last few changes through the change
+feed stays the same whether the captured tables hold 1k or 100k rows,
+while a full re-read (what integrations did before) grows with them.
+"""
+import time
+import pytest
+from backend.app import create_app
+from backend.changes import fetch_changes
+from backend.db import init_db, get_db
+
+SIZES = (1000, 100000)
+CHANGES = 20
+
+
+@pytest.fixture
+def app(tmp_path):
+    flask_app = create_app(testing=True)
+    flask_app.config["DB_PATH"] = str(tmp_path / "cdc.db")
+    with flask_app.app_context():
+        init_db(seed_demo_users=False)
+    return flask_app
+
+
+def _grow_to(conn, n):
+    have = conn.execute("SELECT COUNT(*) FROM patients;").fetchone()[0]
+    conn.executemany(
+        "INSERT INTO patients (first_name, last_name, dob, phone, created_at) "
+        "VALUES ('A', 'B', '1990-01-01', '555', '2025-01-01T00:00:00Z');",
+        [()] * (n - have),
+    )
+    conn.commit()
+
+
+def _time(fn, repeat=20):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _vm_steps(conn, fn):
+    # SQLite bytecode steps fn costs (in units of 100): work, not time
+    steps = [0]
+
+    def count():
+        steps[0] += 1
+        return 0
+
+    conn.set_progress_handler(count, 100)
+    try:
+        fn()
+    finally:
+        conn.set_progress_handler(None, 100)
+    return steps[0]
+
+
+def test_sync_cost_tracks_changes_not_table_size(app):
+    results = []
+    with app.app_context():
+        conn = get_db(readonly=False)
+        for size in SIZES:
+            _grow_to(conn, size)
+            since = conn.execute("SELECT MAX(seq) FROM change_log;").fetchone()[0]
+            conn.execute(
+                f"UPDATE patients SET phone = '555-9' WHERE id IN "
+                f"(SELECT id FROM patients ORDER BY random() LIMIT {CHANGES});"
+            )
+            conn.commit()
+
+            def incremental():
+                changes, more = fetch_changes(conn, since, 500)
+                assert len(changes) == CHANGES and not more
+
+            def full_reread():
+                conn.execute("SELECT * FROM patients;").fetchall()
+
+            results.append((
+                size, _time(incremental), _time(full_reread, 3),
+                _vm_steps(conn, incremental), _vm_steps(conn, full_reread),
+            ))
+        conn.close()
+
+    for size, inc, full, inc_steps, full_steps in results:
+        print(f"\npatients={size:>6}: incremental sync {inc * 1000:.3f} ms "
+              f"({inc_steps * 100:,} VM steps), full re-read {full * 1000:.1f} ms "
+              f"({full_steps * 100:,} VM steps)")
+
+    (*_, inc_small, full_small), (*_, inc_big, full_big) = results
+    assert inc_big <= inc_small + 1
+    assert full_big > full_small * 20
@@ -0,0 +1,132 @@
+"""
+Duplicate detection over HMS_BENCH_PATIENTS patients (20k by default,
+1M for the full run): building the blocking keys, the registration-time
+check, and the full blockwise scan, against what all-pairs comparison
+would cost. Run with -s to see the numbers.
+
+Synthetic charts with varied surnames; 1% are re-registrations of an
+earlier chart with a typo'd surname, a shortened first name or a
+reformatted phone number (the planted duplicates the scan should find).
+"""
+import os
+import random
+import statistics
+import time
+import pytest
+from backend.app import create_app
+from backend.changes import set_suppressed
+from backend.db import get_db, init_db
+from backend.dedupe import (
+    backfill_match_keys, find_matches, scan_duplicates, similarity,
+)
+
+PATIENTS = int(os.environ.get("HMS_BENCH_PATIENTS", "20000"))
+DUPLICATE_RATE = 0.01
+PROBES = 500
+
+FIRST = ["James", "Mary", "Robert", "Patricia", "John", "Jennifer", "Michael",
+         "Linda", "David", "Elizabeth", "William", "Barbara", "Richard", "Susan",
+         "Joseph", "Jessica", "Thomas", "Sarah", "Charles", "Karen", "Amir",
+         "Priya", "Chen", "Olga", "Kwame", "Ines", "Mateo", "Aiko", "Noor", "Lars"]
+SHORT = {"Robert": "Rob", "William": "Will", "Elizabeth": "Liz", "Michael": "Mike",
+         "Jennifer": "Jen", "Thomas": "Tom", "Richard": "Rich", "Patricia": "Pat"}
+SYLLABLES = ["an", "ber", "cal", "dor", "el", "fitz", "gar", "hol", "is", "jen",
+             "kov", "lam", "mor", "nak", "ol", "per", "quin", "ros", "sun", "tor",
+             "ul", "vas", "wen", "xu", "yam", "zel"]
+
+
+@pytest.fixture(scope="module")
+def charts():
+    """(first, last, dob, phone, is_planted_duplicate); patient id = index + 1."""
+    rng = random.Random(7)
+    charts = []
+    for _ in range(PATIENTS):
+        if charts and rng.random() < DUPLICATE_RATE:
+            first, last, dob, phone = charts[rng.randrange(len(charts))][:4]
+            kind = rng.randrange(3)
+            if kind == 0 and len(last) > 4:
+                cut = rng.randrange(2, len(last))
+                last = last[:cut] + last[cut + 1:]
+            elif kind == 1:
+                first = SHORT.get(first, first)
+            else:
+                phone = f"({phone[:3]}) {phone[3:6]}-{phone[6:]}"
+            charts.append((first, last, dob, phone, True))
+            continue
+        last = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).title()
+        dob = f"{rng.randint(1930, 2020)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        phone = "".join(str(rng.randrange(10)) for _ in range(10))
+        charts.append((rng.choice(FIRST), last, dob, phone, False))
+    return charts
+
+
+@pytest.fixture(scope="module")
+def app(tmp_path_factory, charts):
+    flask_app = create_app(testing=True)
+    flask_app.config["DB_PATH"] = str(tmp_path_factory.mktemp("dedupe") / "people.db")
+    with flask_app.app_context():
+        init_db(seed_demo_users=True)
+        conn = get_db(readonly=False)
+        cur = conn.cursor()
+        cur.execute("BEGIN;")
+        set_suppressed(cur, True)
+        cur.executemany(
+            "INSERT INTO patients (id, first_name, last_name, dob, phone, created_at) "
+            "VALUES (?, ?, ?, ?, ?, '2025-01-01T00:00:00Z');",
+            [(i + 1, *c[:4]) for i, c in enumerate(charts)],
+        )
+        set_suppressed(cur, False)
+        conn.commit()
+        conn.close()
+    return flask_app
+
+
+def test_blocking_vs_pairwise(app, charts):
+    with app.app_context():
+        conn = get_db(readonly=False)
+        t0 = time.perf_counter()
+        keyed = backfill_match_keys(conn.cursor())
+        conn.commit()
+        key_s = time.perf_counter() - t0
+
+        rng = random.Random(11)
+        probes = [charts[rng.randrange(len(charts))] for _ in range(PROBES)]
+        samples = []
+        for first, last, dob, phone, _ in probes:
+            t0 = time.perf_counter()
+            found = find_matches(conn, first, last, dob, phone)
+            samples.append(time.perf_counter() - t0)
+            assert found                              # at least the chart itself
+
+        t0 = time.perf_counter()
+        stats = scan_duplicates(conn)
+        scan_s = time.perf_counter() - t0
+        pairs = set(conn.execute("SELECT patient_a, patient_b FROM duplicate_candidates;"))
+        conn.close()
+
+    # planted duplicates are re-registrations of some earlier chart; a
+    # chart may have been copied more than once, so count charts, not pairs
+    planted = [i + 1 for i, c in enumerate(charts) if c[4]]
+    in_pairs = {b for _, b in pairs}
+    recall = sum(1 for pid in planted if pid in in_pairs) / len(planted)
+
+    sample = [(charts[rng.randrange(PATIENTS)], charts[rng.randrange(PATIENTS)])
+              for _ in range(20000)]
+    t0 = time.perf_counter()
+    for a, b in sample:
+        similarity(a, b)
+    per_pair = (time.perf_counter() - t0) / len(sample)
+    all_pairs_h = per_pair * PATIENTS * (PATIENTS - 1) / 2 / 3600
+
+    print(f"\n{PATIENTS:,} patients, {len(planted):,} planted duplicates:")
+    print(f"  blocking keys:      {keyed / key_s:12,.0f} patients/s ({key_s:.1f} s)")
+    print(f"  registration check: {statistics.median(samples) * 1000:12.3f} ms median, "
+          f"{max(samples) * 1000:.2f} ms max")
+    print(f"  blockwise scan:     {PATIENTS / scan_s:12,.0f} patients/s ({scan_s:.1f} s, "
+          f"{stats['pairs']:,} pairs scored, {stats['candidates']:,} candidates)")
+    print(f"  recall of planted duplicates: {recall:.1%}")
+    print(f"  all-pairs comparison would take ~{all_pairs_h:,.0f} h")
+    assert keyed == PATIENTS
+    assert recall > 0.9
+    # blocking scores a sliver of what all-pairs comparison would
+    assert stats["pairs"] * 100 < PATIENTS * (PATIENTS - 1) // 2
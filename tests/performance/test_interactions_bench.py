@@ -0,0 +1,165 @@
+"""
+Interaction checks against a catalogue of HMS_BENCH_MEDICATIONS entries
+(10k by default, 100k for the full run) with HMS_BENCH_PRESCRIPTIONS
+prescriptions (200k / 1M) spread over two years. It measures three
+things. First, the graph build and its size. Second, the
+prescription-time check for patients whose histories range from 10 to
+100k prescriptions: it should stay flat, which is asserted in SQLite VM
+steps rather than time. Third, the interaction_audit scan over everything
+current. Run with -s to see the numbers.
+
+The synthetic catalogue is ~8k generics in a dozen products each. Each
+generic interacts with about one other.
+"""
+import os
+import random
+import sqlite3
+import statistics
+import time
+import pytest
+from backend.app import create_app
+from backend.changes import set_suppressed
+from backend.db import get_db, init_db
+from backend.interactions import (
+    SEVERITIES, audit_interactions, build_graph, check_prescription, load_interactions,
+)
+from backend.medications import load_catalogue
+
+ENTRIES = int(os.environ.get("HMS_BENCH_MEDICATIONS", "10000"))
+PRESCRIPTIONS = int(os.environ.get("HMS_BENCH_PRESCRIPTIONS", "200000"))
+HISTORIES = (10, 1000, 10000, 100000)     # one patient per history length
+PATIENTS = 50000                          # background patients
+PROBES = 300
+
+
+@pytest.fixture(scope="module")
+def app(tmp_path_factory):
+    rng = random.Random(13)
+    generics = [f"drug{g:05d}" for g in range(ENTRIES // 12 + 1)]
+    catalogue = [
+        (f"{generics[i % len(generics)].title()} {i} mg tablet",
+         generics[i % len(generics)], "tablet", f"{i} mg")
+        for i in range(ENTRIES)
+    ]
+    pairs = {tuple(sorted(rng.sample(generics, 2))) for _ in range(len(generics))}
+    pairs = [(a, b, rng.choice(SEVERITIES), f"{a} + {b}") for a, b in sorted(pairs)]
+
+    flask_app = create_app(testing=True)
+    flask_app.config["DB_PATH"] = str(tmp_path_factory.mktemp("interactions") / "rx.db")
+    with flask_app.app_context():
+        init_db(seed_demo_users=True)
+        conn = get_db(readonly=False)
+        cur = conn.cursor()
+        cur.execute("BEGIN;")
+        set_suppressed(cur, True)
+        load_catalogue(conn, catalogue)
+        load_interactions(conn, pairs)
+        top = cur.execute("SELECT MAX(id) FROM medications;").fetchone()[0]
+        patients = PATIENTS + len(HISTORIES)
+        cur.execute(f"""
+            WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {patients})
+            INSERT INTO patients (id, first_name, last_name, dob, phone, created_at)
+            SELECT i, 'P', 'Bench', '1990-01-01', '', '2023-01-01T00:00:00Z' FROM n;
+        """)
+        cur.execute(f"""
+            WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {patients})
+            INSERT INTO appointments
+                (id, patient_id, doctor_id, start_time, reason, status, created_at, start_min)
+            SELECT i, i, 2, '', '', 'completed', '2023-01-01T00:00:00Z', i FROM n;
+        """)
+        # patients 1..4 get HISTORIES; the rest share what is left
+        background = max(0, PRESCRIPTIONS - sum(HISTORIES))
+        rows = [(p + 1, n) for p, n in enumerate(HISTORIES)]
+        for patient, count in rows + [(None, background)]:
+            owner = (f"{patient}" if patient is not None
+                     else f"{len(HISTORIES) + 1} + abs(random()) % {PATIENTS}")
+            cur.execute(f"""
+                WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n
+                                        WHERE i < {count})
+                INSERT INTO prescriptions
+                    (appointment_id, doctor_id, patient_id, medication, medication_id,
+                     instructions, created_at)
+                SELECT p, 2, p, '', m, '',
+                       strftime('%Y-%m-%dT%H:%M:%SZ', 'now', '-' || (i * 7919 % 730) || ' days')
+                  FROM (SELECT {owner} AS p, 1 + abs(random()) % {top} AS m, i FROM n);
+            """)
+        set_suppressed(cur, False)
+        conn.commit()
+        conn.close()
+    return flask_app
+
+
+def _median_ms(fn, probes):
+    samples = []
+    for probe in probes:
+        t0 = time.perf_counter()
+        fn(probe)
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples) * 1000
+
+
+def _vm_steps(conn, fn):
+    # SQLite bytecode steps fn costs (in units of 100): work, not time
+    steps = [0]
+
+    def count():
+        steps[0] += 1
+        return 0
+
+    conn.set_progress_handler(count, 100)
+    try:
+        fn()
+    finally:
+        conn.set_progress_handler(None, 100)
+    return steps[0]
+
+
+def test_check_stays_flat(app):
+    with app.app_context():
+        conn = get_db(readonly=True)
+        t0 = time.perf_counter()
+        graph = build_graph(conn)
+        build_s = time.perf_counter() - t0
+        top = conn.execute("SELECT MAX(id) FROM medications;").fetchone()[0]
+
+        rng = random.Random(17)
+        probes = [rng.randint(1, top) for _ in range(PROBES)]
+        checks = {
+            count: _median_ms(lambda m: check_prescription(conn, graph, patient, m), probes)
+            for patient, count in enumerate(HISTORIES, start=1)
+        }
+        # the same check without the lookback window and history cap
+        unbounded = _median_ms(
+            lambda m: check_prescription(conn, graph, len(HISTORIES), m, 3660, 10 ** 9),
+            probes[:20],
+        )
+
+        t0 = time.perf_counter()
+        stats = audit_interactions(conn, graph)
+        audit_s = time.perf_counter() - t0
+        conn.close()
+
+        raw = sqlite3.connect(app.config["DB_PATH"])
+        steps = {
+            count: _vm_steps(raw, lambda: check_prescription(raw, graph, patient, probes[0]))
+            for patient, count in enumerate(HISTORIES, start=1)
+        }
+        unbounded_steps = _vm_steps(raw, lambda: check_prescription(
+            raw, graph, len(HISTORIES), probes[0], 3660, 10 ** 9))
+        raw.close()
+
+    print(f"\n{ENTRIES:,} medications, {len(graph.details):,} ingredient pairs, "
+          f"{PRESCRIPTIONS:,} prescriptions:")
+    print(f"  graph build:          {build_s * 1000:9.1f} ms, {len(graph):,} medication pairs, "
+          f"{(len(graph._targets) * 8 + len(graph._offsets) * 4) / 2**20:.1f} MiB")
+    for count, ms in checks.items():
+        print(f"  check, {count:>7,} in history: {ms:7.3f} ms median, "
+              f"{steps[count] * 100:,} VM steps")
+    print(f"  check, {HISTORIES[-1]:>7,}, unbounded:  {unbounded:7.3f} ms median, "
+          f"{unbounded_steps * 100:,} VM steps")
+    print(f"  audit:                {audit_s:9.1f} s, {stats['prescriptions']:,} current "
+          f"prescriptions, {stats['interactions']:,} interactions")
+    assert stats["prescriptions"] > 0
+    # the lookback window and history cap bound the work per check
+    assert steps[HISTORIES[-1]] <= 2 * steps[HISTORIES[1]] + 10
+    assert steps[HISTORIES[-1]] * 10 < unbounded_steps
@@ -0,0 +1,67 @@
+"""
+Many worker processes contending for one queue: every job must run
+exactly once (attempts == 1, no lost or doubled work). Run with -s to
+see jobs/second; with no-op jobs this measures queue overhead (claims
+are serialised by the SQLite write lock), real handlers overlap.
+"""
+import os
+import sqlite3
+import time
+import pytest
+from backend.app import create_app
+from backend.db import init_db
+from backend.jobs import enqueue
+from backend.worker import start_pool
+
+JOBS = int(os.environ.get("HMS_BENCH_JOBS", "2000"))
+WORKERS = (1, 8)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    flask_app = create_app(testing=True)
+    flask_app.config["DB_PATH"] = str(tmp_path / "jobs.db")
+    with flask_app.app_context():
+        init_db(seed_demo_users=False)
+    return flask_app.config["DB_PATH"]
+
+
+def _fill(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute("DELETE FROM jobs;")
+    for i in range(JOBS):
+        enqueue(conn, "ping", priority=i % 3)
+    conn.commit()
+    conn.close()
+
+
+def _drain(db_path, processes):
+    _fill(db_path)
+    t0 = time.perf_counter()
+    pool = start_pool([db_path], processes, once=True, poll=0.01)
+    for proc in pool:
+        proc.join(timeout=300)
+        assert proc.exitcode == 0
+    return time.perf_counter() - t0
+
+
+def test_each_job_runs_exactly_once(db_path):
+    rates = {}
+    for processes in WORKERS:
+        seconds = _drain(db_path, processes)
+        rates[processes] = JOBS / seconds
+
+        conn = sqlite3.connect(db_path)
+        statuses = dict(conn.execute(
+            "SELECT status, COUNT(*) FROM jobs GROUP BY status;"
+        ).fetchall())
+        max_attempts = conn.execute("SELECT MAX(attempts) FROM jobs;").fetchone()[0]
+        workers = conn.execute("SELECT COUNT(DISTINCT worker) FROM jobs;").fetchone()[0]
+        conn.close()
+
+        print(f"\n{processes} worker(s): {JOBS} jobs in {seconds:.2f}s "
+              f"({rates[processes]:.0f} jobs/s, {workers} workers took jobs)")
+        assert statuses == {"done": JOBS}
+        assert max_attempts == 1
+        if processes > 1:
+            assert workers > 1
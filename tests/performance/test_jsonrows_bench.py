@@ -0,0 +1,92 @@
+"""
+10k-row list response: the old `[dict(r) for r in fetchall()]` +
+jsonify path vs. json_rows (tuples, chunked encoding, streamed), with
+orjson and with the stdlib fallback. Run with -s to see the numbers.
+
+Both paths run the same SELECT on a pooled read connection inside a
+request context. The body is consumed the way a WSGI server does it:
+the legacy body as one bytes object, the streamed one chunk by chunk,
+each chunk dropped once "sent". Peak memory is tracemalloc's peak over
+one run.
+"""
+import json
+import statistics
+import time
+import tracemalloc
+import pytest
+from flask import jsonify
+from backend import jsonrows
+from backend.app import create_app
+from backend.db import get_db, init_db
+from backend.jsonrows import json_rows
+
+ROWS = 10_000
+ROUNDS = 15
+SQL = ("SELECT id, message, is_read, created_at FROM notifications "
+       "WHERE user_id = 3 ORDER BY created_at DESC;")
+
+
+@pytest.fixture
+def app(tmp_path):
+    flask_app = create_app(testing=True)
+    flask_app.config["DB_PATH"] = str(tmp_path / "rows.db")
+    with flask_app.app_context():
+        init_db(seed_demo_users=True)
+        conn = get_db()
+        conn.executemany(
+            "INSERT INTO notifications (user_id, message, created_at) VALUES (3, ?, ?);",
+            [(f"Appointment reminder #{i}: Dr Smith, room {i % 40}",
+              f"2025-01-{1 + i % 28:02d}T09:{i % 60:02d}:00Z") for i in range(ROWS)],
+        )
+        conn.commit()
+        conn.close()
+    return flask_app
+
+
+def _legacy():
+    conn = get_db(readonly=True)
+    rows = [dict(r) for r in conn.execute(SQL).fetchall()]
+    conn.close()
+    return len(jsonify({"ok": True, "notifications": rows}).get_data())
+
+
+def _streamed():
+    conn = get_db(readonly=True)
+    response = json_rows(conn.execute(SQL), "notifications", close=conn.close)
+    sent = 0
+    for chunk in response.response:
+        sent += len(chunk)
+    return sent
+
+
+def _measure(app, fn):
+    with app.test_request_context("/api/notifications"):
+        size = fn()                                  # warm-up (pool, caches)
+        samples = []
+        for _ in range(ROUNDS):
+            t0 = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - t0)
+        tracemalloc.start()
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return statistics.median(samples) * 1000, peak / 1024, size
+
+
+def test_row_serialisation_time_and_memory(app, monkeypatch):
+    legacy_ms, legacy_kib, legacy_size = _measure(app, _legacy)
+    fast_ms, fast_kib, _ = _measure(app, _streamed)
+
+    encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+    monkeypatch.setattr(jsonrows, "encode", lambda o: encoder.encode(o).encode("utf-8"))
+    std_ms, std_kib, std_size = _measure(app, _streamed)
+
+    print(f"\n{ROWS} rows (~{legacy_size // 1024} KiB of JSON):")
+    print(f"  dict rows + jsonify:      {legacy_ms:7.2f} ms, peak {legacy_kib:8.0f} KiB")
+    print(f"  json_rows, stdlib json:   {std_ms:7.2f} ms, peak {std_kib:8.0f} KiB")
+    print(f"  json_rows, {'orjson' if jsonrows.orjson else 'stdlib'} encoder:"
+          f" {fast_ms:6.2f} ms, peak {fast_kib:8.0f} KiB")
+    assert abs(std_size - legacy_size) < legacy_size * 0.05
+    # streaming keeps one chunk in memory, not the whole body
+    assert fast_kib < legacy_kib / 4 and std_kib < legacy_kib / 4
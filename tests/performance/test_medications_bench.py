@@ -0,0 +1,104 @@
+"""
+Medication autocomplete over a 10k-entry catalogue
+(HMS_BENCH_MEDICATIONS=100000 for the full-size case): building the in-memory MedicationIndex, its
+memory footprint, and suggest() latency against a
+`name LIKE 'q%'` query on the medications table. Run with -s to see the
+numbers.
+
+Synthetic products: ~8k made-up generics, each in a dozen or so
+form/strength combinations, some of them combination products.
+"""
+import os
+import random
+import sqlite3
+import statistics
+import time
+import tracemalloc
+import pytest
+from backend.medications import (
+    MedicationIndex, build_index, create_medication_tables, load_catalogue,
+)
+
+ENTRIES = int(os.environ.get("HMS_BENCH_MEDICATIONS", "10000"))
+PROBES = 2000
+
+SYLLABLES = ["am", "ox", "ci", "lin", "met", "for", "min", "ator", "va", "sta",
+             "tin", "pra", "zol", "lo", "sar", "tan", "cef", "ur", "ox", "ime",
+             "flu", "con", "az", "ole", "pre", "dni", "so", "ne", "ris", "per"]
+FORMS = ["tablet", "capsule", "oral solution", "injection", "cream", "inhaler"]
+STRENGTHS = ["1 mg", "2.5 mg", "5 mg", "10 mg", "20 mg", "50 mg", "100 mg",
+             "250 mg", "500 mg", "1 g"]
+
+
+@pytest.fixture(scope="module")
+def conn():
+    rng = random.Random(3)
+    generics = set()
+    while len(generics) < ENTRIES // 12 + 1:
+        generics.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(3, 5))))
+    generics = sorted(generics)
+    rows, names = [], set()
+    while len(rows) < ENTRIES:
+        generic = rng.choice(generics)
+        if rng.random() < 0.1:
+            generic = f"{generic}/{rng.choice(generics)}"
+        form, strength = rng.choice(FORMS), rng.choice(STRENGTHS)
+        name = f"{generic.split('/')[0].title()} {strength} {form}"
+        if "/" in generic:
+            name = f"Co-{name}"
+        if name.lower() not in names:
+            names.add(name.lower())
+            rows.append((name, generic, form, strength))
+
+    db = sqlite3.connect(":memory:")
+    create_medication_tables(db.cursor())
+    load_catalogue(db, rows)
+    db.commit()
+    yield db
+    db.close()
+
+
+def _latencies(fn, probes):
+    samples = []
+    for q in probes:
+        t0 = time.perf_counter()
+        fn(q)
+        samples.append((time.perf_counter() - t0) * 1e6)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99)]
+
+
+def test_prefix_index(conn):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    index = build_index(conn)
+    build_ms = (time.perf_counter() - t0) * 1000
+    _, peak = tracemalloc.get_traced_memory()
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    rng = random.Random(5)
+    names = [r[1] for r in index.rows]
+    probes = [rng.choice(names)[:rng.randint(2, 6)] for _ in range(PROBES)]
+
+    index_med, index_p99 = _latencies(lambda q: index.suggest(q, 10), probes)
+    sql_med, sql_p99 = _latencies(lambda q: conn.execute(
+        "SELECT id, name, generic, form, strength FROM medications "
+        "WHERE name LIKE ? AND active = 1 ORDER BY name LIMIT 10;", (q + "%",)
+    ).fetchall(), probes)
+
+    print(f"\n{len(index):,} catalogue entries:")
+    print(f"  index build:        {build_ms:9.1f} ms, {held / 2**20:.1f} MiB held "
+          f"({peak / 2**20:.1f} MiB peak)")
+    print(f"  suggest (index):    {index_med:9.1f} us median, {index_p99:.1f} us p99")
+    print(f"  LIKE 'q%' (SQLite): {sql_med:9.1f} us median, {sql_p99:.1f} us p99")
+    assert len(index) == ENTRIES
+    assert isinstance(index, MedicationIndex)
+    # name matches come first and are the ones the LIKE query finds
+    for q in probes:
+        expected = [r[0] for r in conn.execute(
+            "SELECT name FROM medications WHERE name LIKE ? AND active = 1 "
+            "ORDER BY lower(name) LIMIT 10;", (q + "%",)
+        )]
+        got = [r[1] for r in index.suggest(q, 10)]
+        assert got[:len(expected)] == expected
@@ -0,0 +1,104 @@
+"""
+Reception's day view over 200 doctors and HMS_BENCH_APPOINTMENTS
+appointments (200k by default, 2M for the full run). It compares three ways to build it: one query
+per doctor (the old page's N calls to /api/appointments/<doctor_id>),
+one range scan grouped by doctor (schedule.day_appointments), and a
+cached day. Run with -s to see the numbers.
+"""
+import os
+import statistics
+import time
+import pytest
+from backend.app import create_app
+from backend.changes import set_suppressed
+from backend.db import get_db, init_db
+from backend.schedule import day_appointments, day_schedule
+from backend.timeutil import MINUTES_PER_DAY, parse_day
+
+APPOINTMENTS = int(os.environ.get("HMS_BENCH_APPOINTMENTS", "200000"))
+DOCTORS = 200
+FIRST_DOCTOR = 6                                 # after the demo users
+START = parse_day("2024-01-01")
+DAYS = [START + d * MINUTES_PER_DAY for d in range(1, 9)]      # all booked at 200k
+
+
+@pytest.fixture(scope="module")
+def app(tmp_path_factory):
+    flask_app = create_app(testing=True)
+    flask_app.config["DB_PATH"] = str(tmp_path_factory.mktemp("schedule") / "day.db")
+    with flask_app.app_context():
+        init_db(seed_demo_users=True)
+        conn = get_db(readonly=False)
+        cur = conn.cursor()
+        cur.execute("BEGIN;")
+        set_suppressed(cur, True)
+        cur.executemany(
+            "INSERT INTO users (id, username, password_hash, role, full_name, created_at) "
+            "VALUES (?, ?, '-', 'Doctor', ?, '2023-01-01T00:00:00Z');",
+            [(FIRST_DOCTOR + d, f"doc{d}", f"Dr. {d}") for d in range(DOCTORS)],
+        )
+        cur.execute(
+            "INSERT INTO patients (id, first_name, last_name, dob, phone, created_at) "
+            "VALUES (1, 'Bench', 'Patient', '1990-01-01', '555', '2023-01-01T00:00:00Z');"
+        )
+        # each doctor's slots are 15 minutes apart, around the clock
+        cur.execute(f"""
+            WITH RECURSIVE n(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM n
+                                    WHERE i < {APPOINTMENTS - 1})
+            INSERT INTO appointments
+                (patient_id, doctor_id, start_time, reason, status, created_at, start_min)
+            SELECT 1, {FIRST_DOCTOR} + i % {DOCTORS}, '', '', 'completed',
+                   '2023-01-01T00:00:00Z', {START} + (i / {DOCTORS}) * 15
+              FROM n;
+        """)
+        set_suppressed(cur, False)
+        conn.commit()
+        conn.close()
+    return flask_app
+
+
+def _per_doctor(conn, day):
+    # the SELECT /api/appointments/<doctor_id>?from=&to= runs, once per doctor
+    by_doctor = {}
+    for (doctor_id,) in conn.execute("SELECT id FROM users WHERE role = 'Doctor';").fetchall():
+        by_doctor[doctor_id] = [dict(row) for row in conn.execute(
+            """
+            SELECT a.id, a.patient_id, a.doctor_id, a.start_time, a.reason, a.status,
+                   p.first_name || ' ' || p.last_name, u.full_name
+              FROM appointments a
+              JOIN patients p ON p.id = a.patient_id
+              JOIN users u    ON u.id = a.doctor_id
+             WHERE a.doctor_id = ? AND a.start_min >= ? AND a.start_min < ?
+             ORDER BY a.start_time;
+            """,
+            (doctor_id, day, day + MINUTES_PER_DAY)
+        )]
+    return by_doctor
+
+
+def _median_ms(fn):
+    samples = []
+    for day in DAYS:
+        t0 = time.perf_counter()
+        fn(day)
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples) * 1000
+
+
+def test_day_view(app):
+    with app.test_request_context("/api/schedule"):
+        conn = get_db(readonly=True)
+        per_doctor = _median_ms(lambda day: _per_doctor(conn, day))
+        one_scan = _median_ms(lambda day: day_appointments(conn, day))
+        per_day = sum(len(v) for v in day_appointments(conn, DAYS[0]).values())
+        assert 0 < per_day == sum(len(v) for v in _per_doctor(conn, DAYS[0]).values())
+        conn.close()
+        cold = _median_ms(day_schedule)
+        warm = _median_ms(day_schedule)
+        assert all(day_schedule(day)[1] for day in DAYS)
+
+    print(f"\n{APPOINTMENTS:,} appointments, {DOCTORS} doctors, {per_day:,} per day:")
+    print(f"  one query per doctor:   {per_doctor:8.2f} ms")
+    print(f"  one range scan:         {one_scan:8.2f} ms")
+    print(f"  day_schedule, uncached: {cold:8.2f} ms")
+    print(f"  day_schedule, cached:   {warm:8.2f} ms")
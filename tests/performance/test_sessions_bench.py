@@ -0,0 +1,57 @@
+"""
+Per-request session overhead: Flask's signed-cookie session vs. the
+server-side store (opaque ID, LRU over SQLite). Run with -s to see the
+numbers.
+
+The request is GET /api/auth/me, which reads the session and touches no
+other database, so what differs between the two runs is the session
+handling: decode + verify + re-sign + Set-Cookie for the cookie
+session, and a cache lookup (no write) for the server-side one.
+"""
+import statistics
+import time
+import pytest
+from flask.sessions import SecureCookieSessionInterface
+from backend.app import create_app
+from backend.db import init_db
+from tests.conftest import auth_and_get_csrf_as_role
+
+ROUNDS = 2000
+
+
+@pytest.fixture
+def apps(tmp_path):
+    built = {}
+    for backend in ("cookie", "server"):
+        flask_app = create_app(testing=True)
+        flask_app.config["DB_PATH"] = str(tmp_path / f"{backend}.db")
+        if backend == "cookie":
+            flask_app.session_interface = SecureCookieSessionInterface()
+        with flask_app.app_context():
+            init_db(seed_demo_users=True)
+        built[backend] = flask_app
+    return built
+
+
+def _measure(flask_app):
+    client = flask_app.test_client()
+    auth_and_get_csrf_as_role(client, "reception", "staff123")
+    r = client.get("/api/auth/me")
+    assert r.status_code == 200
+    set_cookie = len(r.headers.get("Set-Cookie", ""))
+    samples = []
+    for _ in range(ROUNDS):
+        t0 = time.perf_counter()
+        client.get("/api/auth/me")
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples) * 1e6, set_cookie
+
+
+def test_server_sessions_vs_cookie_sessions(apps):
+    cookie_us, cookie_header = _measure(apps["cookie"])
+    server_us, server_header = _measure(apps["server"])
+    print(f"\nGET /api/auth/me: cookie session {cookie_us:.1f} us "
+          f"(Set-Cookie {cookie_header} bytes every response), "
+          f"server session {server_us:.1f} us (Set-Cookie {server_header} bytes)")
+    # the server-side session is not re-signed and re-sent on every response
+    assert server_header == 0 < cookie_header
@@ -0,0 +1,78 @@
+"""
+Hundreds of tenants through one process: open file descriptors and RSS
+must stay bounded by TENANT_MAX_OPEN, not grow with the tenant count.
+Run with -s to see the numbers (an unbounded registry is shown for
+comparison).
+"""
+import os
+import pytest
+from backend.app import create_app
+from backend.db import get_db
+from backend.tenancy import init_tenancy
+
+TENANTS = int(os.environ.get("HMS_BENCH_TENANTS", "200"))
+MAX_OPEN = 16
+ROUNDS = 2
+
+
+def _fds() -> int:
+    return len(os.listdir("/proc/self/fd"))
+
+
+def _rss_kb() -> int:
+    with open("/proc/self/statm") as f:
+        pages = int(f.read().split()[1])
+    return pages * os.sysconf("SC_PAGE_SIZE") // 1024
+
+
+def _app(tmp_path, max_open):
+    flask_app = create_app(testing=True)
+    names = [f"clinic-{i:03d}" for i in range(TENANTS)]
+    flask_app.config.update(
+        TENANT_DB_DIR=str(tmp_path / "tenants"),
+        TENANTS=",".join(names),
+        TENANT_MAX_OPEN=max_open,
+    )
+    init_tenancy(flask_app)
+    return flask_app, names
+
+
+def _touch_all(app, names, rounds=ROUNDS):
+    for _ in range(rounds):
+        for name in names:
+            with app.test_request_context(
+                "/api/notifications", headers={"X-Tenant-ID": name}
+            ):
+                conn = get_db()
+                conn.execute("SELECT COUNT(*) FROM notifications;").fetchone()
+                conn.close()
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="needs /proc")
+def test_fds_and_memory_stay_bounded(tmp_path):
+    # create the tenant files up front so both runs measure steady state
+    app, names = _app(tmp_path, 1)
+    _touch_all(app, names, rounds=1)
+    app.extensions["hms_tenants"].close_all()
+
+    results = {}
+    for max_open in (MAX_OPEN, TENANTS * 2):
+        app, names = _app(tmp_path, max_open)
+        fds_before, rss_before = _fds(), _rss_kb()
+        _touch_all(app, names)
+        registry = app.extensions["hms_tenants"]
+        results[max_open] = (
+            registry.open_count(), _fds() - fds_before, _rss_kb() - rss_before,
+        )
+        registry.close_all()
+
+    for max_open, (open_count, fds, rss) in results.items():
+        print(f"\nmax_open={max_open:>4}: {TENANTS} tenants, open={open_count:>3}, "
+              f"+{fds} fds, +{rss} KiB RSS")
+
+    bounded_open, bounded_fds, _ = results[MAX_OPEN]
+    _, unbounded_fds, _ = results[TENANTS * 2]
+    assert bounded_open == MAX_OPEN
+    # one idle reader per open tenant: db + wal + shm at most
+    assert bounded_fds <= MAX_OPEN * 3 + 8
+    assert unbounded_fds > bounded_fds * 4
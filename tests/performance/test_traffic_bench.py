@@ -0,0 +1,68 @@
+"""
+What capture costs a request. The same mix of reads and writes runs
+(HMS_BENCH_REQUESTS rounds) on an app with TRAFFIC_CAPTURE_PATH set and
+on one without. A short replay of the capture against a seeded local
+instance follows. Run with -s to see the numbers.
+"""
+import os
+import statistics
+import time
+from backend import traffic
+from backend.app import create_app
+from backend.config import TestingConfig
+from backend.db import init_db
+from tests.conftest import auth_and_get_csrf_as_role, seed_demo_patients
+
+ROUNDS = int(os.environ.get("HMS_BENCH_REQUESTS", "300"))
+
+
+def _app(tmp_path, monkeypatch, capture):
+    monkeypatch.setattr(TestingConfig, "TRAFFIC_CAPTURE_PATH", capture)
+    flask_app = create_app(testing=True)
+    monkeypatch.setattr(TestingConfig, "TRAFFIC_CAPTURE_PATH", "")
+    flask_app.config["DB_PATH"] = str(tmp_path / f"traffic-{bool(capture)}.db")
+    with flask_app.app_context():
+        init_db(seed_demo_users=True)
+        seed_demo_patients()
+    return flask_app
+
+
+def _round_trips(flask_app):
+    client = flask_app.test_client()
+    headers = {"X-CSRF-Token": auth_and_get_csrf_as_role(client, "reception", "staff123")}
+    samples = []
+    for i in range(ROUNDS):
+        t0 = time.perf_counter()
+        client.get("/api/patients/1")
+        client.get("/api/schedule", query_string={"date": "2031-03-04"})
+        client.post("/api/appointments", headers=headers, json={
+            "patient_id": 1, "doctor_id": 2, "reason": "Check-up",
+            "start_time": f"2031-{3 + i // 500:02d}-{1 + i % 500 // 18:02d} "
+                          f"{8 + i % 18 // 2:02d}:{i % 2 * 30:02d}",
+        })
+        samples.append((time.perf_counter() - t0) / 3)
+    return statistics.median(samples) * 1e6
+
+
+def test_capture_overhead(tmp_path, monkeypatch):
+    capture = tmp_path / "capture.jsonl"
+    plain = _round_trips(_app(tmp_path, monkeypatch, ""))
+    captured_app = _app(tmp_path, monkeypatch, str(capture))
+    captured = _round_trips(captured_app)
+    writer = captured_app.extensions["hms_traffic"]
+    writer.close()
+    entries = traffic.read_capture(capture)
+    assert len(entries) == writer.written == ROUNDS * 3 + 1 and writer.dropped == 0
+
+    instance = traffic.LocalInstance(patients=2000, db_dir=str(tmp_path))
+    try:
+        report = traffic.replay(entries, instance.base_url, instance.pools,
+                                speed=0, concurrency=8)
+    finally:
+        instance.close()
+
+    print(f"\n{ROUNDS} rounds of 3 requests, median per request:")
+    print(f"  capture off: {plain:8.1f} µs")
+    print(f"  capture on:  {captured:8.1f} µs ({captured - plain:+.1f} µs)")
+    print(traffic.format_report(report))
+    assert all(r["errors"] == 0 for r in report["routes"].values())
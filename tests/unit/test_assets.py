@@ -0,0 +1,59 @@
+import gzip
+from backend.assets import AssetManifest, build
+
+
+def _make_sources(tmp_path):
+    templates = tmp_path / "templates"
+    static = tmp_path / "static"
+    (static / "js").mkdir(parents=True)
+    (static / "css").mkdir(parents=True)
+    templates.mkdir()
+    (static / "js" / "api.js").write_text("function apiGet() {}\n" * 40)
+    (static / "css" / "style.css").write_text("body { margin: 0; }\n" * 40)
+    (templates / "index.html").write_text(
+        '<link rel="stylesheet" href="static/css/style.css">\n'
+        '<script src="static/js/api.js"></script>\n'
+        '<script src="static/js/missing.js"></script>\n'
+    )
+    return templates, static
+
+
+def test_compile_fingerprints_and_rewrites_html(tmp_path):
+    templates, static = _make_sources(tmp_path)
+    manifest = AssetManifest.compile(templates, static)
+
+    hashed = manifest.fingerprints["js/api.js"]
+    assert hashed.startswith("js/api.") and hashed.endswith(".js")
+    assert hashed != "js/api.js"
+    assert manifest.asset(hashed).immutable is True
+    assert manifest.asset("js/api.js").immutable is False
+
+    html = manifest.page("index.html").body.decode()
+    assert f'src="static/{hashed}"' in html
+    assert 'href="static/' + manifest.fingerprints["css/style.css"] in html
+    # unknown references are left alone
+    assert 'src="static/js/missing.js"' in html
+
+
+def test_precompressed_variants_roundtrip(tmp_path):
+    templates, static = _make_sources(tmp_path)
+    manifest = AssetManifest.compile(templates, static)
+    asset = manifest.asset("js/api.js")
+    assert asset.gzip is not None
+    assert gzip.decompress(asset.gzip) == asset.body
+
+
+def test_build_then_load_matches_compile(tmp_path):
+    templates, static = _make_sources(tmp_path)
+    out = tmp_path / "dist"
+    built = build(out, templates, static)
+
+    hashed = built.fingerprints["js/api.js"]
+    assert (out / "static" / hashed).exists()
+    assert (out / "static" / (hashed + ".gz")).exists()
+
+    loaded = AssetManifest.load(out)
+    assert loaded.fingerprints == built.fingerprints
+    assert loaded.page("index.html").body == built.page("index.html").body
+    assert loaded.asset(hashed).etag == built.asset(hashed).etag
+    assert loaded.asset("js/api.js").immutable is False
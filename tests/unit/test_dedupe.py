@@ -0,0 +1,71 @@
+import sqlite3
+
+import pytest
+from backend.dedupe import (
+    add_match_keys, backfill_match_keys, blocking_keys, create_dedupe_tables,
+    find_matches, normalise_phone, scan_duplicates, similarity, soundex,
+)
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.execute(
+        "CREATE TABLE patients (id INTEGER PRIMARY KEY, first_name TEXT, "
+        "last_name TEXT, dob TEXT, phone TEXT);"
+    )
+    create_dedupe_tables(conn.cursor())
+    return conn
+
+
+def _add(conn, pid, first, last, dob, phone, keyed=True):
+    conn.execute("INSERT INTO patients VALUES (?, ?, ?, ?, ?);", (pid, first, last, dob, phone))
+    if keyed:
+        add_match_keys(conn.cursor(), pid, last, dob, phone)
+
+
+def test_keys():
+    assert [soundex(n) for n in ("Robert", "Rupert", "Ashcraft", "Tymczak", "Lee", "")] == [
+        "R163", "R163", "A261", "T522", "L000", ""]
+    assert normalise_phone("+1 (555) 010-0199") == normalise_phone("555 010 0199") == "5550100199"
+    assert normalise_phone("12-34") is None
+    assert blocking_keys("Smyth", "1990-01-01", "555-0100") == ["p:5550100", "n:S530:1990-01-01"]
+
+
+def test_similarity():
+    same = ("Jon", "Smith", "1990-01-02", "555-0100")
+    assert similarity(same, same) == 1.0
+    assert similarity(same, ("John", "Smyth", "1990-02-01", "5550100")) >= 0.8   # typo, swapped DOB
+    assert similarity(same, ("Mary", "Smith", "1962-07-30", "5550100")) < 0.6    # relative
+
+
+def test_find_matches_only_probes_blocks(conn):
+    _add(conn, 1, "Amy", "Pond", "1989-04-01", "555-1000")
+    _add(conn, 2, "Amelia", "Pond", "1989-04-01", "555-2000")
+    _add(conn, 3, "Amy", "Pond", "1989-04-01", "555-3000", keyed=False)   # not indexed
+    found = find_matches(conn, "Amy", "Pund", "1989-04-01", "555-1000")
+    assert [m["patient_id"] for m in found] == [1]
+    found = find_matches(conn, "Amy", "Pund", "1989-04-01", "555-1000", min_score=0.5)
+    assert [m["patient_id"] for m in found] == [1, 2]
+
+
+def test_scan_is_blockwise_and_repeatable(conn):
+    _add(conn, 1, "Rory", "Williams", "1985-03-10", "555-4000")
+    _add(conn, 2, "Rory", "Wiliams", "1985-03-10", "555-4000")        # both keys shared
+    _add(conn, 3, "River", "Song", "1985-03-10", "555-4000")
+    _add(conn, 4, "Rory", "Williams", "1985-03-10", "555-9999", keyed=False)
+    assert backfill_match_keys(conn.cursor()) == 1
+    stats = scan_duplicates(conn, page_blocks=1)
+    # pairs: (1,2) once despite two shared keys, (1,3), (2,3), and #4 with 1 and 2
+    assert stats["pairs"] == 5 and stats["blocks"] == 2
+    rows = conn.execute(
+        "SELECT patient_a, patient_b FROM duplicate_candidates ORDER BY 1, 2;").fetchall()
+    assert rows == [(1, 2), (1, 4), (2, 4)]
+
+    conn.execute("UPDATE duplicate_candidates SET status = 'dismissed' WHERE patient_b = 4;")
+    scan_duplicates(conn)
+    assert conn.execute(
+        "SELECT COUNT(*) FROM duplicate_candidates WHERE status = 'dismissed';"
+    ).fetchone()[0] == 2
+    # the phone block {1,2,3} and the name block {1,2,4}
+    assert scan_duplicates(conn, max_block=2)["oversized"] == 2
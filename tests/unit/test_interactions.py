@@ -0,0 +1,96 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+from backend.interactions import (
+    DEFAULT_CSV, InteractionGraph, audit_interactions, check_prescription, read_csv,
+)
+from backend.timeutil import ISO_FORMAT
+
+MEDICATIONS = [
+    (1, "warfarin"),
+    (2, "aspirin"),
+    (3, "amoxicillin"),
+    (4, "amoxicillin/clavulanic acid"),
+    (6, "clarithromycin"),
+    (7, "aspirin/warfarin"),                 # both halves of one pair
+]
+PAIRS = [
+    ("aspirin", "warfarin", "major", "Bleeding"),
+    ("amoxicillin", "warfarin", "minor", "INR"),
+    ("clarithromycin", "warfarin", "major", "INR up"),
+    ("unknown", "warfarin", "major", "never built"),
+]
+
+
+def test_graph_adjacency():
+    graph = InteractionGraph(MEDICATIONS, PAIRS)
+    hits = lambda mid, others: sorted(o for o, _ in graph.interactions_with(mid, set(others)))
+    assert hits(1, [2, 3, 4, 6, 7]) == [2, 3, 4, 6, 7]
+    assert hits(4, [1, 2, 3]) == [1]                 # combination product
+    assert hits(2, [1, 3, 7]) == [1, 7]
+    assert hits(7, [7]) == []                        # no self-interaction
+    assert hits(5, [1]) == [] and hits(99, [1]) == []
+    assert len(graph.details) == 3                   # unused pair dropped
+    assert {graph.details[d][2] for _, d in graph.interactions_with(3, {1})} == {"minor"}
+
+
+def test_csv_is_normalised_and_validated(tmp_path):
+    rows = read_csv(DEFAULT_CSV)
+    assert all(a < b for a, b, _, _ in rows)
+    bad = tmp_path / "bad.csv"
+    bad.write_text("ingredient_a,ingredient_b,severity,description\nx,x,major,\n")
+    with pytest.raises(ValueError, match="two different"):
+        read_csv(bad)
+    bad.write_text("ingredient_a,ingredient_b,severity,description\nx,y,severe,\n")
+    with pytest.raises(ValueError, match="severity"):
+        read_csv(bad)
+    bad.write_text("ingredient_a,ingredient_b,severity,description\nx,y,minor,\nY,X,major,\n")
+    with pytest.raises(ValueError, match="duplicate pair"):
+        read_csv(bad)
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.execute(
+        "CREATE TABLE prescriptions (id INTEGER PRIMARY KEY, patient_id INTEGER, "
+        "medication TEXT, medication_id INTEGER, created_at TEXT);"
+    )
+    ago = lambda days: (datetime.utcnow() - timedelta(days=days)).strftime(ISO_FORMAT)
+    conn.executemany(
+        "INSERT INTO prescriptions VALUES (?, ?, ?, ?, ?);",
+        [
+            (1, 1, "Aspirin", 2, ago(10)),
+            (2, 1, "Clarithromycin", 6, ago(200)),       # no longer current
+            (3, 1, "Amoxicillin", 3, ago(5)),
+            (4, 1, "Herbal tea", None, ago(1)),
+            (5, 2, "Aspirin", 2, ago(3)),
+            (6, 1, "Warfarin", 1, ago(2)),
+            (7, 1, "Aspirin", 2, ago(1)),                 # repeat
+        ],
+    )
+    return conn
+
+
+def test_check_prescription(conn):
+    graph = InteractionGraph(MEDICATIONS, PAIRS)
+    warnings = check_prescription(conn, graph, 1, 1)
+    assert [(w["prescription_id"], w["severity"]) for w in warnings] == [
+        (7, "major"), (3, "minor")]                     # latest aspirin only
+    assert warnings[0]["ingredients"] == ["aspirin", "warfarin"]
+    assert [w["prescription_id"] for w in check_prescription(conn, graph, 1, 1, 365)] == [
+        2, 7, 3]
+    assert [w["prescription_id"] for w in check_prescription(
+        conn, graph, 1, 1, max_history=1)] == [7]
+    assert check_prescription(conn, graph, 2, 3) == []
+
+
+def test_audit_counts_each_pair_once(conn):
+    graph = InteractionGraph(MEDICATIONS, PAIRS)
+    stats = audit_interactions(conn, graph)
+    assert stats["patients"] == 2 and stats["prescriptions"] == 5
+    assert stats["by_severity"] == {"minor": 1, "moderate": 0, "major": 1,
+                                    "contraindicated": 0}
+    assert [(f["prescription_a"], f["prescription_b"]) for f in stats["findings"]] == [
+        (1, 6), (3, 6)]
@@ -0,0 +1,58 @@
+import json
+import sqlite3
+
+import pytest
+from flask import Flask
+from backend import jsonrows
+from backend.jsonrows import json_rows
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row          # as get_db() hands them out
+    conn.execute("CREATE TABLE t (id INTEGER, name TEXT, amount REAL, note TEXT);")
+    conn.executemany(
+        "INSERT INTO t VALUES (?, ?, ?, ?);",
+        [(i, f"né\"{i}", i / 4, None if i % 2 else "x,y") for i in range(1, 1201)],
+    )
+    return conn
+
+
+def _expected(conn, limit):
+    return [dict(r) for r in conn.execute(f"SELECT * FROM t ORDER BY id LIMIT {limit};")]
+
+
+def test_small_result_is_one_body(conn):
+    closed = []
+    with Flask(__name__).app_context():
+        r = json_rows(conn.execute("SELECT * FROM t ORDER BY id LIMIT 3;"), "rows",
+                      close=lambda: closed.append(1))
+    assert not r.is_streamed and closed == [1]
+    assert r.content_length == len(r.get_data())
+    assert json.loads(r.get_data()) == {"ok": True, "rows": _expected(conn, 3)}
+    # column order is kept
+    assert r.get_data().startswith(b'{"ok":true,"rows":[{"id":1,"name":')
+
+
+def test_empty_and_large_results(conn):
+    with Flask(__name__).app_context():
+        empty = json_rows(conn.execute("SELECT * FROM t WHERE id < 0;"), "rows")
+        assert json.loads(empty.get_data()) == {"ok": True, "rows": []}
+
+        closed = []
+        r = json_rows(conn.execute("SELECT * FROM t ORDER BY id;"), "rows",
+                      close=lambda: closed.append(1), chunk_rows=100)
+        assert r.is_streamed and closed == []
+        chunks = list(r.response)
+        assert len(chunks) == 12 + 1 and closed == [1]
+    assert json.loads(b"".join(chunks)) == {"ok": True, "rows": _expected(conn, 1200)}
+
+
+def test_stdlib_fallback_matches(conn, monkeypatch):
+    with Flask(__name__).app_context():
+        fast = json_rows(conn.execute("SELECT * FROM t ORDER BY id;"), "rows").get_data()
+        encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+        monkeypatch.setattr(jsonrows, "encode", lambda o: encoder.encode(o).encode("utf-8"))
+        slow = json_rows(conn.execute("SELECT * FROM t ORDER BY id;"), "rows").get_data()
+    assert json.loads(fast) == json.loads(slow)
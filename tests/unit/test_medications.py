@@ -0,0 +1,62 @@
+import sqlite3
+
+import pytest
+from backend.medications import (
+    DEFAULT_CSV, MedicationIndex, create_medication_tables, load_catalogue, read_csv,
+    resolve,
+)
+
+ROWS = [
+    (1, "Amoxicillin 500 mg capsule", "amoxicillin", "capsule", "500 mg"),
+    (2, "Amoxicillin/clavulanic acid 625 mg tablet", "amoxicillin/clavulanic acid",
+     "tablet", "625 mg"),
+    (3, "Co-codamol 30/500 tablet", "codeine phosphate/paracetamol", "tablet", "30/500"),
+    (4, "Codeine phosphate 30 mg tablet", "codeine phosphate", "tablet", "30 mg"),
+]
+
+
+def test_prefix_index():
+    index = MedicationIndex(ROWS)
+    names = lambda q, limit=10: [r[0] for r in index.suggest(q, limit)]
+    assert names("amox") == [1, 2]
+    assert names("AMOXICILLIN/") == [2]
+    assert names("clav") == [2]                       # generic-name word
+    assert names("cod") == [4, 3]                     # names first, then words
+    assert names("co") == [3, 4]                      # no repeats
+    assert names("para") == [3]
+    assert names("cod", limit=1) == [4]
+    assert names("  ") == [] and names("zzz") == []
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    create_medication_tables(conn.cursor())
+    return conn
+
+
+def test_load_adds_updates_and_retires(conn):
+    rows = read_csv(DEFAULT_CSV)
+    first = load_catalogue(conn, rows)
+    assert first == {"added": len(rows), "updated": 0, "retired": 0, "version": 1}
+    warfarin = resolve(conn, "warfarin  5 MG tablet")
+    assert warfarin is not None
+
+    changed = [r for r in rows if not r[0].startswith("Warfarin")]
+    changed[0] = (changed[0][0], changed[0][1], changed[0][2], "750 mg")
+    assert load_catalogue(conn, changed) == {
+        "added": 0, "updated": 1, "retired": 3, "version": 2}
+    assert resolve(conn, "Warfarin 5 mg tablet") is None
+    # reloading the original file brings retired names back under the same id
+    assert load_catalogue(conn, rows)["updated"] == 4
+    assert resolve(conn, "Warfarin 5 mg tablet") == warfarin
+
+
+def test_csv_errors(tmp_path):
+    bad = tmp_path / "bad.csv"
+    bad.write_text("name,generic,form\nX,x,tablet\n")
+    with pytest.raises(ValueError, match="missing column"):
+        read_csv(bad)
+    bad.write_text("name,generic,form,strength\nX,x,tablet,1 mg\nx,x,tablet,2 mg\n")
+    with pytest.raises(ValueError, match="duplicate name"):
+        read_csv(bad)
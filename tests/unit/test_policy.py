@@ -0,0 +1,69 @@
+import pytest
+from flask import Flask, session
+from backend import policy
+from backend.policy import PERMISSIONS, ROLE_BITS, Permission, bind
+
+# who holds what, written out by hand (the compiled masks must agree)
+EXPECTED = {
+    "patient.create":       {"Admin", "Staff"},
+    "patient.read":         {"Admin", "Staff", "Doctor", "Pharmacy", "Patient"},
+    "patient.history":      {"Admin", "Staff", "Doctor", "Patient"},
+    "patient.dedupe":       {"Admin", "Staff"},
+    "appointment.create":   {"Admin", "Staff", "Patient"},
+    "appointment.read":     {"Admin", "Staff", "Doctor", "Patient"},
+    "appointment.schedule": {"Admin", "Staff", "Doctor"},
+    "appointment.complete": {"Admin", "Staff", "Doctor"},
+    "appointment.cancel":   {"Admin", "Staff", "Doctor", "Patient"},
+    "medication.read":      {"Admin", "Staff", "Doctor", "Pharmacy"},
+    "prescription.create":  {"Doctor"},
+    "prescription.read":    {"Admin", "Staff", "Doctor", "Pharmacy", "Patient"},
+    "billing.create":       {"Admin", "Pharmacy"},
+    "billing.read":         {"Admin", "Staff", "Pharmacy", "Patient"},
+    "notification.read":    {"Admin", "Staff", "Doctor", "Pharmacy", "Patient"},
+    "job.submit":           {"Admin", "Staff", "Pharmacy"},
+    "job.read":             {"Admin", "Staff", "Pharmacy"},
+    "analytics.read":       {"Admin", "Staff", "Doctor"},
+    "changes.read":         {"Admin"},
+    "changes.ack":          {"Admin"},
+    "backup.manage":        {"Admin"},
+    "session.revoke":       {"Admin"},
+    "user.manage":          {"Admin"},
+    "session.end":          {"Admin", "Staff", "Doctor", "Pharmacy", "Patient"},
+    "batch":                {"Admin", "Staff", "Doctor", "Pharmacy", "Patient"},
+    "policy.read":          {"Admin", "Staff", "Doctor", "Pharmacy", "Patient"},
+}
+
+
+def test_compiled_masks_match_the_matrix():
+    assert set(PERMISSIONS) == set(EXPECTED)
+    for name, roles in EXPECTED.items():
+        for role, bit in ROLE_BITS.items():
+            assert bool(PERMISSIONS[name].mask & bit) == (role in roles), (name, role)
+
+
+def test_policy_typos_fail_at_compile_time():
+    with pytest.raises(ValueError):
+        Permission("x", {"Nurse": policy.ANY})
+    with pytest.raises(ValueError):
+        Permission("x", {"Admin": "everything"})
+    with pytest.raises(ValueError):
+        bind("billing.read", doctor="doctor_id")      # Patient scope needs patient=
+    with pytest.raises(KeyError):
+        policy.requires("billing.raed")
+
+
+def test_predicates_per_role():
+    app = Flask(__name__)
+    app.secret_key = "test"
+    scope = bind("appointment.cancel", patient="a.patient_id", doctor="a.doctor_id")
+    cases = {
+        "Admin": ("1", ()),
+        "Doctor": ("a.doctor_id = ?", (7,)),
+        "Patient": ("a.patient_id IN (SELECT id FROM patients WHERE owner_user_id = ?)", (7,)),
+        "Pharmacy": ("0", ()),
+    }
+    for role, expected in cases.items():
+        with app.test_request_context():
+            session["role"], session["user_id"] = role, 7
+            assert scope.predicate() == expected
+            assert scope.unrestricted() == (role == "Admin")
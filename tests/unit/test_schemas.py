@@ -0,0 +1,72 @@
+from backend.schemas import (
+    Schema,
+    text,
+    integer,
+    PATIENT_CREATE,
+    APPOINTMENT_CREATE,
+    BILL_CREATE,
+)
+from backend.validators import sanitize_text
+
+
+def _patient(**overrides):
+    body = {
+        "first_name": "Alice",
+        "last_name": "Doe",
+        "dob": "1990-01-01",
+        "phone": "555-0000",
+        "medical_history": "N/A",
+    }
+    body.update(overrides)
+    return body
+
+
+def test_patient_schema_accepts_valid_body():
+    clean, errors = PATIENT_CREATE.validate(_patient(owner_user_id="5"))
+    assert errors is None
+    assert clean["first_name"] == "Alice"
+    assert clean["owner_user_id"] == 5
+
+
+def test_patient_schema_reports_every_bad_field():
+    clean, errors = PATIENT_CREATE.validate(
+        _patient(first_name="1234", phone="bad!!", dob="")
+    )
+    assert clean is None
+    assert set(errors) == {"first_name", "phone", "dob"}
+
+
+def test_text_fields_match_sanitize_text():
+    raw = "  <b>Follow up</b> in two weeks " + "x" * 300
+    clean, errors = APPOINTMENT_CREATE.validate({
+        "patient_id": 1, "doctor_id": 2,
+        "start_time": "2025-10-24 13:30", "reason": raw,
+    })
+    assert errors is None
+    assert clean["reason"] == sanitize_text(raw, max_len=200)
+
+
+def test_non_string_text_is_rejected_not_crashing():
+    clean, errors = PATIENT_CREATE.validate(_patient(first_name=42))
+    assert errors == {"first_name": "must be a string"}
+
+
+def test_body_must_be_object():
+    assert BILL_CREATE.validate(["nope"]) == (None, {"_body": "expected a JSON object"})
+
+
+def test_amount_rules():
+    assert BILL_CREATE.validate({"patient_id": 1, "amount": "25.50"})[0]["amount"] == 25.5
+    for bad in ("-1", "abc", None, "nan", "inf"):
+        assert "amount" in BILL_CREATE.validate({"patient_id": 1, "amount": bad})[1]
+
+
+def test_validate_many_collects_errors_by_index():
+    schema = Schema(integer("id"), text("note", max_len=10))
+    cleaned, failures = schema.validate_many([{"id": 1}, {"id": -1}, {"id": "2"}])
+    assert cleaned is None
+    assert failures == {1: {"id": "must be a non-negative integer"}}
+
+    cleaned, failures = schema.validate_many([{"id": 1}, {"id": "2", "note": "hi"}])
+    assert failures is None
+    assert cleaned == [{"id": 1, "note": ""}, {"id": 2, "note": "hi"}]
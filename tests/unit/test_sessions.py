@@ -0,0 +1,64 @@
+import time
+import pytest
+from backend.sessions import CachedSessionStore, SessionStore, SQLiteSessionStore
+
+
+def _data(user_id, tenant=None):
+    return {"user_id": user_id, "role": "Staff", "tenant": tenant, "csrf_token": "x"}
+
+
+def test_sweep_deletes_expired_rows_in_batches():
+    store = SQLiteSessionStore(":memory:", sweep_batch=40)
+    now = time.time()
+    for i in range(100):
+        store.save(f"old-{i}", _data(i), now - 1)
+    store.save("live", _data(1), now + 60)
+
+    assert [store.sweep(now) for _ in range(4)] == [40, 40, 20, 0]
+    assert store.count() == 1
+    assert store.load("live")[0]["user_id"] == 1
+
+
+def test_revoke_is_per_user_and_tenant():
+    store = SQLiteSessionStore(":memory:")
+    later = time.time() + 60
+    store.save("a1", _data(5, "north"), later)
+    store.save("a2", _data(5, "north"), later)
+    store.save("b1", _data(5, "south"), later)
+    store.save("c1", _data(6, "north"), later)
+
+    assert sorted(store.revoke_user(5, "north")) == ["a1", "a2"]
+    assert store.load("b1") and store.load("c1")
+    assert store.revoke_user(5) == []
+
+
+def test_lru_is_bounded_and_revalidates():
+    backing = SQLiteSessionStore(":memory:")
+    cache = CachedSessionStore(backing, size=3, ttl=60)
+    later = time.time() + 60
+    for i in range(5):
+        cache.save(f"k{i}", _data(i), later)
+    assert len(cache) == 3
+    assert cache.load("k0")[0]["user_id"] == 0       # evicted, reloaded from SQLite
+
+    # another process revoked it: trusted until the cache TTL runs out
+    backing.delete("k4")
+    assert cache.load("k4") is not None
+    cache.ttl = 0
+    assert cache.load("k4") is None
+
+    # revoking through the cache evicts at once
+    cache.ttl = 60
+    cache.save("k9", _data(9), later)
+    assert cache.revoke_user(9) == ["k9"]
+    assert cache.load("k9") is None
+
+
+def test_incomplete_store_fails_when_created():
+    # every method but sweep()
+    methods = ("load", "save", "touch", "delete", "revoke_user")
+    NoSweep = type("NoSweep", (SessionStore,),
+                   {name: getattr(SQLiteSessionStore, name) for name in methods})
+
+    with pytest.raises(TypeError):
+        NoSweep()
@@ -0,0 +1,38 @@
+from datetime import datetime
+from backend.timeutil import (
+    parse_slot,
+    parse_day,
+    parse_bound,
+    format_slot,
+    day_of,
+    now_iso,
+)
+
+
+def test_parse_slot_matches_strptime():
+    for s in ("1970-01-01 00:00", "2025-10-24 13:30", "2024-02-29 23:59"):
+        expected = datetime.strptime(s, "%Y-%m-%d %H:%M") - datetime(1970, 1, 1)
+        assert parse_slot(s) == int(expected.total_seconds() // 60)
+        assert format_slot(parse_slot(s)) == s
+
+
+def test_parse_slot_rejects_bad_input():
+    for bad in (
+        "2025-10-24T13:30", "2025-02-30 10:00", "2025-10-24 24:00",
+        "2025-10-24 13:60", "2025-1-24 13:30", "not-a-date", "",
+        None, 202510241330, "２０２５-10-24 13:30",
+    ):
+        assert parse_slot(bad) is None, bad
+
+
+def test_day_helpers():
+    assert parse_day("2025-10-24") == parse_slot("2025-10-24 00:00")
+    assert parse_bound("2025-10-24") == parse_day("2025-10-24")
+    assert parse_bound("2025-10-24 08:15") == parse_slot("2025-10-24 08:15")
+    assert day_of(parse_slot("2025-10-24 23:59")) == "2025-10-24"
+
+
+def test_now_iso_format():
+    value = now_iso()
+    assert value.endswith("Z")
+    datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ")
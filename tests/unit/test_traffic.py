@@ -0,0 +1,38 @@
+from backend.traffic import Synthesizer, shape_of
+
+
+def test_shape_of_keeps_no_values():
+    body = {
+        "first_name": "Alice", "dob": "1990-01-01", "phone": "555-0100",
+        "start_time": "2031-03-04 10:30", "patient_id": 17, "amount": 12.5,
+        "urgent": True, "note": None, "status": "canceled", "limit": 50,
+        "ids": [4, 5, 6], "password": "patient123",
+    }
+    assert shape_of(body) == {
+        "first_name": "str:5", "dob": "date", "phone": "digits:8",
+        "start_time": "slot", "patient_id": "int", "amount": "num",
+        "urgent": "bool", "note": "null", "status": {"=": "canceled"},
+        "limit": {"=": 50}, "ids": {"[]": [3, "int"]}, "password": "str",
+    }
+    assert shape_of([]) == {"[]": [0, "null"]}
+    assert shape_of("2031-03-04T10:30:00Z") == "iso"
+    # long values of kept keys are shaped like any other string
+    assert shape_of({"status": "x" * 40}) == {"status": "str:40"}
+
+
+def test_synthesizer_fills_shapes_from_pools():
+    synth = Synthesizer({"patient_id": [7], "appointment_id": [3]}, seed=1)
+    body = synth.value({
+        "patient_id": "int", "dob": "date", "start_time": "slot", "phone": "digits:8",
+        "last_name": "str:6", "password": "str", "status": {"=": "completed"},
+        "ids": {"[]": [2, "int"]},
+    })
+    assert body["patient_id"] == 7 and body["status"] == "completed"
+    assert shape_of(body["dob"]) == "date" and shape_of(body["start_time"]) == "slot"
+    assert shape_of(body["phone"]) == "digits:8"
+    assert len(body["last_name"]) == 6 and len(body["password"]) == 8
+    assert len(body["ids"]) == 2
+    assert synth.url("/api/appointments/<int:appointment_id>/status", None) == \
+        "/api/appointments/3/status"
+    assert synth.url("/api/schedule", {"department": {"=": "ICU"}}) == \
+        "/api/schedule?department=ICU"